@@ -0,0 +1,134 @@
+# Python env   : MicroPython v1.27
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : color_correct.py
+# @Description : 颜色校正：gamma、全局亮度与本模块白平衡合成为每通道256项的查找表（按灯珠缓冲区字节顺序排列），
+#                刷新前对整个灯珠缓冲区批量查表（fast_paths.apply_lut）；参数变化时才重建查找表，恒等参数时跳过
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "MicroPython v1.27"
+
+# ======================================== 导入相关模块 =========================================
+
+from micropython import const
+from fast_paths import apply_lut
+
+# ======================================== 全局变量 ============================================
+
+GAMMA_LINEAR = const(100)  # gamma参数以1/100为单位，100为线性（不做gamma校正）
+LEVEL_MAX = const(255)  # 亮度与白平衡增益的满量程（不衰减）
+
+# 颜色校正命令负载的MASK位：只更新置位的参数，其余保持不变
+COLOR_SET_GAMMA = const(0x01)
+COLOR_SET_BRIGHTNESS = const(0x02)
+COLOR_SET_BALANCE = const(0x04)
+
+# ======================================== 功能函数 ============================================
+
+def build_gamma_curve(gamma: int, curve: bytearray = None) -> bytearray:
+    """
+    256项gamma曲线：curve[i] = round(255 × (i/255)^(gamma/100))；传入curve时原地写入
+    用到浮点幂运算，只在gamma变化时调用一次
+    """
+    if curve is None:
+        curve = bytearray(256)
+    if gamma == GAMMA_LINEAR:
+        for i in range(256):
+            curve[i] = i
+        return curve
+    g = gamma / GAMMA_LINEAR
+    for i in range(256):
+        curve[i] = int((i / 255) ** g * 255 + 0.5)
+    return curve
+
+def scale_curve(curve: bytearray, scale: int, lut: bytearray, base: int) -> None:
+    """把gamma曲线按scale/65025（亮度×增益）缩放后写入lut[base:base + 256]，四舍五入，只用整数运算"""
+    for i in range(256):
+        lut[base + i] = (curve[i] * scale + 32512) // 65025
+
+# ======================================== 自定义类 ============================================
+
+class ColorCorrection:
+    """
+    颜色校正查找表：lut为3×256字节，第k段对应灯珠缓冲区中每颗灯的第k个字节（按order把R/G/B放到各自位置），
+    lut[k×256 + v] = round(255 × (v/255)^gamma × 亮度/255 × 该通道增益/255)
+    configure()只记录参数，rebuild()在参数变化后重建：gamma不变时只按亮度与增益重新缩放，
+    新表写入备用缓冲区后整体切换，中断/定时器回调中的刷新不会读到建了一半的表
+    """
+
+    def __init__(self, order: tuple, gamma: int = GAMMA_LINEAR, brightness: int = LEVEL_MAX,
+                 balance: tuple = (LEVEL_MAX, LEVEL_MAX, LEVEL_MAX)):
+        self.order = (order[0], order[1], order[2])
+        self.lut = bytearray(768)
+        self.spare = bytearray(768)
+        self.curve = bytearray(256)
+        self.curve_gamma = -1  # curve对应的gamma（-1表示尚未生成）
+        # 目标参数（configure写入）与当前查找表所用的参数（rebuild写入）
+        self.gamma = gamma
+        self.brightness = brightness
+        self.balance = bytearray(balance)
+        self.built = bytearray(6)  # GAMMA_H GAMMA_L BRIGHT R G B
+        self.identity = True  # 当前查找表为恒等映射，apply()直接跳过
+        self.rebuilds = 0  # 重建次数
+        self.rebuild()
+
+    def configure(self, mask: int, gamma: int, brightness: int, r: int, g: int, b: int) -> bool:
+        """按mask更新参数（gamma为0时忽略），返回参数是否与当前查找表不同（需要rebuild）"""
+        if mask & COLOR_SET_GAMMA and gamma:
+            self.gamma = gamma
+        if mask & COLOR_SET_BRIGHTNESS:
+            self.brightness = brightness
+        if mask & COLOR_SET_BALANCE:
+            balance = self.balance
+            balance[0] = r
+            balance[1] = g
+            balance[2] = b
+        return self.changed()
+
+    def changed(self) -> bool:
+        """目标参数是否与当前查找表所用的参数不同"""
+        built = self.built
+        balance = self.balance
+        return (self.rebuilds == 0 or ((built[0] << 8) | built[1]) != self.gamma or built[2] != self.brightness or
+                built[3] != balance[0] or built[4] != balance[1] or built[5] != balance[2])
+
+    def rebuild(self) -> bool:
+        """参数有变化时重建查找表并切换，返回是否重建"""
+        if not self.changed():
+            return False
+        gamma = self.gamma
+        brightness = self.brightness
+        balance = self.balance
+        if gamma != self.curve_gamma:
+            build_gamma_curve(gamma, self.curve)
+            self.curve_gamma = gamma
+        lut = self.spare
+        for c in range(3):
+            scale_curve(self.curve, brightness * balance[c], lut, self.order[c] << 8)
+        built = self.built
+        built[0] = gamma >> 8
+        built[1] = gamma & 0xFF
+        built[2] = brightness
+        built[3] = balance[0]
+        built[4] = balance[1]
+        built[5] = balance[2]
+        # 先切换表、再更新恒等标志：切换期间apply()用旧表或新表之一，结果都完整
+        self.spare = self.lut
+        self.lut = lut
+        self.identity = (gamma == GAMMA_LINEAR and brightness == LEVEL_MAX and
+                         balance[0] == LEVEL_MAX and balance[1] == LEVEL_MAX and balance[2] == LEVEL_MAX)
+        self.rebuilds += 1
+        return True
+
+    def apply(self, buf, n: int) -> None:
+        """对buf前n颗灯就地查表（恒等时跳过）"""
+        if not self.identity:
+            apply_lut(buf, self.lut, n)
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,102 @@
+# Python env   : MicroPython v1.27
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : color_lut.py
+# @Description : 颜色查找表：整数HSV→RGB（RP2040无FPU）、360项色相表、按灯珠排列预展开的彩虹条带表、呼吸波形表
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "MicroPython v1.27"
+
+# ======================================== 导入相关模块 =========================================
+
+from micropython import const
+
+# ======================================== 全局变量 ============================================
+
+HUE_STEPS = const(360)  # 色相表项数（每度一项）
+WAVE_STEPS = const(256)  # 呼吸波形表项数（一个周期）
+
+# ======================================== 功能函数 ============================================
+
+def hsv_to_rgb_int(h: int, s: int = 255, v: int = 255) -> tuple:
+    """
+    整数HSV转RGB：h为0~359度，s/v为0~255，只用整数乘除
+    与改造前浮点版hsv_to_rgb（见sim/bench_rainbow.py）的结果每通道相差不超过1
+    """
+    if s == 0:
+        return (v, v, v)
+    region = h // 60
+    rem = (h - region * 60) * 255 // 60
+    p = v * (255 - s) // 255
+    q = v * (255 - s * rem // 255) // 255
+    t = v * (255 - s * (255 - rem) // 255) // 255
+    if region == 0:
+        return (v, t, p)
+    elif region == 1:
+        return (q, v, p)
+    elif region == 2:
+        return (p, v, t)
+    elif region == 3:
+        return (p, q, v)
+    elif region == 4:
+        return (t, p, v)
+    return (v, p, q)
+
+def build_hue_lut(order: tuple, s: int = 255, v: int = 255) -> bytearray:
+    """
+    构建360项色相表：第h项3字节，按灯珠缓冲区字节顺序order（如NeoPixel.ORDER，GRB为(1, 0, 2)）排列
+    可直接整段拷贝进NeoPixel.buf
+    """
+    lut = bytearray(HUE_STEPS * 3)
+    o0, o1, o2 = order[0], order[1], order[2]
+    for h in range(HUE_STEPS):
+        r, g, b = hsv_to_rgb_int(h, s, v)
+        k = h * 3
+        lut[k + o0] = r
+        lut[k + o1] = g
+        lut[k + o2] = b
+    return lut
+
+def build_strip_lut(hue_lut: bytearray, num: int, spacing: int) -> bytearray:
+    """
+    构建彩虹条带表：第i颗灯色相为(hue + i*spacing) % 360时，任意hue对应的num颗灯数据在表中是连续的一段
+    表按hue % spacing分为spacing行，每行依次存放色相r, r+spacing, r+2*spacing...共360/spacing+num-1项，
+    因此每一步只需一次切片拷贝（见strip_offset）。spacing须整除360。
+    """
+    row = HUE_STEPS // spacing + num - 1
+    lut = bytearray(spacing * row * 3)
+    k = 0
+    for r in range(spacing):
+        for j in range(row):
+            h = ((r + j * spacing) % HUE_STEPS) * 3
+            lut[k:k + 3] = hue_lut[h:h + 3]
+            k += 3
+    return lut
+
+def strip_offset(hue: int, num: int, spacing: int) -> int:
+    """色相为hue的一步在条带表中的起始字节偏移"""
+    row = HUE_STEPS // spacing + num - 1
+    return ((hue % spacing) * row + hue // spacing) * 3
+
+def build_wave_lut() -> bytearray:
+    """
+    构建呼吸波形表：WAVE_STEPS项亮度（0~255），前半周期按smoothstep曲线从0升到255，后半周期对称回落
+    只用整数运算，首尾为0、正中为255
+    """
+    lut = bytearray(WAVE_STEPS)
+    half = WAVE_STEPS // 2
+    for i in range(WAVE_STEPS):
+        t = i if i < half else WAVE_STEPS - i
+        x = t * 255 // half
+        lut[i] = x * x * (765 - 2 * x) // 65025
+    return lut
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -17,12 +17,99 @@ __platform__ = "MicroPython v1.27"
 
 # 调试开关：True-输出日志，False-关闭所有打印
 DEBUG_ENABLE = True
+# 日志级别：10-DEBUG 20-INFO 30-WARN 40-ERROR，低于该级别的日志在调用处直接跳过（不求值参数、不格式化）
+LOG_LEVEL = 10
+# 性能统计：True-timed_function装饰的函数记录调用次数/最小/最大/累计耗时与对数分桶直方图，False-装饰器直接返回原函数（零开销）
+# 默认关闭，排查性能时再打开
+PROFILE_ENABLE = False
+PROFILE_COLLECT = False  # 上电后是否立即采集，运行中可用utils.profile_enable()切换
+# 二进制事件环记录条数：0-关闭；每条为(事件号, ticks_us, 3个整数参数)，关闭打印时也可事后导出排查
+EVENT_LOG_SIZE = 0
 # 核心配置
 BAUDRATE = 115200
-RING_BUFFER_SIZE = 1024  # 固定环形缓冲区大小（实际可用size-1）
+RING_BUFFER_SIZE = 1024  # 固定环形缓冲区大小（实际可用size-1；NATIVE_ENABLE时大于16384则copy_into用纯Python版本）
 ISR_READ_BUF_SIZE = 64  # ISR预分配读取缓冲区
+UART_RXBUF_SIZE = 1024  # 接收口驱动缓冲区（字节）：空闲中断模式下一次连续收到的数据须全部放得下（默认256时超过即丢弃）
 WDT_TIMEOUT = 5000  # 看门狗超时时间（毫秒），设置为5秒
-WDT_FEED_PERIOD = 1000  # 喂狗定时器周期（毫秒），设置为1秒
+WDT_FEED_PERIOD = 1000  # 喂狗任务周期（毫秒），设置为1秒
+
+# ====================== 原生代码配置 ======================
+
+# 热路径（环形缓冲区读写、整条灯带填色与拷贝，见fast_paths.py）：True-优先用fast_native.py中的viper版本，
+#   固件不支持原生代码或.mpy架构不符时自动回退到纯Python版本；False-始终用纯Python版本
+NATIVE_ENABLE = True
+
+# ====================== 内存回收配置 ======================
+
+# 空闲回收：True-在帧间空闲时显式调用gc.collect()（由接收路径每段数据结束后计时的单次定时器触发）：接收→解析→刷新→转发路径只用预分配缓冲区，
+#          两次回收之间只有异步任务每次唤醒的少量分配，堆不会在数据流中途用尽而触发停顿时刻不可控的自动回收；
+#          False-只依赖MicroPython的自动回收。两种情况下接收路径都统计堆状态，REPL中调用heap_report()查看
+GC_IDLE_ENABLE = True
+GC_CHECK_MS = 5  # 数据连续到达时接收路径检查分配量的最短间隔（毫秒），不足该间隔的批次不调用gc.mem_alloc()
+GC_IDLE_MS = 5  # 接收口空闲多久视为帧间空闲（毫秒），须大于主机发送一帧时的最大字节间隔；空闲回收在最后一批数据处理完GC_IDLE_MS后开始
+GC_MIN_ALLOC = 1024  # 自上次回收以来新分配超过该字节数才回收（没有分配时不做无用的回收）
+GC_FORCE_ALLOC = 16384  # 数据连续到达、始终没有空闲间隔时，新分配超过该字节数后由接收路径在帧边界（解析器处于帧间、环形缓冲区已处理完）回收
+
+# ====================== 快速启动配置 ======================
+
+# 快速启动：True-上电先接通接收/转发通路，上电电压检测在后台进行，开机灯效收到数据即让出；
+#          False-完成上电电压检测并播放完开机灯效后才开始接收（约POWER_ON_SAMPLE_DURATION+灯效时长内不转发）
+FAST_BOOT_ENABLE = True
+# 启动时序记录：各启动阶段与首次转发字节的时刻（上电起的ticks_us），REPL中调用boot_report()查看
+BOOT_TRACE_ENABLE = True
+
+# ====================== 直通转发配置 ======================
+
+# 直通转发开关：True-收满本模块数据后边收边转发（每级延迟与帧长无关），False-空闲中断后整帧处理再转发
+CUT_THROUGH_ENABLE = False
+CUT_THROUGH_POLL_FREQ = 2000  # 直通模式下轮询接收口的频率（Hz），即每级最多增加1/频率的延迟
+FRAME_GAP_US = 2000  # 帧间隔判定（微秒）：超过该时长未收到数据视为一帧结束，主机帧间需留出更长的空闲
+
+# ====================== 帧协议配置 ======================
+
+# 帧协议开关：True-带同步头/类型/帧计数/长度字段的帧格式（见frame_parser.py），流式解析，帧间无需空闲间隔；
+#            False-原始移位格式，一次空闲中断（或一次帧间隔）内收到的数据视为一帧
+FRAMED_PROTOCOL_ENABLE = False
+# 帧协议、空闲中断模式下接收口的搬运频率（Hz）：长帧（如经过整条链后的发现回复）连续到达、线路没有空闲时，
+#   按此频率把驱动缓冲区中已到达的字节搬入环形缓冲区，交给解析器边收边转发，帧长不受RING_BUFFER_SIZE限制；
+#   1/频率内到达的字节（波特率/10/频率）须远小于UART_RXBUF_SIZE（默认500Hz，3Mbaud时每周期约600字节）；
+#   搬运定时器由接收口RX引脚的下降沿（空闲线路上第一个字节的起始位）启动，驱动缓冲区与环形缓冲区读空后停止，线路空闲时不唤醒；
+#   0-关闭，整帧须放得下环形缓冲区。流控开启时由FLOW_POLL_FREQ的流控定时器完成
+RX_DRAIN_FREQ = 500
+
+# ====================== 流控配置 ======================
+
+# 流控（需帧协议）：True-接收积压（环形缓冲区+接收口驱动缓冲区）达到FLOW_XOFF_LEVEL时经回传方向（接收口TX）向上游发送XOFF，
+#                 上游停在数据块边界暂停解析与转发，积压降到FLOW_XON_LEVEL以下时发送XON恢复；上游因此积压后同样向它的上游
+#                 发送XOFF，直到主机。主机可按线路速率连续发送，整条链按最慢模块的处理速度前进而不丢数据；
+#                 False-不发送也不响应XON/XOFF
+FLOW_CONTROL_ENABLE = False
+FLOW_POLL_FREQ = 2000  # 空闲中断模式下流控定时器的频率（Hz）：读取下游的XON/XOFF、更新本模块的XON/XOFF，
+                       # 连续收数据（线路没有空闲，空闲中断不触发）时把积压搬入环形缓冲区；直通模式由轮询定时器完成
+FLOW_XOFF_LEVEL = 1024  # 发送XOFF的积压字节数，其上须留出上游的刹车距离：转发口发送缓冲区（256字节）+ FLOW_CHUNK +
+                        # 两个检查周期内到达的字节，合计不超过RING_BUFFER_SIZE + UART_RXBUF_SIZE
+FLOW_XON_LEVEL = 256  # 发送XON的积压字节数
+FLOW_CHUNK = 64  # 每次交给解析器的字节数，之后检查下游是否要求暂停；直通模式下每个轮询周期处理一块，
+                 # 单个模块最高处理FLOW_CHUNK×CUT_THROUGH_POLL_FREQ字节/秒（默认128KB/s，约1.28Mbaud）
+FLOW_REFRESH_MS = 20  # 保持XOFF期间重发XOFF的间隔（毫秒）：XOFF丢失时上游随后仍会暂停
+FLOW_TIMEOUT_MS = 100  # 暂停后超过该时长既未收到XON也未再收到XOFF时自行恢复（毫秒）：XON丢失时不会永久停住
+
+# ====================== 同步锁存配置 ======================
+
+# 同步锁存（需帧协议，原始格式下忽略、收完即刷新）：True-收到的本模块数据先暂存，收到锁存命令（FRAME_TYPE_SHOW）后全链同时刷新灯珠；
+#                      False-收完本模块数据立即刷新
+LATCH_ENABLE = False
+
+# ====================== 波特率协商配置 ======================
+
+# 帧协议下响应主机的波特率协商命令（FRAME_TYPE_BAUD）：True-响应，False-只原样转发（与旧固件行为相同）
+BAUD_NEGOTIATE_ENABLE = True
+# 收到协商命令后等待多久切换波特率（毫秒）：每个模块从自己收到命令起计时，相邻模块相差一级转发延迟，与链长无关；
+#   须大于本模块以原波特率把命令转发给下一级的时间（命令帧的线路时间加处理时间）。全链协商结束的时刻见README
+BAUD_SWITCH_DELAY_MS = 20
+BAUD_PING_PERIOD_MS = 2  # 切换后向下游发送链路探测的周期（毫秒）
+BAUD_ACK_TIMEOUT_MS = 30  # 切换后等待链路探测/应答的时长（毫秒），超时未通过的链路回退到原波特率
+BAUD_MAX = 3000000  # 接受的最高波特率，更高的请求被忽略
 
 # ====================== 电池电压&灯效核心配置 ======================
 
@@ -31,25 +118,47 @@ BATTERY_TIMER_PERIOD = 100  # 电池电压采样定时器周期：100ms
 ADC_MAX_VALUE = 65535  # ADC最大值
 ADC_REF_VOLTAGE = 3.3  # ADC参考电压（V）
 LOW_VOLTAGE_THRESHOLD = 3.4  # 低电压阈值（V）
+BATTERY_HYSTERESIS = 0.1  # 低电恢复回差（V）：平均电压低于阈值进入低电，回升到阈值+回差以上才恢复，避免红灯闪烁状态来回抖动
 POWER_ON_SAMPLE_DURATION = 1000  # 上电采样时长：1秒
 POWER_ON_SAMPLE_COUNT = 10  # 1秒内采样次数（10次，每次100ms）
 RAINBOW_LOOP_TIMES = 2  # 彩虹流动次数：2次
 RAINBOW_TOTAL_DURATION = 100  # 彩虹总时长（越小越快）
-battery_voltage = 0.0  # 单次采样电压值
-battery_voltage_window = []  # 5次滑动窗口缓冲区
+RAINBOW_HUE_SPACING = 10  # 彩虹相邻灯珠的色相差（度），须整除360
 WINDOW_SIZE = 5  # 滑动滤波窗口大小（5次）
+LOW_BATTERY_FLASH_PERIOD = 500  # 低电压红灯闪烁的亮/灭时长（毫秒）
+STARTUP_EFFECT_ENABLE = True  # 上电电压正常时播放彩虹开机灯效（快速启动下收到UART灯效数据后立即让出）
 low_battery_flag = False  # 低电压标志
-prev_low_battery = False  # 上一次电压状态（用于检测状态变化）
 
-# ====================== 调度标志位配置  ======================
+# ====================== 本地灯效配置 ======================
+
+# 帧协议下收到灯效命令（FRAME_TYPE_EFFECT）后由模块本地渲染，动态灯效（彩虹/呼吸/追逐）的重绘间隔（毫秒）
+EFFECT_FRAME_MS = 20
+
+# ====================== 链路时间同步配置 ======================
+
+# 帧协议下收到时间信标（FRAME_TYPE_TIME）后校正本地时钟偏移，本地灯效与开机彩虹按校正后的链路时间计算相位
+TIME_SYNC_STEP_US = 2000  # 校正量超过该值（us）时直接跳到新偏移（首个信标同样直接对齐），否则按比例逐步修正
+TIME_SYNC_GAIN_SHIFT = 1  # 逐步修正的比例为1/2^TIME_SYNC_GAIN_SHIFT，用于滤除接收时刻的抖动（0为每次完全采用新偏移）
+TIME_SYNC_SLEW_US = 250  # 逐步修正时每个信标最多调整的量（us），须大于时钟漂移×信标周期；
+                         # 接收回调被WS2812发送等推迟时测得的偏移偏小，限幅避免个别信标把时钟拉偏
+
+# ====================== 颜色校正配置 ======================
 
-is_scheduled = False  # UART数据处理调度标志
-wdt_print_scheduled = False  # 看门狗打印调度标志
+# 颜色校正：True-刷新前对整个灯珠缓冲区做一次批量查表（gamma、全局亮度与本模块白平衡合成的每通道256项查找表），
+#          主机可直接发送sRGB内容；帧协议下可用颜色校正命令（FRAME_TYPE_COLOR）在运行中修改参数，参数变化时才重建查找表；
+#          参数为恒等（gamma 1.00、亮度255、增益均为255）时不查表。False-原样写入灯珠，不响应颜色校正命令
+COLOR_CORRECT_ENABLE = True
+COLOR_GAMMA = 100  # 上电时的gamma×100（220即2.2，100为线性）
+COLOR_BRIGHTNESS = 255  # 上电时的全局亮度（0~255）
+COLOR_BALANCE = (255, 255, 255)  # 上电时本模块的白平衡增益R、G、B（0~255，255为不衰减）
 
 # ====================== WS2812配置 ======================
 
 WS2812_PIN = 2
 WS2812_NUM = 16
+# 逐灯寻址开关：True-每个模块取走WS2812_NUM*3字节分别驱动每颗灯（按WS2812的GRB字节顺序，直接整段写入灯珠缓冲区），
+#              False-每个模块取走3字节RGB，16颗灯显示同一颜色
+PER_PIXEL_ENABLE = False
 
 # ======================================== 功能函数 ============================================
 
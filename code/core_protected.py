@@ -14,196 +14,1158 @@ __platform__ = "MicroPython v1.27"
 # ======================================== 导入相关模块 =========================================
 
 import neopixel
-from machine import UART, Pin, disable_irq, enable_irq, ADC, Timer, WDT
+from machine import UART, Pin, ADC, Timer, WDT
 from config import *
-from utils import debug_print, timed_function
+from utils import debug_print, timed_function, log_debug, log_info, log_warn, LOG_DEBUG, LOG_INFO, LOG_WARN, EventRing
 from ring_buffer import RingBuffer
+from frame_parser import FrameParser, build_header, build_show, FRAME_TYPE_BAUD, FRAME_TYPE_LINK_PING, \
+    FRAME_TYPE_LINK_ACK, FRAME_TYPE_SHOW, SHOW_PAYLOAD_SIZE, FRAME_TYPE_EFFECT, EFFECT_PAYLOAD_SIZE, \
+    FRAME_HEADER_SIZE, STATUS_RECORD_SIZE, HEAP_RECORD_SIZE, FRAME_TYPE_HEAP, STATUS_LOW_BATTERY, STATUS_CUT_THROUGH, STATUS_PER_PIXEL, STATUS_LATCH, \
+    FRAME_TYPE_TIME, TIME_PAYLOAD_SIZE, STATUS_TIME_SYNC, build_time, STATUS_FLOW, FLOW_XON, FLOW_XOFF, \
+    FRAME_FLAG_CRC, FRAME_CRC_SIZE, build_crc, FRAME_TYPE_COLOR, COLOR_PAYLOAD_SIZE, COLOR_COUNT_ALL, STATUS_COLOR, \
+    build_color
+from color_lut import build_hue_lut, build_strip_lut, build_wave_lut, strip_offset
+from effects import EffectEngine
+from color_correct import ColorCorrection
+from fast_paths import fill_pixels, copy_bytes, copy_into
 import time
-import micropython
-from ring_buffer import RingBuffer
+import asyncio
+import gc
+from micropython import const
+from array import array
 
 # ======================================== 全局变量 ============================================
 
+# 事件环事件号（EVENT_LOG_SIZE > 0时记录）
+EVT_RX = const(1)  # 收到数据：a=字节数
+EVT_RENDER = const(2)  # 刷新灯珠：a=R或负载字节数，b=G，c=B
+EVT_FORWARD = const(3)  # 转发：a=字节数
+EVT_FRAME = const(4)  # 帧协议本模块数据就绪：a=帧类型，b=帧计数，c=累计丢帧数
+EVT_BAUD = const(6)  # 波特率协商结束：a=接收口波特率，b=转发口波特率，c=bit0上游链路通过/bit1下游链路通过
+EVT_LATCH = const(7)  # 锁存提交：a=收到命令到提交的延迟（us），b=1有暂存数据/0无，c=提交时刻与预定时刻之差（us）
+EVT_EFFECT = const(8)  # 灯效命令：a=灯效编号，b=本模块相位，c=周期（ms）
+EVT_TIME = const(9)  # 时间信标：a=本次测得偏移与原偏移之差（us），b=校正后的偏移（us），c=HOP_US
+EVT_FLOW = const(10)  # 流控：a=1被下游暂停/0恢复，b=累计暂停次数，c=恢复时为本次暂停时长（us）
+EVT_GC = const(11)  # 显式回收：a=停顿时长（us），b=本次回收的字节数，c=上次回收以来显示的帧数
+EVT_COLOR = const(12)  # 颜色校正查找表重建：a=gamma×100，b=全局亮度，c=白平衡增益R<<16|G<<8|B
+EVENT_NAMES = {EVT_RX: "rx", EVT_RENDER: "render", EVT_FORWARD: "forward", EVT_FRAME: "frame",
+               EVT_BAUD: "baud", EVT_LATCH: "latch", EVT_EFFECT: "effect",
+               EVT_TIME: "time", EVT_FLOW: "flow", EVT_GC: "gc", EVT_COLOR: "color"}
+
+# 每个模块从一帧中取走的字节数：逐灯寻址为16×3字节，否则为3字节RGB
+MODULE_BYTES = WS2812_NUM * 3 if PER_PIXEL_ENABLE else 3
+
+# 直通转发状态
+ct_frame_open = False  # 当前是否处于一帧数据之中
+ct_own_count = 0  # 当前帧已收到的本模块数据字节数（收满MODULE_BYTES字节后其余全部转发）
+ct_own_rgb = bytearray(MODULE_BYTES)  # 本模块数据暂存
+ct_last_rx = 0  # 最近一次收到数据的时刻（ticks_us）
+
+# 最近一次接收处理（接收任务或有数据的直通轮询）的耗时（us），随发现帧上报
+last_proc_us = 0
+# 最近一次收到数据的时刻（空闲中断或有数据的直通轮询，ticks_us），作为时间信标的接收时刻
+rx_stamp_us = 0
+
+# 链路时间同步状态：链路时间 = ticks_us + time_offset_us（模2^30）
+time_offset_us = 0
+time_synced = False  # 是否已收到时间信标
+time_err_us = 0  # 最近一次信标测得的偏移与原偏移之差（us），反映两次信标之间的时钟漂移与接收抖动
+time_beacons = 0  # 收到的时间信标数
+
+# 同步锁存状态（只在帧协议下生效：原始格式没有锁存命令，暂存的数据永远不会提交）
+LATCH_ACTIVE = LATCH_ENABLE and FRAMED_PROTOCOL_ENABLE
+latch_buf = bytearray(MODULE_BYTES)  # 暂存的本模块数据（后台缓冲区）
+latch_pending = False  # 是否有尚未提交的暂存数据
+latch_deadline = 0  # 预定提交时刻（ticks_us）
+latch_delay = 0  # 本次锁存命令的提交延迟（us）
+# 提交延迟上限：ticks_add的增量须小于TICKS_MAX // 2（2^29），更长的DELAY_US按此截断
+LATCH_DELAY_MAX = const(0x1FFFFFFF)
+# 锁存任务忙等的下限（us）：按毫秒asyncio.sleep_ms让出事件循环，直到距预定时刻不足LATCH_SPIN_US + 1ms，
+# 余下部分（平均约LATCH_SPIN_US + 500us）再sleep_us补齐，LATCH_SPIN_US为事件循环唤醒延迟留出余量
+LATCH_SPIN_US = const(200)
+
+# 波特率协商状态：两条链路各自独立确认，未通过的链路回退到协商前的波特率
+recv_baud = BAUDRATE  # 接收口（上游链路）当前波特率
+forward_baud = BAUDRATE  # 转发口（下游链路）当前波特率
+baud_pending = 0  # 协商中的新波特率，0表示未在协商
+baud_up_ok = False  # 新波特率下已收到上游的链路探测
+baud_down_ok = False  # 新波特率下已收到下游的应答
+baud_elapsed = 0  # 切换后已等待的时间（毫秒）
+baud_ack_pos = 0  # 下游应答（link_ack）已按序匹配的字节数，应答可跨多次读取到达
+parser_reset_pending = False  # 波特率已切换、解析器待复位：由接收路径在下一次解析前复位，不在定时器回调中打断feed
+
+# 流控状态（XON/XOFF，只在帧协议下生效：原始格式靠空闲间隔分帧，暂停转发会把一帧拆成两帧）
+FLOW_ACTIVE = FLOW_CONTROL_ENABLE and FRAMED_PROTOCOL_ENABLE
+# 搬运定时器（帧协议、空闲中断模式、未开流控时）：接收口RX引脚的下降沿（空闲线路上第一个字节的起始位）启动，数据读空后停止
+DRAIN_ACTIVE = FRAMED_PROTOCOL_ENABLE and RX_DRAIN_FREQ and not FLOW_ACTIVE and not CUT_THROUGH_ENABLE
+flow_paused = False  # 下游要求暂停（收到XOFF）：不再解析与转发，数据留在缓冲区中
+flow_pause_us = 0  # 本次暂停开始的时刻（ticks_us）
+flow_xoff_ms = 0  # 最近一次收到XOFF的时刻（ticks_ms），超过FLOW_TIMEOUT_MS未再收到时自行恢复
+flow_xoff_sent = False  # 已向上游发送XOFF、尚未发送XON
+flow_sent_ms = 0  # 最近一次向上游发送XOFF的时刻（ticks_ms）
+flow_backlog = False  # 环形缓冲区已满、接收口驱动缓冲区中留有数据，腾出空间后继续搬入
+# 流控统计（随发现帧上报，REPL中调用flow_report()查看）
+flow_stalls = 0  # 被下游暂停的次数
+flow_stall_ms = 0  # 累计暂停时长（毫秒，不足1毫秒的部分累计在flow_stall_us中）
+flow_stall_us = 0
+flow_xoffs = 0  # 向上游发送XOFF的次数（不含保持期间的重发）
+flow_timeouts = 0  # 暂停超时自行恢复的次数（XON丢失或下游复位）
+rx_full = 0  # 读取时接收口驱动缓冲区已满的次数（此时驱动可能已丢弃字节）
+
+# 内存回收与堆统计（随发现帧上报，REPL中调用heap_report()查看）
+gc_collections = 0  # 在帧间空闲/帧边界显式回收的次数
+gc_auto = 0  # 检测到的自动回收次数（两次检查之间已分配字节数减少）
+gc_pause_max_us = 0  # 最长一次显式回收的停顿（us）
+gc_pause_last_us = 0  # 最近一次显式回收的停顿（us）
+gc_base = 0  # 最近一次回收后的已分配字节数
+gc_last_alloc = 0  # 上一次检查时的已分配字节数
+gc_frame_mark = 0  # 最近一次回收时的data_frames
+gc_due = False  # 数据连续到达、新分配已超过GC_FORCE_ALLOC：接收路径在下一个帧边界回收
+gc_check_ms = 0  # 接收路径最近一次检查分配量的时刻（ticks_ms）
+heap_per_frame = 0  # 最近一个回收周期内平均每帧分配的字节数（稳态下只剩异步任务唤醒的分配）
+data_frames = 0  # 收到并交给显示的本模块数据帧数
+
+# 待刷新的本模块数据（刷新任务取用）；收到灯效数据后置位effect_preempt，开机灯效随即退出
+render_buf = bytearray(MODULE_BYTES)
+effect_preempt = False
+# 低电压红灯闪烁任务（未运行时为None）
+flash_task = None
+
+# 启动时序（BOOT_TRACE_ENABLE时记录）：[(阶段名, 上电起的ticks_us)]，以及首次转发字节的时刻（-1表示尚未转发）
+boot_marks = []
+boot_forward_us = -1
+
+# 电池电压滑动滤波：窗口中保存read_u16原始计数，定时器回调只做整数运算，读取时才换算为电压
+battery_window = array('H', bytearray(WINDOW_SIZE * 2))  # 固定大小的循环窗口
+battery_index = 0  # 下一次采样写入的位置
+battery_sum = 0  # 窗口内计数之和（随采样增量更新）
+battery_raw = 0  # 最近一次采样的原始计数
+battery_mv = 0  # 窗口平均电压（mV，整数，随采样更新）
+# 窗口计数和与电压的换算系数（1/2分压，所以乘以2），及按计数和表示的低电/恢复阈值
+BATTERY_VOLTS_PER_SUM = ADC_REF_VOLTAGE * 2 / ADC_MAX_VALUE / WINDOW_SIZE
+# 窗口计数和→平均电压（mV）的定点系数（Q16）：和×系数不超过小整数范围，换算只做整数乘法与移位
+BATTERY_MV_SCALE = int(ADC_REF_VOLTAGE * 2000 * 65536 / ADC_MAX_VALUE / WINDOW_SIZE + 0.5)
+BATTERY_LOW_SUM = int(LOW_VOLTAGE_THRESHOLD / BATTERY_VOLTS_PER_SUM)
+BATTERY_RECOVER_SUM = int((LOW_VOLTAGE_THRESHOLD + BATTERY_HYSTERESIS) / BATTERY_VOLTS_PER_SUM)
+
 # ======================================== 功能函数 ============================================
 
 @timed_function
 def set_ws2812_color(r, g, b):
-    for i in range(WS2812_NUM):
-        np[i] = (r, g, b)
+    # 按灯珠字节顺序排好一颗灯的数据后整条填充，不逐颗经NeoPixel.__setitem__赋值（每颗分配一个元组）
+    ws2812_pixel[np.ORDER[0]] = r
+    ws2812_pixel[np.ORDER[1]] = g
+    ws2812_pixel[np.ORDER[2]] = b
+    # 整条同色：只校正这一颗灯的数据再填充
+    if COLOR_CORRECT_ENABLE:
+        color_correction.apply(ws2812_pixel, 1)
+    fill_pixels(np.buf, ws2812_pixel, WS2812_NUM)
     np.write()
-    debug_print("WS2812 updated: 16 LEDs set to (R:%d, G:%d, B:%d)" % (r, g, b))
-
-# HSV转RGB（颜色空间转换）
-def hsv_to_rgb(h, s, v):
-    if s == 0.0:
-        return (int(v * 255), int(v * 255), int(v * 255))
-    i = int(h * 6.0)
-    f = (h * 6.0) - i
-    p, q, t = v * (1 - s), v * (1 - s * f), v * (1 - s * (1 - f))
-    i = i % 6
-    if i == 0:
-        r, g, b = v, t, p
-    elif i == 1:
-        r, g, b = q, v, p
-    elif i == 2:
-        r, g, b = p, v, t
-    elif i == 3:
-        r, g, b = p, q, v
-    elif i == 4:
-        r, g, b = t, p, v
+    if event_log:
+        event_log.record(EVT_RENDER, r, g, b)
+    if LOG_DEBUG:
+        log_debug("WS2812 updated: 16 LEDs set to (R:%d, G:%d, B:%d)", r, g, b)
+
+@timed_function
+def set_ws2812_pixels(data):
+    """逐灯寻址：data为WS2812_NUM*3字节（GRB顺序），整段拷贝进灯珠缓冲区，不逐颗赋值"""
+    copy_bytes(np.buf, data, 0, WS2812_NUM * 3)
+    write_pixels()
+    if event_log:
+        event_log.record(EVT_RENDER, len(data))
+    if LOG_DEBUG:
+        log_debug("WS2812 updated: %d LEDs set from %d-byte payload", WS2812_NUM, len(data))
+
+def write_pixels():
+    """把灯珠缓冲区整体做一次颜色校正查表（参数为恒等或未启用时跳过）后刷新；调用前缓冲区须已整条重写"""
+    if COLOR_CORRECT_ENABLE:
+        color_correction.apply(np.buf, WS2812_NUM)
+    np.write()
+
+def show_module_data(data):
+    """
+    显示本模块取走的数据（data的前MODULE_BYTES字节，调用者无需先切片）：拷贝到render_buf后唤醒刷新任务，
+    不在接收路径上驱动灯珠；同步锁存模式下只暂存，等锁存命令提交
+    """
+    global latch_pending, effect_preempt, data_frames
+    data_frames += 1
+    effect_preempt = True
+    effect_engine.stop()
+    if LATCH_ACTIVE:
+        copy_bytes(latch_buf, data, 0, MODULE_BYTES)
+        latch_pending = True
     else:
-        r, g, b = v, p, q
-    return (int(r * 255), int(g * 255), int(b * 255))
+        copy_bytes(render_buf, data, 0, MODULE_BYTES)
+        render_flag.set()
 
-# 彩虹流动效果（新增：关键长操作前手动喂狗）
-def rainbow_flow():
-    debug_print("=== Rainbow Flow Start (Times: %d, Duration: %dms) ===" % (RAINBOW_LOOP_TIMES, RAINBOW_TOTAL_DURATION))
-    # 关键长操作前手动喂狗，避免超时重启
-    wdt.feed()
-    debug_print("🐶 WDT fed before rainbow flow (long operation)")
+def render_module_data(data):
+    """按当前寻址模式把数据写入灯珠并刷新"""
+    if PER_PIXEL_ENABLE:
+        set_ws2812_pixels(data)
+    else:
+        set_ws2812_color(data[0], data[1], data[2])
 
+# 彩虹单步：把色相hue对应的整条灯带数据从预展开条带表一次切片拷贝进灯珠缓冲区（不调用np.write）
+def rainbow_step(hue):
+    offset = strip_offset(hue, WS2812_NUM, RAINBOW_HUE_SPACING)
+    copy_bytes(np.buf, rainbow_strip_mv, offset, WS2812_NUM * 3)
+
+# 彩虹流动效果（异步任务：每步之间让出CPU，收到UART灯效数据后立即退出，不占用刷新）
+# 色相由链路时间决定（一圈的起点对齐到链路时间中周期的整数倍），各模块步调一致，不随各自sleep的误差漂移
+async def rainbow_flow():
+    debug_print("=== Rainbow Flow Start (Times: %d, Duration: %dms) ===" % (RAINBOW_LOOP_TIMES, RAINBOW_TOTAL_DURATION))
     step_delay = RAINBOW_TOTAL_DURATION / (WS2812_NUM * RAINBOW_LOOP_TIMES)
-    for _ in range(RAINBOW_LOOP_TIMES):
-        for hue in range(360):
-            for i in range(WS2812_NUM):
-                pixel_hue = (hue + i * 10) % 360
-                r, g, b = hsv_to_rgb(pixel_hue / 360.0, 1.0, 1.0)
-                np[i] = (r, g, b)
-            np.write()
-            time.sleep_ms(int(step_delay))
-    wdt.feed()
-    set_ws2812_color(0, 0, 0)
+    step_us = max(1, int(step_delay * 1000))
+    period_us = step_us * 360
+    now = chain_us()
+    start = time.ticks_add(now, -(now % period_us))
+    end = time.ticks_add(time.ticks_us(), period_us * RAINBOW_LOOP_TIMES)
+    while time.ticks_diff(end, time.ticks_us()) > 0:
+        if effect_preempt or low_battery_flag:
+            debug_print("=== Rainbow Flow Preempted ===")
+            return
+        rainbow_step((time.ticks_diff(chain_us(), start) % period_us) // step_us)
+        write_pixels()
+        await asyncio.sleep_ms(int(step_delay))
+    if not effect_preempt:
+        set_ws2812_color(0, 0, 0)
     debug_print("=== Rainbow Flow End ===")
 
-# 上电电压检测（初始化时采集多次取平均，提高准确性）
-def power_on_battery_check():
-    debug_print("=== Power On Battery Check ===")
-    # 长耗时采样前手动喂狗
-    wdt.feed()
-    debug_print("🐶 WDT fed before power-on battery check (long operation)")
+# 低电压红灯闪烁（异步任务：亮灭各LOW_BATTERY_FLASH_PERIOD毫秒，低电压解除后熄灭退出）
+async def low_battery_flash():
+    on = True
+    while low_battery_flag:
+        if on:
+            set_ws2812_color(255, 0, 0)
+        else:
+            set_ws2812_color(0, 0, 0)
+        on = not on
+        await asyncio.sleep_ms(LOW_BATTERY_FLASH_PERIOD)
+    set_ws2812_color(0, 0, 0)
+
+def start_low_battery_flash():
+    """启动红灯闪烁任务（已在运行时不重复创建）"""
+    global flash_task
+    if flash_task is None or flash_task.done():
+        flash_task = asyncio.create_task(low_battery_flash())
 
-    voltages = []
+# 上电电压检测（初始化时采集多次取平均，提高准确性；采样间隔让出CPU，期间照常接收转发）
+async def power_on_battery_check():
+    debug_print("=== Power On Battery Check ===")
+    total = 0
+    count = 0
     start_time = time.ticks_ms()
     while time.ticks_diff(time.ticks_ms(), start_time) < POWER_ON_SAMPLE_DURATION:
-        adc_value = adc.read_u16()
-        voltage = (adc_value / ADC_MAX_VALUE) * ADC_REF_VOLTAGE * 2
-        voltages.append(voltage)
-        time.sleep_ms(POWER_ON_SAMPLE_DURATION // POWER_ON_SAMPLE_COUNT)
-    avg_voltage = round(sum(voltages) / len(voltages), 2)
+        total += adc.read_u16()
+        count += 1
+        await asyncio.sleep_ms(POWER_ON_SAMPLE_DURATION // POWER_ON_SAMPLE_COUNT)
+    # 初始化滑动窗口：上电检测的平均计数填充窗口
+    fill_battery_window(total // count if count else 0)
+    avg_voltage = get_battery_avg_voltage()
     debug_print("Power On Average Voltage: %.2fV (Threshold: %.1fV)" % (avg_voltage, LOW_VOLTAGE_THRESHOLD))
-    # 初始化滑动窗口：上电检测的平均值填充窗口
-    global battery_voltage_window
-    battery_voltage_window = [avg_voltage] * WINDOW_SIZE
     return avg_voltage
 
 # ====================== 电池电压读取&滑动滤波函数 ======================
+def fill_battery_window(counts: int) -> None:
+    """用同一计数填满滑动窗口"""
+    global battery_sum, battery_index, battery_raw, battery_mv
+    for i in range(WINDOW_SIZE):
+        battery_window[i] = counts
+    battery_sum = counts * WINDOW_SIZE
+    battery_index = 0
+    battery_raw = counts
+    battery_mv = (battery_sum * BATTERY_MV_SCALE) >> 16
+
 def read_battery_adc(timer):
-    global battery_voltage, battery_voltage_window
-    adc_value = adc.read_u16()
-    # 计算实际电压（1/2分压，所以乘以2）
-    voltage = (adc_value / ADC_MAX_VALUE) * ADC_REF_VOLTAGE * 2
-    battery_voltage = round(voltage, 2)
+    """
+    定时器回调：新计数替换窗口中最旧的计数并增量更新和，只做小整数运算，不分配内存；
+    低电状态将要变化时才唤醒电池监测任务
+    """
+    global battery_sum, battery_index, battery_raw, battery_mv
+    raw = adc.read_u16()
+    i = battery_index
+    battery_sum += raw - battery_window[i]
+    battery_window[i] = raw
+    i += 1
+    battery_index = 0 if i == WINDOW_SIZE else i
+    battery_raw = raw
+    battery_mv = (battery_sum * BATTERY_MV_SCALE) >> 16
+    if battery_is_low(low_battery_flag) != low_battery_flag:
+        battery_flag.set()
 
-    # 更新滑动窗口（保留最近5次采样值）
-    battery_voltage_window.append(battery_voltage)
-    if len(battery_voltage_window) > WINDOW_SIZE:
-        battery_voltage_window.pop(0)  # 移除最旧的数值
+# 单次采样电压（仅在读取时换算）
+def get_battery_voltage():
+    return battery_raw * WINDOW_SIZE * BATTERY_VOLTS_PER_SUM
 
 # 计算滑动窗口的平均电压（防抖核心）
 def get_battery_avg_voltage():
-    if not battery_voltage_window:
-        return 0.0
-    avg_volt = round(sum(battery_voltage_window) / len(battery_voltage_window), 2)
-    return avg_volt
-
-# ====================== 看门狗打印调度函数 ======================
-def wdt_feed_print(_):
-    """看门狗喂狗打印的调度执行函数（非中断上下文）"""
-    global wdt_print_scheduled
-    debug_print("🐶 WDT fed (timer callback)")
-    wdt_print_scheduled = False  # 执行完成后重置标志位
-
-# ====================== 看门狗喂狗回调函数（软件定时器触发） ======================
-def wdt_feed_callback(timer):
-    """
-    看门狗喂狗回调函数
-    由1秒周期的软件定时器触发，执行喂狗操作并调度打印
-    """
-    global wdt_print_scheduled
-    wdt.feed()  # 重置看门狗超时计数器（喂狗核心操作）
-
-    # 调度打印操作，避免中断上下文直接print，且防止重复调度
-    if not wdt_print_scheduled:
-        try:
-            micropython.schedule(wdt_feed_print, None)
-            wdt_print_scheduled = True
-        except RuntimeError as e:
-            # 调度队列满时仅在调试模式输出错误
-            debug_print("⚠️ WDT print schedule queue full: %s" % str(e))
-            wdt_print_scheduled = False
+    return battery_sum * BATTERY_VOLTS_PER_SUM
+
+# 电池监测任务更新低电压锁定状态（本模块的low_battery_flag决定是否响应UART灯效数据）
+def set_low_battery_flag(flag):
+    global low_battery_flag
+    low_battery_flag = flag
+
+# 带回差的低电判断：直接比较窗口计数和，不做浮点运算
+def battery_is_low(prev_low: bool) -> bool:
+    if prev_low:
+        return battery_sum < BATTERY_RECOVER_SUM
+    return battery_sum < BATTERY_LOW_SUM
 
 # ====================== UART数据处理函数 ======================
 @timed_function
-def parse_rgb_data(data):
-    if len(data) >= 3:
-        r, g, b = data[0], data[1], data[2]
-        debug_print("Parsed RGB data (hex): %s | (R,G,B): (%d, %d, %d)" % (data[:3].hex(), r, g, b))
-        return (r, g, b)
-    else:
-        debug_print("Insufficient data (%d bytes), cannot parse RGB" % len(data))
-        return None
+def parse_rgb_data(data, length):
+    """判断data的前length字节中是否有完整的RGB（前3字节），只返回True/False，不构造元组"""
+    if length >= 3:
+        if LOG_DEBUG:
+            log_debug("Parsed RGB data (hex): %s | (R,G,B): (%d, %d, %d)", bytes(data[:3]).hex(), data[0], data[1],
+                      data[2])
+        return True
+    if LOG_DEBUG:
+        log_debug("Insufficient data (%d bytes), cannot parse RGB", length)
+    return False
 
 @timed_function
-def forward_remaining_data(data):
-    if len(data) >= 3:
-        forward_data = data[3:]
-        if len(forward_data) > 0:
-            debug_print("Forwarded data (hex): %s | Length: %d bytes" % (forward_data.hex(), len(forward_data)))
-            uart_forward.write(forward_data)
-        else:
-            debug_print("No remaining data to forward")
-    else:
-        debug_print("No data to forward (total bytes: %d)" % len(data))
+def forward_remaining_data(data, length):
+    """转发data[MODULE_BYTES:length]：以(缓冲区, 偏移, 字节数)交给转发函数，不切片"""
+    if length >= MODULE_BYTES:
+        n = length - MODULE_BYTES
+        if n > 0:
+            if LOG_DEBUG:
+                log_debug("Forwarded data (hex): %s | Length: %d bytes", bytes(data[MODULE_BYTES:length]).hex(), n)
+            forward_write(data, MODULE_BYTES, n)
+            if event_log:
+                event_log.record(EVT_FORWARD, n)
+        elif LOG_DEBUG:
+            log_debug("No remaining data to forward")
+    elif LOG_DEBUG:
+        log_debug("No data to forward (total bytes: %d)", length)
 
 @timed_function
 def process_received_data(_):
-    global is_scheduled
-    is_scheduled = False
+    global last_proc_us
+    start = time.ticks_us()
 
-    data = ring_buffer.read_all()
-    if len(data) == 0:
+    if FRAMED_PROTOCOL_ENABLE:
+        # 帧协议：直接在环形缓冲区上流式解析，不拷贝
+        handle_framed_data()
+        last_proc_us = time.ticks_diff(time.ticks_us(), start)
+        heap_boundary_collect()
         return
 
-    debug_print("\n=== Received Data ===")
-    debug_print("Raw data (hex): %s" % bytes(data).hex())
-    debug_print("Total bytes received: %d" % len(data))
+    # 一次空闲中断内收到的数据作为一帧，拷贝到预分配的帧缓冲区（不分配新对象）
+    # 之后只传递frame_buf与长度，不切片
+    length = ring_buffer.readinto(frame_buf)
+    if length == 0:
+        return
+
+    if event_log:
+        event_log.record(EVT_RX, length)
+    if LOG_DEBUG:
+        log_debug("\n=== Received Data ===")
+        log_debug("Raw data (hex): %s", bytes(frame_mv[:length]).hex())
+        log_debug("Total bytes received: %d", length)
+
+    if PER_PIXEL_ENABLE:
+        # 逐灯寻址：前MODULE_BYTES字节交给刷新任务
+        if length >= MODULE_BYTES and not low_battery_flag:
+            show_module_data(frame_buf)
+    else:
+        # 低电压时禁用UART控制LED
+        if parse_rgb_data(frame_buf, length) and not low_battery_flag:
+            show_module_data(frame_buf)
+    forward_remaining_data(frame_buf, length)
+    last_proc_us = time.ticks_diff(time.ticks_us(), start)
+    heap_boundary_collect()
+
+# ====================== 帧协议数据处理 ======================
+def handle_framed_data():
+    """
+    把环形缓冲区中的新数据交给流式帧解析器（解析状态跨调用保留，帧可分散在多次接收中）
+    用contiguous/consume直接在环形缓冲区的存储区上按下标解析（不建视图），其余负载边解析边转发，本模块数据收完整后再刷新灯珠
+    流控下每次只交给解析器FLOW_CHUNK字节即返回：转发口写阻塞期间接收口仍在收数据，须让流控及时搬运积压并发出XOFF；
+    下游要求暂停时不再处理，其余数据留在环形缓冲区，恢复后继续（接收任务让出后继续处理，直通模式由下一次轮询处理）
+    """
+    global parser_reset_pending
+    if parser_reset_pending:
+        # 波特率切换：丢弃切换前解析到一半的帧
+        parser_reset_pending = False
+        frame_parser.reset()
+    while not flow_paused:
+        n = ring_buffer.contiguous(FLOW_CHUNK if FLOW_ACTIVE else -1)
+        if not n:
+            break
+        frame_parser.feed(ring_buffer.buf, n, ring_buffer.head)
+        ring_buffer.consume(n)
+        if FLOW_ACTIVE:
+            break
+    take_frame_payload()
+
+def take_frame_payload():
+    """取出解析器中新收完整的本模块数据并显示；锁存命令提交前也会先调用，保证同一批数据中的帧先于锁存生效"""
+    if not frame_parser.ready:
+        return
+    frame_parser.ready = False
+    if event_log:
+        event_log.record(EVT_FRAME, frame_parser.frame_type, frame_parser.seq, frame_parser.lost)
+    if not low_battery_flag:
+        show_module_data(frame_parser.payload)
+
+# ====================== 直通转发（边收边转） ======================
+def cut_through_poll(uart):
+    """
+    直通转发轮询（由CUT_THROUGH_POLL_FREQ频率的定时器调用）
+    新到字节经环形缓冲区暂存：当前帧前MODULE_BYTES字节留给本模块，其余字节立即写入转发口，
+    不再等待整帧接收完毕，每级延迟约为一个轮询周期加几个字节时间。
+    超过FRAME_GAP_US未收到数据视为一帧结束，下一个字节重新作为本模块RGB的开头。
+    """
+    global ct_frame_open, ct_own_count, ct_last_rx, last_proc_us, rx_stamp_us
+
+    now = time.ticks_us()
+    read_len = ring_receive(uart)
+    received = read_len > 0
+    if received:
+        rx_stamp_us = now
+        if event_log:
+            event_log.record(EVT_RX, read_len)
+
+    if FRAMED_PROTOCOL_ENABLE:
+        if FLOW_ACTIVE:
+            flow_read()
+        # 帧协议自带边界，无需按空闲间隔分帧；流控暂停期间留在环形缓冲区中的数据在恢复后继续处理
+        if received or (FLOW_ACTIVE and not ring_buffer.is_empty()):
+            handle_framed_data()
+            last_proc_us = time.ticks_diff(time.ticks_us(), now)
+            heap_boundary_collect()
+        if FLOW_ACTIVE:
+            flow_update()
+        return
+
+    if not received:
+        # 空闲超过帧间隔：结束当前帧
+        if ct_frame_open and time.ticks_diff(now, ct_last_rx) > FRAME_GAP_US:
+            ct_frame_open = False
+            heap_boundary_collect()
+        return
+
+    ct_last_rx = now
+    if not ct_frame_open:
+        ct_frame_open = True
+        ct_own_count = 0
+
+    # 直接转发环形缓冲区存储区上的数据（按偏移与长度），不拷贝、不建视图
+    ready = False
+    buf = ring_buffer.buf
+    while True:
+        head = ring_buffer.head
+        n = ring_buffer.contiguous()
+        if n == 0:
+            break
+        start = 0
+        if ct_own_count < MODULE_BYTES:
+            start = min(MODULE_BYTES - ct_own_count, n)
+            copy_into(ct_own_rgb, ct_own_count, buf, head, start)
+            ct_own_count += start
+            ready = ct_own_count == MODULE_BYTES
+        # 先转发再刷新灯珠，WS2812发送的阻塞时间不计入下游延迟
+        if start < n:
+            forward_write(buf, head + start, n - start)
+            if event_log:
+                event_log.record(EVT_FORWARD, n - start)
+        ring_buffer.consume(n)
 
-    rgb_values = parse_rgb_data(data)
     # 低电压时禁用UART控制LED
-    if rgb_values and not low_battery_flag:
-        set_ws2812_color(*rgb_values)
-    forward_remaining_data(data)
+    if ready and not low_battery_flag:
+        show_module_data(ct_own_rgb)
+    last_proc_us = time.ticks_diff(time.ticks_us(), now)
 
-# ====================== ISR中断回调 ======================
+# ====================== 链路发现 ======================
+def discovery_status(frame_type):
+    """
+    生成本模块在发现帧中追加的状态记录（STATUS_RECORD_SIZE字节，写入预分配缓冲区）：
+    标志位、累计丢帧数、环形缓冲区高水位与溢出字节数、平均电压（mV）、最近一次处理耗时（us）、转发口波特率/100、
+    链路时间偏移与最近一次信标校正量（us）、被下游流控暂停的次数与接收口驱动缓冲区已满的次数（各1字节）、CRC校验失败的帧数；
+    堆状态查询帧（FRAME_TYPE_HEAP）改为追加heap_status()的堆记录
+    """
+    if frame_type == FRAME_TYPE_HEAP:
+        return heap_status()
+    rec = status_buf
+    flags = 0
+    if low_battery_flag:
+        flags |= STATUS_LOW_BATTERY
+    if CUT_THROUGH_ENABLE:
+        flags |= STATUS_CUT_THROUGH
+    if PER_PIXEL_ENABLE:
+        flags |= STATUS_PER_PIXEL
+    if LATCH_ACTIVE:
+        flags |= STATUS_LATCH
+    if time_synced:
+        flags |= STATUS_TIME_SYNC
+    if FLOW_ACTIVE:
+        flags |= STATUS_FLOW
+    if COLOR_CORRECT_ENABLE and not color_correction.identity:
+        flags |= STATUS_COLOR
+    rec[0] = flags
+    rec[1] = min(frame_parser.lost, 0xFF)
+    put_u16(rec, 2, ring_buffer.high_water)
+    put_u16(rec, 4, ring_buffer.overflow)
+    put_u16(rec, 6, battery_mv)
+    put_u16(rec, 8, last_proc_us)
+    put_u16(rec, 10, forward_baud // 100)
+    put_i32(rec, 12, time_offset_us)
+    put_i16(rec, 16, time_err_us)
+    rec[18] = min(flow_stalls, 0xFF)
+    rec[19] = min(rx_full, 0xFF)
+    put_u16(rec, 20, frame_parser.crc_errors)
+    return rec
 
-def uart_idle_callback(uart):
-    global is_scheduled, isr_read_buf, ring_buffer
+def heap_status():
+    """
+    生成本模块在堆状态查询帧中追加的记录（HEAP_RECORD_SIZE字节，写入预分配缓冲区）：
+    显式/自动回收次数、最长回收停顿（us）、每帧分配字节数、空闲堆与已分配堆（16字节为单位）
+    """
+    rec = heap_buf
+    put_u16(rec, 0, gc_collections)
+    put_u16(rec, 2, gc_auto)
+    put_u16(rec, 4, gc_pause_max_us)
+    put_u16(rec, 6, heap_per_frame)
+    put_u16(rec, 8, gc.mem_free() >> 4)
+    put_u16(rec, 10, gc.mem_alloc() >> 4)
+    return rec
+
+def put_u16(buf, offset, value):
+    """大端写入16位无符号数，超出范围时取最大值"""
+    if value > 0xFFFF:
+        value = 0xFFFF
+    elif value < 0:
+        value = 0
+    buf[offset] = value >> 8
+    buf[offset + 1] = value & 0xFF
+
+def put_i16(buf, offset, value):
+    """大端写入16位有符号数（补码），超出范围时取边界值"""
+    if value > 0x7FFF:
+        value = 0x7FFF
+    elif value < -0x8000:
+        value = -0x8000
+    buf[offset] = (value >> 8) & 0xFF
+    buf[offset + 1] = value & 0xFF
+
+def put_i32(buf, offset, value):
+    """大端写入32位有符号数（补码），逐字节移位，不产生大整数"""
+    buf[offset] = (value >> 24) & 0xFF
+    buf[offset + 1] = (value >> 16) & 0xFF
+    buf[offset + 2] = (value >> 8) & 0xFF
+    buf[offset + 3] = value & 0xFF
 
-    read_len = uart.readinto(isr_read_buf)
-    if read_len == 0:
+# ====================== 逐跳命令转发 ======================
+def forward_command(buf):
+    """把改写后的逐跳命令帧发往下游：收到的命令带CRC帧尾时同样置CRC标志并补上CRC帧尾"""
+    if frame_parser.crc_frame:
+        buf[2] |= FRAME_FLAG_CRC
+        uart_forward.write(buf)
+        uart_forward.write(build_crc(buf, command_crc))
+    else:
+        buf[2] &= ~FRAME_FLAG_CRC
+        uart_forward.write(buf)
+
+# ====================== 同步锁存 ======================
+def latch_command(payload):
+    """
+    锁存命令：在收到命令后DELAY_US提交暂存数据。先把DELAY_US减去HOP_US（一级转发延迟）后转发给下游，
+    下游晚一级收到命令、提前一级提交，全链在主机发出命令后约同一时刻刷新。
+    DELAY_US超过LATCH_DELAY_MAX时按LATCH_DELAY_MAX处理（先判断最高字节，不产生大整数）
+    """
+    global latch_deadline, latch_delay
+    now = time.ticks_us()
+    if payload[0] > (LATCH_DELAY_MAX >> 24):
+        delay = LATCH_DELAY_MAX
+    else:
+        delay = (payload[0] << 24) | (payload[1] << 16) | (payload[2] << 8) | payload[3]
+    hop = (payload[4] << 8) | payload[5]
+    forward_command(build_show(delay - hop if delay > hop else 0, hop, latch_out))
+    latch_delay = delay
+    latch_deadline = time.ticks_add(now, delay)
+    latch_flag.set()
+
+def latch_commit():
+    """把暂存数据写入灯珠（低电压时只丢弃暂存数据）"""
+    global latch_pending
+    pending = latch_pending
+    if pending:
+        latch_pending = False
+        if not low_battery_flag:
+            render_module_data(latch_buf)
+    if event_log:
+        event_log.record(EVT_LATCH, latch_delay, 1 if pending else 0, time.ticks_diff(time.ticks_us(), latch_deadline))
+
+# ====================== 本地灯效 ======================
+def effect_command(payload):
+    """
+    灯效命令：把PHASE加上STEP后转发给下游（下游相位依次错开一级），再按本模块的相位启动灯效，由灯效任务渲染
+    """
+    global effect_preempt
+    out = effect_out
+    copy_into(out, FRAME_HEADER_SIZE, payload, 0, EFFECT_PAYLOAD_SIZE)
+    phase = ((payload[7] << 8) | payload[8]) + ((payload[9] << 8) | payload[10])
+    out[FRAME_HEADER_SIZE + 7] = (phase >> 8) & 0xFF
+    out[FRAME_HEADER_SIZE + 8] = phase & 0xFF
+    forward_command(out)
+    effect_preempt = True
+    effect_engine.set(payload, chain_us())
+    effect_flag.set()
+    if event_log:
+        event_log.record(EVT_EFFECT, effect_engine.effect, effect_engine.phase, effect_engine.period)
+
+# ====================== 颜色校正 ======================
+def color_command(payload):
+    """
+    颜色校正命令：跳过前SKIP个模块后对COUNT个模块生效。先把SKIP（或COUNT）减1后转发给下游（已无目标模块时不再转发），
+    落在本模块时按MASK更新参数，参数有变化才唤醒校正任务重建查找表（浮点gamma曲线不在接收路径上计算）
+    """
+    skip = (payload[7] << 8) | payload[8]
+    count = (payload[9] << 8) | payload[10]
+    mine = skip == 0 and count > 0
+    if skip:
+        skip -= 1
+    elif count and count != COLOR_COUNT_ALL:
+        count -= 1
+    if count:
+        out = color_out
+        copy_into(out, FRAME_HEADER_SIZE, payload, 0, COLOR_PAYLOAD_SIZE)
+        out[FRAME_HEADER_SIZE + 7] = skip >> 8
+        out[FRAME_HEADER_SIZE + 8] = skip & 0xFF
+        out[FRAME_HEADER_SIZE + 9] = count >> 8
+        out[FRAME_HEADER_SIZE + 10] = count & 0xFF
+        forward_command(out)
+    if mine and color_correction.configure(payload[0], (payload[1] << 8) | payload[2], payload[3],
+                                           payload[4], payload[5], payload[6]):
+        color_flag.set()
+
+async def color_task():
+    """校正任务：参数变化后重建查找表，再按新表重绘当前画面（灯效重新渲染，或重新刷新最近一帧本模块数据）"""
+    while True:
+        await color_flag.wait()
+        if not color_correction.rebuild():
+            continue
+        if event_log:
+            balance = color_correction.balance
+            event_log.record(EVT_COLOR, color_correction.gamma, color_correction.brightness,
+                             (balance[0] << 16) | (balance[1] << 8) | balance[2])
+        if LOG_INFO:
+            balance = color_correction.balance
+            log_info("🎨 Color correction: gamma %d/100, brightness %d, balance R%d G%d B%d",
+                     color_correction.gamma, color_correction.brightness, balance[0], balance[1], balance[2])
+        if effect_engine.active:
+            effect_flag.set()
+        elif data_frames and not LATCH_ACTIVE:
+            render_flag.set()
+
+def color_report():
+    """打印颜色校正参数与查找表重建次数（REPL中调用）"""
+    balance = color_correction.balance
+    print("Color correction: %s, gamma %.2f, brightness %d, balance R%d G%d B%d, rebuilds %d" % (
+        "identity" if color_correction.identity else "active", color_correction.gamma / 100,
+        color_correction.brightness, balance[0], balance[1], balance[2], color_correction.rebuilds))
+
+# ====================== 链路时间同步 ======================
+def chain_us():
+    """当前链路时间（ticks_us格式，模2^30）：本地时钟加上由时间信标校正的偏移，未收到信标时即本地时钟"""
+    return time.ticks_add(time.ticks_us(), time_offset_us)
+
+def time_command(payload):
+    """
+    时间信标：CHAIN_US为本模块收完该帧时的链路时间，HOP_US为收完到检测到接收（空闲中断/直通轮询）的延迟，
+    因此接收时刻rx_stamp_us对应的链路时间为CHAIN_US + HOP_US。
+    先把下游收完本帧时的链路时间（当前链路时间 + 一帧的线路时间，带CRC时含帧尾）写入信标转发，本级处理耗时不累积到下游；
+    再用本次测得的偏移校正本地时钟：首个信标或差值超过TIME_SYNC_STEP_US时直接对齐，
+    否则按1/2^TIME_SYNC_GAIN_SHIFT逐步修正，每次不超过TIME_SYNC_SLEW_US
+    """
+    global time_offset_us, time_synced, time_err_us, time_beacons
+    hop = (payload[4] << 8) | payload[5]
+    rx_chain = time.ticks_add(((payload[0] & 0x3F) << 24) | (payload[1] << 16) | (payload[2] << 8) | payload[3], hop)
+    size = len(time_out) + FRAME_CRC_SIZE if frame_parser.crc_frame else len(time_out)
+    line_us = size * 10000000 // forward_baud
+    build_time(time.ticks_add(rx_chain, time.ticks_diff(time.ticks_us(), rx_stamp_us) + line_us), hop, time_out)
+    forward_command(time_out)
+
+    measured = time.ticks_diff(rx_chain, rx_stamp_us)
+    err = time.ticks_diff(measured, time_offset_us)
+    if not time_synced or err > TIME_SYNC_STEP_US or err < -TIME_SYNC_STEP_US:
+        time_offset_us = measured
+        time_synced = True
+    else:
+        step = err >> TIME_SYNC_GAIN_SHIFT
+        if step > TIME_SYNC_SLEW_US:
+            step = TIME_SYNC_SLEW_US
+        elif step < -TIME_SYNC_SLEW_US:
+            step = -TIME_SYNC_SLEW_US
+        time_offset_us = time.ticks_diff(time.ticks_add(time_offset_us, step), 0)
+    time_err_us = err
+    time_beacons += 1
+    if event_log:
+        event_log.record(EVT_TIME, err, time_offset_us, hop)
+
+def time_sync_report():
+    """打印链路时间同步状态（REPL中调用）"""
+    if not time_synced:
+        print("Time sync: no beacon yet (chain time = local ticks_us)")
+        return
+    print("Time sync: offset %d us, last correction %d us, beacons %d" % (time_offset_us, time_err_us, time_beacons))
+
+# ====================== 波特率协商 ======================
+def frame_command(frame_type, payload):
+    """帧协议命令回调（在帧解析过程中调用）"""
+    global baud_pending, baud_up_ok
+    if frame_type == FRAME_TYPE_SHOW:
+        if len(payload) >= SHOW_PAYLOAD_SIZE:
+            take_frame_payload()
+            latch_command(payload)
+    elif frame_type == FRAME_TYPE_EFFECT:
+        if len(payload) >= EFFECT_PAYLOAD_SIZE:
+            take_frame_payload()
+            effect_command(payload)
+    elif frame_type == FRAME_TYPE_TIME:
+        if len(payload) >= TIME_PAYLOAD_SIZE:
+            time_command(payload)
+    elif frame_type == FRAME_TYPE_COLOR:
+        if COLOR_CORRECT_ENABLE and len(payload) >= COLOR_PAYLOAD_SIZE:
+            color_command(payload)
+    elif frame_type == FRAME_TYPE_BAUD:
+        if not BAUD_NEGOTIATE_ENABLE or baud_pending or len(payload) < 4:
+            return
+        rate = (payload[0] << 24) | (payload[1] << 16) | (payload[2] << 8) | payload[3]
+        if rate <= 0 or rate > BAUD_MAX or (rate == recv_baud and rate == forward_baud):
+            return
+        baud_pending = rate
+        baud_timer.init(mode=Timer.ONE_SHOT, period=BAUD_SWITCH_DELAY_MS, callback=baud_switch)
+        if LOG_INFO:
+            log_info("Baud negotiation: switching to %d in %d ms", rate, BAUD_SWITCH_DELAY_MS)
+    elif frame_type == FRAME_TYPE_LINK_PING:
+        # 上游链路在新波特率下可用：经接收口回传应答
+        if baud_pending:
+            baud_up_ok = True
+            uart_recv.write(link_ack)
+
+def baud_switch(timer):
+    """切换两个UART到新波特率，之后周期性向下游发送链路探测"""
+    global baud_up_ok, baud_down_ok, baud_elapsed, baud_ack_pos, flow_paused, flow_xoff_sent, parser_reset_pending
+    # 等待协商命令等已排队的数据发完再切换
+    uart_forward.flush()
+    uart_recv.init(baudrate=baud_pending)
+    uart_forward.init(baudrate=baud_pending)
+    # 丢弃回传方向上的残留数据
+    while uart_forward.any():
+        uart_forward.readinto(isr_read_buf)
+    # 解析器可能正在接收任务中feed：只置位标志，由接收路径在下一次解析前复位
+    parser_reset_pending = True
+    # 回传方向上的XON/XOFF随之丢弃，协商结束后按积压重新判断
+    flow_paused = False
+    flow_xoff_sent = False
+    baud_up_ok = False
+    baud_down_ok = False
+    baud_elapsed = 0
+    baud_ack_pos = 0
+    uart_forward.write(link_ping)
+    baud_timer.init(mode=Timer.PERIODIC, period=BAUD_PING_PERIOD_MS, callback=baud_tick)
+
+def baud_tick(timer):
+    """
+    等待下游应答：未收到时继续探测，超时后确定两条链路各自的波特率
+    应答逐字节按序匹配（baud_ack_pos跨调用保留），拆在两次读取中也能识别，且不建切片
+    """
+    global baud_down_ok, baud_elapsed, baud_ack_pos
+    if not baud_down_ok:
+        pos = baud_ack_pos
+        while not baud_down_ok:
+            read_len = uart_forward.readinto(isr_read_buf)
+            if not read_len:
+                break
+            for i in range(read_len):
+                c = isr_read_buf[i]
+                if c == link_ack[pos]:
+                    pos += 1
+                    if pos == FRAME_HEADER_SIZE:
+                        baud_down_ok = True
+                        break
+                else:
+                    pos = 1 if c == link_ack[0] else 0
+        baud_ack_pos = pos
+    baud_elapsed += BAUD_PING_PERIOD_MS
+    if baud_elapsed < BAUD_ACK_TIMEOUT_MS:
+        if not baud_down_ok:
+            uart_forward.write(link_ping)
+        return
+    baud_timer.deinit()
+    baud_settle()
+
+def baud_settle():
+    """协商结束：通过探测的链路采用新波特率，其余回退"""
+    global recv_baud, forward_baud, baud_pending
+    if baud_up_ok:
+        recv_baud = baud_pending
+    else:
+        uart_recv.init(baudrate=recv_baud)
+    if baud_down_ok:
+        forward_baud = baud_pending
+    else:
+        uart_forward.init(baudrate=forward_baud)
+    if event_log:
+        event_log.record(EVT_BAUD, recv_baud, forward_baud, (1 if baud_up_ok else 0) | (2 if baud_down_ok else 0))
+    if LOG_INFO:
+        log_info("Baud negotiation done: recv %d (%s), forward %d (%s)", recv_baud,
+                 "ok" if baud_up_ok else "fallback", forward_baud, "ok" if baud_down_ok else "fallback")
+    baud_pending = 0
+
+# ====================== 流控（XON/XOFF） ======================
+def ring_receive(uart):
+    """
+    把接收口数据读入环形缓冲区，返回读到的字节数
+    流控下只读环形缓冲区放得下的部分，其余留在驱动缓冲区（置位flow_backlog，由流控定时器/轮询继续搬入），
+    并统计读取时驱动缓冲区已满的次数
+    """
+    global flow_backlog, rx_full
+    total = 0
+    if FLOW_ACTIVE:
+        if uart.any() >= UART_RXBUF_SIZE - 1:
+            rx_full += 1
+        flow_backlog = False
+    while True:
+        size = ISR_READ_BUF_SIZE
+        if FLOW_ACTIVE:
+            size = min(size, ring_buffer.free())
+            if size == 0:
+                flow_backlog = uart.any() > 0
+                break
+        read_len = uart.readinto(isr_read_buf, size)
+        # 无数据时readinto返回None
+        if not read_len:
+            break
+        ring_buffer.write(isr_read_buf, read_len)
+        total += read_len
+    return total
+
+def flow_read():
+    """
+    发送方：读取下游经转发口回传的XON/XOFF（其余字节忽略），更新暂停状态；
+    暂停后超过FLOW_TIMEOUT_MS未收到XON也未再收到XOFF时自行恢复
+    波特率协商期间不读取（回传方向上是链路应答，由baud_tick读取）
+    """
+    global flow_paused, flow_pause_us, flow_xoff_ms, flow_stalls, flow_timeouts
+    if baud_pending:
+        return
+    while True:
+        read_len = uart_forward.readinto(flow_rx_buf)
+        if not read_len:
+            break
+        for i in range(read_len):
+            c = flow_rx_buf[i]
+            if c == FLOW_XOFF:
+                flow_xoff_ms = time.ticks_ms()
+                if not flow_paused:
+                    flow_paused = True
+                    flow_pause_us = time.ticks_us()
+                    flow_stalls += 1
+                    if event_log:
+                        event_log.record(EVT_FLOW, 1, flow_stalls)
+            elif c == FLOW_XON and flow_paused:
+                flow_resume()
+    if flow_paused and time.ticks_diff(time.ticks_ms(), flow_xoff_ms) > FLOW_TIMEOUT_MS:
+        flow_timeouts += 1
+        flow_resume()
+
+def flow_resume():
+    """结束暂停并累计暂停时长；空闲中断模式下唤醒接收任务处理暂停期间积压的数据（直通模式由下一次轮询处理）"""
+    global flow_paused, flow_stall_us, flow_stall_ms
+    flow_paused = False
+    stalled = time.ticks_diff(time.ticks_us(), flow_pause_us)
+    flow_stall_us += stalled
+    if flow_stall_us >= 1000:
+        flow_stall_ms += flow_stall_us // 1000
+        flow_stall_us %= 1000
+    if event_log:
+        event_log.record(EVT_FLOW, 0, flow_stalls, stalled)
+    if not CUT_THROUGH_ENABLE:
+        uart_flag.set()
+
+def flow_update():
+    """接收方：按积压字节数（环形缓冲区+接收口驱动缓冲区）经接收口向上游发送XOFF/XON，保持XOFF期间每FLOW_REFRESH_MS重发"""
+    global flow_xoff_sent, flow_sent_ms, flow_xoffs
+    if baud_pending:
+        return
+    level = ring_buffer.available() + uart_recv.any()
+    if flow_xoff_sent:
+        if level <= FLOW_XON_LEVEL:
+            uart_recv.write(flow_xon)
+            flow_xoff_sent = False
+        elif time.ticks_diff(time.ticks_ms(), flow_sent_ms) >= FLOW_REFRESH_MS:
+            uart_recv.write(flow_xoff)
+            flow_sent_ms = time.ticks_ms()
+    elif level >= FLOW_XOFF_LEVEL:
+        uart_recv.write(flow_xoff)
+        flow_xoff_sent = True
+        flow_sent_ms = time.ticks_ms()
+        flow_xoffs += 1
+
+def flow_poll(timer):
+    """
+    流控/搬运定时器回调（空闲中断模式，流控时FLOW_POLL_FREQ，否则帧协议下RX_DRAIN_FREQ）：
+    主机连续发送或长帧连续到达时线路没有空闲、空闲中断不触发，驱动缓冲区积压达到FLOW_CHUNK（或环形缓冲区曾满而留有数据）时
+    在此搬入环形缓冲区并唤醒接收任务；流控下另读取下游的XON/XOFF、更新本模块的XON/XOFF。
+    搬运定时器由RX引脚的下降沿启动，一个周期内驱动缓冲区与环形缓冲区都已读空时停止
+    """
+    global rx_stamp_us
+    if FLOW_ACTIVE:
+        flow_read()
+    pending = uart_recv.any()
+    if pending and (pending >= FLOW_CHUNK or flow_backlog):
+        stamp = time.ticks_us()
+        if ring_receive(uart_recv):
+            rx_stamp_us = stamp
+            uart_flag.set()
+    if FLOW_ACTIVE:
+        flow_update()
+    elif not pending and ring_buffer.is_empty():
+        drain_arm()
+
+def drain_wake(pin):
+    """接收口RX引脚下降沿回调：线路从空闲转为收数据，关闭沿中断并启动搬运定时器"""
+    rx_pin.irq(handler=None)
+    drain_timer.init(freq=RX_DRAIN_FREQ, mode=Timer.PERIODIC, callback=flow_poll)
+
+def drain_arm():
+    """
+    停止搬运定时器并打开RX引脚的下降沿中断（接通接收通路时首次调用）：下一个字节的起始位重新启动搬运，线路空闲时不再唤醒
+    停止时若已有字节正在到达，其后每个字节的起始位都是下降沿，最多晚一个字节启动
+    """
+    drain_timer.deinit()
+    rx_pin.irq(handler=drain_wake, trigger=Pin.IRQ_FALLING)
+
+def flow_report():
+    """打印流控状态与统计（REPL中调用）"""
+    if not FLOW_ACTIVE:
+        print("Flow control disabled (FLOW_CONTROL_ENABLE = False or FRAMED_PROTOCOL_ENABLE = False)")
         return
+    print("paused: %s, xoff held: %s, backlog: %d bytes" % (flow_paused, flow_xoff_sent,
+                                                            ring_buffer.available() + uart_recv.any()))
+    print("stalls: %d (%d ms total), timeouts: %d, xoff sent: %d" % (flow_stalls, flow_stall_ms, flow_timeouts,
+                                                                     flow_xoffs))
+    print("ring overflow: %d bytes, rx buffer full: %d" % (ring_buffer.overflow, rx_full))
+
+# ====================== 内存回收 ======================
+def frame_boundary():
+    """是否处于帧间：环形缓冲区已处理完，且没有收到一半的帧（帧协议看解析器，直通原始格式看帧间隔）"""
+    if not ring_buffer.is_empty():
+        return False
+    if FRAMED_PROTOCOL_ENABLE:
+        return frame_parser.idle()
+    if CUT_THROUGH_ENABLE:
+        return not ct_frame_open
+    return True
+
+def heap_mark_cycle(alloc):
+    """一个回收周期结束（显式或自动回收）：按周期内的分配字节数与显示帧数更新每帧分配量"""
+    global gc_frame_mark, heap_per_frame
+    frames = data_frames - gc_frame_mark
+    if frames:
+        heap_per_frame = (alloc - gc_base) // frames
+    gc_frame_mark = data_frames
 
-    # 将接收到的数据写入环形缓冲区
-    ring_buffer.write(isr_read_buf, read_len)
+def heap_collect():
+    """显式回收并记录停顿时长"""
+    global gc_collections, gc_pause_max_us, gc_pause_last_us, gc_base, gc_last_alloc, gc_due
+    gc_due = False
+    before = gc.mem_alloc()
+    start = time.ticks_us()
+    gc.collect()
+    pause = time.ticks_diff(time.ticks_us(), start)
+    gc_collections += 1
+    gc_pause_last_us = pause
+    if pause > gc_pause_max_us:
+        gc_pause_max_us = pause
+    frames = data_frames - gc_frame_mark
+    heap_mark_cycle(before)
+    gc_base = gc_last_alloc = gc.mem_alloc()
+    if event_log:
+        event_log.record(EVT_GC, pause, before - gc_base, frames)
+
+def heap_check():
+    """检查已分配字节数：比上次检查时少说明期间发生了自动回收，计数后以此为新的起点；返回自上次回收以来的新分配量"""
+    global gc_auto, gc_base, gc_last_alloc
+    alloc = gc.mem_alloc()
+    if alloc < gc_last_alloc:
+        gc_auto += 1
+        heap_mark_cycle(gc_last_alloc)
+        gc_base = alloc
+    gc_last_alloc = alloc
+    return alloc - gc_base
+
+def heap_poll():
+    """
+    空闲定时器到期时调用：自上次回收以来新分配超过GC_MIN_ALLOC字节、且接收口仍已空闲GC_IDLE_MS（帧间空闲）时显式回收；
+    定时器到期后又收到了数据则不回收，接收路径处理完这批数据后会重新计时
+    """
+    if heap_check() < GC_MIN_ALLOC:
+        return
+    if time.ticks_diff(time.ticks_us(), rx_stamp_us) >= GC_IDLE_MS * 1000 and not uart_recv.any():
+        heap_collect()
 
-    # 避免重复调度处理函数
-    if not is_scheduled:
-        try:
-            micropython.schedule(process_received_data, None)
-            is_scheduled = True
-        except RuntimeError as e:
-            debug_print("⚠️ Schedule queue full: %s" % str(e))
-            is_scheduled = False
+def heap_boundary_collect():
+    """
+    接收路径处理完一批数据后调用：每GC_CHECK_MS检查一次分配量（统计自动回收）；重新开始GC_IDLE_MS的单次空闲定时
+    （线路安静下来后只触发一次，空闲时不轮询）；数据连续到达、新分配超过GC_FORCE_ALLOC字节后置位gc_due，在处理完一批数据、恰好处于帧边界时回收，
+    停顿只推迟下一帧的处理，不会打断一帧的转发
+    """
+    global gc_check_ms, gc_due
+    now = time.ticks_ms()
+    if time.ticks_diff(now, gc_check_ms) >= GC_CHECK_MS:
+        gc_check_ms = now
+        if heap_check() >= GC_FORCE_ALLOC and GC_IDLE_ENABLE:
+            gc_due = True
+    if not GC_IDLE_ENABLE:
+        return
+    gc_timer.init(mode=Timer.ONE_SHOT, period=GC_IDLE_MS, callback=gc_idle_callback)
+    if gc_due and frame_boundary():
+        heap_collect()
+
+def gc_idle_callback(timer):
+    """空闲定时器回调（软中断上下文，可分配内存）：接收口已GC_IDLE_MS没有新数据，检查堆并在帧间显式回收，不占用异步任务"""
+    heap_poll()
+
+def heap_report():
+    """打印堆状态与回收统计（REPL中调用）：稳态下每帧分配只剩异步任务唤醒的少量字节，回收都发生在帧间"""
+    heap_check()
+    alloc = gc.mem_alloc()
+    print("heap: %d bytes free, %d bytes allocated (%d since last collection)" % (gc.mem_free(), alloc,
+                                                                                 alloc - gc_base))
+    print("idle collections: %d (longest pause %d us, last %d us), automatic collections: %d" % (
+        gc_collections, gc_pause_max_us, gc_pause_last_us, gc_auto))
+    print("allocated per frame: %d bytes (%d frames since last collection)" % (heap_per_frame,
+                                                                              data_frames - gc_frame_mark))
+    if not GC_IDLE_ENABLE:
+        print("Idle collection disabled (GC_IDLE_ENABLE = False), automatic collections only")
+
+# ====================== 异步任务 ======================
+async def uart_ingest_task():
+    """接收任务：空闲中断把数据读入环形缓冲区后置位uart_flag，任务被唤醒后解析并转发"""
+    while True:
+        await uart_flag.wait()
+        process_received_data(None)
+        # 流控下每轮只处理FLOW_CHUNK字节：让出后再处理其余数据，期间流控定时器得以搬运积压并收发XON/XOFF
+        while FLOW_ACTIVE and not flow_paused and not ring_buffer.is_empty():
+            await asyncio.sleep_ms(0)
+            process_received_data(None)
+
+async def latch_task():
+    """
+    锁存任务：被锁存命令唤醒后等到预定时刻提交。等待的整毫秒部分用asyncio.sleep_ms让出，接收任务与软中断回调照常运行，
+    只在最后不足1ms（加LATCH_SPIN_US）内忙等补齐；等待中收到新的锁存命令时按新的预定时刻继续等
+    """
+    while True:
+        await latch_flag.wait()
+        remaining = time.ticks_diff(latch_deadline, time.ticks_us())
+        while remaining >= LATCH_SPIN_US + 1000:
+            await asyncio.sleep_ms((remaining - LATCH_SPIN_US) // 1000)
+            remaining = time.ticks_diff(latch_deadline, time.ticks_us())
+        if remaining > 0:
+            time.sleep_us(remaining)
+        latch_commit()
+
+async def render_task():
+    """刷新任务：只在有新数据时被唤醒，两次唤醒之间到达的多帧只刷新最新一帧"""
+    while True:
+        await render_flag.wait()
+        if not low_battery_flag:
+            render_module_data(render_buf)
+
+async def effect_task():
+    """
+    灯效任务：收到灯效命令后被唤醒；静态灯效绘制一次后继续等待，动态灯效在链路时间每EFFECT_FRAME_MS的整数倍时刻重绘一帧，
+    时钟同步后全链在同一时刻换帧，WS2812发送占用CPU的时段也不会与沿链逐级传递的时间信标逐级重合
+    """
+    frame_us = EFFECT_FRAME_MS * 1000
+    while True:
+        await effect_flag.wait()
+        while effect_engine.active:
+            if not low_battery_flag:
+                effect_engine.render(chain_us())
+                write_pixels()
+                if event_log:
+                    event_log.record(EVT_RENDER, effect_engine.effect)
+            if not effect_engine.animated():
+                break
+            await asyncio.sleep_ms((frame_us - chain_us() % frame_us + 999) // 1000)
+
+async def battery_task():
+    """电池监测任务：采样回调判断低电状态将要变化时才被唤醒，按回差切换状态并启动/结束红灯闪烁"""
+    while True:
+        await battery_flag.wait()
+        low = battery_is_low(low_battery_flag)
+        if low == low_battery_flag:
+            continue
+        set_low_battery_flag(low)
+        if low:
+            if LOG_WARN:
+                log_warn("⚠️ Battery Low! (Avg: %.2fV < %.1fV) → Red LED Flash",
+                         get_battery_avg_voltage(), LOW_VOLTAGE_THRESHOLD)
+            start_low_battery_flash()
+        elif LOG_INFO:
+            # 闪烁任务检测到标志清除后熄灭退出
+            log_info("✅ Battery Recovered! (Avg: %.2fV ≥ %.1fV) → LED Off, Restore UART Control",
+                     get_battery_avg_voltage(), LOW_VOLTAGE_THRESHOLD + BATTERY_HYSTERESIS)
+
+async def watchdog_task():
+    """喂狗任务：任何任务长时间占用CPU都会使喂狗推迟，看门狗因此能发现卡死"""
+    while True:
+        wdt.feed()
+        if LOG_DEBUG:
+            log_debug("🐶 WDT fed (watchdog task)")
+        await asyncio.sleep_ms(WDT_FEED_PERIOD)
+
+# ====================== 启动时序 ======================
+def boot_mark(name):
+    """记录一个启动阶段的时刻（RP2040复位后ticks_us从0开始计，即上电后的微秒数）"""
+    if BOOT_TRACE_ENABLE:
+        boot_marks.append((name, time.ticks_us()))
+
+def boot_forward_write(buf, offset, n):
+    """首次转发：记录开始写出的时刻，并把转发函数换回uart_forward.write，之后转发路径上没有额外开销"""
+    global forward_write, boot_forward_us
+    boot_forward_us = time.ticks_us()
+    uart_forward.write(buf, offset, n)
+    forward_write = uart_forward.write
+    frame_parser.forward = forward_write
+
+def boot_report():
+    """打印启动时序与上电到首次转发字节的时间（REPL中调用）"""
+    if not BOOT_TRACE_ENABLE:
+        print("Boot trace disabled (BOOT_TRACE_ENABLE = False)")
+        return
+    for name, t in boot_marks:
+        print("%-18s %10.3f ms" % (name, t / 1000))
+    if boot_forward_us < 0:
+        print("%-18s %13s" % ("first forward", "none yet"))
+    else:
+        print("%-18s %10.3f ms" % ("first forward", boot_forward_us / 1000))
+
+# ====================== 事件环导出 ======================
+def dump_event_log():
+    """打印事件环中的全部记录（REPL中调用，用于事后排查）"""
+    if event_log is None:
+        print("Event log disabled (EVENT_LOG_SIZE = 0)")
+        return
+    event_log.dump(EVENT_NAMES)
+
+# ====================== ISR中断回调 ======================
+
+def uart_idle_callback(uart):
+    global rx_stamp_us
+    stamp = time.ticks_us()
+    # 一次空闲中断收到的数据可能超过ISR读缓冲区，循环读空（流控下读到环形缓冲区满为止），避免残留数据等到下一次中断
+    # 记录接收时刻（时间信标用），唤醒接收任务（任务运行前多次置位只唤醒一次）
+    if ring_receive(uart):
+        rx_stamp_us = stamp
+        uart_flag.set()
 
 # ======================================== 自定义类 ============================================
 
@@ -216,9 +1178,65 @@ ring_buffer = RingBuffer(RING_BUFFER_SIZE)
 # 超时时间设置为5000ms（5秒），若超过5秒未喂狗则自动重启设备
 wdt = WDT(timeout=WDT_TIMEOUT)
 np = neopixel.NeoPixel(Pin(WS2812_PIN), WS2812_NUM)
+# 彩虹查找表：360项整数色相表（灯珠字节顺序），再按灯珠排列预展开为条带表，运行时每步只做一次切片拷贝
+hue_lut = build_hue_lut(np.ORDER)
+rainbow_strip_lut = build_strip_lut(hue_lut, WS2812_NUM, RAINBOW_HUE_SPACING)
+rainbow_strip_mv = memoryview(rainbow_strip_lut)
+# set_ws2812_color填色用的单颗灯数据（灯珠缓冲区字节顺序）
+ws2812_pixel = bytearray(3)
+# 颜色校正查找表（按灯珠字节顺序排列，初始参数取自配置）与转发颜色校正命令的预分配缓冲区
+color_correction = ColorCorrection(np.ORDER, COLOR_GAMMA, COLOR_BRIGHTNESS, COLOR_BALANCE)
+color_out = build_color(0, 0, 0, 0, 0, 0, 0, 0)
 # 初始化ADC（电池电压采集）
 adc = ADC(Pin(BATTERY_ADC_PIN))
 isr_read_buf = bytearray(ISR_READ_BUF_SIZE)
+# 二进制事件环（EVENT_LOG_SIZE为0时不创建）
+event_log = EventRing(EVENT_LOG_SIZE) if EVENT_LOG_SIZE > 0 else None
+# 整帧处理用的预分配帧缓冲区及其视图（环形缓冲区最多容纳RING_BUFFER_SIZE-1字节）
+frame_buf = bytearray(RING_BUFFER_SIZE)
+frame_mv = memoryview(frame_buf)
+# UART接收口（RX接上游，TX为回传方向）与转发口（TX接下游，RX为下游的回传）
+uart_recv = UART(0, baudrate=BAUDRATE, tx=Pin(0), rx=Pin(1), bits=8, parity=None, stop=1, rxbuf=UART_RXBUF_SIZE)
+# 接收口RX引脚：只用于下降沿唤醒搬运定时器，不带参数构造不改变引脚的UART功能
+rx_pin = Pin(1)
 uart_forward = UART(1, baudrate=BAUDRATE, tx=Pin(4), rx=Pin(5), bits=8, parity=None, stop=1)
+# 转发函数forward_write(buf, offset, n)发送buf[offset:offset + n]（UART.write的off/sz参数，不切片）：
+# 记录启动时序时先用boot_forward_write捕获首次转发，之后换回uart_forward.write
+forward_write = boot_forward_write if BOOT_TRACE_ENABLE else uart_forward.write
+# 帧协议解析器：每帧取走MODULE_BYTES字节，其余经转发口发往下一级；命令帧交给frame_command，发现帧/堆状态查询帧追加discovery_status
+status_buf = bytearray(STATUS_RECORD_SIZE)
+heap_buf = bytearray(HEAP_RECORD_SIZE)
+frame_parser = FrameParser(MODULE_BYTES, forward_write, frame_command, discovery_status)
+# 波特率协商用的定时器与预生成的链路探测/应答帧
+baud_timer = Timer(-1)
+# 空闲回收的单次定时器；帧协议下长帧连续到达时的搬运定时器（只在接收口收数据期间运行）
+gc_timer = Timer(-1)
+drain_timer = Timer(-1)
+link_ping = bytes(build_header(FRAME_TYPE_LINK_PING, 0, 0))
+link_ack = bytes(build_header(FRAME_TYPE_LINK_ACK, 0, 0))
+# 转发锁存命令的预分配缓冲区
+latch_out = build_show(0, 0)
+# 本地灯效引擎（与彩虹开机灯效共用条带表）、呼吸波形表与转发灯效命令的预分配缓冲区
+wave_lut = build_wave_lut()
+effect_engine = EffectEngine(np.buf, WS2812_NUM, np.ORDER, rainbow_strip_mv, RAINBOW_HUE_SPACING, wave_lut)
+effect_out = bytearray(FRAME_HEADER_SIZE + EFFECT_PAYLOAD_SIZE)
+build_header(FRAME_TYPE_EFFECT, 0, EFFECT_PAYLOAD_SIZE, effect_out)
+# 转发时间信标的预分配缓冲区
+time_out = build_time(0, 0)
+# 转发带CRC的逐跳命令时CRC帧尾的预分配缓冲区
+command_crc = bytearray(FRAME_CRC_SIZE)
+
+flow_rx_buf = bytearray(16)  # 回传方向的读取缓冲区（流控字符）
+flow_xon = bytes((FLOW_XON,))
+flow_xoff = bytes((FLOW_XOFF,))
+# 异步任务的唤醒标志：在中断/定时器回调中置位，由对应任务等待
+uart_flag = asyncio.ThreadSafeFlag()  # 空闲中断收到数据 → 接收任务
+render_flag = asyncio.ThreadSafeFlag()  # 有新的本模块数据 → 刷新任务
+battery_flag = asyncio.ThreadSafeFlag()  # 低电状态将要变化 → 电池监测任务
+effect_flag = asyncio.ThreadSafeFlag()  # 收到灯效命令 → 灯效任务
+color_flag = asyncio.ThreadSafeFlag()  # 颜色校正参数变化 → 校正任务
+latch_flag = asyncio.ThreadSafeFlag()  # 收到锁存命令 → 锁存任务
+# 堆统计起点：导入与建表之后的已分配字节数
+gc_base = gc_last_alloc = gc.mem_alloc()
 
 # ========================================  主程序  ===========================================
\ No newline at end of file
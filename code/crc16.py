@@ -0,0 +1,44 @@
+# Python env   : MicroPython v1.27
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : crc16.py
+# @Description : 帧协议CRC尾使用的CRC-16/CCITT-FALSE（多项式0x1021，初值0xFFFF，不反转、不异或输出，
+#                与CPython的binascii.crc_hqx(data, 0xFFFF)结果相同）的256项查找表；
+#                逐段增量计算见fast_paths.crc16_update（纯Python与viper两个版本共用本表）
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "MicroPython v1.27"
+
+# ======================================== 导入相关模块 =========================================
+
+from micropython import const
+from array import array
+
+# ======================================== 全局变量 ============================================
+
+CRC16_POLY = const(0x1021)
+CRC16_INIT = const(0xFFFF)
+
+# ======================================== 功能函数 ============================================
+
+def build_crc16_table() -> array:
+    """生成256项查找表：表项i为高字节为i、低字节为0时移出8位后的余数，之后每字节只需一次查表"""
+    table = array('H', bytearray(512))
+    for i in range(256):
+        crc = i << 8
+        for _ in range(8):
+            crc = (crc << 1) ^ CRC16_POLY if crc & 0x8000 else crc << 1
+        table[i] = crc & 0xFFFF
+    return table
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+CRC16_TABLE = build_crc16_table()
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,134 @@
+# Python env   : MicroPython v1.27
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : effects.py
+# @Description : 本地灯效引擎：按灯效命令（FRAME_TYPE_EFFECT）的参数与链路时间计算相位，从预计算查找表生成灯珠数据，
+#                主机只需在切换场景时发送一条命令
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "MicroPython v1.27"
+
+# ======================================== 导入相关模块 =========================================
+
+import time
+from micropython import const
+from color_lut import HUE_STEPS, strip_offset
+from fast_paths import fill_pixels, copy_bytes
+
+# ======================================== 全局变量 ============================================
+
+# 灯效编号（命令负载的EFFECT_ID）
+EFFECT_OFF = const(0)  # 熄灭
+EFFECT_SOLID = const(1)  # 纯色：R G B
+EFFECT_RAINBOW = const(2)  # 彩虹流动：一个周期色相转一圈，模块内相邻灯珠错开RAINBOW_HUE_SPACING度
+EFFECT_BREATHE = const(3)  # 呼吸：R G B按呼吸波形表调节亮度
+EFFECT_CHASE = const(4)  # 追逐：每周期点亮PARAM/256的时间，配合每级相位差形成沿级联移动的光带
+EFFECT_COUNT = const(5)
+
+# 相位为16位定点数：65536为一个完整周期
+PHASE_MASK = const(0xFFFF)
+
+# ======================================== 功能函数 ============================================
+
+# ======================================== 自定义类 ============================================
+
+class EffectEngine:
+    """
+    灯效引擎：保存当前灯效参数，render()按当前时刻计算相位并写入灯珠缓冲区（不调用write，由调用者刷新）
+    相位 = 命令中的PHASE（已按本模块在级联中的位置逐级加上STEP） + (链路时间 mod 周期)/周期 × 65536
+    时刻均为链路时间（ticks_us，经时间信标同步）：周期起点取链路时间中周期的整数倍，
+    各模块收到命令的先后不影响相位，时钟同步后全链动画保持同相
+    """
+
+    def __init__(self, buf, num: int, order: tuple, strip_mv, spacing: int, wave_lut: bytearray):
+        self.buf = buf
+        self.num = num
+        self.o0, self.o1, self.o2 = order[0], order[1], order[2]
+        self.pixel = bytearray(3)  # fill()的单颗灯数据（灯珠缓冲区字节顺序）
+        self.strip_mv = strip_mv
+        self.spacing = spacing
+        self.wave_lut = wave_lut
+        self.active = False  # 是否有灯效在运行（收到灯效数据后停止）
+        self.effect = EFFECT_OFF
+        self.param = 0
+        self.r = 0
+        self.g = 0
+        self.b = 0
+        self.period = 0  # 周期（毫秒），0表示静止在PHASE
+        self.period_us = 0
+        self.phase = 0
+        self.start = 0  # 相位起点（链路时间ticks_us），随渲染推进以保持经过时间在一个周期以内
+
+    def set(self, payload, now_us: int) -> None:
+        """按命令负载（EFFECT_ID PARAM R G B PERIOD_H PERIOD_L PHASE_H PHASE_L STEP_H STEP_L）切换灯效"""
+        effect = payload[0]
+        self.effect = effect if effect < EFFECT_COUNT else EFFECT_OFF
+        self.param = payload[1]
+        self.r = payload[2]
+        self.g = payload[3]
+        self.b = payload[4]
+        self.period = (payload[5] << 8) | payload[6]
+        self.period_us = self.period * 1000
+        self.phase = (payload[7] << 8) | payload[8]
+        # 起点对齐到链路时间中周期的整数倍，与收到命令的时刻无关
+        self.start = time.ticks_add(now_us, -(now_us % self.period_us)) if self.period_us else now_us
+        self.active = True
+
+    def stop(self) -> None:
+        """停止灯效（不改动灯珠缓冲区），之后由灯效数据接管显示"""
+        self.active = False
+
+    def animated(self) -> bool:
+        """当前灯效是否需要周期性重绘"""
+        return self.active and self.period > 0 and self.effect >= EFFECT_RAINBOW
+
+    def phase_at(self, now_us: int) -> int:
+        """
+        当前相位（0~65535）；经过时间只保留一个周期以内（时钟校正使链路时间回退时起点同样按整周期回退），
+        按毫秒计算，乘法结果不超出小整数范围
+        """
+        period_us = self.period_us
+        if period_us == 0:
+            return self.phase
+        elapsed = time.ticks_diff(now_us, self.start)
+        if elapsed >= period_us or elapsed < 0:
+            rem = elapsed % period_us
+            self.start = time.ticks_add(self.start, elapsed - rem)
+            elapsed = rem
+        return (self.phase + ((((elapsed // 1000) << 14) // self.period) << 2)) & PHASE_MASK
+
+    def fill(self, r: int, g: int, b: int) -> None:
+        """全部灯珠设为同一颜色（直接写缓冲区）"""
+        pixel = self.pixel
+        pixel[self.o0] = r
+        pixel[self.o1] = g
+        pixel[self.o2] = b
+        fill_pixels(self.buf, pixel, self.num)
+
+    def render(self, now_us: int) -> None:
+        """按当前链路时间生成一帧灯珠数据"""
+        effect = self.effect
+        if effect == EFFECT_SOLID:
+            self.fill(self.r, self.g, self.b)
+        elif effect == EFFECT_RAINBOW:
+            hue = (self.phase_at(now_us) * HUE_STEPS) >> 16
+            offset = strip_offset(hue, self.num, self.spacing)
+            copy_bytes(self.buf, self.strip_mv, offset, self.num * 3)
+        elif effect == EFFECT_BREATHE:
+            level = self.wave_lut[self.phase_at(now_us) >> 8]
+            self.fill(self.r * level // 255, self.g * level // 255, self.b * level // 255)
+        elif effect == EFFECT_CHASE:
+            if (self.phase_at(now_us) >> 8) < self.param:
+                self.fill(self.r, self.g, self.b)
+            else:
+                self.fill(0, 0, 0)
+        else:
+            self.fill(0, 0, 0)
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,121 @@
+# Python env   : MicroPython v1.27
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : fast_native.py
+# @Description : 热路径的viper版本（与fast_paths.py中的纯Python版本接口、结果完全一致），由fast_paths.py按NATIVE_ENABLE导入；
+#                固件未启用原生代码发射器或.mpy架构与芯片不符时导入失败，fast_paths.py自动回退到纯Python版本
+#                viper函数最多4个参数；指针下标不做越界检查，由调用者保证长度（与纯Python版本的前提相同）
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "MicroPython v1.27"
+
+# ======================================== 导入相关模块 =========================================
+
+import micropython
+from crc16 import CRC16_TABLE
+
+# ======================================== 全局变量 ============================================
+
+# copy_into把起始下标与字节数打包成一个小整数（高14位/低16位），起始下标须小于此值
+COPY_OFFSET_LIMIT = 16384
+
+# ======================================== 功能函数 ============================================
+
+@micropython.viper
+def ring_put(ring, tail: int, src, n: int) -> int:
+    """把src的前n字节从tail开始写入环形存储区ring（到末尾回绕），返回新的写指针"""
+    d = ptr8(ring)
+    s = ptr8(src)
+    size = int(len(ring))
+    for i in range(n):
+        d[tail] = s[i]
+        tail += 1
+        if tail == size:
+            tail = 0
+    return tail
+
+@micropython.viper
+def ring_get(dst, ring, head: int, n: int) -> int:
+    """从环形存储区ring的head开始取n字节（到末尾回绕）写入dst开头，返回新的读指针"""
+    d = ptr8(dst)
+    s = ptr8(ring)
+    size = int(len(ring))
+    for i in range(n):
+        d[i] = s[head]
+        head += 1
+        if head == size:
+            head = 0
+    return head
+
+@micropython.viper
+def fill_pixels(buf, pixel, n: int):
+    """把3字节的pixel（已按灯珠缓冲区字节顺序排列）重复写满buf的前n颗灯"""
+    d = ptr8(buf)
+    p = ptr8(pixel)
+    p0 = p[0]
+    p1 = p[1]
+    p2 = p[2]
+    end = n * 3
+    i = 0
+    while i < end:
+        d[i] = p0
+        d[i + 1] = p1
+        d[i + 2] = p2
+        i += 3
+
+@micropython.viper
+def copy_bytes(dst, src, offset: int, n: int):
+    """把src[offset:offset + n]拷贝到dst开头（不分配切片对象）"""
+    d = ptr8(dst)
+    s = ptr8(src)
+    for i in range(n):
+        d[i] = s[offset + i]
+
+def copy_into(dst, pos: int, src, offset: int, n: int) -> None:
+    """把src[offset:offset + n]拷贝到dst[pos:pos + n]（不分配切片对象）；viper最多4个参数，拷贝由copy_bytes_at完成"""
+    copy_bytes_at(dst, pos, src, offset << 16 | n)
+
+@micropython.viper
+def copy_bytes_at(dst, pos: int, src, span: int):
+    """copy_into的viper实现：span高14位为src中的起始下标（小整数为30位，须小于COPY_OFFSET_LIMIT），低16位为字节数"""
+    d = ptr8(dst)
+    s = ptr8(src)
+    offset = span >> 16
+    n = span & 0xFFFF
+    for i in range(n):
+        d[pos + i] = s[offset + i]
+
+@micropython.viper
+def apply_lut(buf, lut, n: int):
+    """颜色校正：buf前n颗灯的每个字节按所在位置查表替换，lut为3×256字节（依次为灯珠缓冲区第0/1/2字节的表）"""
+    d = ptr8(buf)
+    t = ptr8(lut)
+    end = n * 3
+    i = 0
+    while i < end:
+        d[i] = t[d[i]]
+        d[i + 1] = t[256 + d[i + 1]]
+        d[i + 2] = t[512 + d[i + 2]]
+        i += 3
+
+@micropython.viper
+def crc16_update(crc: int, data, start: int, n: int) -> int:
+    """把data[start:start + n]累加到CRC-16（查表，每字节一次），返回新的CRC"""
+    t = ptr16(CRC16_TABLE)
+    d = ptr8(data)
+    end = start + n
+    i = start
+    while i < end:
+        crc = ((crc << 8) & 0xFFFF) ^ t[((crc >> 8) ^ d[i]) & 0xFF]
+        i += 1
+    return crc
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,136 @@
+# Python env   : MicroPython v1.27
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : fast_paths.py
+# @Description : 接收与刷新热路径（环形缓冲区读写、整条灯带填色、条带表/本模块数据拷贝、帧解析的定长拷贝、帧CRC增量计算、颜色校正查表）的统一入口：
+#                NATIVE_ENABLE为True时导入fast_native.py中的viper版本，导入失败时自动回退到本文件的纯Python版本
+#                viper版本须放在单独的模块中：不支持原生代码的固件编译含viper装饰器的模块时报错，同一模块内无法捕获
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "MicroPython v1.27"
+
+# ======================================== 导入相关模块 =========================================
+
+import time
+from config import NATIVE_ENABLE, RING_BUFFER_SIZE
+from crc16 import CRC16_TABLE, CRC16_INIT
+from utils import log_info, log_warn, LOG_INFO, LOG_WARN
+
+# ======================================== 全局变量 ============================================
+
+# ======================================== 功能函数 ============================================
+
+# ====================== 纯Python版本（参考实现与回退） ======================
+def ring_put_py(ring, tail: int, src, n: int) -> int:
+    """把src的前n字节从tail开始写入环形存储区ring（到末尾回绕），返回新的写指针；ring传memoryview时切片不拷贝"""
+    size = len(ring)
+    part1 = min(n, size - tail)
+    src = memoryview(src)
+    ring[tail:tail + part1] = src[:part1]
+    if n > part1:
+        ring[0:n - part1] = src[part1:n]
+    return (tail + n) % size
+
+def ring_get_py(dst, ring, head: int, n: int) -> int:
+    """从环形存储区ring的head开始取n字节（到末尾回绕）写入dst开头，返回新的读指针"""
+    size = len(ring)
+    part1 = min(n, size - head)
+    dst = memoryview(dst)
+    dst[:part1] = ring[head:head + part1]
+    if n > part1:
+        dst[part1:n] = ring[0:n - part1]
+    return (head + n) % size
+
+def fill_pixels_py(buf, pixel, n: int) -> None:
+    """把3字节的pixel（已按灯珠缓冲区字节顺序排列）重复写满buf的前n颗灯"""
+    p0, p1, p2 = pixel[0], pixel[1], pixel[2]
+    for i in range(0, n * 3, 3):
+        buf[i] = p0
+        buf[i + 1] = p1
+        buf[i + 2] = p2
+
+def copy_bytes_py(dst, src, offset: int, n: int) -> None:
+    """把src[offset:offset + n]拷贝到dst开头；src传memoryview时切片不拷贝"""
+    dst[:n] = src[offset:offset + n]
+
+def copy_into_py(dst, pos: int, src, offset: int, n: int) -> None:
+    """把src[offset:offset + n]拷贝到dst[pos:pos + n]；src与dst可为bytearray或memoryview（不修改长度）"""
+    mv = memoryview(src)
+    dst[pos:pos + n] = mv[offset:offset + n]
+
+def apply_lut_py(buf, lut, n: int) -> None:
+    """颜色校正：buf前n颗灯的每个字节按所在位置查表替换，lut为3×256字节（依次为灯珠缓冲区第0/1/2字节的表）"""
+    for i in range(0, n * 3, 3):
+        buf[i] = lut[buf[i]]
+        buf[i + 1] = lut[256 + buf[i + 1]]
+        buf[i + 2] = lut[512 + buf[i + 2]]
+
+def crc16_update_py(crc: int, data, start: int, n: int) -> int:
+    """把data[start:start + n]累加到CRC-16（查表，每字节一次），返回新的CRC；分段调用与一次算完结果相同"""
+    table = CRC16_TABLE
+    for i in range(start, start + n):
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ data[i]]
+    return crc
+
+def benchmark(repeat: int = 1000) -> None:
+    """板上对比（REPL中调用）：各热路径纯Python版本与当前实现单次调用的平均耗时（us）"""
+    ring = memoryview(bytearray(1024))
+    src = bytearray(range(64))
+    dst = bytearray(64)
+    pixels = bytearray(48)
+    pixel = bytearray((1, 2, 3))
+    lut = bytearray(i & 0xFF for i in range(768))
+    cases = (("ring_put 64B", ring_put_py, ring_put, (ring, 1000, src, 64)),
+             ("ring_get 64B", ring_get_py, ring_get, (dst, ring, 1000, 64)),
+             ("fill_pixels 16", fill_pixels_py, fill_pixels, (pixels, pixel, 16)),
+             ("copy_bytes 48B", copy_bytes_py, copy_bytes, (pixels, ring, 100, 48)),
+             ("copy_into 48B", copy_into_py, copy_into, (pixels, 0, ring, 100, 48)),
+             ("apply_lut 16", apply_lut_py, apply_lut, (pixels, lut, 16)),
+             ("crc16 64B", crc16_update_py, crc16_update, (CRC16_INIT, src, 0, 64)))
+    print("native active: %s" % NATIVE_ACTIVE)
+    for name, pure, current, args in cases:
+        costs = []
+        for fn in (pure, current):
+            start = time.ticks_us()
+            for _ in range(repeat):
+                fn(*args)
+            costs.append(time.ticks_diff(time.ticks_us(), start) / repeat)
+        print("%-16s pure %7.2f us  current %7.2f us" % (name, costs[0], costs[1]))
+    # CRC的每字节耗时（帧协议CRC尾的主要开销随帧长线性增长）
+    print("%-16s pure %7.3f us/B current %7.3f us/B" % ("crc16 per byte", costs[0] / 64, costs[1] / 64))
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+ring_put = ring_put_py
+ring_get = ring_get_py
+fill_pixels = fill_pixels_py
+copy_bytes = copy_bytes_py
+copy_into = copy_into_py
+apply_lut = apply_lut_py
+crc16_update = crc16_update_py
+NATIVE_ACTIVE = False  # 是否在用viper版本
+
+if NATIVE_ENABLE:
+    try:
+        from fast_native import ring_put, ring_get, fill_pixels, copy_bytes, copy_into, apply_lut, crc16_update, \
+            COPY_OFFSET_LIMIT
+        NATIVE_ACTIVE = True
+        if LOG_INFO:
+            log_info("⚡ Native fast paths enabled")
+        # 解析器按环形缓冲区存储区的下标拷贝：下标超出viper版copy_into可打包的范围时改用纯Python版本
+        if RING_BUFFER_SIZE > COPY_OFFSET_LIMIT:
+            copy_into = copy_into_py
+            if LOG_WARN:
+                log_warn("⚠️ RING_BUFFER_SIZE %d > %d, native copy_into disabled", RING_BUFFER_SIZE, COPY_OFFSET_LIMIT)
+    except (ImportError, SyntaxError, ValueError, NotImplementedError) as e:
+        # 未启用原生代码发射器（SyntaxError）、.mpy架构不符（ValueError）或文件缺失（ImportError）
+        if LOG_WARN:
+            log_warn("⚠️ Native fast paths unavailable (%s), using pure Python", e)
+
+# ========================================  主程序  ===========================================
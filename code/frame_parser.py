@@ -0,0 +1,585 @@
+# Python env   : MicroPython v1.27
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : frame_parser.py
+# @Description : 带同步头、类型、帧计数与长度字段（可选CRC-16帧尾）的帧格式（移位/稀疏增量/游程编码），
+#                以及可跨多次调用续接的流式解析状态机
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "MicroPython v1.27"
+
+# ======================================== 导入相关模块 =========================================
+
+from micropython import const
+from crc16 import CRC16_INIT
+from fast_paths import crc16_update, copy_into
+
+# ======================================== 全局变量 ============================================
+
+# 帧格式：SYNC1 SYNC2 TYPE SEQ LEN_H LEN_L PAYLOAD[LEN] [CRC_H CRC_L]
+FRAME_SYNC1 = const(0xA5)
+FRAME_SYNC2 = const(0x5A)
+FRAME_HEADER_SIZE = const(6)
+FRAME_MAX_PAYLOAD = const(0xFFFF)
+# TYPE最高位为1时帧尾带2字节大端CRC-16/CCITT-FALSE（见crc16.py），覆盖TYPE到负载末尾（不含同步头），LEN不含CRC；
+# 各级按转发出去的帧重新计算CRC，校验失败的帧不显示、不执行，并以错误的CRC转发，下游同样丢弃
+FRAME_FLAG_CRC = const(0x80)
+FRAME_CRC_SIZE = const(2)
+
+# 帧类型
+FRAME_TYPE_RGB = const(0x01)  # 移位传输：每个模块取走负载开头的数据，其余连同改写长度后的帧头转发
+FRAME_TYPE_DELTA = const(0x02)  # 稀疏增量：负载为若干条记录SKIP_H SKIP_L DATA，只寻址有变化的模块
+FRAME_TYPE_RLE = const(0x03)  # 游程编码：负载为若干条记录RUN_H RUN_L DATA，连续RUN个模块显示同一DATA
+FRAME_TYPE_DISCOVER = const(0x04)  # 链路发现：负载为COUNT_H COUNT_L + 各模块状态记录，每个模块计数加1并在末尾追加自己的记录
+FRAME_TYPE_HEAP = const(0x05)  # 堆状态查询：格式与发现帧相同，每个模块追加HEAP_RECORD_SIZE字节的堆记录
+
+# 发现帧中每个模块的状态记录：FLAGS LOST HW_H HW_L OVF_H OVF_L MV_H MV_L PROC_H PROC_L BAUD_H BAUD_L
+#                              OFS[4] ERR_H ERR_L（有符号：链路时间减本地时钟的偏移、最近一次时间信标的校正量，单位us）
+#                              STALL FULL（被下游流控暂停的次数、读取时接收口驱动缓冲区已满的次数，各1字节，超过255记为255）
+#                              CRC_H CRC_L（CRC校验失败而丢弃的帧数）
+STATUS_RECORD_SIZE = const(22)
+STATUS_LOW_BATTERY = const(0x01)  # FLAGS：低电压锁定（不响应灯效数据）
+STATUS_CUT_THROUGH = const(0x02)  # FLAGS：直通转发
+STATUS_PER_PIXEL = const(0x04)  # FLAGS：逐灯寻址
+STATUS_LATCH = const(0x08)  # FLAGS：同步锁存
+STATUS_TIME_SYNC = const(0x10)  # FLAGS：已收到时间信标（本地时钟已对齐链路时间）
+STATUS_FLOW = const(0x20)  # FLAGS：流控（XON/XOFF）
+STATUS_COLOR = const(0x40)  # FLAGS：颜色校正生效（查找表不是恒等映射）
+
+# 堆状态查询中每个模块的记录：GC_H GC_L AUTO_H AUTO_L PAUSE_H PAUSE_L（空闲时显式回收次数、自动回收次数、最长回收停顿us）
+#                              PF_H PF_L FREE_H FREE_L ALLOC_H ALLOC_L（最近一个回收周期内平均每帧分配的字节数、
+#                              空闲堆/16字节、已分配堆/16字节）
+HEAP_RECORD_SIZE = const(12)
+
+# 流控字符：经回传方向（下游接收口TX→上游转发口RX）发送的单字节，不成帧；回传方向上只有链路应答帧，不含这两个值
+FLOW_XON = const(0x11)  # 积压已消化，上游可以继续发送
+FLOW_XOFF = const(0x13)  # 积压过多，上游暂停发送
+
+# 命令帧：0x10~0x3F为广播命令，原样转发给下游，同时把负载交给本模块的命令回调；
+#         0x40~0x4F为逐跳命令，解析器不转发、不参与帧计数，只交给命令回调，由本模块决定是否（改写后）发往下游
+FRAME_CMD_FIRST = const(0x10)
+FRAME_CMD_LAST = const(0x3F)
+FRAME_LINK_FIRST = const(0x40)
+FRAME_LINK_LAST = const(0x4F)
+FRAME_TYPE_BAUD = const(0x10)  # 波特率协商：负载为4字节大端新波特率
+FRAME_TYPE_LINK_PING = const(0x40)  # 上游→下游：新波特率下的链路探测
+FRAME_TYPE_LINK_ACK = const(0x41)  # 下游→上游（回传方向）：对链路探测的应答
+FRAME_TYPE_SHOW = const(0x42)  # 锁存：负载为4字节大端提交延迟DELAY_US + 2字节大端每级扣减HOP_US，逐级改写后转发
+SHOW_PAYLOAD_SIZE = const(6)
+FRAME_TYPE_EFFECT = const(0x43)  # 本地灯效：负载为EFFECT_ID PARAM R G B PERIOD_H PERIOD_L PHASE_H PHASE_L STEP_H STEP_L，
+                                 # 逐级把PHASE加上STEP后转发，第k级模块的相位为PHASE + k×STEP
+EFFECT_PAYLOAD_SIZE = const(11)
+FRAME_TYPE_TIME = const(0x44)  # 时间信标：负载为4字节大端链路时间CHAIN_US（ticks_us，模2^30） + 2字节大端每级接收检测延迟HOP_US，
+                               # 逐级把CHAIN_US改写为下游收完该帧时的链路时间后转发
+TIME_PAYLOAD_SIZE = const(6)
+FRAME_TYPE_COLOR = const(0x45)  # 颜色校正：负载为MASK GAMMA_H GAMMA_L BRIGHT R G B SKIP_H SKIP_L COUNT_H COUNT_L，
+                                # MASK位0/1/2分别更新gamma（×100）/全局亮度/白平衡增益R G B（0~255），
+                                # 跳过前SKIP个模块后对COUNT个模块生效（0xFFFF为其后全部），逐级改写SKIP/COUNT后转发
+COLOR_PAYLOAD_SIZE = const(11)
+COLOR_COUNT_ALL = const(0xFFFF)
+# 命令帧负载最多保留的字节数，超出部分只转发不保留
+COMMAND_MAX_PAYLOAD = const(32)
+
+# 增量/游程记录的计数字段长度，记录总长为RECORD_COUNT_SIZE + 每模块数据长度
+RECORD_COUNT_SIZE = const(2)
+
+# 解析器状态
+_ST_SYNC1 = const(0)
+_ST_SYNC2 = const(1)
+_ST_HEADER = const(2)
+_ST_OWN = const(3)
+_ST_PASS = const(4)
+_ST_SKIP = const(5)
+_ST_RECORD = const(6)
+_ST_COMMAND = const(7)
+_ST_CRC = const(8)
+
+# ======================================== 功能函数 ============================================
+
+def build_header(frame_type: int, seq: int, length: int, buf: bytearray = None) -> bytearray:
+    """生成帧头；传入buf时原地写入（不分配内存）"""
+    if buf is None:
+        buf = bytearray(FRAME_HEADER_SIZE)
+    buf[0] = FRAME_SYNC1
+    buf[1] = FRAME_SYNC2
+    buf[2] = frame_type
+    buf[3] = seq & 0xFF
+    buf[4] = (length >> 8) & 0xFF
+    buf[5] = length & 0xFF
+    return buf
+
+def build_show(delay_us: int, hop_us: int, buf: bytearray = None) -> bytearray:
+    """生成锁存命令帧（帧头 + DELAY_US + HOP_US）；传入buf时原地写入"""
+    if buf is None:
+        buf = bytearray(FRAME_HEADER_SIZE + SHOW_PAYLOAD_SIZE)
+    build_header(FRAME_TYPE_SHOW, 0, SHOW_PAYLOAD_SIZE, buf)
+    buf[6] = (delay_us >> 24) & 0xFF
+    buf[7] = (delay_us >> 16) & 0xFF
+    buf[8] = (delay_us >> 8) & 0xFF
+    buf[9] = delay_us & 0xFF
+    buf[10] = (hop_us >> 8) & 0xFF
+    buf[11] = hop_us & 0xFF
+    return buf
+
+def build_effect(effect: int, param: int, r: int, g: int, b: int, period_ms: int, phase: int, step: int,
+                 buf: bytearray = None) -> bytearray:
+    """生成灯效命令帧（帧头 + 11字节负载，见FRAME_TYPE_EFFECT）；传入buf时原地写入"""
+    if buf is None:
+        buf = bytearray(FRAME_HEADER_SIZE + EFFECT_PAYLOAD_SIZE)
+    build_header(FRAME_TYPE_EFFECT, 0, EFFECT_PAYLOAD_SIZE, buf)
+    buf[6] = effect
+    buf[7] = param
+    buf[8] = r
+    buf[9] = g
+    buf[10] = b
+    buf[11] = (period_ms >> 8) & 0xFF
+    buf[12] = period_ms & 0xFF
+    buf[13] = (phase >> 8) & 0xFF
+    buf[14] = phase & 0xFF
+    buf[15] = (step >> 8) & 0xFF
+    buf[16] = step & 0xFF
+    return buf
+
+def build_time(chain_us: int, hop_us: int, buf: bytearray = None) -> bytearray:
+    """生成时间信标帧（帧头 + CHAIN_US + HOP_US）；传入buf时原地写入"""
+    if buf is None:
+        buf = bytearray(FRAME_HEADER_SIZE + TIME_PAYLOAD_SIZE)
+    build_header(FRAME_TYPE_TIME, 0, TIME_PAYLOAD_SIZE, buf)
+    buf[6] = (chain_us >> 24) & 0xFF
+    buf[7] = (chain_us >> 16) & 0xFF
+    buf[8] = (chain_us >> 8) & 0xFF
+    buf[9] = chain_us & 0xFF
+    buf[10] = (hop_us >> 8) & 0xFF
+    buf[11] = hop_us & 0xFF
+    return buf
+
+def build_color(mask: int, gamma: int, brightness: int, r: int, g: int, b: int, skip: int, count: int,
+                buf: bytearray = None) -> bytearray:
+    """生成颜色校正命令帧（帧头 + 11字节负载，见FRAME_TYPE_COLOR）；传入buf时原地写入"""
+    if buf is None:
+        buf = bytearray(FRAME_HEADER_SIZE + COLOR_PAYLOAD_SIZE)
+    build_header(FRAME_TYPE_COLOR, 0, COLOR_PAYLOAD_SIZE, buf)
+    buf[6] = mask
+    buf[7] = (gamma >> 8) & 0xFF
+    buf[8] = gamma & 0xFF
+    buf[9] = brightness
+    buf[10] = r
+    buf[11] = g
+    buf[12] = b
+    buf[13] = (skip >> 8) & 0xFF
+    buf[14] = skip & 0xFF
+    buf[15] = (count >> 8) & 0xFF
+    buf[16] = count & 0xFF
+    return buf
+
+def build_crc(buf, out: bytearray = None) -> bytearray:
+    """计算完整帧buf（帧头 + 负载，TYPE已置FRAME_FLAG_CRC）的CRC帧尾；传入out时原地写入"""
+    if out is None:
+        out = bytearray(FRAME_CRC_SIZE)
+    crc = crc16_update(CRC16_INIT, buf, 2, len(buf) - 2)
+    out[0] = crc >> 8
+    out[1] = crc & 0xFF
+    return out
+
+# ======================================== 自定义类 ============================================
+
+class FrameParser:
+    """
+    流式帧解析器
+    每个字节只被检查一次：帧头逐字节进入状态机，负载按整段处理，
+    一帧可以分散在任意多次feed中，一次feed也可以包含多帧，不要求帧间有空闲间隔。
+    解析过程不分配内存：feed按下标直接读取传入的缓冲区（不建切片或视图），定长字段用copy_into拷入预分配缓冲区，
+    转发以forward(buf, offset, n)发送buf[offset:offset + n]（与MicroPython流对象的write(buf, off, sz)相同）。
+    对FRAME_TYPE_RGB帧：负载前own_size字节留给本模块，其余负载连同长度减去own_size的帧头交给forward；
+    对FRAME_TYPE_DELTA/FRAME_TYPE_RLE帧，只有负载中的第一条记录与本模块有关：
+    - DELTA：SKIP为0时取走该记录的DATA，长度减去一条记录后转发其余记录；否则SKIP减1后整帧转发（本模块不刷新）。
+      第k条记录的SKIP是它与上一条记录所寻址模块之间相隔的模块数（第一条为距本模块的模块数）。
+    - RLE：取走第一条记录的DATA；RUN不大于1时去掉该记录转发其余记录，否则RUN减1后整帧转发。
+    两种帧都只改写帧头与第一条记录的计数字段，其余负载边收边转发，不需要缓存整帧。
+    负载被本模块取完时转发长度为0的帧头（带CRC时连同帧尾），下游收到这样的空帧只接上帧计数并原样转发，
+    不把上游已取完数据的帧计入lost。
+    对FRAME_TYPE_DISCOVER/FRAME_TYPE_HEAP帧：计数加1、长度加一条记录（STATUS_RECORD_SIZE/HEAP_RECORD_SIZE）后转发，
+    已有记录原样转发，最后追加status(frame_type)返回的本模块记录；未提供status时按未知类型处理。
+    命令帧收完整后以command(frame_type, payload)回调通知本模块，payload为负载前COMMAND_MAX_PAYLOAD字节的视图
+    （各长度的视图在构造时建好）；
+    广播命令同时原样转发，逐跳命令不转发。
+    未知类型的帧原样转发，留给下游（可能更新的固件）处理。
+    TYPE带FRAME_FLAG_CRC的帧：收到的字节逐段累加CRC，转发出去的字节另行累加，负载之后收齐CRC帧尾再结束本帧；
+    本模块数据与命令推迟到校验通过后才提交（payload与上一次的完好数据保持不变），校验失败计入crc_errors，
+    转发出去的部分补上按转发内容计算的CRC（失败时取反），下游同样丢弃。不带标志的帧与原先完全相同。
+    """
+
+    def __init__(self, own_size: int, forward: callable, command: callable = None, status: callable = None):
+        self.own_size = own_size
+        self.forward = forward
+        self.command = command
+        self.status = status
+        self._append = False  # 当前帧转发完后是否追加本模块状态记录
+        self._record_size = 0  # 当前发现/查询帧中每个模块的记录长度
+        self.command_buf = bytearray(COMMAND_MAX_PAYLOAD)
+        self._command_mv = memoryview(self.command_buf)
+        self._command_len = 0
+        # 每种长度一个预先建好的视图，命令回调不再切片
+        self._command_views = [self._command_mv[:k] for k in range(COMMAND_MAX_PAYLOAD + 1)]
+        self._command_forward = False
+        # 双缓冲：_own接收中，payload为最近一次收完整的本模块数据
+        self._own = bytearray(own_size)
+        self.payload = bytearray(own_size)
+        self.ready = False  # payload中有尚未被取走的新数据（取走后由调用者清零）
+        self.header = bytearray(FRAME_HEADER_SIZE)
+        self._out_header = bytearray(FRAME_HEADER_SIZE)
+        self._count = bytearray(RECORD_COUNT_SIZE)
+        self._out_count = bytearray(RECORD_COUNT_SIZE)
+        self._count_pos = 0
+        self._tee = False  # 本模块数据是否同时转发（RLE游程未结束时）
+        self.state = _ST_SYNC1
+        self._hdr_pos = 0
+        self._own_pos = 0
+        self.remaining = 0
+        self.frame_type = 0
+        self.seq = 0
+        self.last_seq = -1
+        # CRC帧尾
+        self.crc_frame = False  # 当前（最近一）帧带CRC帧尾
+        self._in_crc = 0  # 收到的帧的CRC
+        self._out_crc = 0  # 转发出去的帧的CRC
+        self._out_open = False  # 当前帧已向下游转发帧头，结束时须补上CRC帧尾
+        self._held = False  # 本模块数据已收完整，等待CRC帧尾校验后提交
+        self._is_command = False
+        self._crc_pos = 0
+        self._trailer = bytearray(FRAME_CRC_SIZE)
+        self._out_trailer = bytearray(FRAME_CRC_SIZE)
+        # 统计
+        self.frames = 0  # 收到的完整帧头数
+        self.lost = 0  # 按帧计数跳变推算的丢帧数
+        self.sync_errors = 0  # 寻找同步头时丢弃的字节数
+        self.short_frames = 0  # 负载不足own_size、无法取出本模块数据的RGB帧
+        self.crc_errors = 0  # CRC校验失败而丢弃的帧
+
+    def reset(self) -> None:
+        """丢弃解析到一半的帧，从寻找同步头重新开始"""
+        self.state = _ST_SYNC1
+        self._hdr_pos = 0
+        self._own_pos = 0
+        self._count_pos = 0
+        self._append = False
+        self._held = False
+        self._out_open = False
+        self.remaining = 0
+
+    def idle(self) -> bool:
+        """是否处于帧间（正在寻找同步头，没有解析到一半的帧）"""
+        return self.state == _ST_SYNC1
+
+    def feed(self, data, length: int = -1, start: int = 0) -> bool:
+        """
+        解析data[start:start + length]（length默认到data末尾），直接按下标读取data，如环形缓冲区的存储区
+        返回True表示本次调用中有新的本模块数据收完整，可从payload读取
+        """
+        n = len(data) if length < 0 else start + length
+        i = start
+        ready = False
+        while i < n:
+            state = self.state
+            if state == _ST_PASS or state == _ST_SKIP:
+                take = min(self.remaining, n - i)
+                if self.crc_frame:
+                    self._in_crc = crc16_update(self._in_crc, data, i, take)
+                if state == _ST_PASS:
+                    self._emit(data, i, take)
+                i += take
+                self.remaining -= take
+                if self.remaining == 0:
+                    self._end_payload()
+            elif state == _ST_OWN:
+                take = min(self.own_size - self._own_pos, n - i)
+                pos = self._own_pos
+                copy_into(self._own, pos, data, i, take)
+                if self.crc_frame:
+                    self._in_crc = crc16_update(self._in_crc, data, i, take)
+                if self._tee:
+                    self._emit(data, i, take)
+                i += take
+                self._own_pos = pos + take
+                self.remaining -= take
+                if self._own_pos == self.own_size:
+                    if self.crc_frame:
+                        self._held = True
+                    else:
+                        self._commit()
+                        ready = True
+                    if self.remaining:
+                        self.state = _ST_PASS
+                    else:
+                        self._end_payload()
+            elif state == _ST_HEADER:
+                pos = self._hdr_pos
+                take = min(FRAME_HEADER_SIZE - pos, n - i)
+                copy_into(self.header, pos, data, i, take)
+                i += take
+                self._hdr_pos = pos + take
+                if self._hdr_pos == FRAME_HEADER_SIZE:
+                    self._begin_frame()
+            elif state == _ST_RECORD:
+                pos = self._count_pos
+                take = min(RECORD_COUNT_SIZE - pos, n - i)
+                copy_into(self._count, pos, data, i, take)
+                if self.crc_frame:
+                    self._in_crc = crc16_update(self._in_crc, data, i, take)
+                i += take
+                self._count_pos = pos + take
+                self.remaining -= take
+                if self._count_pos == RECORD_COUNT_SIZE:
+                    self._begin_record()
+            elif state == _ST_COMMAND:
+                take = min(self.remaining, n - i)
+                pos = self._command_len
+                keep = min(take, COMMAND_MAX_PAYLOAD - pos)
+                if keep > 0:
+                    copy_into(self.command_buf, pos, data, i, keep)
+                    self._command_len = pos + keep
+                if self.crc_frame:
+                    self._in_crc = crc16_update(self._in_crc, data, i, take)
+                if self._command_forward:
+                    self._emit(data, i, take)
+                i += take
+                self.remaining -= take
+                if self.remaining == 0:
+                    self._end_payload()
+            elif state == _ST_CRC:
+                pos = self._crc_pos
+                take = min(FRAME_CRC_SIZE - pos, n - i)
+                copy_into(self._trailer, pos, data, i, take)
+                i += take
+                self._crc_pos = pos + take
+                if self._crc_pos == FRAME_CRC_SIZE:
+                    self.state = _ST_SYNC1
+                    if self._end_crc():
+                        ready = True
+            elif state == _ST_SYNC2:
+                b = data[i]
+                i += 1
+                if b == FRAME_SYNC2:
+                    self.header[0] = FRAME_SYNC1
+                    self.header[1] = FRAME_SYNC2
+                    self._hdr_pos = 2
+                    self.state = _ST_HEADER
+                elif b == FRAME_SYNC1:
+                    self.sync_errors += 1
+                else:
+                    self.sync_errors += 2
+                    self.state = _ST_SYNC1
+            else:
+                b = data[i]
+                i += 1
+                if b == FRAME_SYNC1:
+                    self.state = _ST_SYNC2
+                else:
+                    self.sync_errors += 1
+        return ready
+
+    def _begin_frame(self) -> None:
+        header = self.header
+        frame_type = header[2] & ~FRAME_FLAG_CRC
+        seq = header[3]
+        length = (header[4] << 8) | header[5]
+        crc = (header[2] & FRAME_FLAG_CRC) != 0
+        self.crc_frame = crc
+        if crc:
+            self._in_crc = crc16_update(CRC16_INIT, header, 2, FRAME_HEADER_SIZE - 2)
+        self._out_open = False
+        self._held = False
+        self._is_command = False
+        if FRAME_LINK_FIRST <= frame_type <= FRAME_LINK_LAST:
+            # 逐跳命令由上一级模块生成或改写，不计入帧计数
+            self._begin_command(frame_type, length, False)
+            return
+        if self.last_seq >= 0:
+            self.lost += (seq - self.last_seq - 1) & 0xFF
+        self.last_seq = seq
+        self.frame_type = frame_type
+        self.seq = seq
+        self.frames += 1
+        self.remaining = length
+
+        if FRAME_CMD_FIRST <= frame_type <= FRAME_CMD_LAST:
+            self._emit_header(header)
+            self._begin_command(frame_type, length, True)
+            return
+
+        if length == 0 and (frame_type == FRAME_TYPE_RGB or frame_type == FRAME_TYPE_DELTA or frame_type == FRAME_TYPE_RLE):
+            # 上游已取完全部数据的空帧：只传递帧计数，原样转发
+            self._emit_header(header)
+            self._end_payload()
+            return
+
+        if (frame_type == FRAME_TYPE_DISCOVER or frame_type == FRAME_TYPE_HEAP) and self.status is not None:
+            size = STATUS_RECORD_SIZE if frame_type == FRAME_TYPE_DISCOVER else HEAP_RECORD_SIZE
+            if length < RECORD_COUNT_SIZE or length + size > FRAME_MAX_PAYLOAD:
+                self.short_frames += 1
+                self._skip(length)
+                return
+            self._record_size = size
+            self._count_pos = 0
+            self.state = _ST_RECORD
+            return
+
+        if frame_type == FRAME_TYPE_DELTA or frame_type == FRAME_TYPE_RLE:
+            if length < RECORD_COUNT_SIZE + self.own_size:
+                self.short_frames += 1
+                self._skip(length)
+                return
+            self._count_pos = 0
+            self.state = _ST_RECORD
+            return
+
+        if frame_type != FRAME_TYPE_RGB:
+            # 未知类型：整帧原样转发
+            self._emit_header(header)
+            if length:
+                self.state = _ST_PASS
+            else:
+                self._end_payload()
+            return
+
+        if length < self.own_size:
+            self.short_frames += 1
+            self._skip(length)
+            return
+
+        # 负载全部属于本模块时仍转发长度为0的帧头，下游据此接上帧计数，不把这一帧记为丢失
+        self._emit_header(build_header(header[2], seq, length - self.own_size, self._out_header))
+        self._own_pos = 0
+        self._tee = False
+        self.state = _ST_OWN
+
+    def _begin_command(self, frame_type: int, length: int, forward: bool) -> None:
+        self.frame_type = frame_type
+        self.remaining = length
+        self._command_len = 0
+        self._command_forward = forward
+        self._is_command = True
+        if length:
+            self.state = _ST_COMMAND
+        else:
+            self._end_payload()
+
+    def _end_command(self) -> None:
+        if self.command is not None:
+            self.command(self.frame_type, self._command_views[self._command_len])
+
+    def _begin_record(self) -> None:
+        """第一条增量/游程记录的计数字段收完整：决定取走、改写还是跳过这条记录"""
+        count = (self._count[0] << 8) | self._count[1]
+        # 帧头中的长度含已收下的计数字段
+        length = self.remaining + RECORD_COUNT_SIZE
+        self._own_pos = 0
+        if self.frame_type == FRAME_TYPE_DISCOVER or self.frame_type == FRAME_TYPE_HEAP:
+            # 计数加1，已有记录原样转发，转发完后追加本模块记录
+            self._forward_record(length + self._record_size, (count + 1) & 0xFFFF)
+            self._append = True
+            if self.remaining:
+                self.state = _ST_PASS
+            else:
+                self._end_payload()
+            return
+        if self.frame_type == FRAME_TYPE_DELTA and count:
+            # 不是本模块：计数减1后整帧转发
+            self._forward_record(length, count - 1)
+            self.state = _ST_PASS
+            return
+        if self.frame_type == FRAME_TYPE_RLE and count > 1:
+            # 游程未结束：本模块显示该颜色，计数减1后连同颜色一起转发
+            self._forward_record(length, count - 1)
+            self._tee = True
+            self.state = _ST_OWN
+            return
+        # 记录属于本模块且到此为止：去掉这条记录转发其余记录
+        # 没有其余记录时转发长度为0的帧头，只传递帧计数
+        self._emit_header(build_header(self.header[2], self.seq, length - RECORD_COUNT_SIZE - self.own_size,
+                                       self._out_header))
+        self._tee = False
+        self.state = _ST_OWN
+
+    def _append_status(self) -> None:
+        self._append = False
+        rec = self.status(self.frame_type)
+        self._emit(rec, 0, self._record_size)
+
+    def _forward_record(self, length: int, count: int) -> None:
+        """转发长度为length的帧头与改写为count的第一条记录计数字段"""
+        self._emit_header(build_header(self.header[2], self.seq, length, self._out_header))
+        out = self._out_count
+        out[0] = (count >> 8) & 0xFF
+        out[1] = count & 0xFF
+        self._emit(out, 0, RECORD_COUNT_SIZE)
+
+    def _skip(self, length: int) -> None:
+        """丢弃长度为length的负载（不转发）"""
+        if length:
+            self.state = _ST_SKIP
+        else:
+            self._end_payload()
+
+    def _emit_header(self, buf) -> None:
+        """向下游转发帧头：此后本帧须以CRC帧尾结束（带CRC时）"""
+        self.forward(buf, 0, FRAME_HEADER_SIZE)
+        self._out_open = True
+        if self.crc_frame:
+            self._out_crc = crc16_update(CRC16_INIT, buf, 2, FRAME_HEADER_SIZE - 2)
+
+    def _emit(self, data, start: int, n: int) -> None:
+        """向下游转发帧头之后的字节data[start:start + n]"""
+        self.forward(data, start, n)
+        if self.crc_frame:
+            self._out_crc = crc16_update(self._out_crc, data, start, n)
+
+    def _commit(self) -> None:
+        """提交收完整的本模块数据：与payload交换"""
+        self._own, self.payload = self.payload, self._own
+        self.ready = True
+
+    def _end_payload(self) -> None:
+        """负载收完：追加本模块状态记录；带CRC的帧转入接收CRC帧尾，否则本帧结束（命令帧执行命令回调）"""
+        if self._append:
+            self._append_status()
+        if self.crc_frame:
+            self._crc_pos = 0
+            self.state = _ST_CRC
+            return
+        self.state = _ST_SYNC1
+        if self._is_command:
+            self._end_command()
+
+    def _end_crc(self) -> bool:
+        """
+        CRC帧尾收完整：转发出去的部分补上CRC帧尾（校验失败时取反，下游同样丢弃），
+        校验通过时执行命令回调或提交本模块数据，返回是否提交了本模块数据
+        """
+        trailer = self._trailer
+        ok = ((trailer[0] << 8) | trailer[1]) == self._in_crc
+        if self._out_open:
+            crc = self._out_crc if ok else self._out_crc ^ 0xFFFF
+            out = self._out_trailer
+            out[0] = crc >> 8
+            out[1] = crc & 0xFF
+            self.forward(out, 0, FRAME_CRC_SIZE)
+            self._out_open = False
+        held = self._held
+        self._held = False
+        if not ok:
+            self.crc_errors += 1
+            return False
+        if self._is_command:
+            self._end_command()
+        if held:
+            self._commit()
+        return held
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -4,47 +4,54 @@
 # @Author  : 李清水
 # @File    : main.py
 # @Description : 实现 UART 解析 RGB 控制 WS2812 并转发数据，
-#                ADC 滑动滤波监测电池电压（低电告警禁 UART 控灯），集成 WDT 防卡死，通过环形缓冲区、中断调度保障运行稳定。
+#                ADC 滑动滤波监测电池电压（低电告警禁 UART 控灯），集成 WDT 防卡死；
+#                接收、刷新、电池监测、喂狗与灯效为asyncio任务，由中断/定时器回调置位标志唤醒，空闲时不轮询。
 
 # ======================================== 导入相关模块 =========================================
 
-from machine import UART, Pin, disable_irq, enable_irq, ADC, Timer, WDT
-import time
-import neopixel
+from machine import UART, Timer
+import asyncio
 import micropython
 from config import *
-from utils import debug_print, timed_function
+from utils import debug_print
 from core_protected import *
 
 # ======================================== 全局变量 ============================================
 
 # ======================================== 功能函数 ============================================
 
-# ======================================== 自定义类 ============================================
-
-# ======================================== 初始化配置 ==========================================
-
-# 分配紧急异常缓冲区（防止中断中出现异常时无法打印信息）
-micropython.alloc_emergency_exception_buf(100)
-
-# 初始化电池电压采集定时器（100ms一次）
-battery_timer = Timer(-1)
-battery_timer.init(period=BATTERY_TIMER_PERIOD, mode=Timer.PERIODIC, callback=read_battery_adc)
-
-# 初始化UART接收和转发端口
-uart_recv = UART(0, baudrate=BAUDRATE, tx=Pin(0), rx=Pin(1), bits=8, parity=None, stop=1)
-# 配置UART空闲中断（接收完成后触发）
-uart_recv.irq(handler=uart_idle_callback, trigger=UART.IRQ_RXIDLE, hard=False)
-debug_print("✅ WDT initialized with timeout: %d seconds" % (WDT_TIMEOUT / 1000))
-
-# 初始化喂狗软件定时器（1秒周期自动喂狗）
-wdt_feed_timer = Timer(-1)
-wdt_feed_timer.init(period=WDT_FEED_PERIOD, mode=Timer.PERIODIC, callback=wdt_feed_callback)
-debug_print("✅ WDT feed timer initialized with period: %d seconds" % (WDT_FEED_PERIOD / 1000))
-
-# ========================================  主程序  ===========================================
-
-if __name__ == "__main__":
+def start_receive_path():
+    """接通接收/转发通路：直通轮询定时器或UART空闲中断，以及接收、刷新与灯效任务"""
+    if CUT_THROUGH_ENABLE:
+        # 直通转发：定时轮询接收口，收满本模块数据后边收边转发
+        cut_through_timer.init(freq=CUT_THROUGH_POLL_FREQ, mode=Timer.PERIODIC,
+                               callback=lambda t: cut_through_poll(uart_recv))
+        debug_print("✅ Cut-through forwarding enabled, poll frequency: %d Hz" % CUT_THROUGH_POLL_FREQ)
+    else:
+        # 配置UART空闲中断（接收完成后触发，置位uart_flag唤醒接收任务）
+        uart_recv.irq(handler=uart_idle_callback, trigger=UART.IRQ_RXIDLE, hard=False)
+        asyncio.create_task(uart_ingest_task())
+        if FLOW_ACTIVE:
+            # 流控：连续收数据时空闲中断不触发，由定时器搬运积压并收发XON/XOFF（直通模式在轮询中完成）
+            flow_timer.init(freq=FLOW_POLL_FREQ, mode=Timer.PERIODIC, callback=flow_poll)
+        elif DRAIN_ACTIVE:
+            # 帧协议：长帧连续到达时由定时器搬运已到达的字节，解析器边收边转发，帧长不受环形缓冲区大小限制；
+            # 定时器由RX引脚的下降沿启动、数据读空后停止，线路空闲时不唤醒
+            drain_arm()
+    if FLOW_ACTIVE:
+        debug_print("✅ Flow control (XON/XOFF) enabled, XOFF at %d bytes, XON at %d bytes" %
+                    (FLOW_XOFF_LEVEL, FLOW_XON_LEVEL))
+    asyncio.create_task(render_task())
+    asyncio.create_task(effect_task())
+    if COLOR_CORRECT_ENABLE:
+        asyncio.create_task(color_task())
+    if LATCH_ACTIVE:
+        asyncio.create_task(latch_task())
+    elif LATCH_ENABLE:
+        debug_print("⚠️ LATCH_ENABLE ignored: synchronized latch requires FRAMED_PROTOCOL_ENABLE")
+    boot_mark("receive path")
+
+async def main():
     debug_print("=== UART+WS2812+Battery Monitor ===")
     debug_print("UART Baudrate: %d" % BAUDRATE)
     debug_print("WS2812: GP%d, %d LEDs" % (WS2812_PIN, WS2812_NUM))
@@ -54,60 +61,60 @@ if __name__ == "__main__":
     RING_BUFFER_SIZE, RING_BUFFER_SIZE - 1))
     debug_print("Debug Mode: %s" % ("Enabled" if DEBUG_ENABLE else "Disabled"))
 
+    asyncio.create_task(watchdog_task())
+    debug_print("✅ WDT feed task started with period: %d seconds" % (WDT_FEED_PERIOD / 1000))
+    # 空闲回收：GC_IDLE_ENABLE时由接收路径在每段数据结束后重新计时的单次定时器触发，在帧间空闲显式回收
+    if GC_IDLE_ENABLE:
+        debug_print("✅ Idle GC enabled: collect after %d ms of line idle once %d bytes allocated" % (
+            GC_IDLE_MS, GC_MIN_ALLOC))
+    # 快速启动：先接通数据通路，上电检测和开机灯效期间照常接收转发
+    if FAST_BOOT_ENABLE:
+        start_receive_path()
+
     # 上电电压检测
-    avg_voltage = power_on_battery_check()
-    if avg_voltage < LOW_VOLTAGE_THRESHOLD:
-        low_battery_flag = True
-        debug_print("⚠️ Low Battery! (Avg: %.2fV < %.1fV) → Red LED On" % (avg_voltage, LOW_VOLTAGE_THRESHOLD))
-        set_ws2812_color(255, 0, 0)
+    avg_voltage = await power_on_battery_check()
+    boot_mark("battery check")
+    if battery_is_low(False):
+        set_low_battery_flag(True)
+        debug_print("⚠️ Low Battery! (Avg: %.2fV < %.1fV) → Red LED Flash" % (avg_voltage, LOW_VOLTAGE_THRESHOLD))
+        start_low_battery_flash()
     else:
-        low_battery_flag = False
-        debug_print("✅ Battery Normal (Avg: %.2fV) → Rainbow Flow" % avg_voltage)
-        rainbow_flow()
+        set_low_battery_flag(False)
+        if STARTUP_EFFECT_ENABLE:
+            debug_print("✅ Battery Normal (Avg: %.2fV) → Rainbow Flow" % avg_voltage)
+            if FAST_BOOT_ENABLE:
+                asyncio.create_task(rainbow_flow())
+            else:
+                await rainbow_flow()
+                boot_mark("startup effect")
+        else:
+            debug_print("✅ Battery Normal (Avg: %.2fV)" % avg_voltage)
 
-    # 初始化上一次状态
-    prev_low_battery = low_battery_flag
-    flash_count = 0
+    if not FAST_BOOT_ENABLE:
+        start_receive_path()
 
-    # 主循环
+    # 上电检测已填满滑动窗口，之后由定时器持续采样（100ms一次）
+    battery_timer.init(period=BATTERY_TIMER_PERIOD, mode=Timer.PERIODIC, callback=read_battery_adc)
     debug_print("\n=== Battery Voltage Monitor (Sliding Filter) ===")
-    while True:
-        # 打印实时电压和5次平均电压（每500ms一次）
-        if flash_count % 5 == 0:
-            avg_volt = get_battery_avg_voltage()
-            debug_print("Battery Voltage - Single: %.2fV | Avg(5): %.2fV | Low Battery: %s" % (
-            battery_voltage, avg_volt, low_battery_flag))
-
-        # 1. 检测当前电压状态（基于5次滑动平均值）
-        avg_volt = get_battery_avg_voltage()
-        current_low_battery = avg_volt < LOW_VOLTAGE_THRESHOLD
-
-        # 2. 低电压→正常电压 恢复逻辑
-        if prev_low_battery and not current_low_battery:
-            debug_print("✅ Battery Recovered! (Avg: %.2fV ≥ %.1fV) → LED Off, Restore UART Control" % (
-            avg_volt, LOW_VOLTAGE_THRESHOLD))
-            low_battery_flag = False  # 清除低电压标志
-            set_ws2812_color(0, 0, 0)  # 关闭红灯
-        # 3. 正常→低电压 告警逻辑
-        elif not prev_low_battery and current_low_battery:
-            debug_print("⚠️ Battery Low! (Avg: %.2fV < %.1fV) → Red LED Flash" % (avg_volt, LOW_VOLTAGE_THRESHOLD))
-            low_battery_flag = True
-
-        # 4. 低电压时红灯闪烁
-        if current_low_battery:
-            if flash_count % 10 < 5:
-                set_ws2812_color(255, 0, 0)
-            else:
-                set_ws2812_color(0, 0, 0)
+    await battery_task()
 
-        # 5. 更新上一次状态（用于下一次循环对比）
-        prev_low_battery = current_low_battery
+# ======================================== 自定义类 ============================================
 
-        # 计数器递增
-        flash_count += 1
+# ======================================== 初始化配置 ==========================================
 
-        # 关键修改：主循环末尾补充喂狗
-        wdt.feed()
-        debug_print("🐶 WDT fed (main loop end)")
+# 分配紧急异常缓冲区（防止中断中出现异常时无法打印信息）
+micropython.alloc_emergency_exception_buf(100)
 
-        time.sleep_ms(100)
\ No newline at end of file
+# 电池电压采集定时器（上电检测结束后在main中启动）
+battery_timer = Timer(-1)
+
+# UART接收和转发端口已在core_protected中初始化（波特率协商需要同时切换两者），接收通路由start_receive_path接通
+cut_through_timer = Timer(-1)
+flow_timer = Timer(-1)
+boot_mark("imported")
+debug_print("✅ WDT initialized with timeout: %d seconds" % (WDT_TIMEOUT / 1000))
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    asyncio.run(main())
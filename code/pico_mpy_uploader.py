@@ -3,99 +3,257 @@
 # @Time    : 2025/9/5 下午10:12
 # @Author  : 李清水
 # @File    : pico_mpy_uploader.py
-# @Description : pico_mpy_uploader，编译mpy文件
+# @Description : pico_mpy_uploader，编译mpy文件并上传：按内容哈希缓存（未改动的文件不重新编译、不重新上传），进程池并行编译，
+#                每块板一个mpremote会话批量上传，多块板按并发上限同时部署并逐板汇总
+#                用法：python pico_mpy_uploader.py --port /dev/ttyACM0 --port /dev/ttyACM1 --parallel 8
+#                     python pico_mpy_uploader.py --all          （mpremote connect list列出的全部板）
+#                mpy-cross/mpremote命令可用--mpy-cross/--mpremote或环境变量MPY_CROSS/MPREMOTE替换（如测试用的替身脚本）
+#                含viper代码的文件（NATIVE_FILES）按--arch加上mpy-cross的-march参数编译（默认armv6m，即RP2040），
+#                --arch none时以.py上传，由板上编译器按芯片架构编译
 # @License : CC BY-NC 4.0
 
-__version__ = "0.1.0"
+__version__ = "0.3.0"
 __author__ = "李清水"
 __license__ = "CC BY-NC 4.0"
 __platform__ = "MicroPython v1.27"
 
 # ======================================== 导入相关模块 =========================================
 
+import argparse
+import hashlib
+import json
 import os
+import shlex
 import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 # ======================================== 全局变量 ============================================
 
+# 缓存目录（相对源文件目录）：build/下为编译产物，build.json记录每个产物对应的源文件哈希，boards/下为每块板已上传文件的哈希
+CACHE_DIR = ".mpy_cache"
+
+# 直接以.py上传的文件（上电入口须为main.py），其余.py编译为.mpy
+RAW_FILES = ("main.py",)
+
+# 含@micropython.viper/native函数的文件：须按目标芯片架构编译（-march），不指定架构时以.py上传
+NATIVE_FILES = ("fast_native.py",)
+
+# mpy-cross支持的原生代码架构（RP2040为armv6m，RP2350为armv7emsp）；"none"表示含原生代码的文件以.py上传
+ARCHES = ("none", "armv6m", "armv7m", "armv7em", "armv7emsp", "armv7emdp", "xtensa", "xtensawin", "rv32imc",
+          "x86", "x64")
+DEFAULT_ARCH = "armv6m"
+
+# 未指定--port时的板名：不带connect参数，由mpremote自动选择
+AUTO_PORT = "auto"
+
+DEFAULT_MPY_CROSS = "%s -m mpy_cross" % shlex.quote(sys.executable)
+DEFAULT_MPREMOTE = "mpremote"
+
 # ======================================== 功能函数 ============================================
 
-def main():
-    # 1. 区分文件：main.py单独处理，其他py文件编译
+def file_hash(path: str, salt: str = "") -> str:
+    """文件内容（加上编译命令等影响产物的参数）的SHA-256"""
+    h = hashlib.sha256(salt.encode())
+    with open(path, "rb") as f:
+        h.update(f.read())
+    return h.hexdigest()
+
+def load_json(path: str) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_json(path: str, data: dict) -> None:
+    """先写临时文件再替换，中途中断不会留下损坏的缓存"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+def board_key(port: str) -> str:
+    """板名转为缓存文件名"""
+    return "".join(c if c.isalnum() or c in "-_." else "_" for c in port)
+
+def list_sources(src_dir: str) -> list:
+    """待部署的.py文件（排除本脚本）"""
     current_script = os.path.basename(__file__)
-    all_py_files = [f for f in os.listdir(".") if f.endswith(".py") and f != current_script]
-    main_file = "main.py" if "main.py" in all_py_files else None
-    compile_py_files = [f for f in all_py_files if f != main_file]  # 排除main.py
+    return sorted(f for f in os.listdir(src_dir) if f.endswith(".py") and f != current_script)
 
-    if not all_py_files:
-        print("当前文件夹没有可处理的Python文件！")
-        return
-
-    # 2. 编译非main.py的py文件为mpy
-    compiled_mpy = []
-    if compile_py_files:
-        print("=== 开始编译py文件为mpy（排除main.py）===")
-        for py_file in compile_py_files:
-            mpy_file = py_file.replace(".py", ".mpy")
-            try:
-                # 调用mpy-cross编译
-                subprocess.run(
-                    ["python", "-m", "mpy_cross", py_file, "-o", mpy_file],
-                    check=True,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                print(f"✅ 编译成功: {py_file} → {mpy_file}")
-                compiled_mpy.append(mpy_file)
-            except subprocess.CalledProcessError as e:
-                print(f"❌ 编译失败 {py_file}: {e.stderr}")
-
-    # 3. 上传文件到Pico
-    print("\n=== 开始上传到树莓派Pico ===")
-    # 先传编译后的mpy文件
-    for mpy_file in compiled_mpy:
-        try:
-            subprocess.run(
-                ["mpremote", "fs", "cp", mpy_file, ":/"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            print(f"✅ 上传成功: {mpy_file}")
-        except subprocess.CalledProcessError as e:
-            print(f"❌ 上传失败 {mpy_file}: {e.stderr}")
+def remote_name(name: str, arch: str) -> str:
+    """源文件在板上的文件名：RAW_FILES与未指定架构时的NATIVE_FILES保持.py，其余为.mpy"""
+    if name in RAW_FILES or (name in NATIVE_FILES and arch == "none"):
+        return name
+    return name[:-3] + ".mpy"
+
+def compile_one(mpy_cross: str, src: str, out: str) -> tuple:
+    """进程池中执行：调用mpy-cross编译一个文件，返回(源文件, 错误信息或None)"""
+    try:
+        subprocess.run(shlex.split(mpy_cross) + [src, "-o", out], check=True, stdout=subprocess.PIPE,
+                       stderr=subprocess.PIPE, text=True)
+    except subprocess.CalledProcessError as e:
+        return src, (e.stderr or e.stdout or str(e)).strip()
+    except FileNotFoundError as e:
+        return src, str(e)
+    return src, None
+
+def build(src_dir: str, mpy_cross: str, jobs: int, force: bool = False, arch: str = DEFAULT_ARCH) -> tuple:
+    """
+    编译源文件：源文件哈希（含编译命令）与build.json中记录一致且产物存在时跳过，其余在进程池中并行编译；
+    NATIVE_FILES的编译命令加上-march=arch
+    返回(产物列表[(本地路径, 板上文件名, 哈希)], 重新编译数, 命中缓存数, 编译失败列表[(文件, 错误)])，main.py排在最后
+    """
+    cache = os.path.join(src_dir, CACHE_DIR)
+    build_dir = os.path.join(cache, "build")
+    os.makedirs(build_dir, exist_ok=True)
+    manifest_path = os.path.join(cache, "build.json")
+    manifest = {} if force else load_json(manifest_path)
+
+    artifacts = []
+    todo = []
+    for name in list_sources(src_dir):
+        src = os.path.join(src_dir, name)
+        remote = remote_name(name, arch)
+        if remote == name:
+            artifacts.append((src, name, file_hash(src)))
+            continue
+        cmd = mpy_cross + (" -march=%s" % arch if name in NATIVE_FILES else "")
+        digest = file_hash(src, cmd)
+        out = os.path.join(build_dir, remote)
+        artifacts.append((out, remote, digest))
+        if manifest.get(name) != digest or not os.path.exists(out):
+            todo.append((name, src, out, digest, cmd))
 
-    # 单独上传main.py（直接传原文件）
-    if main_file:
+    failed = []
+    if todo:
+        with ProcessPoolExecutor(max_workers=max(1, jobs)) as pool:
+            results = pool.map(compile_one, [t[4] for t in todo], [t[1] for t in todo], [t[2] for t in todo])
+            for (name, src, out, digest, cmd), (_, error) in zip(todo, results):
+                if error is None:
+                    manifest[name] = digest
+                    print("✅ 编译成功: %s → %s" % (name, os.path.basename(out)))
+                else:
+                    manifest.pop(name, None)
+                    failed.append((name, error))
+                    print("❌ 编译失败 %s: %s" % (name, error))
+        save_json(manifest_path, manifest)
+
+    # 编译失败的文件不上传（板上保留旧版本）；main.py最后上传，上传中断时不会先启动引用了缺失模块的入口
+    bad = set(name[:-3] + ".mpy" for name, _ in failed)
+    artifacts = [a for a in artifacts if a[1] not in bad]
+    artifacts.sort(key=lambda a: a[1] in RAW_FILES)
+    cached = sum(1 for a in artifacts if a[1].endswith(".mpy")) - (len(todo) - len(failed))
+    return artifacts, len(todo) - len(failed), cached, failed
+
+def deploy_board(port: str, artifacts: list, src_dir: str, mpremote: str, force: bool = False,
+                 reset: bool = False) -> dict:
+    """
+    部署到一块板：只上传哈希与该板上次成功上传时不同的文件，全部文件在一个mpremote会话中用一条cp命令写入；
+    同一模块换了板上文件名（切换--arch时.py与.mpy互换）时在同一会话中删除旧文件，否则板上优先导入.py；
+    会话成功后才更新该板的上传记录
+    """
+    start = time.perf_counter()
+    manifest_path = os.path.join(src_dir, CACHE_DIR, "boards", board_key(port) + ".json")
+    manifest = {} if force else load_json(manifest_path)
+    changed = [a for a in artifacts if manifest.get(a[1]) != a[2]]
+    current = set(a[1] for a in artifacts)
+    modules = set(a[1].rsplit(".", 1)[0] for a in artifacts)
+    stale = sorted(name for name in manifest if name not in current and name.rsplit(".", 1)[0] in modules)
+    result = {"port": port, "uploaded": len(changed), "unchanged": len(artifacts) - len(changed),
+              "removed": len(stale), "bytes": sum(os.path.getsize(a[0]) for a in changed), "error": None}
+    if changed or stale or reset:
+        commands = []
+        if changed:
+            commands.append(["fs", "cp"] + [a[0] for a in changed] + [":/"])
+        if stale:
+            commands.append(["fs", "rm"] + [":" + name for name in stale])
+        if reset:
+            commands.append(["reset"])
+        cmd = shlex.split(mpremote)
+        if port != AUTO_PORT:
+            cmd += ["connect", port]
+        for i, command in enumerate(commands):
+            cmd += (["+"] if i else []) + command
         try:
-            subprocess.run(
-                ["mpremote", "fs", "cp", main_file, ":/"],
-                check=True,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            print(f"✅ 上传成功（直接传py）: {main_file}")
+            subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
         except subprocess.CalledProcessError as e:
-            print(f"❌ 上传失败 {main_file}: {e.stderr}")
+            result["error"] = (e.stderr or e.stdout or str(e)).strip()
+        except FileNotFoundError as e:
+            result["error"] = str(e)
+        if result["error"] is None:
+            for path, name, digest in changed:
+                manifest[name] = digest
+            for name in stale:
+                manifest.pop(name)
+            save_json(manifest_path, manifest)
+    result["seconds"] = time.perf_counter() - start
+    return result
 
-# ======================================== 自定义类 ============================================
+def list_ports(mpremote: str) -> list:
+    """mpremote connect list列出的串口设备（每行第一列）"""
+    out = subprocess.run(shlex.split(mpremote) + ["connect", "list"], check=True, stdout=subprocess.PIPE,
+                         stderr=subprocess.PIPE, text=True).stdout
+    return [line.split()[0] for line in out.splitlines() if line.strip()]
 
-# ======================================== 初始化配置 ==========================================
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Compile to .mpy and deploy to one or many Pico boards")
+    parser.add_argument("--src", default=".", help="源文件目录（默认当前目录）")
+    parser.add_argument("--port", action="append", default=[], help="目标板串口，可重复；不指定时由mpremote自动选择")
+    parser.add_argument("--all", action="store_true", help="部署到mpremote connect list列出的全部板")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="并行编译的进程数")
+    parser.add_argument("--parallel", type=int, default=4, help="同时部署的板数上限")
+    parser.add_argument("--force", action="store_true", help="忽略缓存，全部重新编译并上传")
+    parser.add_argument("--reset", action="store_true", help="上传后复位板子（同一会话内）")
+    parser.add_argument("--arch", choices=ARCHES, default=os.environ.get("MPY_ARCH", DEFAULT_ARCH),
+                        help="含viper代码的文件的目标架构（mpy-cross -march），none为以.py上传由板上编译")
+    parser.add_argument("--mpy-cross", default=os.environ.get("MPY_CROSS", DEFAULT_MPY_CROSS), help="mpy-cross命令")
+    parser.add_argument("--mpremote", default=os.environ.get("MPREMOTE", DEFAULT_MPREMOTE), help="mpremote命令")
+    args = parser.parse_args(argv)
 
-# ========================================  主程序  ===========================================
-
-if __name__ == "__main__":
-    # 检查依赖工具是否安装
+    if not list_sources(args.src):
+        print("当前文件夹没有可处理的Python文件！")
+        return 1
     try:
-        subprocess.run(["python", "-m", "mpy_cross", "--version"], check=True, stdout=subprocess.PIPE,
-                       stderr=subprocess.PIPE)
-        subprocess.run(["mpremote", "--version"], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        ports = list(args.port) + (list_ports(args.mpremote) if args.all else [])
     except (subprocess.CalledProcessError, FileNotFoundError):
         print("请先安装依赖工具：")
         print("pip install mpy-cross mpremote")
-        exit(1)
+        return 1
+    if args.all and not ports:
+        print("未找到已连接的板（mpremote connect list为空）！")
+        return 1
+    ports = list(dict.fromkeys(ports)) or [AUTO_PORT]
+
+    print("=== 编译py文件为mpy（排除main.py，未改动的文件跳过，原生代码架构 %s）===" % args.arch)
+    t0 = time.perf_counter()
+    artifacts, compiled, cached, failed = build(args.src, args.mpy_cross, args.jobs, args.force, args.arch)
+    print("编译 %d 个，缓存 %d 个，失败 %d 个（%.1f s）" % (compiled, cached, len(failed), time.perf_counter() - t0))
 
-    main()
\ No newline at end of file
+    print("\n=== 上传到 %d 块板（并发 %d）===" % (len(ports), args.parallel))
+    t0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, args.parallel)) as pool:
+        results = list(pool.map(lambda p: deploy_board(p, artifacts, args.src, args.mpremote, args.force,
+                                                        args.reset), ports))
+    for r in results:
+        if r["error"] is None:
+            print("✅ %-20s 上传 %3d 个（%7.1f KB），未改动 %3d 个，删除 %d 个，%6.1f s" % (
+                r["port"], r["uploaded"], r["bytes"] / 1024, r["unchanged"], r["removed"], r["seconds"]))
+        else:
+            print("❌ %-20s 上传失败：%s" % (r["port"], r["error"]))
+    ok = sum(1 for r in results if r["error"] is None)
+    print("\n共 %d 块板：成功 %d，失败 %d，用时 %.1f s" % (len(results), ok, len(results) - ok,
+                                                    time.perf_counter() - t0))
+    return 0 if ok == len(results) and not failed else 1
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    sys.exit(main())
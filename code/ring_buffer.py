@@ -13,9 +13,8 @@ __platform__ = "MicroPython v1.27"
 
 # ======================================== 导入相关模块 =========================================
 
-from machine import disable_irq, enable_irq
-# 导入配置（编译mpy后仍可正常导入明文配置）
-from config import DEBUG_ENABLE
+from utils import log_warn, LOG_WARN
+from fast_paths import ring_put, ring_get
 
 # ======================================== 全局变量 ============================================
 
@@ -25,11 +24,23 @@ from config import DEBUG_ENABLE
 # ======================================== 自定义类 ============================================
 
 class RingBuffer:
+    """
+    单生产者/单消费者环形缓冲区
+    生产者（UART中断回调）只修改tail，消费者（调度执行的处理函数）只修改head，
+    每个索引只有一方写入，且都在数据拷贝完成后才更新，因此读写双方都无需关中断。
+    存储区与其memoryview在构造时一次分配，write/readinto的字节拷贝由fast_paths的ring_put/ring_get完成（viper版本不分配切片对象），
+    peek直接返回存储区上的memoryview，配合consume实现零拷贝消费；
+    热路径用contiguous取得从head开始的连续字节数，直接按下标读取buf[head:head + n]，连视图对象也不分配。
+    """
+
     def __init__(self, size: int):
         self.buf = bytearray(size)
+        self._mv = memoryview(self.buf)
         self.size = size  # 总容量
-        self.head = 0  # 读指针（下一个要读取的位置）
-        self.tail = 0  # 写指针（下一个要写入的位置）
+        self.head = 0  # 读指针（下一个要读取的位置），仅消费者修改
+        self.tail = 0  # 写指针（下一个要写入的位置），仅生产者修改
+        self.overflow = 0  # 缓冲区满被丢弃的累计字节数
+        self.high_water = 0  # 历史最大占用字节数
 
     def is_empty(self) -> bool:
         """判断缓冲区是否为空（仅head==tail表示空）"""
@@ -39,50 +50,84 @@ class RingBuffer:
         """判断缓冲区是否为满（预留1字节，避免head==tail歧义）"""
         return (self.tail + 1) % self.size == self.head
 
-    def write(self, data: bytearray, length: int) -> int:
-        if length <= 0:
-            return 0
-
-        # 计算实际可用的空闲空间（预留1字节，避免满/空歧义）
-        if self.is_full():
-            debug_print("⚠️ Ring buffer full (usable: %d bytes), discarding data" % (self.size - 1))
-            return 0
-
-        # 计算空闲空间大小
-        if self.tail >= self.head:
-            free = (self.size - self.tail - 1) + self.head  # 减1是预留空间
-        else:
-            free = self.head - self.tail - 1
+    def available(self) -> int:
+        """可读字节数"""
+        return (self.tail - self.head) % self.size
 
-        write_len = min(length, free)
-        part1_len = min(write_len, self.size - self.tail)
-        self.buf[self.tail:self.tail + part1_len] = data[:part1_len]
+    def free(self) -> int:
+        """可写字节数（预留1字节）"""
+        return self.size - 1 - (self.tail - self.head) % self.size
 
-        part2_len = write_len - part1_len
-        if part2_len > 0:
-            self.buf[0:part2_len] = data[part1_len:part1_len + part2_len]
+    def write(self, data, length: int) -> int:
+        """写入data的前length字节，空间不足时只写入能放下的部分，其余计入overflow"""
+        if length <= 0:
+            return 0
 
-        self.tail = (self.tail + write_len) % self.size
+        tail = self.tail
+        used = (tail - self.head) % self.size
+        write_len = min(length, self.size - 1 - used)
+        if write_len < length:
+            self.overflow += length - write_len
+            if LOG_WARN:
+                log_warn("⚠️ Ring buffer full (usable: %d bytes), discarding %d bytes", self.size - 1,
+                         length - write_len)
+            if write_len == 0:
+                return 0
+
+        # 数据拷贝完成后再发布新的写指针
+        self.tail = ring_put(self._mv, tail, data, write_len)
+        used += write_len
+        if used > self.high_water:
+            self.high_water = used
         return write_len
 
+    def peek(self, n: int = -1) -> memoryview:
+        """
+        返回从读指针开始、最多n字节（默认全部）的连续数据视图，不移动读指针
+        数据跨越存储区末尾时只返回末尾之前的部分，消费后再次peek取得其余部分
+        """
+        head = self.head
+        tail = self.tail
+        end = tail if tail >= head else self.size
+        if n >= 0 and head + n < end:
+            end = head + n
+        return self._mv[head:end]
+
+    def contiguous(self, n: int = -1) -> int:
+        """
+        从读指针开始、最多n字节（默认全部）的连续可读字节数（数据在buf[head:head + 返回值]），不移动读指针、不分配对象
+        数据跨越存储区末尾时只计末尾之前的部分，消费后再次调用取得其余部分
+        """
+        head = self.head
+        tail = self.tail
+        count = (tail if tail >= head else self.size) - head
+        if 0 <= n < count:
+            count = n
+        return count
+
+    def consume(self, n: int) -> None:
+        """丢弃已处理的n字节（n不得超过available()）"""
+        self.head = (self.head + n) % self.size
+
+    def readinto(self, buf, nbytes: int = -1) -> int:
+        """拷贝最多nbytes（默认len(buf)）字节到buf开头并消费，返回实际字节数"""
+        n = len(buf) if nbytes < 0 else min(nbytes, len(buf))
+        head = self.head
+        n = min(n, (self.tail - head) % self.size)
+        if n == 0:
+            return 0
+        self.head = ring_get(buf, self._mv, head, n)
+        return n
+
     def read_all(self) -> bytearray:
-        # 禁用中断防止读写冲突（原子操作）
-        irq_state = disable_irq()
-        try:
-            if self.is_empty():  # 仅用is_empty判断，避免歧义
-                return bytearray()
-
-            if self.tail > self.head:
-                data = self.buf[self.head:self.tail]
-            else:
-                data = self.buf[self.head:] + self.buf[:self.tail]
-
-            # 读取后重置指针（保持原有逻辑，也可改为逐字节读取）
-            self.head = self.tail = 0
-            return data
-        finally:
-            # 恢复中断状态
-            enable_irq(irq_state)
+        """读出全部数据到新分配的bytearray（兼容旧接口，热路径请用readinto/peek）"""
+        data = bytearray(self.available())
+        self.readinto(data)
+        return data
+
+    def clear(self) -> None:
+        """丢弃全部未读数据（消费者调用）"""
+        self.head = self.tail
 
 # ======================================== 初始化配置 ==========================================
 
@@ -14,10 +14,48 @@ __platform__ = "MicroPython v1.27"
 # ======================================== 导入相关模块 =========================================
 
 import time
-from config import DEBUG_ENABLE
+from array import array
+from micropython import const
+from config import DEBUG_ENABLE, LOG_LEVEL, PROFILE_ENABLE, PROFILE_COLLECT
 
 # ======================================== 全局变量 ============================================
 
+# 日志级别
+LEVEL_DEBUG = const(10)
+LEVEL_INFO = const(20)
+LEVEL_WARN = const(30)
+LEVEL_ERROR = const(40)
+
+# 各级别开关（导入时由配置确定）
+# 热路径调用处先判断开关，如 `if LOG_DEBUG: log_debug("...%s", bytes(data).hex())`，
+# 关闭的级别只需一次全局变量读取和一次跳转，参数不会被求值
+LOG_DEBUG = DEBUG_ENABLE and LOG_LEVEL <= LEVEL_DEBUG
+LOG_INFO = DEBUG_ENABLE and LOG_LEVEL <= LEVEL_INFO
+LOG_WARN = DEBUG_ENABLE and LOG_LEVEL <= LEVEL_WARN
+LOG_ERROR = DEBUG_ENABLE and LOG_LEVEL <= LEVEL_ERROR
+
+# 事件环每条记录的字段数：事件号、ticks_us、参数a、参数b、参数c
+EVENT_FIELDS = const(5)
+
+# 性能统计：每个被统计函数一个预分配的int数组，字段如下，之后为直方图各桶
+PROF_COUNT = const(0)  # 调用次数
+PROF_TOTAL_S = const(1)  # 累计耗时的整秒部分
+PROF_TOTAL_US = const(2)  # 累计耗时的微秒部分（满1秒进位，避免大整数分配）
+PROF_MIN = const(3)  # 最短耗时（us）
+PROF_MAX = const(4)  # 最长耗时（us）
+PROF_HIST = const(5)  # 直方图起始下标
+# 直方图桶数：桶0统计<1us，桶k（k≥1）统计[2^(k-1), 2^k)us，最后一桶统计≥2^14us（约16ms）
+PROF_BUCKETS = const(16)
+PROF_FIELDS = const(21)  # PROF_HIST + PROF_BUCKETS
+
+# timed_function包装函数中表示“未传该参数”的哨兵（包装函数用固定的3个参数，不经*args打包元组）
+_NO_ARG = object()
+
+# 运行时采集开关与已注册的统计项（名称与数组一一对应）
+profile_on = PROFILE_COLLECT
+profile_names = []
+profile_tables = []
+
 # ======================================== 功能函数 ============================================
 
 # 调试打印函数（统一控制输出）
@@ -26,21 +64,166 @@ def debug_print(*args, **kwargs):
     if DEBUG_ENABLE:
         print(*args, **kwargs)
 
-# 计时装饰器
-def timed_function(f: callable, *args: tuple, **kwargs: dict) -> callable:
+# 延迟格式化日志：级别关闭时直接返回，不做字符串格式化
+def log_debug(fmt: str, *args) -> None:
+    if LOG_DEBUG:
+        print(fmt % args if args else fmt)
+
+def log_info(fmt: str, *args) -> None:
+    if LOG_INFO:
+        print(fmt % args if args else fmt)
+
+def log_warn(fmt: str, *args) -> None:
+    if LOG_WARN:
+        print(fmt % args if args else fmt)
+
+def log_error(fmt: str, *args) -> None:
+    if LOG_ERROR:
+        print(fmt % args if args else fmt)
+
+# 计时装饰器：性能统计
+def timed_function(f: callable) -> callable:
+    """
+    记录被装饰函数每次调用的ticks_us耗时：调用次数、最小/最大/累计耗时及对数分桶直方图
+    统计数组在装饰时一次分配，调用时不打印、不分配；PROFILE_ENABLE为False时直接返回原函数
+    包装函数只接受最多3个位置参数（*args每次调用都会分配一个元组），被装饰函数的参数不能多于3个
+    """
+    if not PROFILE_ENABLE:
+        return f
     myname = str(f).split(' ')[1]
+    stats = array('i', bytearray(PROF_FIELDS * 4))
+    stats[PROF_MIN] = 0x3FFFFFFF
+    profile_names.append(myname)
+    profile_tables.append(stats)
+
+    def call(a, b, c):
+        # 按实际传入的参数个数调用，被装饰函数的默认参数照常生效
+        if a is _NO_ARG:
+            return f()
+        if b is _NO_ARG:
+            return f(a)
+        if c is _NO_ARG:
+            return f(a, b)
+        return f(a, b, c)
 
-    def new_func(*args: tuple, **kwargs: dict) -> any:
-        t: int = time.ticks_us()
-        result = f(*args, **kwargs)
-        delta: int = time.ticks_diff(time.ticks_us(), t)
-        debug_print('Function %s Time = %6.3fms' % (myname, delta / 1000))
+    def new_func(a=_NO_ARG, b=_NO_ARG, c=_NO_ARG):
+        if not profile_on:
+            return call(a, b, c)
+        t = time.ticks_us()
+        result = call(a, b, c)
+        delta = time.ticks_diff(time.ticks_us(), t)
+        stats[PROF_COUNT] += 1
+        total = stats[PROF_TOTAL_US] + delta
+        if total >= 1000000:
+            total -= 1000000
+            stats[PROF_TOTAL_S] += 1
+        stats[PROF_TOTAL_US] = total
+        if delta < stats[PROF_MIN]:
+            stats[PROF_MIN] = delta
+        if delta > stats[PROF_MAX]:
+            stats[PROF_MAX] = delta
+        bucket = 0
+        while delta and bucket < PROF_BUCKETS - 1:
+            delta >>= 1
+            bucket += 1
+        stats[PROF_HIST + bucket] += 1
         return result
 
     return new_func
 
+def profile_enable(on: bool = True) -> None:
+    """运行时开启/暂停性能统计采集"""
+    global profile_on
+    profile_on = on
+
+def profile_reset() -> None:
+    """清空所有统计"""
+    for stats in profile_tables:
+        for i in range(PROF_FIELDS):
+            stats[i] = 0
+        stats[PROF_MIN] = 0x3FFFFFFF
+
+def profile_stats(name: str) -> dict:
+    """
+    读取某个函数的统计：count/min_us/max_us/total_us/avg_us，
+    hist为各桶计数，bucket_us为各桶下界（us）
+    """
+    stats = profile_tables[profile_names.index(name)]
+    count = stats[PROF_COUNT]
+    total = stats[PROF_TOTAL_S] * 1000000 + stats[PROF_TOTAL_US]
+    return {
+        "count": count,
+        "min_us": stats[PROF_MIN] if count else 0,
+        "max_us": stats[PROF_MAX],
+        "total_us": total,
+        "avg_us": total // count if count else 0,
+        "hist": list(stats[PROF_HIST:PROF_HIST + PROF_BUCKETS]),
+        "bucket_us": [0] + [1 << (k - 1) for k in range(1, PROF_BUCKETS)],
+    }
+
+def profile_report() -> None:
+    """打印所有函数的统计及非空直方图桶（不受DEBUG_ENABLE控制，供REPL调用）"""
+    print("%-26s %8s %9s %9s %9s" % ("function", "count", "min(us)", "avg(us)", "max(us)"))
+    for name in profile_names:
+        st = profile_stats(name)
+        print("%-26s %8d %9d %9d %9d" % (name, st["count"], st["min_us"], st["avg_us"], st["max_us"]))
+        hist = st["hist"]
+        for k in range(PROF_BUCKETS):
+            if hist[k]:
+                print("    >= %6dus: %d" % (st["bucket_us"][k], hist[k]))
+
 # ======================================== 自定义类 ============================================
 
+class EventRing:
+    """
+    固定大小的二进制事件环
+    每条记录为EVENT_FIELDS个int（事件号、ticks_us、3个参数），存放在构造时一次分配的array中，
+    record不格式化、不分配内存，可在UART热路径上常开；写满后覆盖最旧记录，事后用dump导出。
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        # 以bytearray初始化按原始字节拷贝，不经过中间列表
+        self.data = array('i', bytearray(size * EVENT_FIELDS * 4))
+        self.index = 0  # 下一条记录的写入位置
+        self.count = 0  # 累计记录条数（含已被覆盖的）
+
+    def record(self, event: int, a: int = 0, b: int = 0, c: int = 0) -> None:
+        data = self.data
+        k = self.index * EVENT_FIELDS
+        data[k] = event
+        data[k + 1] = time.ticks_us()
+        data[k + 2] = a
+        data[k + 3] = b
+        data[k + 4] = c
+        self.index += 1
+        if self.index == self.size:
+            self.index = 0
+        self.count += 1
+
+    def entries(self):
+        """按时间先后依次产生(事件号, ticks_us, a, b, c)"""
+        n = min(self.count, self.size)
+        start = (self.index - n) % self.size
+        data = self.data
+        for i in range(n):
+            k = ((start + i) % self.size) * EVENT_FIELDS
+            yield (data[k], data[k + 1], data[k + 2], data[k + 3], data[k + 4])
+
+    def dump(self, names: dict = None) -> None:
+        """打印全部记录（不受DEBUG_ENABLE控制），names为{事件号: 名称}"""
+        prev = None
+        for event, ticks, a, b, c in self.entries():
+            delta = 0 if prev is None else time.ticks_diff(ticks, prev)
+            prev = ticks
+            name = names.get(event, event) if names else event
+            print("%10d %+8dus %-12s %d %d %d" % (ticks, delta, name, a, b, c))
+        print("events: %d recorded, %d kept" % (self.count, min(self.count, self.size)))
+
+    def clear(self) -> None:
+        self.index = 0
+        self.count = 0
+
 # ======================================== 初始化配置 ==========================================
 
 # ========================================  主程序  ===========================================
\ No newline at end of file
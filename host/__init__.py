@@ -0,0 +1,32 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : __init__.py
+# @Description : 主机端控制库：把NumPy画面按级联布局打包为链首模块接收的字节流，并按链路发送时间节流写出，以及本地灯效命令、链路时间信标与颜色校正命令，可按XON/XOFF流控、可带CRC帧尾（需要numpy，串口需要pyserial）
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+from host.layout import BLANK, row_major, serpentine, index_table, expand_modules
+from host.packer import FramePacker, add_crc
+from host.stream import PacedWriter, frame_gap_us, baud_settle_ms, open_serial, FLOW_XON, FLOW_XOFF
+from host.effects import EFFECT_OFF, EFFECT_SOLID, EFFECT_RAINBOW, EFFECT_BREATHE, EFFECT_CHASE, effect_frame, wall_step
+from host.timebase import TimeBeacon, beacon_frame, beacon_hop_us
+from host.color import color_frame, balance_frames, correction_lut
+from host.capture import CaptureWriter, capture_serial, read_capture
+
+# ======================================== 全局变量 ============================================
+
+# ======================================== 功能函数 ============================================
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
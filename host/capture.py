@@ -0,0 +1,141 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : capture.py
+# @Description : UART流量抓包文件：按到达时刻记录某个模块接收口（UART0 RX）上的字节流，供sim/replay.py在仿真链上
+#                按原时序或压缩空闲后重放，做性能回归对比。现场用USB串口的RX并接在模块输入线上抓包（capture_serial），
+#                仿真中由sim.replay.tap_input直接记录送达接收口的每段数据
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import json
+import struct
+import time
+from host.stream import BITS_PER_BYTE
+
+# ======================================== 全局变量 ============================================
+
+# 文件头：魔数、格式版本、元数据长度，其后为UTF-8编码的JSON元数据（波特率、来源、抓包的模块序号、固件配置覆盖等）
+CAPTURE_MAGIC = b"NPXCAP"
+CAPTURE_VERSION = 1
+HEADER = struct.Struct(">6sBH")
+
+# 记录头：首字节开始到达的时刻（微秒，float64）、波特率、字节数，其后为数据
+RECORD = struct.Struct(">dIH")
+RECORD_MAX = 0xFFFF  # 单条记录的最大字节数，更长的数据段按字节时间拆成多条
+
+# capture_serial每次读取的超时（秒）：线路空闲时按此周期检查是否到时，读到的字节越少、到达时刻估计越准
+READ_TIMEOUT_S = 0.002
+
+# ======================================== 功能函数 ============================================
+
+def char_us(baudrate: int) -> float:
+    """单字节线路时间（微秒），8N1"""
+    return BITS_PER_BYTE * 1e6 / baudrate
+
+def read_capture(path: str) -> tuple:
+    """读取抓包文件，返回(元数据dict, [(首字节到达时刻us, 波特率, bytes), ...])，记录按文件中的顺序"""
+    with open(path, "rb") as f:
+        raw = f.read()
+    if len(raw) < HEADER.size:
+        raise ValueError("%s: not a capture file" % path)
+    magic, version, meta_len = HEADER.unpack_from(raw, 0)
+    if magic != CAPTURE_MAGIC:
+        raise ValueError("%s: not a capture file" % path)
+    if version != CAPTURE_VERSION:
+        raise ValueError("%s: unsupported capture version %d" % (path, version))
+    pos = HEADER.size
+    meta = json.loads(raw[pos:pos + meta_len].decode("utf-8")) if meta_len else {}
+    pos += meta_len
+    records = []
+    while pos < len(raw):
+        if pos + RECORD.size > len(raw):
+            raise ValueError("%s: truncated record at byte %d" % (path, pos))
+        t_us, baudrate, n = RECORD.unpack_from(raw, pos)
+        pos += RECORD.size
+        if pos + n > len(raw):
+            raise ValueError("%s: truncated record at byte %d" % (path, pos - RECORD.size))
+        records.append((t_us, baudrate, raw[pos:pos + n]))
+        pos += n
+    return meta, records
+
+def capture_serial(port, baudrate: int, path: str, seconds: float, meta: dict = None,
+                   clock: callable = time.perf_counter) -> int:
+    """
+    从已打开的串口port（open_serial的返回值，RX并接在被测模块的输入线上）抓包seconds秒，写入path，返回字节数
+    每次读取返回时刻减去读到的字节数×字节时间作为首字节到达时刻（驱动缓冲的延迟不可见，时刻偏晚但间隔可信），
+    并保证相邻记录不重叠；时刻从抓包开始计
+    """
+    port.timeout = READ_TIMEOUT_S
+    per_byte = char_us(baudrate)
+    total = 0
+    last_end = 0.0
+    with CaptureWriter(path, dict({"baudrate": baudrate, "source": "serial"}, **(meta or {}))) as writer:
+        t0 = clock()
+        deadline = t0 + seconds
+        while clock() < deadline:
+            data = port.read(port.in_waiting or 1)
+            if not data:
+                continue
+            end = (clock() - t0) * 1e6
+            start = max(end - len(data) * per_byte, last_end)
+            writer.write(start, data, baudrate)
+            last_end = start + len(data) * per_byte
+            total += len(data)
+    return total
+
+# ======================================== 自定义类 ============================================
+
+class CaptureWriter:
+    """
+    抓包文件写出器：write(t_us, data, baudrate)追加一段从t_us开始按字节时间连续到达的数据
+    可用作上下文管理器；path也可以是已打开的二进制文件对象（不负责关闭）
+    """
+
+    def __init__(self, path, meta: dict = None):
+        self.meta = dict(meta or {})
+        if hasattr(path, "write"):
+            self._file = path
+            self._owned = False
+        else:
+            self._file = open(path, "wb")
+            self._owned = True
+        encoded = json.dumps(self.meta, sort_keys=True).encode("utf-8")
+        self._file.write(HEADER.pack(CAPTURE_MAGIC, CAPTURE_VERSION, len(encoded)))
+        self._file.write(encoded)
+        self.records = 0
+        self.bytes = 0
+
+    def write(self, t_us: float, data, baudrate: int) -> None:
+        data = bytes(data)
+        per_byte = char_us(baudrate)
+        for pos in range(0, len(data), RECORD_MAX):
+            chunk = data[pos:pos + RECORD_MAX]
+            self._file.write(RECORD.pack(t_us + pos * per_byte, baudrate, len(chunk)))
+            self._file.write(chunk)
+            self.records += 1
+        self.bytes += len(data)
+
+    def close(self) -> None:
+        if self._owned:
+            self._file.close()
+        else:
+            self._file.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
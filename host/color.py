@@ -0,0 +1,88 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : color.py
+# @Description : 颜色校正命令：生成FRAME_TYPE_COLOR帧，设置各模块的gamma、全局亮度与白平衡，由模块在刷新前查表校正，
+#                主机只需发送sRGB内容；以及与固件查找表逐字节一致的NumPy参考实现
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import numpy as np
+from host.packer import FRAME_SYNC1, FRAME_SYNC2
+
+# ======================================== 全局变量 ============================================
+
+# 颜色校正命令帧类型与负载长度（与code/frame_parser.py一致）
+FRAME_TYPE_COLOR = 0x45
+COLOR_PAYLOAD_SIZE = 11
+COLOR_COUNT_ALL = 0xFFFF
+
+# 负载MASK位（与code/color_correct.py一致）
+COLOR_SET_GAMMA = 0x01
+COLOR_SET_BRIGHTNESS = 0x02
+COLOR_SET_BALANCE = 0x04
+
+# ======================================== 功能函数 ============================================
+
+def color_frame(gamma: float = None, brightness: int = None, balance: tuple = None, skip: int = 0,
+                count: int = None) -> bytes:
+    """
+    颜色校正命令帧：跳过前skip个模块后对count个模块生效（None为其后全部），只更新给出的参数
+    gamma按1/100取整（2.2即220，1.0为线性），brightness与balance（R, G, B增益）为0~255，255为不衰减
+    """
+    mask = 0
+    gamma_x100 = 0
+    if gamma is not None:
+        gamma_x100 = int(round(gamma * 100))
+        if not 1 <= gamma_x100 <= 0xFFFF:
+            raise ValueError("gamma must be 0.01..655.35, got %r" % gamma)
+        mask |= COLOR_SET_GAMMA
+    if brightness is not None:
+        if not 0 <= brightness <= 255:
+            raise ValueError("brightness must be 0..255, got %d" % brightness)
+        mask |= COLOR_SET_BRIGHTNESS
+    else:
+        brightness = 0
+    if balance is not None:
+        if any(not 0 <= v <= 255 for v in balance):
+            raise ValueError("balance gains must be 0..255, got %r" % (balance,))
+        mask |= COLOR_SET_BALANCE
+    else:
+        balance = (0, 0, 0)
+    if count is None:
+        count = COLOR_COUNT_ALL
+    if not 0 <= skip <= 0xFFFF or not 1 <= count <= COLOR_COUNT_ALL:
+        raise ValueError("skip must be 0..65535 and count 1..65535, got %d, %d" % (skip, count))
+    r, g, b = balance
+    return bytes((FRAME_SYNC1, FRAME_SYNC2, FRAME_TYPE_COLOR, 0, 0, COLOR_PAYLOAD_SIZE,
+                  mask, gamma_x100 >> 8, gamma_x100 & 0xFF, brightness, r, g, b,
+                  skip >> 8, skip & 0xFF, count >> 8, count & 0xFF))
+
+def balance_frames(balances: list) -> bytes:
+    """逐模块白平衡：balances[i]为第i个模块的(R, G, B)增益，None的模块不改；返回依次拼接的命令帧"""
+    return b"".join(color_frame(balance=gains, skip=i, count=1) for i, gains in enumerate(balances)
+                    if gains is not None)
+
+def correction_lut(gamma: float = 1.0, brightness: int = 255, balance: tuple = (255, 255, 255)) -> np.ndarray:
+    """
+    与固件相同的查找表（3×256，按R、G、B排列）：lut[c][v] = round(round(255×(v/255)^gamma) × 亮度×增益 / 65025)
+    主机端自行校正时对整帧做一次lut[c][frame[..., c]]
+    """
+    g = int(round(gamma * 100)) / 100
+    v = np.arange(256) / 255.0
+    curve = np.arange(256) if g == 1.0 else np.floor(v ** g * 255 + 0.5).astype(np.int64)
+    scale = np.array([brightness * gain for gain in balance], dtype=np.int64)[:, None]
+    return ((curve[None, :] * scale + 32512) // 65025).astype(np.uint8)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
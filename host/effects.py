@@ -0,0 +1,59 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : effects.py
+# @Description : 本地灯效命令：生成FRAME_TYPE_EFFECT命令帧，切换场景时只需发送一次，由各模块按各自相位本地渲染
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+from host.packer import FRAME_SYNC1, FRAME_SYNC2
+
+# ======================================== 全局变量 ============================================
+
+# 灯效命令帧类型与负载长度（与code/frame_parser.py一致）
+FRAME_TYPE_EFFECT = 0x43
+EFFECT_PAYLOAD_SIZE = 11
+
+# 灯效编号（与code/effects.py一致）
+EFFECT_OFF = 0
+EFFECT_SOLID = 1
+EFFECT_RAINBOW = 2
+EFFECT_BREATHE = 3
+EFFECT_CHASE = 4
+
+# 相位一整周期
+PHASE_CYCLE = 0x10000
+
+# ======================================== 功能函数 ============================================
+
+def effect_frame(effect: int, color: tuple = (0, 0, 0), period_ms: int = 0, phase: int = 0, step: int = 0,
+                 param: int = 0) -> bytes:
+    """
+    灯效命令帧：链首模块相位为phase，之后每级加step（均为1/65536周期）；period_ms为一个周期的毫秒数（0~65535，0为静止）
+    color为纯色/呼吸/追逐的颜色，param为追逐灯效点亮时间占周期的比例（/256）
+    """
+    if not 0 <= period_ms <= 0xFFFF:
+        raise ValueError("period_ms must be 0..65535, got %d" % period_ms)
+    phase &= 0xFFFF
+    step &= 0xFFFF
+    r, g, b = color
+    return bytes((FRAME_SYNC1, FRAME_SYNC2, FRAME_TYPE_EFFECT, 0, 0, EFFECT_PAYLOAD_SIZE,
+                  effect, param, r, g, b, period_ms >> 8, period_ms & 0xFF, phase >> 8, phase & 0xFF,
+                  step >> 8, step & 0xFF))
+
+def wall_step(modules: int, cycles: float = 1.0) -> int:
+    """每级相位差：让modules个模块沿级联方向恰好铺开cycles个周期"""
+    return int(round(PHASE_CYCLE * cycles / modules)) & 0xFFFF if modules else 0
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,78 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : layout.py
+# @Description : 级联布局：级联顺序中第k个模块对应画面中的哪个像素（行优先、蛇形、任意索引表），
+#                以及逐灯寻址时每颗灯对应的像素
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import numpy as np
+
+# ======================================== 全局变量 ============================================
+
+# 布局中表示“该位置的模块不显示画面”的下标，打包时发送黑色
+BLANK = -1
+
+# ======================================== 功能函数 ============================================
+
+def row_major(height: int, width: int) -> np.ndarray:
+    """行优先：每行从左到右、逐行向下，第k个模块对应像素k"""
+    return np.arange(height * width, dtype=np.intp)
+
+def serpentine(height: int, width: int) -> np.ndarray:
+    """蛇形：偶数行从左到右，奇数行从右到左（相邻两行首尾相接走线）"""
+    grid = np.arange(height * width, dtype=np.intp).reshape(height, width)
+    grid[1::2] = grid[1::2, ::-1].copy()
+    return grid.reshape(-1)
+
+def index_table(table, height: int, width: int) -> np.ndarray:
+    """
+    任意索引表：table[k]为第k个模块对应的像素，可以是行优先下标（一维），也可以是(y, x)坐标（N×2）
+    下标为BLANK（或坐标含负数）的模块不显示画面；越界时抛出ValueError
+    """
+    arr = np.asarray(table, dtype=np.intp)
+    if arr.ndim == 2 and arr.shape[1] == 2:
+        y, x = arr[:, 0], arr[:, 1]
+        blank = (y < 0) | (x < 0)
+        if ((y >= height) | (x >= width)).any():
+            raise ValueError("layout coordinate outside %dx%d frame" % (height, width))
+        arr = np.where(blank, BLANK, y * width + x)
+    elif arr.ndim != 1:
+        raise ValueError("layout table must be 1-D indices or N x 2 (y, x) coordinates, got shape %s" % (arr.shape,))
+    if ((arr < BLANK) | (arr >= height * width)).any():
+        raise ValueError("layout index outside %dx%d frame" % (height, width))
+    return arr
+
+def expand_modules(layout: np.ndarray, width: int, module_shape: tuple = (4, 4),
+                   led_layout: np.ndarray = None) -> np.ndarray:
+    """
+    逐灯寻址：把模块布局展开为每颗灯对应的像素下标
+    画面每个模块占module_shape（行, 列）个像素，画面宽度为width*列数；led_layout为模块内灯珠的走线顺序
+    （对module_shape的行优先下标，默认行优先）。返回长度为模块数×灯数的下标数组，不显示的模块其灯均为BLANK
+    """
+    mh, mw = module_shape
+    if led_layout is None:
+        led_layout = row_major(mh, mw)
+    led_layout = np.asarray(led_layout, dtype=np.intp)
+    layout = np.asarray(layout, dtype=np.intp)
+    big_width = width * mw
+    # 每个模块左上角像素在大画面中的下标 + 每颗灯相对左上角的偏移
+    corner = (layout // width) * mh * big_width + (layout % width) * mw
+    offset = (led_layout // mw) * big_width + led_layout % mw
+    index = corner[:, None] + offset[None, :]
+    index[layout < 0] = BLANK
+    return index.reshape(-1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
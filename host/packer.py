@@ -0,0 +1,115 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : packer.py
+# @Description : 帧打包：把(H, W, 3) uint8画面按级联布局一次向量化gather为链首模块接收的字节流
+#                （原始移位格式或帧协议RGB帧，逐灯寻址时每模块48字节GRB），以及帧协议的CRC-16帧尾
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import binascii
+import numpy as np
+from host.layout import expand_modules
+
+# ======================================== 全局变量 ============================================
+
+# 帧协议常量（与code/frame_parser.py一致）
+FRAME_SYNC1 = 0xA5
+FRAME_SYNC2 = 0x5A
+FRAME_TYPE_RGB = 0x01
+FRAME_HEADER_SIZE = 6
+FRAME_MAX_PAYLOAD = 0xFFFF
+# TYPE最高位为1时帧尾带2字节大端CRC-16/CCITT-FALSE，覆盖TYPE到负载末尾
+FRAME_FLAG_CRC = 0x80
+FRAME_CRC_SIZE = 2
+CRC16_INIT = 0xFFFF
+
+# 每个模块的通道顺序：3字节模式为parse_rgb_data读取的R、G、B；逐灯寻址为直接写入灯珠缓冲区的G、R、B
+RGB_ORDER = (0, 1, 2)
+GRB_ORDER = (1, 0, 2)
+
+# ======================================== 功能函数 ============================================
+
+def add_crc(frame) -> bytes:
+    """给一个完整的帧协议帧（帧头 + 负载）置CRC标志并追加CRC帧尾，可用于灯效命令、时间信标等任意帧"""
+    frame = bytearray(frame)
+    frame[2] |= FRAME_FLAG_CRC
+    crc = binascii.crc_hqx(frame[2:], CRC16_INIT)
+    return bytes(frame + bytes((crc >> 8, crc & 0xFF)))
+
+# ======================================== 自定义类 ============================================
+
+class FramePacker:
+    """
+    画面打包器：构造时把布局预先换算为源画面字节下标表，pack()对每帧只做一次np.take（加帧头），
+    输出即固件parse_rgb_data/forward_remaining_data（或帧解析器）期望的字节流：第k个模块的数据排在第k段
+    """
+
+    def __init__(self, layout: np.ndarray, height: int, width: int, per_pixel: bool = False, framed: bool = False,
+                 module_shape: tuple = (4, 4), led_layout: np.ndarray = None, crc: bool = False):
+        """
+        layout为layout.py生成的模块布局，height×width为模块网格尺寸
+        per_pixel为True时画面尺寸为(height*行, width*列, 3)，每颗灯取一个像素（对应PER_PIXEL_ENABLE）；
+        framed为True时输出帧协议RGB帧（对应FRAMED_PROTOCOL_ENABLE），crc为True时再带CRC帧尾，
+        线路上损坏的帧被各模块丢弃（保持上一帧画面），不会错位显示
+        """
+        layout = np.asarray(layout, dtype=np.intp)
+        if per_pixel:
+            pixel_index = expand_modules(layout, width, module_shape, led_layout)
+            self.frame_shape = (height * module_shape[0], width * module_shape[1], 3)
+            order = GRB_ORDER
+        else:
+            pixel_index = layout
+            self.frame_shape = (height, width, 3)
+            order = RGB_ORDER
+        blank = pixel_index < 0
+        source = np.where(blank, 0, pixel_index)
+        self.index = (source[:, None] * 3 + np.array(order, dtype=np.intp)[None, :]).reshape(-1)
+        self.blank = np.repeat(blank, 3) if blank.any() else None
+        self.modules = len(layout)
+        self.framed = framed
+        self.crc = framed and crc
+        self.payload_size = len(self.index)
+        if framed and self.payload_size > FRAME_MAX_PAYLOAD:
+            raise ValueError("payload of %d bytes exceeds one frame" % self.payload_size)
+        header_size = FRAME_HEADER_SIZE if framed else 0
+        trailer_size = FRAME_CRC_SIZE if self.crc else 0
+        # 预分配输出缓冲区：帧头固定部分只写一次，每帧只更新帧计数（与CRC帧尾）
+        self.buf = np.zeros(header_size + self.payload_size + trailer_size, dtype=np.uint8)
+        self.payload = self.buf[header_size:header_size + self.payload_size]
+        if framed:
+            frame_type = FRAME_TYPE_RGB | FRAME_FLAG_CRC if self.crc else FRAME_TYPE_RGB
+            self.buf[:FRAME_HEADER_SIZE] = (FRAME_SYNC1, FRAME_SYNC2, frame_type, 0,
+                                            self.payload_size >> 8, self.payload_size & 0xFF)
+
+    @property
+    def size(self) -> int:
+        """每帧输出的字节数"""
+        return len(self.buf)
+
+    def pack(self, frame: np.ndarray, seq: int = 0) -> bytes:
+        """打包一帧；frame须为frame_shape的uint8数组，seq为帧协议帧计数（原始格式忽略）"""
+        frame = np.asarray(frame)
+        if frame.shape != self.frame_shape or frame.dtype != np.uint8:
+            raise ValueError("expected %s uint8 frame, got %s %s" % (self.frame_shape, frame.shape, frame.dtype))
+        np.take(frame.reshape(-1), self.index, out=self.payload)
+        if self.blank is not None:
+            self.payload[self.blank] = 0
+        if self.framed:
+            self.buf[3] = seq & 0xFF
+        if self.crc:
+            crc = binascii.crc_hqx(self.buf[2:-FRAME_CRC_SIZE], CRC16_INIT)
+            self.buf[-2] = crc >> 8
+            self.buf[-1] = crc & 0xFF
+        return self.buf.tobytes()
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
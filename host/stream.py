@@ -0,0 +1,192 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : stream.py
+# @Description : 按链路发送时间节流的帧写出器：写入串口、pty或任意有write()的对象，时钟可替换为仿真虚拟时钟；
+#                可选按链首模块回传的XON/XOFF暂停与恢复（固件FLOW_CONTROL_ENABLE）
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import time
+
+# ======================================== 全局变量 ============================================
+
+# 每字节线路时间：1起始位 + 8数据位 + 1停止位
+BITS_PER_BYTE = 10
+
+# 空闲中断模式下帧间留出的空闲位时间（固件UART在线路空闲约32个位时间后触发RXIDLE）
+IDLE_GAP_BITS = 48
+
+# 直通转发原始格式下帧间空闲相对FRAME_GAP_US的余量
+CUT_THROUGH_GAP_MARGIN = 1.5
+
+# 流控字符与每次写出的字节数（与固件frame_parser.py/config.py一致）：每写出FLOW_CHUNK字节前检查一次是否被暂停，
+# 链首模块的刹车距离按此计算，块越小暂停越及时
+FLOW_XON = 0x11
+FLOW_XOFF = 0x13
+FLOW_CHUNK = 64
+
+# 波特率协商命令帧的字节数（帧头6字节 + 4字节大端波特率），模块接收检测的空闲位时间（与timebase.IDLE_DETECT_BITS相同）
+BAUD_FRAME_SIZE = 10
+IDLE_DETECT_BITS = 32
+
+# ======================================== 功能函数 ============================================
+
+def frame_gap_us(baudrate: int, framed: bool = False, cut_through: bool = False, gap_us: int = 2000) -> float:
+    """
+    相邻两帧之间主机须留出的空闲时间（微秒）：帧协议自带边界无需空闲；原始格式下空闲中断模式留出IDLE_GAP_BITS位时间，
+    直通转发模式须超过固件的FRAME_GAP_US（gap_us）
+    """
+    if framed:
+        return 0.0
+    if cut_through:
+        return gap_us * CUT_THROUGH_GAP_MARGIN
+    return IDLE_GAP_BITS * 1e6 / baudrate
+
+def baud_settle_ms(modules: int, baudrate: int, switch_delay_ms: int = 20, ack_timeout_ms: int = 30,
+                   cut_through: bool = False, poll_freq: int = 2000) -> float:
+    """
+    发出波特率协商命令（baudrate为原波特率）后，主机须等待多久才能以新波特率发送数据（毫秒）：固件不回报协商完成，
+    每个模块从自己收到命令起计时，switch_delay_ms（BAUD_SWITCH_DELAY_MS）后切换、再过ack_timeout_ms（BAUD_ACK_TIMEOUT_MS）
+    确认或回退；命令在原波特率下逐级转发，链尾模块比链首晚modules-1个每级延迟收到命令，协商也晚同样的时间结束。
+    每级延迟为命令帧的线路时间加接收检测（空闲中断模式IDLE_DETECT_BITS位时间，直通模式一个轮询周期），不含模块的处理时间，
+    开始发送前另留几毫秒余量
+    """
+    frame_us = BAUD_FRAME_SIZE * BITS_PER_BYTE * 1e6 / baudrate
+    detect_us = 1e6 / poll_freq if cut_through else IDLE_DETECT_BITS * 1e6 / baudrate
+    return (modules * (frame_us + detect_us)) / 1000.0 + switch_delay_ms + ack_timeout_ms
+
+def open_serial(port: str, baudrate: int, xonxoff: bool = False):
+    """
+    打开串口（需要pyserial），写超时为None即阻塞写，节流由PacedWriter负责
+    xonxoff为True时由操作系统响应XON/XOFF（回传方向上只有流控字符与链路应答，不会误判）；
+    USB串口芯片内部的发送缓冲区不受其控制，刹车距离较大时改用PacedWriter(flow=True)逐块检查
+    """
+    try:
+        import serial
+    except ImportError:
+        raise ImportError("open_serial needs pyserial: pip install pyserial")
+    return serial.Serial(port, baudrate=baudrate, write_timeout=None, xonxoff=xonxoff)
+
+# ======================================== 自定义类 ============================================
+
+class PacedWriter:
+    """
+    节流写出器：一帧开始写出后，下一帧最早在该帧的线路时间（字节数×BITS_PER_BYTE/波特率）加帧间空闲之后开始，
+    min_period另可限制最高帧率；调用方准备帧的速度跟不上时不等待，并计入late
+    port为任何有write()的对象（串口、pty的文件对象、BytesIO）；clock/sleep默认为真实时钟，测试时可换成虚拟时钟
+    flow为True时按FLOW_CHUNK字节分块写出，每块之前读取链首模块回传的XON/XOFF（port还需有in_waiting与read()），
+    暂停期间每flow_poll秒检查一次，超过flow_timeout秒既未收到XON也未再收到XOFF时自行恢复（与固件FLOW_TIMEOUT_MS对应）
+    """
+
+    def __init__(self, port, baudrate: int, gap_us: float = 0.0, min_period: float = 0.0,
+                 clock: callable = time.perf_counter, sleep: callable = time.sleep, flow: bool = False,
+                 flow_timeout: float = 0.1, flow_poll: float = 0.0005):
+        self.port = port
+        self.baudrate = baudrate
+        self.gap = gap_us / 1e6
+        self.min_period = min_period
+        self.clock = clock
+        self.sleep = sleep
+        self.next_time = None  # 下一帧最早开始写出的时刻（秒）
+        self.frames = 0
+        self.bytes = 0
+        self.late = 0  # 准备好时已晚于最早时刻的帧数（发送被上游拖慢）
+        self.waited = 0.0  # 累计等待时长（秒）
+        self.flow = flow
+        self.flow_timeout = flow_timeout
+        self.flow_poll = flow_poll
+        self.paused = False  # 链首模块要求暂停（收到XOFF）
+        self.xoff_time = 0.0  # 最近一次收到XOFF的时刻（秒）
+        self.chunk_end = 0.0  # 上一块在线路上发完的时刻（秒）
+        self.stalls = 0  # 被暂停的次数
+        self.stalled = 0.0  # 累计暂停时长（秒）
+        self.flow_timeouts = 0  # 暂停超时自行恢复的次数
+
+    def line_time(self, nbytes: int) -> float:
+        """nbytes字节在线路上的发送时长（秒）"""
+        return nbytes * BITS_PER_BYTE / self.baudrate
+
+    def poll_flow(self) -> None:
+        """读取链首模块回传的XON/XOFF（其余字节忽略），更新暂停状态"""
+        waiting = self.port.in_waiting
+        if waiting:
+            for c in self.port.read(waiting):
+                if c == FLOW_XOFF:
+                    self.xoff_time = self.clock()
+                    if not self.paused:
+                        self.paused = True
+                        self.stalls += 1
+                elif c == FLOW_XON:
+                    self.paused = False
+        if self.paused and self.clock() - self.xoff_time > self.flow_timeout:
+            self.paused = False
+            self.flow_timeouts += 1
+
+    def wait_flow(self) -> None:
+        """被暂停时等到收到XON（或超时）"""
+        self.poll_flow()
+        if not self.paused:
+            return
+        start = self.clock()
+        while self.paused:
+            self.sleep(self.flow_poll)
+            self.poll_flow()
+        self.stalled += self.clock() - start
+
+    def write_chunks(self, data) -> None:
+        """流控下分块写出：每块之前检查暂停，并按线路时间节流，使未发出的数据留在主机而非串口缓冲区中"""
+        view = memoryview(data)
+        for start in range(0, len(view), FLOW_CHUNK):
+            self.wait_flow()
+            piece = view[start:start + FLOW_CHUNK]
+            now = self.clock()
+            if self.chunk_end > now:
+                self.sleep(self.chunk_end - now)
+                now = self.chunk_end
+            self.port.write(piece)
+            self.chunk_end = now + self.line_time(len(piece))
+
+    def write_frame(self, data) -> float:
+        """等到最早开始时刻后写出一帧，返回实际开始写出的时刻"""
+        now = self.clock()
+        if self.next_time is not None:
+            wait = self.next_time - now
+            if wait > 0:
+                self.sleep(wait)
+                self.waited += wait
+                now = self.clock()
+            elif wait < 0:
+                self.late += 1
+        if self.flow:
+            self.write_chunks(data)
+            self.next_time = max(self.chunk_end + self.gap, now + self.min_period)
+        else:
+            self.port.write(data)
+            self.next_time = now + max(self.line_time(len(data)) + self.gap, self.min_period)
+        self.frames += 1
+        self.bytes += len(data)
+        return now
+
+    def stream(self, frames, packer) -> int:
+        """把画面序列逐帧打包并节流写出（帧计数按帧序号递增），返回写出的帧数"""
+        count = 0
+        for frame in frames:
+            self.write_frame(packer.pack(frame, count & 0xFF))
+            count += 1
+        return count
+
+    def stats(self) -> dict:
+        return {"frames": self.frames, "bytes": self.bytes, "late": self.late, "waited_s": self.waited,
+                "stalls": self.stalls, "stalled_s": self.stalled, "flow_timeouts": self.flow_timeouts}
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,88 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : timebase.py
+# @Description : 链路时间信标：生成FRAME_TYPE_TIME帧，按主机时钟周期性插入到PacedWriter的发送流中，各模块据此校正本地时钟
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+from host.packer import FRAME_SYNC1, FRAME_SYNC2, FRAME_CRC_SIZE, add_crc
+from host.stream import IDLE_GAP_BITS
+
+# ======================================== 全局变量 ============================================
+
+# 时间信标帧类型与负载长度（与code/frame_parser.py一致）
+FRAME_TYPE_TIME = 0x44
+TIME_PAYLOAD_SIZE = 6
+TIME_FRAME_SIZE = 6 + TIME_PAYLOAD_SIZE
+
+# 链路时间与MicroPython ticks_us相同，按2^30回绕
+TICKS_PERIOD = 1 << 30
+
+# 固件UART在线路空闲约32个位时间后触发RXIDLE
+IDLE_DETECT_BITS = 32
+
+# ======================================== 功能函数 ============================================
+
+def beacon_frame(chain_us: int, hop_us: int = 0) -> bytes:
+    """时间信标帧：chain_us为链首模块收完该帧时的链路时间，hop_us为每级收完到检测到接收的延迟（见beacon_hop_us）"""
+    if not 0 <= hop_us <= 0xFFFF:
+        raise ValueError("hop_us must be 0..65535, got %d" % hop_us)
+    chain_us %= TICKS_PERIOD
+    return bytes((FRAME_SYNC1, FRAME_SYNC2, FRAME_TYPE_TIME, 0, 0, TIME_PAYLOAD_SIZE,
+                  chain_us >> 24, (chain_us >> 16) & 0xFF, (chain_us >> 8) & 0xFF, chain_us & 0xFF,
+                  hop_us >> 8, hop_us & 0xFF))
+
+def beacon_hop_us(baudrate: int, cut_through: bool = False, poll_freq: int = 2000) -> int:
+    """
+    每级接收检测延迟的标称值：空闲中断模式为IDLE_DETECT_BITS位时间，直通模式为半个轮询周期（平均值）；
+    实际值与中断响应有关，可用sim/bench_timesync.py在hop_us=0时测得的每级偏差校准
+    """
+    if cut_through:
+        return int(round(5e5 / poll_freq))
+    return int(round(IDLE_DETECT_BITS * 1e6 / baudrate))
+
+# ======================================== 自定义类 ============================================
+
+class TimeBeacon:
+    """
+    周期性时间信标：send(writer)到期时经PacedWriter写出一个信标，链路时间取主机时钟（writer.clock，秒）在
+    信标实际开始写出时刻加上信标的线路时间，即链首模块收完信标的时刻；信标之后留出IDLE_GAP_BITS位时间的空闲，
+    空闲中断模式下接收检测不被紧随的数据推迟；crc为True时信标带CRC帧尾（线路时间含帧尾）
+    """
+
+    def __init__(self, hop_us: int = 0, period: float = 1.0, crc: bool = False):
+        self.hop_us = hop_us
+        self.period = period
+        self.crc = crc
+        self.next_time = None  # 下一个信标的最早时刻（秒）
+        self.sent = 0
+
+    def due(self, now: float) -> bool:
+        return self.next_time is None or now >= self.next_time
+
+    def send(self, writer) -> bool:
+        """到期时写出一个信标，返回是否写出"""
+        now = writer.clock()
+        if not self.due(now):
+            return False
+        start = now if writer.next_time is None else max(now, writer.next_time)
+        size = TIME_FRAME_SIZE + FRAME_CRC_SIZE if self.crc else TIME_FRAME_SIZE
+        chain_us = int(round((start + writer.line_time(size)) * 1e6))
+        frame = beacon_frame(chain_us, self.hop_us)
+        writer.write_frame(add_crc(frame) if self.crc else frame)
+        writer.next_time += IDLE_GAP_BITS / writer.baudrate
+        self.next_time = start + self.period
+        self.sent += 1
+        return True
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
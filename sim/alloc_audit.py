@@ -0,0 +1,183 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : alloc_audit.py
+# @Description : 固件堆分配审计：逐条字节码跟踪code/下的函数，按MicroPython的分配规则统计执行到的分配点，
+#                并把估计的字节数计入所在模块的GC堆模型（mpgc.py），自动回收因此在分配处发生
+#                CPython的分配与板上不同（小整数、绑定方法等），不能直接测量，只统计在MicroPython上必然分配的操作
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import dis
+import os
+import sys
+from collections import Counter
+from sim import asyncio, mpgc
+from sim.chain import FIRMWARE_DIR
+from sim.kernel import active_kernel
+
+# ======================================== 全局变量 ============================================
+
+# 分配种类及其估计大小（字节，MicroPython的GC块为16字节）
+ALLOC_SIZES = {
+    "slice": 32,  # 切片取值：新的memoryview对象，或bytes/bytearray切片的拷贝
+    "tuple": 32,  # 构造元组（含返回多个值）
+    "list": 32,  # 构造列表（含列表推导）
+    "dict": 64,  # 构造字典
+    "set": 32,  # 构造集合
+    "str": 32,  # 字符串拼接/格式化（f-string）
+    "*args call": 32,  # f(*args)调用：参数元组
+    "*args tuple": 32,  # 调用带*args的函数：打包参数元组
+    "closure": 32,  # 运行时创建函数/闭包/lambda
+    "constructor": 32,  # 调用bytes/bytearray/memoryview/list/tuple/dict/str/array等构造函数
+    "coroutine": 64,  # await ThreadSafeFlag.wait()/Event.wait()：每次等待创建一个生成器对象
+}
+
+# 调用时必然分配的内建构造函数
+CONSTRUCTORS = frozenset(("bytes", "bytearray", "memoryview", "list", "tuple", "dict", "set", "str", "array",
+                          "object"))
+
+# 字节码到分配种类（BUILD_TUPLE 0为空元组单例，不分配）
+_OPCODE_KINDS = {
+    "BUILD_TUPLE": "tuple",
+    "BUILD_LIST": "list",
+    "BUILD_MAP": "dict",
+    "BUILD_CONST_KEY_MAP": "dict",
+    "BUILD_SET": "set",
+    "BUILD_STRING": "str",
+    "FORMAT_VALUE": "str",
+    "CALL_FUNCTION_EX": "*args call",
+    "MAKE_FUNCTION": "closure",
+    "BINARY_SLICE": "slice",
+}
+
+_CO_VARARGS = 0x04
+_CO_RESUMABLE = 0x20 | 0x80 | 0x200  # 生成器/协程/异步生成器：call事件也在每次恢复执行时产生
+
+# ======================================== 功能函数 ============================================
+
+def alloc_sites(code) -> dict:
+    """找出一个代码对象中会分配的字节码：{偏移: 种类}"""
+    sites = {}
+    instructions = list(dis.get_instructions(code))
+    for k, ins in enumerate(instructions):
+        name = ins.opname
+        kind = _OPCODE_KINDS.get(name)
+        if name == "BUILD_TUPLE" and not ins.arg:
+            kind = None
+        elif name == "BUILD_SLICE":
+            # 切片赋值（STORE_SUBSCR）原地写入，只有取值产生新对象
+            nxt = instructions[k + 1].opname if k + 1 < len(instructions) else ""
+            kind = "slice" if nxt == "BINARY_SUBSCR" else None
+        elif name in ("LOAD_GLOBAL", "LOAD_NAME") and ins.argval in CONSTRUCTORS:
+            kind = "constructor"
+        if kind is not None:
+            sites[ins.offset] = kind
+    return sites
+
+# ======================================== 自定义类 ============================================
+
+class AllocAudit:
+    """
+    上下文管理器：期间执行的固件代码中的分配点按(文件, 行号, 种类)计数，并计入当前模块的堆模型
+    计入：切片取值、构造元组/列表/字典/集合、字符串拼接与f-string、*args调用与带*args函数的参数元组、
+    运行时创建函数、调用内建构造函数、await ThreadSafeFlag/Event的wait()（asyncio替身中另行挂钩）
+    不计：整数运算、切片赋值、方法调用（LOAD_METHOD不创建绑定方法）、for ... in range（编译为计数循环）、
+    浮点运算与%格式化（热路径上不应出现，日志在级别关闭时不求值）
+    """
+
+    def __init__(self, firmware_dir: str = FIRMWARE_DIR):
+        self.prefix = os.path.join(os.path.abspath(firmware_dir), "")
+        self.sites = Counter()  # {(文件, 行号, 种类): 次数}
+        self.nodes = Counter()  # {模块序号: 分配次数}
+        self._code_sites = {}
+        self._saved_waits = []
+        self._saved_trace = None
+
+    def reset(self) -> None:
+        """清空计数（如跳过启动阶段）"""
+        self.sites.clear()
+        self.nodes.clear()
+
+    def total(self, kinds: tuple = None, exclude: tuple = ()) -> int:
+        """分配次数合计：kinds为None时统计全部种类，exclude中的种类不计"""
+        return sum(n for (_, _, kind), n in self.sites.items()
+                   if (kinds is None or kind in kinds) and kind not in exclude)
+
+    def top(self, n: int = 10, exclude: tuple = ()) -> list:
+        """次数最多的分配点：[((文件, 行号, 种类), 次数)]"""
+        return [item for item in self.sites.most_common() if item[0][2] not in exclude][:n]
+
+    def record(self, frame, kind: str) -> None:
+        # 只统计在模块上执行的固件代码（主机端直接调用固件模块编码帧时不计）
+        node = active_kernel().current
+        if node is None or node.index < 0:
+            return
+        key = (os.path.basename(frame.f_code.co_filename), frame.f_lineno, kind)
+        self.sites[key] += 1
+        self.nodes[node.index] += 1
+        mpgc.heap(node).allocate(node, ALLOC_SIZES[kind])
+
+    def _is_firmware(self, code) -> bool:
+        return code.co_filename.startswith(self.prefix)
+
+    def _trace_call(self, frame, event, arg):
+        code = frame.f_code
+        if not self._is_firmware(code):
+            return None
+        if event == "call" and code.co_flags & _CO_VARARGS and not code.co_flags & _CO_RESUMABLE:
+            name = code.co_varnames[code.co_argcount + code.co_kwonlyargcount]
+            if frame.f_locals.get(name):
+                self.record(frame, "*args tuple")
+        frame.f_trace_opcodes = True
+        return self._trace_opcode
+
+    def _trace_opcode(self, frame, event, arg):
+        if event == "opcode":
+            code = frame.f_code
+            sites = self._code_sites.get(code)
+            if sites is None:
+                sites = self._code_sites[code] = alloc_sites(code)
+            kind = sites.get(frame.f_lasti)
+            if kind is not None:
+                self.record(frame, kind)
+        return self._trace_opcode
+
+    def _hook_wait(self, cls) -> None:
+        """每次调用wait()时记一次协程分配（调用者为固件代码时）"""
+        original = cls.wait
+        audit = self
+
+        def wait(flag, *args):
+            caller = sys._getframe(1)
+            if audit._is_firmware(caller.f_code):
+                audit.record(caller, "coroutine")
+            return original(flag, *args)
+
+        self._saved_waits.append((cls, original))
+        cls.wait = wait
+
+    def __enter__(self) -> "AllocAudit":
+        for cls in (asyncio.ThreadSafeFlag, asyncio.Event):
+            self._hook_wait(cls)
+        self._saved_trace = sys.gettrace()
+        sys.settrace(self._trace_call)
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        sys.settrace(self._saved_trace)
+        for cls, original in reversed(self._saved_waits):
+            cls.wait = original
+        self._saved_waits = []
+        return False
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,176 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : asyncio.py
+# @Description : asyncio模块替身（MicroPython子集）：任务的每一步作为所属模块CPU上的一个任务执行，
+#                sleep按虚拟时间唤醒，ThreadSafeFlag/Event可在中断回调中置位
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+from sim.kernel import current_node
+
+# ======================================== 全局变量 ============================================
+
+# ======================================== 功能函数 ============================================
+
+def sleep_ms(ms: int) -> "_Wait":
+    return _Wait(_SLEEP, ms * 1000.0)
+
+def sleep(s: float) -> "_Wait":
+    return _Wait(_SLEEP, s * 1e6)
+
+def create_task(coro) -> "Task":
+    return Task(coro)
+
+def run(coro) -> "Task":
+    """仿真中不阻塞：创建任务后立即返回，由仿真内核驱动"""
+    return Task(coro)
+
+# ======================================== 自定义类 ============================================
+
+class CancelledError(BaseException):
+    pass
+
+
+_SLEEP = 0
+_WAIT = 1
+
+
+class _Wait:
+    """任务让出CPU时交给调度器的请求：按虚拟时间休眠，或等待某个对象唤醒"""
+
+    def __init__(self, kind: int, arg):
+        self.kind = kind
+        self.arg = arg
+
+    def __await__(self):
+        yield self
+
+
+class Task:
+    """一个协程任务：每次恢复执行提交为所属模块CPU上的一个任务"""
+
+    def __init__(self, coro):
+        self.coro = coro
+        self.node = current_node()
+        self._done = False
+        self.data = None
+        self._gen = 0
+        self._waiters = []
+        self._resume(0.0)
+
+    def _resume(self, delay_us: float, exc: BaseException = None) -> None:
+        self._gen += 1
+        self.node.submit(self.node.now() + delay_us, self._step, self._gen, exc)
+
+    def _wake(self) -> None:
+        self._resume(0.0)
+
+    def _step(self, gen: int, exc: BaseException) -> None:
+        if gen != self._gen or self._done:
+            return
+        try:
+            request = self.coro.throw(exc) if exc is not None else self.coro.send(None)
+        except StopIteration as e:
+            self._finish(e.value)
+            return
+        except CancelledError:
+            self._finish(None)
+            return
+        if request.kind == _SLEEP:
+            self._resume(request.arg)
+        else:
+            request.arg._add_waiter(self)
+
+    def _finish(self, value) -> None:
+        self._done = True
+        self.data = value
+        for task in self._waiters:
+            task._wake()
+        self._waiters = []
+
+    def _add_waiter(self, task: "Task") -> None:
+        if self._done:
+            task._wake()
+        else:
+            self._waiters.append(task)
+
+    def done(self) -> bool:
+        return self._done
+
+    def cancel(self) -> bool:
+        if self._done:
+            return False
+        self._resume(0.0, CancelledError())
+        return True
+
+    def __await__(self):
+        if not self._done:
+            yield _Wait(_WAIT, self)
+        return self.data
+
+
+class ThreadSafeFlag:
+    """单个任务等待的标志：set可在中断回调中调用，wait返回时自动清除"""
+
+    def __init__(self):
+        self._flag = False
+        self._waiter = None
+
+    def _add_waiter(self, task: Task) -> None:
+        self._waiter = task
+
+    def set(self) -> None:
+        if self._waiter is not None:
+            task, self._waiter = self._waiter, None
+            task._wake()
+        else:
+            self._flag = True
+
+    def clear(self) -> None:
+        self._flag = False
+
+    async def wait(self) -> None:
+        if self._flag:
+            self._flag = False
+            return
+        await _Wait(_WAIT, self)
+
+
+class Event:
+    """可被多个任务等待的事件，置位后保持到clear"""
+
+    def __init__(self):
+        self.state = False
+        self._waiters = []
+
+    def _add_waiter(self, task: Task) -> None:
+        self._waiters.append(task)
+
+    def is_set(self) -> bool:
+        return self.state
+
+    def set(self) -> None:
+        self.state = True
+        for task in self._waiters:
+            task._wake()
+        self._waiters = []
+
+    def clear(self) -> None:
+        self.state = False
+
+    async def wait(self) -> bool:
+        if not self.state:
+            await _Wait(_WAIT, self)
+        return True
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
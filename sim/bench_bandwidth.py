@@ -0,0 +1,217 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_bandwidth.py
+# @Description : 带宽基准：静态文字、滚动字幕、全动态视频三类内容下，移位/稀疏增量/游程编码每帧字节数与线路速率下的帧率上限，
+#                并在仿真链上逐帧校验增量与游程帧的显示结果
+#                用法：python -m sim.bench_bandwidth --width 20 --height 20 --set BAUDRATE=115200
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import math
+import sys
+from sim.bench_latency import parse_overrides
+from sim.chain import ChainSimulator, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 每字节线路时间：1起始位 + 8数据位 + 1停止位
+BITS_PER_BYTE = 10
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 3×5点阵字体（每行3位，高位在左）
+FONT = {
+    " ": (0, 0, 0, 0, 0), "0": (7, 5, 5, 5, 7), "1": (2, 6, 2, 2, 7), "2": (7, 1, 7, 4, 7),
+    "6": (7, 4, 7, 5, 7), "D": (6, 5, 5, 5, 6), "E": (7, 4, 6, 4, 7), "I": (7, 2, 2, 2, 7),
+    "N": (5, 7, 7, 7, 5), "O": (7, 5, 5, 5, 7), "P": (7, 5, 7, 4, 4), "T": (7, 2, 2, 2, 2),
+    "X": (5, 5, 2, 5, 5),
+}
+
+BLACK = (0, 0, 0)
+TEXT_COLOR = (255, 160, 0)
+
+# ======================================== 功能函数 ============================================
+
+def text_columns(text: str) -> list:
+    """把字符串渲染为点阵列（每列5位，字间空一列）"""
+    columns = []
+    for ch in text:
+        rows = FONT.get(ch, FONT[" "])
+        for bit in (4, 2, 1):
+            columns.append(tuple(bool(r & bit) for r in rows))
+        columns.append((False,) * 5)
+    return columns
+
+def static_text(width: int, height: int, frame: int) -> list:
+    """静态文字：两行文字常亮，右下角光标每15帧闪烁一次"""
+    wall = [BLACK] * (width * height)
+    for line, text in enumerate(("NEO", "PIX")):
+        top = 1 + line * 7
+        for x, column in enumerate(text_columns(text)[:width - 1]):
+            for y, lit in enumerate(column):
+                if lit and top + y < height:
+                    wall[(top + y) * width + x + 1] = TEXT_COLOR
+    if (frame // 15) % 2 == 0:
+        wall[(height - 2) * width + width - 2] = (255, 255, 255)
+    return wall
+
+def ticker(width: int, height: int, frame: int) -> list:
+    """滚动字幕：5行高的文字带每帧左移一列，其余区域为固定的底色"""
+    wall = [(0, 0, 40)] * (width * height)
+    columns = text_columns("NEOPIXDOT 2026 ")
+    top = max(0, (height - 5) // 2)
+    for x in range(width):
+        column = columns[(x + frame) % len(columns)]
+        for y, lit in enumerate(column):
+            if top + y < height:
+                wall[(top + y) * width + x] = TEXT_COLOR if lit else BLACK
+    return wall
+
+def video(width: int, height: int, frame: int) -> list:
+    """全动态视频：随时间流动的等离子效果，几乎每个模块每帧都变化"""
+    wall = []
+    t = frame * 0.21
+    for y in range(height):
+        for x in range(width):
+            v = math.sin(x * 0.45 + t) + math.sin(y * 0.37 - t * 1.3) + math.sin((x + y) * 0.25 + t * 0.7)
+            wall.append((int(127 + 42 * v) & 0xFF, int(127 + 42 * math.sin(v + t)) & 0xFF,
+                         int(127 - 42 * v) & 0xFF))
+    return wall
+
+CONTENT = {"static-text": static_text, "ticker": ticker, "video": video}
+
+def encode_raw(colors: list, prev: list = None, seq: int = 0) -> bytes:
+    """原始移位协议（无帧头）"""
+    return bytes(c for rgb in colors for c in rgb)
+
+def encode_rgb(colors: list, prev: list = None, seq: int = 0) -> bytes:
+    """帧协议移位帧（FRAME_TYPE_RGB）"""
+    fp = firmware_module("frame_parser")
+    payload = encode_raw(colors)
+    return bytes(fp.build_header(fp.FRAME_TYPE_RGB, seq, len(payload))) + payload
+
+def encode_delta(colors: list, prev: list = None, seq: int = 0) -> bytes:
+    """
+    稀疏增量帧（FRAME_TYPE_DELTA）：只为与prev不同的模块生成记录
+    prev为None时所有模块都视为有变化；没有变化时返回空字节串（不发送）
+    """
+    fp = firmware_module("frame_parser")
+    payload = bytearray()
+    last = -1
+    for i, rgb in enumerate(colors):
+        if prev is not None and prev[i] == rgb:
+            continue
+        skip = i - last - 1
+        payload += bytes(((skip >> 8) & 0xFF, skip & 0xFF)) + bytes(rgb)
+        last = i
+    if not payload:
+        return b""
+    return bytes(fp.build_header(fp.FRAME_TYPE_DELTA, seq, len(payload))) + bytes(payload)
+
+def encode_rle(colors: list, prev: list = None, seq: int = 0) -> bytes:
+    """游程编码帧（FRAME_TYPE_RLE）：相邻同色模块合并为一条记录"""
+    fp = firmware_module("frame_parser")
+    payload = bytearray()
+    i = 0
+    while i < len(colors):
+        run = 1
+        while i + run < len(colors) and colors[i + run] == colors[i] and run < 0xFFFF:
+            run += 1
+        payload += bytes(((run >> 8) & 0xFF, run & 0xFF)) + bytes(colors[i])
+        i += run
+    return bytes(fp.build_header(fp.FRAME_TYPE_RLE, seq, len(payload))) + bytes(payload)
+
+def encode_auto(colors: list, prev: list = None, seq: int = 0) -> bytes:
+    """逐帧选最短的帧协议编码（移位/增量/游程）"""
+    candidates = [encode_rgb(colors, prev, seq), encode_rle(colors, prev, seq)]
+    if prev is not None:
+        candidates.append(encode_delta(colors, prev, seq))
+    return min(candidates, key=len)
+
+ENCODERS = (("raw shift", encode_raw), ("framed rgb", encode_rgb), ("delta", encode_delta),
+            ("rle", encode_rle), ("auto", encode_auto))
+
+def measure_content(generate: callable, width: int, height: int, frames: int, baudrate: int) -> list:
+    """每种编码的平均/最大每帧字节数，及按最大帧长计算的线路速率下可持续帧率"""
+    walls = [generate(width, height, f) for f in range(frames)]
+    rows = []
+    for name, encode in ENCODERS:
+        # 第0帧为上电后的完整画面，统计从第1帧开始
+        sizes = [len(encode(walls[f], walls[f - 1], f)) for f in range(1, frames)]
+        avg = sum(sizes) / len(sizes)
+        peak = max(sizes)
+        fps = baudrate / BITS_PER_BYTE / peak if peak else float("inf")
+        rows.append((name, avg, peak, fps))
+    return rows
+
+def verify_chain(generate: callable, width: int, height: int, frames: int, overrides: dict) -> int:
+    """
+    在仿真链上逐帧发送encode_auto编码的帧，每帧后比较全部模块第0颗灯的颜色
+    返回显示不一致的(帧, 模块)数
+    """
+    length = width * height
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    mismatches = 0
+    prev = None
+    for f in range(frames):
+        wall = generate(width, height, f)
+        data = encode_auto(wall, prev, f & 0xFF)
+        if data:
+            sim.send(data)
+        sim.run_for(len(data) * sim.char_us + length * 2000.0 + 5000.0)
+        mismatches += sum(1 for i in range(length) if sim.pixels(i).pixel(0) != wall[i])
+        prev = wall
+    return mismatches + len(sim.errors())
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot frame encoding bandwidth benchmark")
+    parser.add_argument("--width", type=int, default=20, help="墙面宽度（模块数）")
+    parser.add_argument("--height", type=int, default=20, help="墙面高度（模块数），模块按行优先顺序级联")
+    parser.add_argument("--frames", type=int, default=120, help="每类内容统计的帧数")
+    parser.add_argument("--verify-size", type=int, default=6, help="仿真校验用的小墙边长，0表示不校验")
+    parser.add_argument("--verify-frames", type=int, default=20, help="仿真校验的帧数")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+    baudrate = overrides.get("BAUDRATE", firmware_module("config").BAUDRATE)
+
+    print("wall: %dx%d = %d modules, baudrate: %d" % (args.width, args.height, args.width * args.height, baudrate))
+    print("%-12s %-12s %12s %10s %10s" % ("content", "encoding", "avg bytes", "max bytes", "max fps"))
+    for content, generate in CONTENT.items():
+        for name, avg, peak, fps in measure_content(generate, args.width, args.height, args.frames, baudrate):
+            print("%-12s %-12s %12.1f %10d %10.1f" % (content, name, avg, peak, fps))
+
+    if args.verify_size:
+        overrides.setdefault("FRAMED_PROTOCOL_ENABLE", True)
+        overrides.setdefault("CUT_THROUGH_ENABLE", True)
+        failures = 0
+        for content, generate in CONTENT.items():
+            bad = verify_chain(generate, args.verify_size, args.verify_size, args.verify_frames, overrides)
+            failures += bad > 0
+            print("verify %-12s %dx%d chain, %d frames: %s" % (
+                content, args.verify_size, args.verify_size, args.verify_frames,
+                "ok" if bad == 0 else "%d mismatches" % bad))
+        if failures:
+            print("%d encoding(s) displayed wrong pixels" % failures)
+            sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_baud.py
+# @Description : 波特率协商基准：主机下发FRAME_TYPE_BAUD后全链逐段切换并确认，报告各链路最终波特率与不同级联长度下的最大帧率；
+#                可指定不响应协商的模块（--deaf）验证相邻链路自动回退
+#                用法：python -m sim.bench_baud --nodes 10 50 100 --rates 460800 921600 --deaf 3
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import json
+from sim.bench_latency import encode_framed, measure_chain, parse_overrides, print_header, print_row
+from sim.chain import ChainSimulator, firmware_module
+from host import baud_settle_ms
+
+# ======================================== 全局变量 ============================================
+
+# 协商结束后到开始发送数据之间的余量（微秒）
+SETTLE_MARGIN_US = 5000.0
+
+# ======================================== 功能函数 ============================================
+
+def baud_frame(rate: int, seq: int = 0) -> bytes:
+    """波特率协商命令帧：负载为4字节大端波特率"""
+    fp = firmware_module("frame_parser")
+    return bytes(fp.build_header(fp.FRAME_TYPE_BAUD, seq, 4)) + rate.to_bytes(4, "big")
+
+def host_negotiate(sim: ChainSimulator, rate: int, deaf: list = ()) -> float:
+    """
+    主机端协商流程（与模块固件相同的时序）：以当前波特率发出命令帧，等待BAUD_SWITCH_DELAY_MS后切换，
+    周期性向模块0发送链路探测，BAUD_ACK_TIMEOUT_MS内未收到应答则回退；之后等到全链各模块结束协商
+    deaf中的模块关闭BAUD_NEGOTIATE_ENABLE，模拟不响应协商的旧固件
+    返回全链协商结束、可以开始发送数据的时刻；主机链路结果保存在sim.host_baud_ok
+    """
+    fp = firmware_module("frame_parser")
+    config = sim.nodes[0].modules["config"]
+    for index in deaf:
+        sim.module(index).BAUD_NEGOTIATE_ENABLE = False
+    ping = bytes(fp.build_header(fp.FRAME_TYPE_LINK_PING, 0, 0))
+    ack = bytes(fp.build_header(fp.FRAME_TYPE_LINK_ACK, 0, 0))
+    uart = sim.host_uart
+    old_rate = uart.baudrate
+    command = baud_frame(rate)
+    start = sim.now
+    sim.send(command, at=start)
+    switch_at = start + len(command) * uart.char_us + config.BAUD_SWITCH_DELAY_MS * 1000.0
+    period_us = config.BAUD_PING_PERIOD_MS * 1000.0
+    ticks = config.BAUD_ACK_TIMEOUT_MS // config.BAUD_PING_PERIOD_MS
+    state = {"ok": False, "rx": b""}
+
+    def switch() -> None:
+        uart.init(baudrate=rate)
+        uart.read()
+        uart.write(ping)
+
+    def tick(k: int) -> None:
+        if not state["ok"]:
+            state["rx"] += uart.read() or b""
+            state["ok"] = ack in state["rx"]
+        if k + 1 < ticks:
+            if not state["ok"]:
+                uart.write(ping)
+        elif not state["ok"]:
+            uart.init(baudrate=old_rate)
+
+    sim.host.submit(switch_at, switch)
+    for k in range(ticks):
+        sim.host.submit(switch_at + (k + 1) * period_us, tick, k)
+    host_done = switch_at + (ticks + 1) * period_us
+    # 命令逐级转发，每个模块从自己收到命令起计时：等到所有响应协商的模块都收到命令并结束协商（baud_pending回到0），
+    # 上限为主机端估算的等待时间（host.baud_settle_ms）的两倍
+    negotiating = [i for i in range(len(sim)) if i not in deaf]
+    seen = set()
+    limit = start + 2000.0 * baud_settle_ms(len(sim), old_rate, config.BAUD_SWITCH_DELAY_MS,
+                                            config.BAUD_ACK_TIMEOUT_MS, config.CUT_THROUGH_ENABLE,
+                                            config.CUT_THROUGH_POLL_FREQ)
+    while True:
+        pending = False
+        for i in negotiating:
+            if sim.module(i).baud_pending:
+                seen.add(i)
+                pending = True
+        if (sim.now >= host_done and len(seen) == len(negotiating) and not pending) or sim.now >= limit:
+            break
+        sim.run(until=sim.now + period_us)
+    sim.host_baud_ok = state["ok"]
+    sim.baud_settle_us = sim.now - start
+    done = sim.now + SETTLE_MARGIN_US
+    sim.run(until=done)
+    return done
+
+def link_rates(sim: ChainSimulator) -> list:
+    """每条链路（主机→模块0、模块i→模块i+1）两端的波特率"""
+    rates = []
+    upstream = sim.host_uart
+    for node in sim.nodes:
+        rates.append((upstream.baudrate, node.uarts[0].baudrate))
+        upstream = node.uarts[1]
+    return rates
+
+def negotiate_report(length: int, rate: int, overrides: dict, deaf: list) -> dict:
+    """单次协商：统计新波特率下贯通的链路数与两端不一致（不可用）的链路数"""
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=1000.0)
+    host_negotiate(sim, rate, deaf)
+    rates = link_rates(sim)
+    config = sim.nodes[0].modules["config"]
+    return {
+        "modules": length,
+        "rate": rate,
+        "fast_links": sum(1 for a, b in rates if a == b == rate),
+        "fallback_links": sum(1 for a, b in rates if a == b != rate),
+        "broken_links": sum(1 for a, b in rates if a != b),
+        "errors": len(sim.errors()),
+        "settle_ms": sim.baud_settle_us / 1000.0,
+        "settle_estimate_ms": baud_settle_ms(length, sim.baudrate, config.BAUD_SWITCH_DELAY_MS,
+                                             config.BAUD_ACK_TIMEOUT_MS, config.CUT_THROUGH_ENABLE,
+                                             config.CUT_THROUGH_POLL_FREQ),
+    }
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot chain baud-rate negotiation benchmark")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 10, 50, 100, 200], help="级联模块数（可给多个）")
+    parser.add_argument("--rates", type=int, nargs="+", default=[460800, 921600, 2000000],
+                        help="协商的目标波特率（可给多个），起始波特率为config.BAUDRATE")
+    parser.add_argument("--deaf", type=int, nargs="*", default=[], help="不响应协商的模块序号")
+    parser.add_argument("--frames", type=int, default=6, help="测最大帧率时连续发送的帧数")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+    overrides.setdefault("FRAMED_PROTOCOL_ENABLE", True)
+    overrides.setdefault("CUT_THROUGH_ENABLE", True)
+
+    results = []
+    for rate in [None] + args.rates:
+        prepare = None if rate is None else (lambda sim, rate=rate: host_negotiate(sim, rate, args.deaf))
+        if not args.json:
+            print("\nrate: %s, deaf modules: %s" % ("no negotiation" if rate is None else rate, args.deaf or "none"))
+            print_header()
+        for length in args.nodes:
+            row = measure_chain(length, overrides, 0.0, args.frames, encode_framed, prepare)
+            if rate is not None:
+                row["negotiation"] = negotiate_report(length, rate, overrides,
+                                                      [d for d in args.deaf if d < length])
+            results.append(row)
+            if not args.json:
+                print_row(row)
+                if rate is not None:
+                    n = row["negotiation"]
+                    print("%8s links at %d: %d, fallback: %d, broken: %d, settled in %.1f ms (host estimate %.1f ms)" % (
+                        "", rate, n["fast_links"], n["fallback_links"], n["broken_links"], n["settle_ms"],
+                        n["settle_estimate_ms"]))
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
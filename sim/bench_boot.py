@@ -0,0 +1,114 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_boot.py
+# @Description : 启动时序基准：全链同时上电、主机从上电起即按固定周期发送画面，
+#                对比快速启动与旧流程（先完成上电检测与开机灯效再接收）下各模块首次转发字节、链尾收到数据与全链显示画面的时刻
+#                用法：python -m sim.bench_boot --nodes 1 10 50 --set CUT_THROUGH_ENABLE=True
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import json
+from sim.bench_latency import encode_frame, encode_framed, frame_colors, parse_overrides
+from sim.chain import ChainSimulator
+
+# ======================================== 全局变量 ============================================
+
+# 对比的启动方式：(名称, 配置覆盖)
+MODES = (("legacy", {"FAST_BOOT_ENABLE": False}),
+         ("fast boot", {"FAST_BOOT_ENABLE": True}))
+
+# ======================================== 功能函数 ============================================
+
+def first_match(history: list, rgb: tuple) -> float:
+    """灯珠刷新记录中第一次显示rgb的时刻，未显示为None"""
+    target = bytes((rgb[1], rgb[0], rgb[2]))
+    return next((t for t, buf in history if bytes(buf[:3]) == target), None)
+
+def measure_boot(length: int, overrides: dict, period_ms: float, duration_ms: float) -> dict:
+    """
+    全链在t=0同时上电，主机从t=0起每period_ms发送一帧相同的画面（比模块数多一个颜色，链尾也能收到数据），
+    运行duration_ms后统计：
+    模块0接通接收通路的时刻、各模块首次转发字节的最晚时刻、链尾首次收到数据的时刻、全部模块显示画面的时刻（毫秒）
+    """
+    encode = encode_framed if overrides.get("FRAMED_PROTOCOL_ENABLE") else encode_frame
+    colors = frame_colors(0, length + 1)
+    sim = ChainSimulator(length, overrides=overrides)
+    t = 0.0
+    seq = 0
+    while t < duration_ms * 1000.0:
+        sim.send(encode(colors, seq & 0xFF), at=t)
+        t += period_ms * 1000.0
+        seq += 1
+
+    state = {"tail": None}
+
+    def tail_poll() -> bool:
+        if state["tail"] is None and sim.tail_uart.any():
+            state["tail"] = sim.now
+        return False
+
+    sim.run(until=duration_ms * 1000.0, stop=tail_poll)
+    ms = lambda us: None if us is None else us / 1000.0
+    cores = [node.modules["core_protected"] for node in sim.nodes]
+    marks = dict(cores[0].boot_marks)
+    forwards = [core.boot_forward_us for core in cores]
+    shown = [first_match(sim.pixels(i).history, colors[i]) for i in range(length)]
+    return {
+        "modules": length,
+        "receive_path_ms": ms(marks.get("receive path")),
+        "battery_check_ms": ms(marks.get("battery check")),
+        "first_forward_ms": ms(forwards[0]) if forwards[0] >= 0 else None,
+        "last_first_forward_ms": None if min(forwards) < 0 else ms(max(forwards)),
+        "tail_first_byte_ms": ms(state["tail"]),
+        "all_shown_ms": None if None in shown else ms(max(shown)),
+        "errors": len(sim.errors()),
+    }
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot boot timing benchmark")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 10, 50], help="级联模块数（可给多个）")
+    parser.add_argument("--period", type=float, default=20.0, help="主机发送画面的周期（毫秒）")
+    parser.add_argument("--duration", type=float, default=5000.0, help="从上电起仿真的时长（毫秒）")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+
+    results = []
+    if not args.json:
+        print("overrides: %s, frame period: %.1f ms" % (overrides, args.period))
+        print("%8s %-10s %12s %12s %12s %12s %12s %12s" % ("modules", "mode", "rx armed", "battery ok",
+                                                          "fwd #0", "fwd slowest", "tail rx", "all shown"))
+    fmt = lambda v: "-" if v is None else "%.3f" % v
+    for length in args.nodes:
+        for mode, mode_overrides in MODES:
+            r = measure_boot(length, dict(overrides, **mode_overrides), args.period, args.duration)
+            r["mode"] = mode
+            results.append(r)
+            if not args.json:
+                print("%8d %-10s %12s %12s %12s %12s %12s %12s" % (
+                    length, mode, fmt(r["receive_path_ms"]), fmt(r["battery_check_ms"]), fmt(r["first_forward_ms"]),
+                    fmt(r["last_first_forward_ms"]), fmt(r["tail_first_byte_ms"]), fmt(r["all_shown_ms"])))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print("(times in ms after power-on)")
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_color.py
+# @Description : 颜色校正校验与基准：
+#                1. 固件查找表与主机端NumPy参考实现（host.correction_lut）逐字节一致，及与浮点理想值的最大误差；
+#                2. 仿真链上经颜色校正命令设置全局gamma/亮度与逐模块白平衡后，各模块显示内容与主机端校正结果一致，
+#                   已显示的画面与灯效按新表重绘，重复相同参数的命令不重建查找表；
+#                3. 不校正与校正刷新一帧的主机CPU耗时、查找表重建耗时，以及由主机逐帧校正整面墙的耗时（改为模块校正后省去）
+#                用法：python -m sim.bench_color --nodes 4 --set PER_PIXEL_ENABLE=False
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import sys
+import timeit
+import numpy as np
+from host.color import color_frame, balance_frames, correction_lut
+from host.effects import EFFECT_SOLID, effect_frame
+from sim.bench_latency import encode_frame, encode_per_pixel, frame_colors, framed, parse_overrides
+from sim.chain import ChainSimulator, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 查找表核对的参数组：(gamma, 亮度, 白平衡)
+LUT_CASES = ((1.0, 255, (255, 255, 255)), (2.2, 255, (255, 255, 255)), (2.8, 128, (255, 255, 255)),
+             (2.2, 200, (255, 220, 180)), (1.0, 64, (255, 255, 255)), (0.45, 255, (128, 255, 0)))
+
+# 整链校验：全局参数与逐模块白平衡（None为不设置）
+GLOBAL_GAMMA = 2.2
+GLOBAL_BRIGHTNESS = 160
+BALANCES = (None, (255, 200, 180), None, (180, 255, 230))
+
+# 灯效重绘校验用的颜色
+EFFECT_COLOR = (200, 40, 90)
+
+# ======================================== 功能函数 ============================================
+
+def check_luts() -> list:
+    """固件ColorCorrection与host.correction_lut逐字节比对，返回[(参数, 是否一致, 与浮点理想值的最大误差)]"""
+    cc = firmware_module("color_correct")
+    order = (1, 0, 2)
+    rows = []
+    for gamma, brightness, balance in LUT_CASES:
+        corr = cc.ColorCorrection(order, int(round(gamma * 100)), brightness, balance)
+        ref = correction_lut(gamma, brightness, balance)
+        fw = np.frombuffer(bytes(corr.lut), dtype=np.uint8).reshape(3, 256)
+        same = all(np.array_equal(fw[order[c]], ref[c]) for c in range(3))
+        v = np.arange(256) / 255.0
+        ideal = np.stack([(v ** gamma) * 255 * brightness * gain / 65025 for gain in balance])
+        rows.append(((gamma, brightness, balance), same, float(np.abs(ref - ideal).max())))
+    return rows
+
+def expected_buf(raw: bytes, lut: np.ndarray, order: tuple) -> bytes:
+    """灯珠缓冲区内容raw（按order排列）经主机端查找表校正后的结果"""
+    pixels = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3).copy()
+    out = pixels.copy()
+    for c in range(3):
+        out[:, order[c]] = lut[c][pixels[:, order[c]]]
+    return out.tobytes()
+
+def module_lut(i: int) -> np.ndarray:
+    """整链校验中第i个模块应有的查找表"""
+    balance = BALANCES[i % len(BALANCES)] or (255, 255, 255)
+    return correction_lut(GLOBAL_GAMMA, GLOBAL_BRIGHTNESS, balance)
+
+def settle(sim: ChainSimulator, frame: bytes) -> None:
+    """发送frame并运行到传遍整条链、各模块处理完毕"""
+    sim.send(frame)
+    sim.run_for(len(sim) * (len(frame) * sim.char_us + 3000.0) + 30000.0)
+
+def check_chain(length: int, overrides: dict, encode: callable) -> dict:
+    """
+    先显示一帧数据，再发送全局gamma/亮度与逐模块白平衡命令：已显示的画面须按新表重绘；
+    随后的数据帧与本地灯效同样按新表校正；重复发送相同参数不重建查找表
+    """
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    fp = firmware_module("frame_parser")
+    problems = []
+    command = color_frame(gamma=GLOBAL_GAMMA, brightness=GLOBAL_BRIGHTNESS)
+    if command != bytes(fp.build_color(0x03, int(GLOBAL_GAMMA * 100), GLOBAL_BRIGHTNESS, 0, 0, 0, 0, 0xFFFF)):
+        problems.append("host color_frame differs from firmware build_color")
+    cores = [node.modules["core_protected"] for node in sim.nodes]
+    order = cores[0].np.ORDER
+
+    def verify(stage: str, raws: list) -> None:
+        for i, core in enumerate(cores):
+            if bytes(core.np.buf) != expected_buf(raws[i], module_lut(i), order):
+                problems.append("%s: module %d pixels differ" % (stage, i))
+
+    def data_bufs(frame: int) -> list:
+        # 逐灯寻址时灯珠缓冲区即本模块数据，否则为3字节RGB按order填满整条
+        if cores[0].PER_PIXEL_ENABLE:
+            size = cores[0].MODULE_BYTES
+            payload = encode(frame_colors(frame, length), frame)[6:]
+            return [payload[i * size:(i + 1) * size] for i in range(length)]
+        bufs = []
+        for r, g, b in frame_colors(frame, length):
+            px = [0, 0, 0]
+            px[order[0]], px[order[1]], px[order[2]] = r, g, b
+            bufs.append(bytes(px) * cores[0].WS2812_NUM)
+        return bufs
+
+    settle(sim, encode(frame_colors(0, length), 0))
+    settle(sim, command + balance_frames(BALANCES[i % len(BALANCES)] for i in range(length)))
+    verify("redraw after command", data_bufs(0))
+    rebuilds = [core.color_correction.rebuilds for core in cores]
+    settle(sim, encode(frame_colors(1, length), 1))
+    verify("next frame", data_bufs(1))
+    settle(sim, command)
+    repeated = sum(core.color_correction.rebuilds for core in cores) - sum(rebuilds)
+    if repeated:
+        problems.append("identical command rebuilt %d table(s)" % repeated)
+    settle(sim, effect_frame(EFFECT_SOLID, EFFECT_COLOR))
+    solid = [0, 0, 0]
+    solid[order[0]], solid[order[1]], solid[order[2]] = EFFECT_COLOR
+    verify("solid effect", [bytes(solid) * cores[0].WS2812_NUM] * length)
+    flags = []
+    for node, core in zip(sim.nodes, cores):
+        with node.context():
+            flags.append(core.discovery_status(fp.FRAME_TYPE_DISCOVER)[0] & fp.STATUS_COLOR)
+    if not all(flags):
+        problems.append("discovery flag STATUS_COLOR missing on %d module(s)" % flags.count(0))
+    return {"problems": problems + ["module %d error: %s" % (i, e) for i, _, e in sim.errors()],
+            "rebuilds": rebuilds}
+
+def render_costs(repeat: int, modules: int) -> list:
+    """
+    刷新一帧本模块数据（不含WS2812发送）在不校正与校正时的主机耗时，查找表重建耗时，及主机逐帧校正整面墙的耗时（微秒）
+    用纯Python热路径统计：主机上的viper版本按CPython逐字节执行，耗时没有参考意义（板上用fast_paths.benchmark()）
+    """
+    rows = []
+    for per_pixel in (False, True):
+        sim = ChainSimulator(1, overrides={"NATIVE_ENABLE": False, "PER_PIXEL_ENABLE": per_pixel,
+                                           "PROFILE_ENABLE": False})
+        sim.run(until=BOOT_US)
+        core = sim.module(0)
+        core.np.write = lambda: None
+        data = bytearray(range(core.MODULE_BYTES))
+        costs = []
+        with sim.nodes[0].context():
+            for gamma in (100, 220):
+                core.color_correction.configure(0x01, gamma, 0, 0, 0, 0)
+                core.color_correction.rebuild()
+                costs.append(min(timeit.repeat(lambda: core.render_module_data(data), number=repeat, repeat=3))
+                             / repeat * 1e6)
+        rows.append(("render %s" % ("per-pixel 16" if per_pixel else "rgb"), costs[0], costs[1]))
+
+    cc = firmware_module("color_correct")
+    corr = cc.ColorCorrection((1, 0, 2))
+    params = ((220, 255), (280, 255), (280, 128), (280, 64))
+    k = [0]
+
+    def rebuild(gamma_change: bool) -> None:
+        # 交替两组参数，使每次都需要重建
+        gamma, brightness = params[k[0] % 2 + (0 if gamma_change else 2)]
+        corr.configure(0x03, gamma, brightness, 0, 0, 0)
+        corr.rebuild()
+        k[0] += 1
+    rows.append(("rebuild (gamma)", min(timeit.repeat(lambda: rebuild(True), number=50, repeat=3)) / 50 * 1e6, None))
+    rows.append(("rebuild (brightness)", min(timeit.repeat(lambda: rebuild(False), number=50, repeat=3)) / 50 * 1e6,
+                 None))
+
+    lut = correction_lut(2.2, 160)
+    frame = np.random.default_rng(1).integers(0, 256, (modules * 16, 3), dtype=np.uint8)
+    host = min(timeit.repeat(lambda: np.stack([lut[c][frame[:, c]] for c in range(3)], axis=1),
+                             number=200, repeat=3)) / 200 * 1e6
+    rows.append(("host correction %dx16" % modules, host, None))
+    return rows
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot color correction check and benchmark")
+    parser.add_argument("--nodes", type=int, default=4, help="整链校验的模块数")
+    parser.add_argument("--repeat", type=int, default=2000, help="刷新耗时统计的帧数")
+    parser.add_argument("--wall", type=int, default=100, help="主机端校正耗时对照的模块数")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    args = parser.parse_args(argv)
+    overrides = dict({"FRAMED_PROTOCOL_ENABLE": True, "STARTUP_EFFECT_ENABLE": False},
+                     **parse_overrides(args.overrides))
+
+    print("%-34s %10s %14s" % ("lut (gamma, brightness, balance)", "vs host", "max err (LSB)"))
+    failures = 0
+    for params, same, err in check_luts():
+        failures += not same or err > 1.0
+        print("%-34s %10s %14.3f" % (params, "ok" if same else "FAIL", err))
+
+    print("\n%-24s %10s  %s" % ("chain (%d modules)" % args.nodes, "check", "rebuilds per module"))
+    modes = (("framed rgb", {}, framed(encode_frame)),
+             ("framed per-pixel", {"PER_PIXEL_ENABLE": True}, framed(encode_per_pixel)),
+             ("framed cut-through", {"CUT_THROUGH_ENABLE": True}, framed(encode_frame)))
+    for name, mode, encode in modes:
+        r = check_chain(args.nodes, dict(overrides, **mode), encode)
+        failures += bool(r["problems"])
+        print("%-24s %10s  %s" % (name, "ok" if not r["problems"] else "FAIL", r["rebuilds"]))
+        for problem in r["problems"][:10]:
+            print("         %s" % problem)
+    print("(rebuilds include the power-on build; commands handled in one wake of the color task share a rebuild)")
+
+    print("\n%-24s %14s %14s" % ("cost", "identity(us)", "corrected(us)"))
+    for name, plain, corrected in render_costs(args.repeat, args.wall):
+        print("%-24s %14.2f %14s" % (name, plain, "-" if corrected is None else "%.2f" % corrected))
+    print("(host CPU per call with pure Python paths; the viper apply_lut is timed on the board by fast_paths.benchmark())")
+    if failures:
+        print("%d check(s) failed" % failures)
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
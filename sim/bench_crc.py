@@ -0,0 +1,188 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_crc.py
+# @Description : 帧CRC基准：
+#                1. crc16_update的纯Python与viper版本（主机端按CPython执行）在随机分段输入下须与binascii.crc_hqx一致，
+#                   并给出本机上的每字节耗时（板上MicroPython字节码与viper的每字节耗时在REPL中调用fast_paths.benchmark()）；
+#                2. 每条链路按给定字节错误率随机翻转1位，分别不带与带CRC帧尾发送帧协议数据：
+#                   统计显示了错误内容（不是任何一帧的正确画面）的刷新次数、因CRC丢弃的帧数与结束时画面是否为某一完好帧，
+#                   带CRC时须没有错误显示；
+#                3. 不带与带CRC帧尾时的端到端延迟与最大帧率（--cpu-scale大于0时计入解析器的CRC计算耗时）
+#                用法：python -m sim.bench_crc --nodes 8 --frames 40 --error-rate 0.001
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import binascii
+import random
+import sys
+import time
+from host import add_crc
+from sim.bench_latency import encode_frame, encode_per_pixel, framed, frame_colors, measure_chain, parse_overrides
+from sim.chain import ChainSimulator, RECV_UART_ID, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 关闭开机彩虹：有错误时各模块收到首帧的时刻不同，彩虹画面不参与对比
+BASE = {"FRAMED_PROTOCOL_ENABLE": True, "STARTUP_EFFECT_ENABLE": False}
+
+# 注入错误的工作模式：(名称, 配置覆盖, 原始编码函数)
+MODES = (
+    ("framed rgb", {}, encode_frame),
+    ("framed per-pixel", {"PER_PIXEL_ENABLE": True}, encode_per_pixel),
+    ("framed cut-through", {"CUT_THROUGH_ENABLE": True}, encode_frame),
+)
+
+# ======================================== 功能函数 ============================================
+
+def with_crc(encode: callable) -> callable:
+    """把帧协议编码函数包装为带CRC帧尾的版本"""
+    def encode_crc(colors: list, seq: int = 0) -> bytes:
+        return add_crc(encode(colors, seq))
+    return encode_crc
+
+def check_crc_functions(cases: int, seed: int) -> list:
+    """随机数据按随机分段逐段累加，与binascii.crc_hqx对比；返回[(实现, 用例数, 不一致数, 每字节耗时us)]"""
+    crc16 = firmware_module("crc16")
+    impls = (("pure python", firmware_module("fast_paths").crc16_update_py),
+             ("viper (stand-in)", firmware_module("fast_native").crc16_update))
+    rng = random.Random(seed)
+    data = [bytes(rng.getrandbits(8) for _ in range(rng.randrange(1, 300))) for _ in range(cases)]
+    rows = []
+    for name, update in impls:
+        bad = 0
+        for buf in data:
+            crc, pos = crc16.CRC16_INIT, 0
+            mv = memoryview(buf)
+            while pos < len(buf):
+                n = rng.randrange(1, len(buf) - pos + 1)
+                crc = update(crc, mv, pos, n)
+                pos += n
+            bad += crc != binascii.crc_hqx(buf, crc16.CRC16_INIT)
+        block = bytes(range(256)) * 4
+        start = time.perf_counter()
+        for _ in range(20):
+            update(crc16.CRC16_INIT, block, 0, len(block))
+        per_byte = (time.perf_counter() - start) / (20 * len(block)) * 1e6
+        rows.append((name, cases, bad, per_byte))
+    return rows
+
+def inject_errors(sim: ChainSimulator, rate: float, rng: random.Random) -> list:
+    """每条链路（主机→模块0及各模块之间）的接收端按字节错误率rate随机翻转1位，返回[已翻转的字节数]"""
+    count = [0]
+    for node in sim.nodes:
+        uart = node.uarts[RECV_UART_ID]
+
+        def corrupt(start, char_us, data, baudrate, deliver=uart._deliver):
+            data = bytearray(data)
+            for k in range(len(data)):
+                if rng.random() < rate:
+                    data[k] ^= 1 << rng.randrange(8)
+                    count[0] += 1
+            deliver(start, char_us, bytes(data), baudrate)
+
+        uart._deliver = corrupt
+    return count
+
+def run_chain(length: int, overrides: dict, encode: callable, frames: int, rate: float, seed: int) -> tuple:
+    """发送frames帧（rate大于0时注入错误），返回(仿真器, 各模块刷新记录, 翻转的字节数)"""
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    flipped = inject_errors(sim, rate, random.Random(seed)) if rate > 0 else [0]
+    frame_us = len(encode(frame_colors(0, length))) * sim.char_us
+    t = BOOT_US
+    for f in range(frames):
+        sim.send(encode(frame_colors(f, length), f), at=t)
+        t += frame_us + length * 3000.0 + 5000.0
+    sim.run(until=t + 100000.0)
+    histories = [[bytes(buf) for _, buf in sim.pixels(i).history] for i in range(length)]
+    return sim, histories, flipped[0]
+
+def run_corruption(length: int, overrides: dict, encode: callable, frames: int, rate: float, seed: int) -> dict:
+    """同一模式下先无错误运行得到各模块的正确画面集合，再注入错误运行，统计错误显示与丢弃"""
+    _, reference, _ = run_chain(length, overrides, encode, frames, 0.0, seed)
+    good = [set(h) for h in reference]
+    sim, histories, flipped = run_chain(length, overrides, encode, frames, rate, seed)
+    parsers = [node.modules["core_protected"].frame_parser for node in sim.nodes]
+    return {
+        "flipped": flipped,
+        "shown": sum(1 for i, h in enumerate(histories) for buf in h if buf in good[i]),
+        "wrong": sum(1 for i, h in enumerate(histories) for buf in h if buf not in good[i]),
+        "discarded": sum(p.crc_errors for p in parsers),
+        "final_ok": sum(1 for i, h in enumerate(histories) if not h or h[-1] in good[i]),
+        "errors": len(sim.errors()),
+    }
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot frame CRC benchmark")
+    parser.add_argument("--nodes", type=int, default=8, help="链长")
+    parser.add_argument("--frames", type=int, default=40, help="每种模式发送的帧数")
+    parser.add_argument("--error-rate", type=float, default=0.001, help="每条链路的字节错误率")
+    parser.add_argument("--cases", type=int, default=500, help="CRC函数的随机用例数")
+    parser.add_argument("--latency-nodes", type=int, default=10, help="延迟对比的链长")
+    parser.add_argument("--cpu-scale", type=float, default=0.0,
+                        help="主机耗时换算为模块耗时的倍数（0为不计CPU耗时，结果完全确定）")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    args = parser.parse_args(argv)
+    overrides = dict(BASE, **parse_overrides(args.overrides))
+
+    print("%-20s %8s %12s %14s" % ("crc16_update", "cases", "mismatches", "host us/byte"))
+    for name, cases, bad, per_byte in check_crc_functions(args.cases, args.seed):
+        print("%-20s %8d %12s %14.3f" % (name, cases, bad if bad else "0 (ok)", per_byte))
+    print("(board cost per byte, bytecode vs viper: fast_paths.benchmark() in the REPL)")
+
+    print("\n%-20s %5s %8s %8s %8s %10s %9s %7s %6s" % (
+        "corruption (%d mod)" % args.nodes, "crc", "flipped", "shown", "wrong", "discarded", "final ok", "errors",
+        "check"))
+    failures = 0
+    for name, mode, raw in MODES:
+        for crc in (False, True):
+            encode = with_crc(framed(raw)) if crc else framed(raw)
+            r = run_corruption(args.nodes, dict(overrides, **mode), encode, args.frames, args.error_rate, args.seed)
+            if crc:
+                ok = not r["wrong"] and r["final_ok"] == args.nodes and not r["errors"]
+                check = "ok" if ok else "FAIL"
+                failures += not ok
+            else:
+                check = "-"
+            print("%-20s %5s %8d %8d %8d %10d %6d/%-2d %7d %6s" % (
+                name, "on" if crc else "off", r["flipped"], r["shown"], r["wrong"], r["discarded"], r["final_ok"],
+                args.nodes, r["errors"], check))
+    print("(byte error rate %g per link; wrong: pixel writes matching no frame; "
+          "final ok: modules ending on a good image)" % args.error_rate)
+
+    print("\n%-20s %5s %12s %10s %9s" % ("latency (%d mod)" % args.latency_nodes, "crc", "latency(ms)", "hop(ms)",
+                                         "max fps"))
+    for name, mode, raw in MODES:
+        for crc in (False, True):
+            encode = with_crc(framed(raw)) if crc else framed(raw)
+            r = measure_chain(args.latency_nodes, dict(overrides, **mode), args.cpu_scale, 6, encode)
+            print("%-20s %5s %12s %10s %9s" % (
+                name, "on" if crc else "off", "-" if r["latency_ms"] is None else "%.3f" % r["latency_ms"],
+                "-" if r["per_hop_ms"] is None else "%.3f" % r["per_hop_ms"],
+                "-" if r["max_fps"] is None else "%.1f" % r["max_fps"]))
+    if failures:
+        print("%d CRC-protected scenario(s) displayed corrupted data" % failures)
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_cut_through.py
+# @Description : 直通转发基准：固定级联长度，增加帧中后续负载字节数，对比整帧转发与直通转发的每级延迟
+#                用法：python -m sim.bench_cut_through --nodes 5 --payload 0 96 480 960
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+from sim.bench_latency import encode_frame, parse_overrides, per_hop_slope, run_frames
+
+# ======================================== 全局变量 ============================================
+
+# 两种转发模式的配置覆盖项
+MODES = (
+    ("store-and-forward", {"CUT_THROUGH_ENABLE": False}),
+    ("cut-through", {"CUT_THROUGH_ENABLE": True}),
+)
+
+# ======================================== 功能函数 ============================================
+
+def padded_encoder(payload: int) -> callable:
+    """在原始帧后追加payload字节（模拟链路更长的下游模块数据），由链尾接收"""
+    padding = bytes(i % 251 + 1 for i in range(payload))
+
+    def encode(colors: list, seq: int = 0) -> bytes:
+        return encode_frame(colors) + padding
+
+    return encode
+
+def measure(length: int, payload: int, overrides: dict, cpu_scale: float) -> tuple:
+    """返回(每级延迟ms, 末级模块显示延迟ms, 整帧发送时间ms)，未能完整显示时延迟为None"""
+    sim, tracker, starts = run_frames(length, 1, 0.0, overrides, cpu_scale, padded_encoder(payload))
+    tx_ms = (length * 3 + payload) * sim.char_us / 1000
+    if not tracker.complete():
+        return None, None, tx_ms
+    render = [row[0] - starts[0] for row in tracker.times]
+    return per_hop_slope(render) / 1000, render[-1] / 1000, tx_ms
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot cut-through forwarding benchmark")
+    parser.add_argument("--nodes", type=int, default=5, help="级联模块数")
+    parser.add_argument("--payload", type=int, nargs="+", default=[0, 48, 96, 192, 480, 960, 1920],
+                        help="每帧追加的下游负载字节数（可给多个）")
+    parser.add_argument("--cpu-scale", type=float, default=0.0, help="主机执行时间→RP2040执行时间的放大倍数")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    args = parser.parse_args(argv)
+    base = parse_overrides(args.overrides)
+    # 整帧转发一次只能处理ISR读缓冲区大小的数据，这里放大到环形缓冲区容量，避免先被这个限制截断
+    base.setdefault("ISR_READ_BUF_SIZE", 1024)
+
+    print("modules: %d, overrides: %s" % (args.nodes, base))
+    print("%10s %10s | %14s %14s | %14s %14s" % (
+        "payload", "tx(ms)", "S&F hop(ms)", "S&F last(ms)", "CT hop(ms)", "CT last(ms)"))
+    for payload in args.payload:
+        row = []
+        for _, mode in MODES:
+            hop, last, tx_ms = measure(args.nodes, payload, dict(base, **mode), args.cpu_scale)
+            row += ["-" if hop is None else "%.3f" % hop, "-" if last is None else "%.3f" % last]
+        print("%10d %10.3f | %14s %14s | %14s %14s" % (payload, tx_ms, *row))
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
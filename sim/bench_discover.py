@@ -0,0 +1,214 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_discover.py
+# @Description : 链路发现基准：主机发送一帧FRAME_TYPE_DISCOVER，从链尾收回模块数与各级状态记录，
+#                解码后与仿真中各模块的实际状态核对，并报告一次往返的耗时随级联长度的变化；
+#                随后发送一帧堆状态查询（FRAME_TYPE_HEAP），同样核对各模块的回收统计
+#                用法：python -m sim.bench_discover --nodes 10 50 100 --low 3 --show
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import json
+import struct
+import sys
+from sim.bench_latency import encode_framed, frame_colors, parse_overrides
+from sim.chain import ChainSimulator, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 状态记录格式（与frame_parser中STATUS_RECORD_SIZE一致）
+STATUS_FORMAT = ">BBHHHHHihBBH"
+STATUS_FIELDS = ("flags", "lost", "ring_high_water", "ring_overflow", "battery_mv", "proc_us", "baud",
+                 "time_offset_us", "time_err_us", "flow_stalls", "rx_full", "crc_errors")
+
+# 堆记录格式（与frame_parser中HEAP_RECORD_SIZE一致）
+HEAP_FORMAT = ">HHHHHH"
+HEAP_FIELDS = ("gc_collections", "gc_auto", "gc_pause_max_us", "heap_per_frame", "heap_free_16", "heap_alloc_16")
+
+# ======================================== 功能函数 ============================================
+
+def discover_frame(seq: int = 0, frame_type: int = None) -> bytes:
+    """发现帧（frame_type默认FRAME_TYPE_DISCOVER，也可为FRAME_TYPE_HEAP）：计数为0、不含记录"""
+    fp = firmware_module("frame_parser")
+    if frame_type is None:
+        frame_type = fp.FRAME_TYPE_DISCOVER
+    return bytes(fp.build_header(frame_type, seq, 2)) + b"\x00\x00"
+
+def decode_discovery(data: bytes, frame_type: int = None) -> tuple:
+    """
+    从链尾收到的字节中找出发现帧（或堆状态查询帧）并解码
+    返回(模块数, 记录列表)，每条记录为dict，状态记录的baud已换算为波特率
+    """
+    fp = firmware_module("frame_parser")
+    if frame_type is None:
+        frame_type = fp.FRAME_TYPE_DISCOVER
+    if frame_type == fp.FRAME_TYPE_HEAP:
+        size, record_format, fields = fp.HEAP_RECORD_SIZE, HEAP_FORMAT, HEAP_FIELDS
+    else:
+        size, record_format, fields = fp.STATUS_RECORD_SIZE, STATUS_FORMAT, STATUS_FIELDS
+    for pos in range(len(data) - fp.FRAME_HEADER_SIZE + 1):
+        if data[pos] == fp.FRAME_SYNC1 and data[pos + 1] == fp.FRAME_SYNC2 and data[pos + 2] == frame_type:
+            break
+    else:
+        raise ValueError("no discovery frame in %d bytes" % len(data))
+    length = (data[pos + 4] << 8) | data[pos + 5]
+    payload = data[pos + fp.FRAME_HEADER_SIZE:pos + fp.FRAME_HEADER_SIZE + length]
+    if len(payload) < length:
+        raise ValueError("truncated discovery frame: %d of %d bytes" % (len(payload), length))
+    count = (payload[0] << 8) | payload[1]
+    records = []
+    for k in range(count):
+        record = dict(zip(fields, struct.unpack_from(record_format, payload, 2 + k * size)))
+        if "baud" in record:
+            record["baud"] *= 100
+        records.append(record)
+    return count, records
+
+def discover(sim: ChainSimulator, seq: int = 0, timeout_us: float = None, frame_type: int = None) -> dict:
+    """发送发现帧或堆状态查询帧（帧计数为seq）并运行到链尾收齐结果，返回模块数、记录与往返耗时"""
+    frame = discover_frame(seq, frame_type)
+    # 每级最多增加一条记录，按整帧转发估算最长耗时
+    if timeout_us is None:
+        size = len(frame) + len(sim) * firmware_module("frame_parser").STATUS_RECORD_SIZE
+        timeout_us = len(sim) * (size * sim.char_us + 5000.0) + 20000.0
+    sim.tail_uart.read()
+    start = sim.now
+    sim.send(frame, at=start)
+    received = bytearray()
+    result = {}
+
+    def done() -> bool:
+        chunk = sim.tail_uart.read()
+        if chunk:
+            received.extend(chunk)
+            try:
+                result["count"], result["records"] = decode_discovery(bytes(received), frame_type)
+            except ValueError:
+                return False
+            return True
+        return False
+
+    sim.run(until=start + timeout_us, stop=done)
+    result["round_trip_us"] = sim.now - start
+    return result
+
+def check_records(sim: ChainSimulator, count: int, records: list) -> list:
+    """与仿真中各模块的实际状态核对，返回不一致项的描述"""
+    fp = firmware_module("frame_parser")
+    problems = []
+    if count != len(sim):
+        problems.append("count %d != %d modules" % (count, len(sim)))
+    for i, (node, record) in enumerate(zip(sim.nodes, records)):
+        core = node.modules["core_protected"]
+        if record["ring_high_water"] != min(core.ring_buffer.high_water, 0xFFFF):
+            problems.append("module %d high water %d != %d" % (i, record["ring_high_water"], core.ring_buffer.high_water))
+        if bool(record["flags"] & fp.STATUS_LOW_BATTERY) != core.low_battery_flag:
+            problems.append("module %d low battery flag mismatch" % i)
+        if record["baud"] != core.forward_baud:
+            problems.append("module %d baud %d != %d" % (i, record["baud"], core.forward_baud))
+        if record["flow_stalls"] != min(core.flow_stalls, 0xFF):
+            problems.append("module %d flow stalls %d != %d" % (i, record["flow_stalls"], core.flow_stalls))
+        if record["crc_errors"] != min(core.frame_parser.crc_errors, 0xFFFF):
+            problems.append("module %d crc errors %d != %d" % (i, record["crc_errors"], core.frame_parser.crc_errors))
+        expected_mv = int(core.get_battery_avg_voltage() * 1000)
+        if abs(record["battery_mv"] - expected_mv) > 1:
+            problems.append("module %d battery %d mV != %d mV" % (i, record["battery_mv"], expected_mv))
+    return problems
+
+def check_heap_records(sim: ChainSimulator, count: int, records: list) -> list:
+    """堆状态查询的记录与仿真中各模块的回收统计核对，返回不一致项的描述"""
+    problems = []
+    if count != len(sim):
+        problems.append("heap query count %d != %d modules" % (count, len(sim)))
+    for i, (node, record) in enumerate(zip(sim.nodes, records)):
+        core = node.modules["core_protected"]
+        if record["gc_collections"] != min(core.gc_collections, 0xFFFF):
+            problems.append("module %d gc collections %d != %d" % (i, record["gc_collections"], core.gc_collections))
+        if record["gc_auto"] != min(core.gc_auto, 0xFFFF):
+            problems.append("module %d auto collections %d != %d" % (i, record["gc_auto"], core.gc_auto))
+        if not record["heap_free_16"] or not record["heap_alloc_16"]:
+            problems.append("module %d heap free/alloc missing" % i)
+    return problems
+
+def run_discovery(length: int, overrides: dict, low: list, frames: int) -> dict:
+    """先发送frames帧灯效数据产生负载，再进行一次发现"""
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    for index in low:
+        if index < length:
+            sim.module(index).set_low_battery_flag(True)
+    for f in range(frames):
+        data = encode_framed(frame_colors(f, length), f)
+        sim.send(data)
+        sim.run_for(len(data) * sim.char_us * (length + 1) + length * 3000.0)
+    result = discover(sim, frames)
+    result["modules"] = length
+    result["problems"] = check_records(sim, result.get("count", 0), result.get("records", [])) \
+        if "count" in result else ["no discovery frame received"]
+    heap = discover(sim, frames + 1, frame_type=firmware_module("frame_parser").FRAME_TYPE_HEAP)
+    result["heap_records"] = heap.get("records", [])
+    result["problems"] += check_heap_records(sim, heap["count"], heap["records"]) \
+        if "count" in heap else ["no heap query frame received"]
+    return result
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot chain discovery benchmark")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 10, 50, 100], help="级联模块数（可给多个）")
+    parser.add_argument("--low", type=int, nargs="*", default=[], help="置为低电压锁定的模块序号")
+    parser.add_argument("--frames", type=int, default=3, help="发现前发送的灯效帧数")
+    parser.add_argument("--show", action="store_true", help="打印每个模块的状态记录")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+    overrides.setdefault("FRAMED_PROTOCOL_ENABLE", True)
+
+    results = []
+    failures = 0
+    if not args.json:
+        print("overrides: %s" % overrides)
+        print("%8s %8s %12s %14s %10s" % ("modules", "found", "reply bytes", "round trip(ms)", "check"))
+    for length in args.nodes:
+        r = run_discovery(length, overrides, args.low, args.frames)
+        results.append(r)
+        failures += bool(r["problems"])
+        if args.json:
+            continue
+        count = r.get("count", 0)
+        print("%8d %8d %12d %14.3f %10s" % (length, count, 8 + count * firmware_module("frame_parser").STATUS_RECORD_SIZE,
+                                            r["round_trip_us"] / 1000, "ok" if not r["problems"] else "FAIL"))
+        for problem in r["problems"]:
+            print("         %s" % problem)
+        if args.show:
+            print("         %4s %6s %5s %8s %8s %8s %8s %8s" % ("#", "flags", "lost", "ring hw", "overflow", "mV",
+                                                                 "proc us", "baud"))
+            for i, rec in enumerate(r.get("records", [])):
+                print("         %4d %6s %5d %8d %8d %8d %8d %8d" % (
+                    i, "0x%02x" % rec["flags"], rec["lost"], rec["ring_high_water"], rec["ring_overflow"],
+                    rec["battery_mv"], rec["proc_us"], rec["baud"]))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    if failures:
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_effects.py
+# @Description : 本地灯效基准：主机发送一条灯效命令后校验全链各模块的相位与显示内容、动态灯效的重绘帧率、灯效数据抢占，
+#                对比本地灯效与逐帧推送像素的主机流量，并统计每种灯效渲染一帧的CPU耗时
+#                用法：python -m sim.bench_effects --nodes 10 50 --set CUT_THROUGH_ENABLE=True
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import sys
+import timeit
+from host.effects import EFFECT_OFF, EFFECT_SOLID, EFFECT_RAINBOW, EFFECT_BREATHE, EFFECT_CHASE, effect_frame, wall_step
+from sim.bench_latency import encode_framed, frame_colors, parse_overrides
+from sim.chain import ChainSimulator, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+COLOR = (200, 40, 90)
+
+# 静止（PERIOD_MS = 0）时校验显示内容的灯效：(名称, 编号, 参数)
+STATIC_CASES = (("solid", EFFECT_SOLID, 0), ("rainbow", EFFECT_RAINBOW, 0), ("breathe", EFFECT_BREATHE, 0),
+                ("chase", EFFECT_CHASE, 96), ("off", EFFECT_OFF, 0))
+
+# ======================================== 功能函数 ============================================
+
+def expected_buf(core, effect: int, param: int, phase: int) -> bytes:
+    """按查找表独立计算相位为phase时一个模块的灯珠缓冲区（GRB）"""
+    lut = firmware_module("color_lut")
+    num = core.WS2812_NUM
+    order = core.np.ORDER
+
+    def solid(r: int, g: int, b: int) -> bytes:
+        px = [0, 0, 0]
+        px[order[0]], px[order[1]], px[order[2]] = r, g, b
+        return bytes(px) * num
+
+    if effect == EFFECT_SOLID:
+        return solid(*COLOR)
+    if effect == EFFECT_RAINBOW:
+        offset = lut.strip_offset((phase * 360) >> 16, num, core.RAINBOW_HUE_SPACING)
+        return bytes(core.rainbow_strip_lut[offset:offset + num * 3])
+    if effect == EFFECT_BREATHE:
+        level = lut.build_wave_lut()[phase >> 8]
+        return solid(*(c * level // 255 for c in COLOR))
+    if effect == EFFECT_CHASE:
+        return solid(*COLOR) if (phase >> 8) < param else solid(0, 0, 0)
+    return solid(0, 0, 0)
+
+def check_static(length: int, overrides: dict, phase: int = 1234) -> list:
+    """每种灯效发送一条静止命令（每级相位差铺满一个周期），逐模块核对相位与灯珠内容，返回不一致项"""
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    step = wall_step(length)
+    fp = firmware_module("frame_parser")
+    problems = []
+    for name, effect, param in STATIC_CASES:
+        frame = effect_frame(effect, COLOR, 0, phase, step, param)
+        if frame != bytes(fp.build_effect(effect, param, *COLOR, 0, phase, step)):
+            problems.append("%s: host frame differs from firmware build_effect" % name)
+        sim.send(frame)
+        sim.run_for(length * (len(frame) * sim.char_us + 3000.0) + 20000.0)
+        for i, node in enumerate(sim.nodes):
+            core = node.modules["core_protected"]
+            want_phase = (phase + i * step) & 0xFFFF
+            if core.effect_engine.phase != want_phase:
+                problems.append("%s: module %d phase %d != %d" % (name, i, core.effect_engine.phase, want_phase))
+            elif bytes(core.np.buf) != expected_buf(core, effect, param, want_phase):
+                problems.append("%s: module %d pixels differ" % (name, i))
+    return problems + ["module %d error: %s" % (i, e) for i, _, e in sim.errors()]
+
+def check_animated(length: int, overrides: dict, period_ms: int = 1000, run_ms: int = 1000) -> dict:
+    """
+    动态彩虹：运行run_ms统计每个模块的重绘帧率与相邻刷新间的色相是否变化；
+    之后推送一帧灯效数据，灯效须停止且模块显示该数据
+    """
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    frame = effect_frame(EFFECT_RAINBOW, period_ms=period_ms, step=wall_step(length))
+    sim.send(frame)
+    start = sim.now
+    sim.run_for(run_ms * 1000.0)
+    fps = [sum(1 for t, _ in sim.pixels(i).history if t >= start) * 1000.0 / run_ms for i in range(length)]
+
+    colors = frame_colors(1, length)
+    data = encode_framed(colors, 0)
+    sim.send(data)
+    sim.run_for(length * (len(data) * sim.char_us + 3000.0) + 20000.0)
+    stop = sim.now
+    sim.run_for(200000.0)
+    after = sum(1 for i in range(length) for t, _ in sim.pixels(i).history if t > stop)
+    shown = sum(1 for i in range(length) if sim.pixels(i).pixel(0) == colors[i])
+    return {"min_fps": min(fps), "max_fps": max(fps), "shown": shown, "writes_after_data": after,
+            "errors": len(sim.errors())}
+
+def render_cost(repeat: int) -> list:
+    """
+    每种灯效渲染一帧（不含WS2812发送）的主机耗时（微秒），以及原彩虹单步作对照
+    用纯Python热路径统计：主机上的viper版本按CPython逐字节执行，耗时没有参考意义
+    """
+    sim = ChainSimulator(1, overrides={"NATIVE_ENABLE": False})
+    sim.run(until=BOOT_US)
+    core = sim.module(0)
+    engine = core.effect_engine
+    payload = bytearray(11)
+    rows = []
+    for name, effect, param in STATIC_CASES:
+        period = 0 if effect in (EFFECT_SOLID, EFFECT_OFF) else 1000
+        payload[:] = bytes(effect_frame(effect, COLOR, period, 0, 0, param or 96))[6:]
+        engine.set(payload, 0)
+
+        def frames(engine=engine):
+            for k in range(repeat):
+                engine.render(k * 7)
+        rows.append((name, min(timeit.repeat(frames, number=1, repeat=3)) / repeat * 1e6))
+    rows.append(("rainbow_step (startup)", min(timeit.repeat(
+        lambda: [core.rainbow_step(k % 360) for k in range(repeat)], number=1, repeat=3)) / repeat * 1e6))
+    return rows
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot on-module effect engine benchmark")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 10, 50], help="级联模块数（可给多个）")
+    parser.add_argument("--fps", type=float, default=30.0, help="对照：逐帧推送像素的帧率")
+    parser.add_argument("--repeat", type=int, default=5000, help="渲染耗时统计的帧数")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+    overrides.setdefault("FRAMED_PROTOCOL_ENABLE", True)
+
+    print("overrides: %s" % overrides)
+    print("%8s %10s %16s %16s %10s %10s" % ("modules", "static", "effect bytes", "stream B/s", "fps", "preempt"))
+    failures = 0
+    for length in args.nodes:
+        problems = check_static(length, overrides)
+        anim = check_animated(length, overrides)
+        preempt_ok = anim["shown"] == length and anim["writes_after_data"] == 0 and not anim["errors"]
+        failures += bool(problems) + (not preempt_ok)
+        stream = (6 + 3 * length) * args.fps
+        print("%8d %10s %16d %16.0f %10s %10s" % (
+            length, "ok" if not problems else "FAIL", len(effect_frame(EFFECT_RAINBOW)), stream,
+            "%.0f-%.0f" % (anim["min_fps"], anim["max_fps"]),
+            "ok" if preempt_ok else
+            "FAIL (%d/%d shown, %d writes)" % (anim["shown"], length, anim["writes_after_data"])))
+        for problem in problems[:10]:
+            print("         %s" % problem)
+
+    print("\n%-24s %12s" % ("effect", "us/frame"))
+    for name, us in render_cost(args.repeat):
+        print("%-24s %12.3f" % (name, us))
+    print("(host CPU time per rendered frame, excluding the WS2812 write)")
+    if failures:
+        print("%d check(s) failed" % failures)
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_flow.py
+# @Description : 流控（XON/XOFF）基准：主机按线路速率连续发送帧协议逐灯数据（最大负载，帧间无空闲），
+#                分别在全链同速与中间一段链路降速（瓶颈）时对比关闭与开启FLOW_CONTROL_ENABLE：
+#                统计各模块按顺序显示的帧数、接收口驱动缓冲区与环形缓冲区溢出字节数、解析器丢帧数、暂停次数与实际帧率，
+#                开启流控时须零丢失且全部帧按顺序显示
+#                用法：python -m sim.bench_flow --nodes 8 --frames 30 --slow-baud 57600
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import sys
+from host import PacedWriter
+from sim.bench_latency import encode_per_pixel, frame_colors, framed, parse_overrides
+from sim.chain import ChainSimulator, FrameTracker, FORWARD_UART_ID, RECV_UART_ID
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 基础配置：流控需帧协议；逐灯寻址使每帧足够长，连续发送时接收积压超过单个缓冲区
+BASE = {"FRAMED_PROTOCOL_ENABLE": True, "PER_PIXEL_ENABLE": True}
+
+# 场景：(名称, 配置覆盖, 是否设置瓶颈链路)
+SCENARIOS = (
+    ("line rate, idle irq", {}, False),
+    ("line rate, cut-through", {"CUT_THROUGH_ENABLE": True}, False),
+    ("slow link, idle irq", {}, True),
+    ("slow link, cut-through", {"CUT_THROUGH_ENABLE": True}, True),
+)
+
+# 最后一次显示进展之后等待多久视为结束（微秒）
+STALL_US = 300000.0
+
+# ======================================== 功能函数 ============================================
+
+def set_slow_link(sim: ChainSimulator, index: int, baudrate: int) -> None:
+    """把模块index与其下游（或链尾）之间的链路两端设为baudrate"""
+    sim.nodes[index].uarts[FORWARD_UART_ID].init(baudrate=baudrate)
+    downstream = sim.nodes[index + 1].uarts[RECV_UART_ID] if index + 1 < len(sim.nodes) else sim.tail_uart
+    downstream.init(baudrate=baudrate)
+
+def run_case(length: int, overrides: dict, flow: bool, frames: int, slow_link: int, slow_baud: int) -> dict:
+    """主机以最大负载连续写出frames帧（flow时按XON/XOFF暂停），返回显示与丢失统计"""
+    sim = ChainSimulator(length, overrides=dict(BASE, **overrides, FLOW_CONTROL_ENABLE=flow))
+    sim.run(until=BOOT_US)
+    if slow_link >= 0:
+        set_slow_link(sim, slow_link, slow_baud)
+    expected = [frame_colors(f, length) for f in range(frames)]
+    tracker = FrameTracker(sim, expected)
+    encode = framed(encode_per_pixel)
+
+    class SimPort:
+        @property
+        def in_waiting(self) -> int:
+            return sim.host_uart.any()
+
+        def read(self, nbytes: int) -> bytes:
+            return sim.host_uart.read(nbytes) or b""
+
+        def write(self, data) -> None:
+            sim.send(data)
+
+    writer = PacedWriter(SimPort(), sim.baudrate, clock=lambda: sim.now / 1e6, sleep=lambda s: sim.run_for(s * 1e6),
+                         flow=flow)
+    start = sim.now
+    for f in range(frames):
+        writer.write_frame(encode(expected[f], f))
+    sim.run(stop=tracker.stop_when(STALL_US))
+    # 驱动缓冲区溢出在读取时才计入（替身按到达时刻结算），结束时统一结算一次
+    for node in sim.nodes:
+        node.uarts[RECV_UART_ID].any()
+
+    cores = [node.modules["core_protected"] for node in sim.nodes]
+    last = max((t for row in tracker.times for t in row if t is not None), default=start)
+    shown = min(sum(1 for t in row if t is not None) for row in tracker.times)
+    return {
+        "complete": tracker.complete(),
+        "shown": shown,
+        "rx_overflow": sim.uart_stats()["rx_overflow"],
+        "ring_overflow": sim.ring_stats()["overflow"],
+        "lost": sum(core.frame_parser.lost for core in cores),
+        "stalls": writer.stalls + sum(core.flow_stalls for core in cores),
+        "timeouts": writer.flow_timeouts + sum(core.flow_timeouts for core in cores),
+        "fps": frames / ((last - start) / 1e6) if last > start else 0.0,
+        "errors": len(sim.errors()),
+    }
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot XON/XOFF flow control benchmark")
+    parser.add_argument("--nodes", type=int, default=8, help="链长")
+    parser.add_argument("--frames", type=int, default=30, help="连续发送的帧数")
+    parser.add_argument("--slow-link", type=int, default=0,
+                        help="瓶颈链路所在模块（与其下游之间）；各级取走本模块数据后帧逐级变短，瓶颈须足够靠近链首")
+    parser.add_argument("--slow-baud", type=int, default=57600, help="瓶颈链路的波特率")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+    slow_link = args.slow_link
+
+    print("%-24s %5s %8s %10s %10s %6s %7s %9s %7s %6s" % ("scenario", "flow", "shown", "rx ovf(B)", "ring ovf(B)",
+                                                           "lost", "stalls", "timeouts", "fps", "check"))
+    failures = 0
+    for name, mode, slow in SCENARIOS:
+        for flow in (False, True):
+            r = run_case(args.nodes, dict(overrides, **mode), flow, args.frames, slow_link if slow else -1,
+                         args.slow_baud)
+            zero_loss = r["complete"] and not (r["rx_overflow"] or r["ring_overflow"] or r["lost"] or r["errors"])
+            if flow:
+                check = "ok" if zero_loss else "FAIL"
+                failures += not zero_loss
+            else:
+                check = "-"
+            print("%-24s %5s %4d/%-3d %10d %10d %6d %7d %9d %7.1f %6s" % (
+                name, "on" if flow else "off", r["shown"], args.frames, r["rx_overflow"], r["ring_overflow"],
+                r["lost"], r["stalls"], r["timeouts"], r["fps"], check))
+    print("(shown: frames displayed in order by every module; slow link: module %d -> %d at %d baud)" % (
+        slow_link, slow_link + 1, args.slow_baud))
+    if failures:
+        print("%d flow-controlled scenario(s) lost data" % failures)
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
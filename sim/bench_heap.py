@@ -0,0 +1,206 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_heap.py
+# @Description : 堆分配与回收调度基准：
+#                1. 各工作模式下跳过启动与预热帧后，按MicroPython的分配规则审计（alloc_audit.py）每个模块每帧的分配：
+#                   接收→解析→刷新→转发路径须为0，异步任务每次唤醒的生成器单独列出；
+#                2. 把模型堆的空闲空间设小，使自动回收在运行期间发生，对比关闭与开启GC_IDLE_ENABLE：
+#                   显式/自动回收次数、最长停顿、链尾模块显示延迟的最大值与波动，以及固件统计的每帧分配字节数，
+#                   开启时须没有自动回收且没有丢数据（连续发送时两次唤醒之间到达的多帧只刷新最新一帧，显示帧数可少于发送帧数）
+#                用法：python -m sim.bench_heap --nodes 3 --frames 20 --heap-free 4096
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import contextlib
+import sys
+from host import add_crc
+from sim import mpgc
+from sim.alloc_audit import AllocAudit
+from sim.bench_latency import encode_frame, encode_per_pixel, frame_colors, framed, parse_overrides
+from sim.chain import ChainSimulator, FrameTracker, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 关闭开机彩虹（其分配只在启动阶段发生，不属于稳态）
+BASE = {"STARTUP_EFFECT_ENABLE": False}
+
+# 预热帧数：首次转发（启动时序记录）、首次唤醒等只发生一次的分配不计入稳态
+WARMUP_FRAMES = 3
+
+# 异步任务唤醒（await ThreadSafeFlag.wait()）的分配种类
+WAKE_KINDS = ("coroutine",)
+
+# ======================================== 功能函数 ============================================
+
+def with_show(encode: callable) -> callable:
+    """每帧数据之后跟一条锁存命令"""
+    fp = firmware_module("frame_parser")
+
+    def encode_latched(colors: list, seq: int = 0) -> bytes:
+        return encode(colors, seq) + bytes(fp.build_show(2000, 300))
+
+    return encode_latched
+
+def with_crc(encode: callable) -> callable:
+    """把帧协议编码函数包装为带CRC帧尾的版本"""
+    def encode_crc(colors: list, seq: int = 0) -> bytes:
+        return add_crc(encode(colors, seq))
+    return encode_crc
+
+def audit_modes() -> tuple:
+    """审计的工作模式：(名称, 配置覆盖, 编码函数)"""
+    framed_on = {"FRAMED_PROTOCOL_ENABLE": True}
+    return (
+        ("raw rgb", {}, encode_frame),
+        ("raw per-pixel", {"PER_PIXEL_ENABLE": True}, encode_per_pixel),
+        ("raw cut-through", {"CUT_THROUGH_ENABLE": True}, encode_frame),
+        ("framed rgb", framed_on, framed(encode_frame)),
+        ("framed per-pixel", dict(framed_on, PER_PIXEL_ENABLE=True), framed(encode_per_pixel)),
+        ("framed cut-through", dict(framed_on, CUT_THROUGH_ENABLE=True), framed(encode_frame)),
+        ("framed crc", framed_on, with_crc(framed(encode_frame))),
+        ("framed latch", dict(framed_on, LATCH_ENABLE=True), with_show(framed(encode_frame))),
+        ("framed flow", dict(framed_on, FLOW_CONTROL_ENABLE=True), framed(encode_frame)),
+    )
+
+@contextlib.contextmanager
+def heap_model(free: int = None):
+    """期间创建的模块堆模型只有free字节空闲（None为默认模型）"""
+    saved = mpgc.LIVE_BYTES
+    if free is not None:
+        mpgc.LIVE_BYTES = mpgc.HEAP_SIZE - free
+    try:
+        yield
+    finally:
+        mpgc.LIVE_BYTES = saved
+
+def send_frames(sim: ChainSimulator, encode: callable, first: int, count: int, start: float, gap_us: float) -> list:
+    """从start开始依次发送第first~first+count-1帧（帧间空闲gap_us），运行到最后一帧传完，返回各帧的发送时刻"""
+    length = len(sim)
+    starts = []
+    t = start
+    for f in range(first, first + count):
+        data = encode(frame_colors(f, length), f)
+        sim.send(data, at=t)
+        starts.append(t)
+        t += len(data) * sim.char_us + gap_us
+    sim.run(until=t + length * 3000.0)
+    return starts
+
+def audit_mode(length: int, overrides: dict, encode: callable, frames: int, gap_us: float) -> dict:
+    """预热后审计frames帧，返回每个模块每帧的数据路径分配次数、任务唤醒次数与最多的分配点"""
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    with AllocAudit() as audit:
+        send_frames(sim, encode, 0, WARMUP_FRAMES, BOOT_US, gap_us)
+        audit.reset()
+        send_frames(sim, encode, WARMUP_FRAMES, frames, sim.now, gap_us)
+    per_frame = float(frames * length)
+    return {
+        "data_path": audit.total(exclude=WAKE_KINDS) / per_frame,
+        "wakes": audit.total(kinds=WAKE_KINDS) / per_frame,
+        "top": audit.top(3, exclude=WAKE_KINDS),
+        "errors": len(sim.errors()),
+    }
+
+def run_gc(length: int, overrides: dict, encode: callable, frames: int, gap_us: float, free: int) -> dict:
+    """模型堆只有free字节空闲时连续发送frames帧，返回回收统计与链尾模块的显示延迟"""
+    with heap_model(free):
+        sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    expected = [frame_colors(f, length) for f in range(frames)]
+    tracker = FrameTracker(sim, expected)
+    with AllocAudit():
+        starts = send_frames(sim, encode, 0, frames, BOOT_US, gap_us)
+        sim.run(until=sim.now + 50000.0)
+    heaps = [node.heap for node in sim.nodes]
+    cores = [node.modules["core_protected"] for node in sim.nodes]
+    last = tracker.times[-1]
+    lost = sim.ring_stats()["overflow"] + sim.uart_stats()["rx_overflow"]
+    if cores[0].FRAMED_PROTOCOL_ENABLE:
+        lost += sum(core.frame_parser.lost for core in cores)
+    latencies = [(t - s) / 1000 for t, s in zip(last, starts) if t is not None]
+    return {
+        "shown": sum(1 for t in last if t is not None),
+        "lost": lost,
+        "explicit": sum(h.collections for h in heaps),
+        "auto": sum(h.auto_collections for h in heaps),
+        "pause_us": max((pause for h in heaps for _, _, pause in h.events), default=0.0),
+        "latency_max": max(latencies, default=0.0),
+        "latency_spread": max(latencies, default=0.0) - min(latencies, default=0.0),
+        "per_frame": cores[0].heap_per_frame,
+        "errors": len(sim.errors()),
+    }
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot heap allocation and GC scheduling benchmark")
+    parser.add_argument("--nodes", type=int, default=3, help="链长")
+    parser.add_argument("--frames", type=int, default=20, help="每种模式审计的帧数（不含预热帧）")
+    parser.add_argument("--gc-frames", type=int, default=120, help="回收对比中发送的帧数")
+    parser.add_argument("--gap-ms", type=float, default=15.0, help="帧间空闲（毫秒）")
+    parser.add_argument("--heap-free", type=int, default=4096, help="回收对比中模型堆的空闲字节数")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    args = parser.parse_args(argv)
+    overrides = dict(BASE, **parse_overrides(args.overrides))
+    gap_us = args.gap_ms * 1000.0
+
+    print("%-20s %14s %12s %6s  %s" % ("allocations/frame", "data path", "task wakes", "check", "top sites"))
+    failures = 0
+    for name, mode, encode in audit_modes():
+        r = audit_mode(args.nodes, dict(overrides, **mode), encode, args.frames, gap_us)
+        ok = not r["data_path"] and not r["errors"]
+        failures += not ok
+        sites = ", ".join("%s:%d %s x%d" % (f, line, kind, n) for (f, line, kind), n in r["top"])
+        print("%-20s %14.2f %12.2f %6s  %s" % (name, r["data_path"], r["wakes"], "ok" if ok else "FAIL", sites or "-"))
+    print("(per module per frame after %d warm-up frames; task wakes: one generator per await ThreadSafeFlag.wait())"
+          % WARMUP_FRAMES)
+
+    # 回收阈值按模型堆的空闲大小缩放，使显式回收先于堆满发生
+    gc_overrides = dict(overrides, GC_MIN_ALLOC=args.heap_free // 4, GC_FORCE_ALLOC=args.heap_free // 2)
+    scenarios = (
+        ("gaps, idle irq", {"FRAMED_PROTOCOL_ENABLE": True}, gap_us),
+        ("back-to-back, cut-through", {"FRAMED_PROTOCOL_ENABLE": True, "CUT_THROUGH_ENABLE": True}, 0.0),
+    )
+    print("\n%-26s %5s %7s %9s %6s %10s %12s %11s %8s %5s %6s" % (
+        "gc (%d B free)" % args.heap_free, "idle", "shown", "explicit", "auto", "pause(us)", "worst lat(ms)",
+        "spread(ms)", "B/frame", "lost", "check"))
+    for name, mode, gap in scenarios:
+        encode = framed(encode_frame)
+        for idle in (False, True):
+            r = run_gc(args.nodes, dict(gc_overrides, GC_IDLE_ENABLE=idle, **mode), encode, args.gc_frames, gap,
+                       args.heap_free)
+            if idle:
+                ok = not r["auto"] and not r["errors"] and not r["lost"]
+                check = "ok" if ok else "FAIL"
+                failures += not ok
+            else:
+                check = "-"
+            print("%-26s %5s %3d/%-3d %9d %6d %10.0f %12.3f %11.3f %8d %5d %6s" % (
+                name, "on" if idle else "off", r["shown"], args.gc_frames, r["explicit"], r["auto"], r["pause_us"],
+                r["latency_max"], r["latency_spread"], r["per_frame"], r["lost"], check))
+    print("(latency: host send start to display at the last module; B/frame: firmware heap_per_frame of module 0;")
+    print(" lost: ring/rx overflow and parser resyncs; back-to-back frames arriving between two wakes show only the latest)")
+    if failures:
+        print("%d scenario(s) allocated on the data path or collected mid-stream" % failures)
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_host.py
+# @Description : 主机端控制库（host/）校验与基准：打包结果与逐模块Python循环逐字节比对，向量化打包与循环打包的耗时对比，
+#                经pty写出时的节流与数据完整性，以及经PacedWriter驱动仿真链后各模块的显示结果
+#                用法：python -m sim.bench_host --width 20 --height 20 --frames 30
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import os
+import sys
+import threading
+import time
+import timeit
+import tty
+import numpy as np
+from host import BLANK, FramePacker, PacedWriter, frame_gap_us, index_table, row_major, serpentine
+from sim.bench_latency import parse_overrides
+from sim.chain import ChainSimulator, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 逐灯寻址时每个模块的灯珠排列（行, 列）
+MODULE_SHAPE = (4, 4)
+
+# ======================================== 功能函数 ============================================
+
+def make_layouts(height: int, width: int, seed: int = 1) -> dict:
+    """待校验的布局：行优先、蛇形、随机排列的索引表（含一个不显示的模块，用(y, x)坐标表示）"""
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(height * width)
+    coords = [(p // width, p % width) for p in order]
+    coords[len(coords) // 2] = (BLANK, BLANK)
+    return {"row-major": row_major(height, width), "serpentine": serpentine(height, width),
+            "table": index_table(coords, height, width)}
+
+def reference_pack(frame: np.ndarray, layout, width: int, per_pixel: bool, framed: bool, seq: int = 0) -> bytes:
+    """逐模块Python循环打包（与固件协议逐条对应），用作校验基准；帧头用固件frame_parser生成"""
+    out = bytearray()
+    mh, mw = MODULE_SHAPE
+    for p in layout:
+        p = int(p)
+        if per_pixel:
+            for j in range(mh * mw):
+                if p < 0:
+                    out += b"\x00\x00\x00"
+                    continue
+                r, g, b = frame[(p // width) * mh + j // mw, (p % width) * mw + j % mw]
+                out += bytes((g, r, b))
+        elif p < 0:
+            out += b"\x00\x00\x00"
+        else:
+            out += bytes(int(c) for c in frame[p // width, p % width])
+    if framed:
+        fp = firmware_module("frame_parser")
+        out = bytes(fp.build_header(fp.FRAME_TYPE_RGB, seq, len(out))) + bytes(out)
+    return bytes(out)
+
+def random_frames(shape: tuple, count: int, seed: int = 2) -> list:
+    rng = np.random.default_rng(seed)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(count)]
+
+def check_packing(height: int, width: int) -> list:
+    """每种布局 × 3字节/逐灯寻址 × 原始/帧协议，打包结果与reference_pack逐字节比对，返回不一致的组合"""
+    failures = []
+    for name, layout in make_layouts(height, width).items():
+        for per_pixel in (False, True):
+            for framed in (False, True):
+                packer = FramePacker(layout, height, width, per_pixel=per_pixel, framed=framed)
+                for seq, frame in enumerate(random_frames(packer.frame_shape, 2)):
+                    if packer.pack(frame, seq) != reference_pack(frame, layout, width, per_pixel, framed, seq):
+                        failures.append("%s per_pixel=%s framed=%s" % (name, per_pixel, framed))
+                        break
+    return failures
+
+def time_packing(height: int, width: int, per_pixel: bool, repeat: int) -> tuple:
+    """向量化打包与循环打包的单帧耗时（微秒）"""
+    layout = serpentine(height, width)
+    packer = FramePacker(layout, height, width, per_pixel=per_pixel, framed=True)
+    frame = random_frames(packer.frame_shape, 1)[0]
+    vector = min(timeit.repeat(lambda: packer.pack(frame), number=repeat, repeat=3)) / repeat
+    loops = max(1, repeat // 100)
+    loop = min(timeit.repeat(lambda: reference_pack(frame, layout, width, per_pixel, True), number=loops,
+                             repeat=3)) / loops
+    return packer.size, vector * 1e6, loop * 1e6
+
+def check_pty(height: int, width: int, frames: int, baudrate: int) -> dict:
+    """经pty写出frames帧：读端收到的字节须与写出的一致，总耗时不少于各帧线路时间之和"""
+    master, slave = os.openpty()
+    # 原始模式：关闭行规程的换行转换与回显，字节原样透传（与串口一致）
+    tty.setraw(slave)
+    packer = FramePacker(serpentine(height, width), height, width, framed=True)
+    data = random_frames(packer.frame_shape, frames)
+    expected = b"".join(packer.pack(f, i & 0xFF) for i, f in enumerate(data))
+    received = bytearray()
+
+    def reader() -> None:
+        while len(received) < len(expected):
+            chunk = os.read(master, 65536)
+            if not chunk:
+                break
+            received.extend(chunk)
+
+    thread = threading.Thread(target=reader, daemon=True)
+    thread.start()
+    with os.fdopen(slave, "wb", buffering=0) as port:
+        writer = PacedWriter(port, baudrate)
+        start = time.perf_counter()
+        writer.stream(data, packer)
+        # 最后一帧的线路时间也计入
+        elapsed = writer.next_time - start
+    thread.join(timeout=5.0)
+    os.close(master)
+    return {"ok": bytes(received) == expected, "elapsed_s": elapsed,
+            "line_s": writer.line_time(len(expected)), "late": writer.late}
+
+def check_chain(height: int, width: int, frames: int, overrides: dict, per_pixel: bool) -> int:
+    """
+    用仿真虚拟时钟驱动PacedWriter，把随机画面按随机索引表布局写入仿真链；
+    每个模块显示过的内容中须按顺序出现每一帧应显示的数据，返回不满足的模块数
+    """
+    overrides = dict(overrides, PER_PIXEL_ENABLE=per_pixel)
+    framed = overrides.get("FRAMED_PROTOCOL_ENABLE", False)
+    layout = make_layouts(height, width)["table"]
+    packer = FramePacker(layout, height, width, per_pixel=per_pixel, framed=framed)
+    module_bytes = packer.payload_size // packer.modules
+    length = packer.modules
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    config = sim.nodes[0].modules["config"]
+
+    class SimPort:
+        def write(self, data) -> None:
+            sim.send(data)
+
+    gap = frame_gap_us(sim.baudrate, framed, config.CUT_THROUGH_ENABLE, config.FRAME_GAP_US)
+    writer = PacedWriter(SimPort(), sim.baudrate, gap_us=gap, clock=lambda: sim.now / 1e6,
+                         sleep=lambda s: sim.run_for(s * 1e6))
+    data = random_frames(packer.frame_shape, frames)
+    expected = [reference_pack(f, layout, width, per_pixel, False) for f in data]
+    writer.stream(data, packer)
+    sim.run_for(length * (packer.size * sim.char_us + 3000.0) + 20000.0)
+
+    bad = 0
+    for i in range(length):
+        if per_pixel:
+            shown = [bytes(buf) for _, buf in sim.pixels(i).history]
+        else:
+            shown = [bytes((buf[1], buf[0], buf[2])) for _, buf in sim.pixels(i).history]
+        want = iter(shown)
+        if not all(any(s == e[i * module_bytes:(i + 1) * module_bytes] for s in want) for e in expected):
+            bad += 1
+    return bad + len(sim.errors())
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot host controller library check and benchmark")
+    parser.add_argument("--width", type=int, default=20, help="模块网格宽度")
+    parser.add_argument("--height", type=int, default=20, help="模块网格高度")
+    parser.add_argument("--repeat", type=int, default=1000, help="打包耗时统计的帧数")
+    parser.add_argument("--frames", type=int, default=20, help="pty与仿真链校验的帧数")
+    parser.add_argument("--chain-size", type=int, default=4, help="仿真链校验用的小网格边长，0表示不校验")
+    parser.add_argument("--baudrate", type=int, default=921600, help="pty节流校验的波特率")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项（仿真链校验），可重复")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+
+    mismatched = check_packing(5, 7)
+    failures = bool(mismatched)
+    print("packing vs per-module loop (3 layouts x rgb/per-pixel x raw/framed): %s" % (
+        "ok" if not mismatched else "FAIL " + ", ".join(mismatched)))
+
+    print("\n%-10s %10s %14s %14s %10s %12s" % ("mode", "bytes", "vector(us)", "loop(us)", "speedup", "line(us)"))
+    for per_pixel in (False, True):
+        size, vector, loop = time_packing(args.height, args.width, per_pixel, args.repeat)
+        line = size * 10 * 1e6 / args.baudrate
+        print("%-10s %10d %14.1f %14.1f %9.1fx %12.1f" % ("per-pixel" if per_pixel else "rgb", size, vector, loop,
+                                                         loop / vector, line))
+
+    r = check_pty(args.height, args.width, args.frames, args.baudrate)
+    failures += not r["ok"]
+    print("\npty %d frames at %d baud: data %s, elapsed %.1f ms (line time %.1f ms), late frames %d" % (
+        args.frames, args.baudrate, "ok" if r["ok"] else "MISMATCH", r["elapsed_s"] * 1e3, r["line_s"] * 1e3,
+        r["late"]))
+
+    if args.chain_size:
+        n = args.chain_size
+        for per_pixel in (False, True):
+            bad = check_chain(n, n, args.frames, overrides, per_pixel)
+            failures += bad > 0
+            print("chain %dx%d %s, %d frames via PacedWriter: %s" % (
+                n, n, "per-pixel" if per_pixel else "rgb", args.frames, "ok" if bad == 0 else "%d modules wrong" % bad))
+    if failures:
+        print("%d check(s) failed" % failures)
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_latch.py
+# @Description : 同步锁存基准：测量一帧在链首与链尾模块刷新灯珠的时刻差（锁存偏差），
+#                对比收到即刷新、锁存不补偿（HOP_US=0）与按每级延迟补偿三种方式
+#                用法：python -m sim.bench_latch --nodes 10 50 100 --set CUT_THROUGH_ENABLE=True
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import json
+from sim.bench_latency import encode_frame, encode_per_pixel, frame_colors, framed, parse_overrides, per_hop_slope
+from sim.chain import ChainSimulator, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# ======================================== 功能函数 ============================================
+
+def show_frame(delay_us: int, hop_us: int) -> bytes:
+    """锁存命令帧"""
+    return bytes(firmware_module("frame_parser").build_show(delay_us, hop_us))
+
+def render_times(sim: ChainSimulator, after: float) -> list:
+    """每个模块在after之后第一次刷新灯珠的时刻，未刷新为None"""
+    times = []
+    for i in range(len(sim)):
+        t = next((t for t, _ in sim.pixels(i).history if t >= after), None)
+        times.append(t)
+    return times
+
+def measure_skew(length: int, overrides: dict, latch: bool, delay_us: int = 0, hop_us: int = 0,
+                 frames: int = 3) -> dict:
+    """
+    连续发送frames帧，统计每帧各模块刷新时刻的偏差
+    锁存模式下等一帧传遍全链（各模块已暂存）后再单独发送锁存命令，刷新时刻从锁存命令发出时算起；
+    否则从该帧发出时算起。返回最后一帧的首尾偏差、全链最大偏差与每级斜率
+    """
+    overrides = dict(overrides, LATCH_ENABLE=latch)
+    encode = framed(encode_per_pixel if overrides.get("PER_PIXEL_ENABLE") else encode_frame)
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    result = {"modules": length, "latch": latch, "delay_us": delay_us, "hop_us": hop_us,
+              "first_last_us": None, "spread_us": None, "per_hop_us": None, "shown": 0}
+    for f in range(frames):
+        colors = frame_colors(f, length)
+        data = encode(colors, f)
+        start = sim.now
+        sim.send(data, at=start)
+        sim.run_for(len(data) * sim.char_us * (length + 1) + length * 3000.0 + 20000.0)
+        if latch:
+            token = show_frame(delay_us, hop_us)
+            start = sim.now
+            sim.send(token, at=start)
+            sim.run_for(len(token) * sim.char_us * (length + 1) + length * 3000.0 + delay_us + 20000.0)
+        times = render_times(sim, start)
+        shown = sum(1 for i in range(length) if sim.pixels(i).pixel(0) == colors[i])
+        result["shown"] = shown
+        if shown < length or None in times:
+            return result
+        rel = [t - start for t in times]
+        result["first_last_us"] = rel[-1] - rel[0]
+        result["spread_us"] = max(rel) - min(rel)
+        result["per_hop_us"] = per_hop_slope(rel)
+    return result
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot synchronized latch skew benchmark")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[2, 10, 50, 100], help="级联模块数（可给多个）")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+    overrides.setdefault("FRAMED_PROTOCOL_ENABLE", True)
+
+    results = []
+    if not args.json:
+        print("overrides: %s" % overrides)
+        print("%8s %-26s %14s %12s %12s %8s" % ("modules", "mode", "first-last(us)", "spread(us)", "hop(us)",
+                                               "shown"))
+    for length in args.nodes:
+        rows = [("immediate", measure_skew(length, overrides, False)),
+                ("latch, hop_us=0", measure_skew(length, overrides, True))]
+        # 用不补偿时测得的每级锁存命令延迟作为HOP_US，DELAY_US留出整条链的传播时间
+        hop = rows[1][1]["per_hop_us"]
+        if hop is not None:
+            hop_us = int(round(hop))
+            rows.append(("latch, hop_us=%d" % hop_us,
+                         measure_skew(length, overrides, True, hop_us * length + 1000, hop_us)))
+        for mode, r in rows:
+            r["mode"] = mode
+            results.append(r)
+            if not args.json:
+                fmt = lambda v: "-" if v is None else "%.1f" % v
+                print("%8d %-26s %14s %12s %12s %8s" % (length, mode, fmt(r["first_last_us"]), fmt(r["spread_us"]),
+                                                        fmt(r["per_hop_us"]), "%d/%d" % (r["shown"], length)))
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_latency.py
+# @Description : 级联延迟基准：端到端帧延迟、最大可持续帧率、每级转发延迟随级联长度的变化
+#                用法：python -m sim.bench_latency --nodes 1 10 50 --set BAUDRATE=921600
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import ast
+import json
+from sim.chain import ChainSimulator, FrameTracker, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# ======================================== 功能函数 ============================================
+
+def frame_colors(frame: int, length: int) -> list:
+    """第frame帧中每个模块的颜色：相邻帧同一模块的颜色一定不同，且不会是全黑"""
+    return [((i * 7 + frame * 37) % 255 + 1, (i * 3 + 11) % 255 + 1, frame % 255 + 1) for i in range(length)]
+
+def encode_frame(colors: list, seq: int = 0) -> bytes:
+    """原始移位协议：按模块顺序拼接RGB"""
+    return bytes(c for rgb in colors for c in rgb)
+
+def encode_per_pixel(colors: list, seq: int = 0, leds: int = 16) -> bytes:
+    """逐灯寻址（PER_PIXEL_ENABLE）：每个模块leds×3字节GRB，第0颗灯为目标颜色，其余灯B通道递增以互相区分"""
+    return bytes(c for r, g, b in colors for k in range(leds) for c in (g, r, (b + k) & 0xFF))
+
+def framed(encode: callable) -> callable:
+    """把原始编码包装为帧协议（FRAMED_PROTOCOL_ENABLE）：帧头 + 原始负载"""
+    fp = firmware_module("frame_parser")
+
+    def encode_framed(colors: list, seq: int = 0) -> bytes:
+        payload = encode(colors, seq)
+        return bytes(fp.build_header(fp.FRAME_TYPE_RGB, seq, len(payload))) + payload
+
+    return encode_framed
+
+def encode_framed(colors: list, seq: int = 0) -> bytes:
+    """帧协议 + 3字节RGB"""
+    return framed(encode_frame)(colors, seq)
+
+def parse_overrides(items: list) -> dict:
+    """把["KEY=VALUE", ...]解析为config覆盖项，VALUE按Python字面量解析"""
+    overrides = {}
+    for item in items or []:
+        key, _, value = item.partition("=")
+        try:
+            overrides[key] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            overrides[key] = value
+    return overrides
+
+def run_frames(length: int, frames: int, period_us: float, overrides: dict, cpu_scale: float,
+               encode: callable = encode_frame, prepare: callable = None) -> tuple:
+    """
+    新建一条长度为length的链，每隔period_us发送一帧，共frames帧
+    prepare(sim)在上电后、发送第一帧前调用（如协商波特率），返回可以开始发送的时刻
+    返回(仿真器, 跟踪器, 每帧发送起始时刻列表)
+    """
+    sim = ChainSimulator(length, overrides=overrides, cpu_scale=cpu_scale)
+    sim.run(until=BOOT_US)
+    begin = prepare(sim) if prepare else BOOT_US
+    expected = [frame_colors(f, length) for f in range(frames)]
+    tracker = FrameTracker(sim, expected)
+    starts = []
+    for f in range(frames):
+        t = begin + f * period_us
+        sim.send(encode(expected[f], f), at=t)
+        starts.append(t)
+    frame_us = len(encode(expected[0])) * sim.char_us
+    stall_us = max(200_000.0, 20 * frame_us)
+    sim.run(stop=tracker.stop_when(stall_us))
+    return sim, tracker, starts
+
+def per_hop_slope(times: list) -> float:
+    """最小二乘拟合 显示时刻 ~ 模块序号 的斜率（每级延迟，微秒）"""
+    n = len(times)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(times) / n
+    num = sum((i - mean_x) * (t - mean_y) for i, t in enumerate(times))
+    den = sum((i - mean_x) ** 2 for i in range(n))
+    return num / den
+
+def measure_chain(length: int, overrides: dict, cpu_scale: float = 0.0, frames: int = 6,
+                  encode: callable = encode_frame, prepare: callable = None) -> dict:
+    """单条链的完整测量：单帧延迟 + 二分搜索最大可持续帧率"""
+    sim, tracker, starts = run_frames(length, 1, 0.0, overrides, cpu_scale, encode, prepare)
+    frame_bytes = len(encode(frame_colors(0, length)))
+    result = {
+        "modules": length,
+        "frame_bytes": frame_bytes,
+        "frame_tx_ms": frame_bytes * sim.char_us / 1000,
+        "delivered": sum(1 for row in tracker.times if row[0] is not None),
+        "latency_ms": None,
+        "first_hop_ms": None,
+        "per_hop_ms": None,
+        "max_fps": None,
+        "uart": sim.uart_stats(),
+        "ring": sim.ring_stats(),
+        "errors": len(sim.errors()),
+    }
+    if not tracker.complete():
+        return result
+
+    render = [row[0] - starts[0] for row in tracker.times]
+    result["latency_ms"] = render[-1] / 1000
+    result["first_hop_ms"] = render[0] / 1000
+    result["per_hop_ms"] = per_hop_slope(render) / 1000
+
+    # 二分搜索：连续frames帧在周期P下全部按序显示的最小P
+    lo = frame_bytes * sim.char_us
+    hi = render[-1] + lo + sim.host_uart.idle_us
+    # 上界不够（如需要帧间空闲间隔的模式）时逐步加倍
+    for _ in range(8):
+        if run_frames(length, frames, hi, overrides, cpu_scale, encode, prepare)[1].complete():
+            break
+        lo, hi = hi, hi * 2
+    else:
+        return result
+    for _ in range(12):
+        if hi - lo <= max(1.0, hi * 0.005):
+            break
+        mid = (lo + hi) / 2
+        if run_frames(length, frames, mid, overrides, cpu_scale, encode, prepare)[1].complete():
+            hi = mid
+        else:
+            lo = mid
+    result["max_fps"] = 1e6 / hi
+    return result
+
+def format_ms(value) -> str:
+    return "-" if value is None else "%.3f" % value
+
+def print_header() -> None:
+    print("%8s %8s %10s %12s %11s %11s %9s %11s %9s %9s" % (
+        "modules", "bytes", "tx(ms)", "latency(ms)", "hop0(ms)", "hop(ms)", "max fps", "delivered", "rx drop",
+        "ring hw"))
+
+def print_row(r: dict) -> None:
+    fps = "-" if r["max_fps"] is None else "%.1f" % r["max_fps"]
+    print("%8d %8d %10.3f %12s %11s %11s %9s %11s %9d %9d" % (
+        r["modules"], r["frame_bytes"], r["frame_tx_ms"], format_ms(r["latency_ms"]),
+        format_ms(r["first_hop_ms"]), format_ms(r["per_hop_ms"]), fps,
+        "%d/%d" % (r["delivered"], r["modules"]), r["uart"]["rx_overflow"], r["ring"]["high_water"]))
+
+def build_parser(description: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--nodes", type=int, nargs="+", default=[1, 2, 5, 10, 20, 50, 100, 200, 500],
+                        help="级联模块数（可给多个）")
+    parser.add_argument("--frames", type=int, default=6, help="测最大帧率时连续发送的帧数")
+    parser.add_argument("--cpu-scale", type=float, default=0.0,
+                        help="主机执行时间→RP2040执行时间的放大倍数，0表示只计阻塞时间（结果可复现）")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    parser.add_argument("--framed", action="store_true",
+                        help="使用帧协议编码（自动设置FRAMED_PROTOCOL_ENABLE=True）")
+    parser.add_argument("--per-pixel", action="store_true",
+                        help="逐灯寻址，每个模块16×3字节（自动设置PER_PIXEL_ENABLE=True）")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    return parser
+
+def main(argv: list = None) -> None:
+    args = build_parser("NeoPixDot chain latency benchmark").parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+    encode = encode_frame
+    if args.per_pixel:
+        overrides.setdefault("PER_PIXEL_ENABLE", True)
+        encode = encode_per_pixel
+    if args.framed:
+        overrides.setdefault("FRAMED_PROTOCOL_ENABLE", True)
+        encode = framed(encode)
+    results = []
+    if not args.json:
+        print("overrides: %s" % (overrides or "none"))
+        print_header()
+    for length in args.nodes:
+        results.append(measure_chain(length, overrides, args.cpu_scale, args.frames, encode))
+        if not args.json:
+            print_row(results[-1])
+    if args.json:
+        print(json.dumps(results, indent=2))
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
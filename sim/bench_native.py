@@ -0,0 +1,240 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_native.py
+# @Description : 热路径原生版本校验：fast_native.py中的viper函数（主机端由micropython替身补上ptr8/ptr16后按CPython执行）
+#                与fast_paths.py中的纯Python版本在随机输入下须产生相同的缓冲区与返回值；
+#                fast_native不可导入或NATIVE_ENABLE为False时须回退到纯Python版本；
+#                各种工作模式下整条链分别用两种实现运行，各模块的灯珠刷新记录（时刻与内容）须完全一致
+#                viper的执行速度只能在板上测量（REPL中调用fast_paths.benchmark()）
+#                用法：python -m sim.bench_native --cases 2000 --nodes 4
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import contextlib
+import importlib
+import io
+import random
+import sys
+from host.effects import EFFECT_BREATHE, EFFECT_RAINBOW, effect_frame
+from sim.bench_latency import encode_frame, encode_per_pixel, framed, frame_colors
+from sim.chain import ChainSimulator, FIRMWARE_DIR, STAND_INS, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 开机彩虹播放到一半时开始发送数据（彩虹自上电约1秒起播放），开机灯效与其被数据抢占的过程同样参与对比
+DATA_START_US = 1500000.0
+
+# 整链对比的工作模式：(名称, 配置覆盖, 编码函数, 附加命令)；附加命令"show"为每帧数据后发送锁存命令，
+# "effects"为数据之后再发送呼吸与彩虹灯效命令
+MODES = (
+    ("raw rgb", {}, encode_frame, None),
+    ("raw per-pixel", {"PER_PIXEL_ENABLE": True}, encode_per_pixel, None),
+    ("raw cut-through", {"CUT_THROUGH_ENABLE": True}, encode_frame, None),
+    ("raw per-pixel gamma", {"PER_PIXEL_ENABLE": True, "COLOR_GAMMA": 220, "COLOR_BRIGHTNESS": 200},
+     encode_per_pixel, None),
+    ("framed", {"FRAMED_PROTOCOL_ENABLE": True}, framed(encode_frame), "effects"),
+    ("framed cut-through", {"FRAMED_PROTOCOL_ENABLE": True, "CUT_THROUGH_ENABLE": True}, framed(encode_frame),
+     "effects"),
+    ("framed per-pixel latch", {"FRAMED_PROTOCOL_ENABLE": True, "PER_PIXEL_ENABLE": True, "LATCH_ENABLE": True},
+     framed(encode_per_pixel), "show"),
+)
+
+# ======================================== 功能函数 ============================================
+
+def random_source(rng: random.Random, n: int):
+    """随机内容的源数据：bytes、bytearray或一段memoryview（与固件中的各种调用方式对应）"""
+    data = bytearray(rng.getrandbits(8) for _ in range(n + 8))
+    kind = rng.randrange(3)
+    if kind == 0:
+        return bytes(data[:n])
+    if kind == 1:
+        return data[:n]
+    start = rng.randrange(9)
+    return memoryview(data)[start:start + n]
+
+def check_functions(native, pure, cases: int, seed: int) -> list:
+    """随机输入下逐个函数对比两种实现，返回[(函数名, 用例数, 不一致数)]"""
+    rng = random.Random(seed)
+    rows = []
+
+    def compare(name: str, make: callable, call: callable) -> None:
+        bad = 0
+        for _ in range(cases):
+            args = make()
+            outputs = []
+            for impl in (native, pure):
+                # 两种实现各自写入一份相同初始内容的目标缓冲区
+                fresh = [bytearray(a) if isinstance(a, bytearray) else a for a in args]
+                ret = call(impl, fresh)
+                outputs.append((ret, [bytes(a) for a in fresh if isinstance(a, bytearray)]))
+            if outputs[0] != outputs[1]:
+                bad += 1
+        rows.append((name, cases, bad))
+
+    def ring_put_args() -> tuple:
+        size = rng.randrange(2, 300)
+        n = rng.randrange(size)
+        return bytearray(rng.getrandbits(8) for _ in range(size)), rng.randrange(size), random_source(rng, n), n
+
+    def ring_get_args() -> tuple:
+        size = rng.randrange(2, 300)
+        n = rng.randrange(size)
+        return bytearray(n + rng.randrange(4)), bytearray(rng.getrandbits(8) for _ in range(size)), \
+            rng.randrange(size), n
+
+    def fill_args() -> tuple:
+        n = rng.randrange(65)
+        return bytearray(n * 3 + rng.randrange(4)), bytearray(rng.getrandbits(8) for _ in range(3)), n
+
+    def copy_args() -> tuple:
+        n = rng.randrange(100)
+        offset = rng.randrange(50)
+        return bytearray(n + rng.randrange(4)), random_source(rng, offset + n), offset, n
+
+    def copy_into_args() -> tuple:
+        n = rng.randrange(100)
+        pos = rng.randrange(50)
+        offset = rng.randrange(50)
+        return bytearray(pos + n + rng.randrange(4)), pos, random_source(rng, offset + n), offset, n
+
+    def lut_args() -> tuple:
+        n = rng.randrange(65)
+        return bytearray(rng.getrandbits(8) for _ in range(n * 3 + rng.randrange(4))), \
+            bytes(rng.getrandbits(8) for _ in range(768)), n
+
+    def crc_args() -> tuple:
+        n = rng.randrange(100)
+        start = rng.randrange(50)
+        return rng.getrandbits(16), random_source(rng, start + n), start, n
+
+    # ring参数以memoryview传入（与RingBuffer一致），目标缓冲区按字节比较
+    compare("ring_put", ring_put_args,
+            lambda impl, a: (impl.ring_put(memoryview(a[0]), a[1], a[2], a[3])))
+    compare("ring_get", ring_get_args,
+            lambda impl, a: (impl.ring_get(a[0], memoryview(a[1]), a[2], a[3])))
+    compare("fill_pixels", fill_args, lambda impl, a: impl.fill_pixels(a[0], a[1], a[2]))
+    compare("copy_bytes", copy_args, lambda impl, a: impl.copy_bytes(a[0], a[1], a[2], a[3]))
+    compare("copy_into", copy_into_args, lambda impl, a: impl.copy_into(a[0], a[1], a[2], a[3], a[4]))
+    compare("apply_lut", lut_args, lambda impl, a: impl.apply_lut(a[0], a[1], a[2]))
+    compare("crc16_update", crc_args, lambda impl, a: impl.crc16_update(a[0], a[1], a[2], a[3]))
+    return rows
+
+def load_fast_paths(native_enable: bool, block_native: bool):
+    """重新导入一份fast_paths（不缓存）：block_native时fast_native导入失败，模拟固件不支持原生代码"""
+    names = ["config", "utils", "crc16", "fast_paths", "fast_native"]
+    saved = {key: sys.modules.pop(key, None) for key in list(STAND_INS) + names}
+    sys.modules.update(STAND_INS)
+    if block_native:
+        sys.modules["fast_native"] = None
+    sys.path.insert(0, FIRMWARE_DIR)
+    try:
+        config = importlib.import_module("config")
+        config.NATIVE_ENABLE = native_enable
+        with contextlib.redirect_stdout(io.StringIO()):
+            return importlib.import_module("fast_paths")
+    finally:
+        sys.path.remove(FIRMWARE_DIR)
+        for key, value in saved.items():
+            if value is None:
+                sys.modules.pop(key, None)
+            else:
+                sys.modules[key] = value
+
+def check_fallback() -> list:
+    """各种情况下fast_paths选用的实现，返回[(情况, 是否原生, 是否符合预期)]"""
+    rows = []
+    for name, enable, block, want in (("native available", True, False, True),
+                                      ("native import fails", True, True, False),
+                                      ("NATIVE_ENABLE = False", False, False, False)):
+        module = load_fast_paths(enable, block)
+        pure = module.ring_put is module.ring_put_py and module.fill_pixels is module.fill_pixels_py and \
+            module.ring_get is module.ring_get_py and module.copy_bytes is module.copy_bytes_py and \
+            module.copy_into is module.copy_into_py and module.apply_lut is module.apply_lut_py and \
+            module.crc16_update is module.crc16_update_py
+        rows.append((name, module.NATIVE_ACTIVE, module.NATIVE_ACTIVE == want and pure != want))
+    return rows
+
+def run_chain(length: int, overrides: dict, encode: callable, extra: str, frames: int) -> tuple:
+    """运行一条链：开机灯效中途发送frames帧数据（及附加命令），返回(各模块刷新记录, 是否全部用原生版本, 错误数)"""
+    sim = ChainSimulator(length, overrides=overrides)
+    sim.run(until=BOOT_US)
+    show = bytes(firmware_module("frame_parser").build_show(0, 0))
+    frame_us = len(encode(frame_colors(0, length))) * sim.char_us
+    t = DATA_START_US
+    for f in range(frames):
+        sim.send(encode(frame_colors(f, length), f), at=t)
+        t += frame_us + length * 3000.0 + 5000.0
+        if extra == "show":
+            sim.send(show, at=t)
+            t += len(show) * sim.char_us + length * 3000.0 + 5000.0
+    if extra == "effects":
+        for frame in (effect_frame(EFFECT_BREATHE, (200, 40, 90), 300), effect_frame(EFFECT_RAINBOW, period_ms=500)):
+            sim.send(frame, at=t)
+            t += 150000.0
+    sim.run(until=t + 100000.0)
+    histories = [[(time, bytes(buf)) for time, buf in sim.pixels(i).history] for i in range(length)]
+    native = [node.modules["fast_paths"].NATIVE_ACTIVE for node in sim.nodes]
+    return histories, all(native), len(sim.errors())
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot native hot path correctness check")
+    parser.add_argument("--cases", type=int, default=2000, help="每个函数的随机用例数")
+    parser.add_argument("--nodes", type=int, default=4, help="整链对比的模块数")
+    parser.add_argument("--frames", type=int, default=12, help="整链对比发送的数据帧数（足以让环形缓冲区回绕）")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    args = parser.parse_args(argv)
+
+    native = firmware_module("fast_native")
+    pure = firmware_module("fast_paths")
+    pure = type("Pure", (), {"ring_put": staticmethod(pure.ring_put_py), "ring_get": staticmethod(pure.ring_get_py),
+                             "fill_pixels": staticmethod(pure.fill_pixels_py),
+                             "copy_bytes": staticmethod(pure.copy_bytes_py),
+                             "copy_into": staticmethod(pure.copy_into_py),
+                             "apply_lut": staticmethod(pure.apply_lut_py),
+                             "crc16_update": staticmethod(pure.crc16_update_py)})
+    failures = 0
+    print("%-24s %8s %12s" % ("function", "cases", "mismatches"))
+    for name, cases, bad in check_functions(native, pure, args.cases, args.seed):
+        failures += bool(bad)
+        print("%-24s %8d %12s" % (name, cases, bad if bad else "0 (ok)"))
+
+    print("\n%-24s %8s %12s" % ("fallback", "native", "check"))
+    for name, active, ok in check_fallback():
+        failures += not ok
+        print("%-24s %8s %12s" % (name, active, "ok" if ok else "FAIL"))
+
+    print("\n%-24s %8s %12s %12s" % ("chain (%d modules)" % args.nodes, "writes", "identical", "errors"))
+    for name, overrides, encode, extra in MODES:
+        fast, fast_native, fast_errors = run_chain(args.nodes, dict(overrides, NATIVE_ENABLE=True), encode, extra,
+                                                   args.frames)
+        slow, slow_native, slow_errors = run_chain(args.nodes, dict(overrides, NATIVE_ENABLE=False), encode, extra,
+                                                   args.frames)
+        ok = fast == slow and fast_native and not slow_native and not fast_errors + slow_errors
+        failures += not ok
+        print("%-24s %8d %12s %12d" % (name, sum(len(h) for h in fast), "ok" if ok else "FAIL",
+                                       fast_errors + slow_errors))
+    print("(chain: pixel write history with viper paths vs pure Python, same timestamps and buffers)")
+    if failures:
+        print("%d check(s) failed" % failures)
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
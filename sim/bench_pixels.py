@@ -0,0 +1,82 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_pixels.py
+# @Description : 逐灯寻址写缓冲区基准：整段拷贝进NeoPixel.buf 与 逐颗np[i] = (r, g, b) 赋值的单帧CPU耗时对比
+#                NeoPixel替身的__setitem__与MicroPython自带neopixel.py实现相同，二者的相对开销可作参考
+#                用法：python -m sim.bench_pixels --repeat 20000
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import timeit
+from sim import neopixel
+from sim.kernel import Kernel, Node
+
+# ======================================== 全局变量 ============================================
+
+# ======================================== 功能函数 ============================================
+
+def per_index_loop(np, data, leds: int) -> None:
+    """逐颗赋值：每颗灯构造一个元组，经__setitem__按ORDER写入"""
+    for i in range(leds):
+        offset = i * 3
+        np[i] = (data[offset + 1], data[offset], data[offset + 2])
+
+def single_color_loop(np, data, leds: int) -> None:
+    """原set_ws2812_color：所有灯写同一颜色"""
+    color = (data[1], data[0], data[2])
+    for i in range(leds):
+        np[i] = color
+
+def bulk_copy(np, data, leds: int) -> None:
+    """逐灯寻址模式：GRB负载整段拷贝进缓冲区"""
+    np.buf[:] = data
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot per-pixel buffer write benchmark")
+    parser.add_argument("--leds", type=int, default=16, help="每个模块的灯珠数")
+    parser.add_argument("--repeat", type=int, default=20000, help="每种写法重复的帧数")
+    args = parser.parse_args(argv)
+
+    node = Node(Kernel(), 0)
+    with node.context():
+        np = neopixel.NeoPixel(None, args.leds)
+    payload = bytearray((i * 7) & 0xFF for i in range(args.leds * 3 + 6))
+    # 与固件相同：负载是接收缓冲区中的一段memoryview
+    data = memoryview(payload)[3:3 + args.leds * 3]
+
+    print("leds: %d, frames: %d" % (args.leds, args.repeat))
+    print("%-28s %14s %10s" % ("method", "us/frame", "relative"))
+    results = []
+    for name, fn in (("np[i] = (r, g, b) per LED", per_index_loop),
+                     ("set_ws2812_color loop", single_color_loop),
+                     ("np.buf[:] = payload", bulk_copy)):
+        seconds = min(timeit.repeat(lambda: fn(np, data, args.leds), number=args.repeat, repeat=3))
+        results.append((name, seconds / args.repeat * 1e6))
+    baseline = results[0][1]
+    for name, us in results:
+        print("%-28s %14.3f %9.1fx" % (name, us, baseline / us))
+
+    # 两种写法结果必须一致
+    per_index_loop(np, data, args.leds)
+    expected = bytes(np.buf)
+    np.buf[:] = bytes(len(np.buf))
+    bulk_copy(np, data, args.leds)
+    assert bytes(np.buf) == expected, "bulk copy and per-index loop produced different buffers"
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_rainbow.py
+# @Description : 彩虹灯效单帧耗时基准：原浮点hsv_to_rgb逐颗赋值 与 整数查找表切片拷贝 对比，并校验两者颜色误差
+#                用法：python -m sim.bench_rainbow --repeat 2000
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import timeit
+from sim.chain import ChainSimulator
+
+# ======================================== 全局变量 ============================================
+
+# 固定用纯Python快速路径：CPython上的viper替身只是普通函数，计时不代表设备上的原生代码（原生路径见bench_native）
+OVERRIDES = {"NATIVE_ENABLE": False}
+
+# ======================================== 功能函数 ============================================
+
+def hsv_to_rgb(h: float, s: float, v: float) -> tuple:
+    """改造前固件中的浮点HSV转RGB（h/s/v均为0~1），作为计时与误差校验的参照"""
+    if s == 0.0:
+        return (int(v * 255), int(v * 255), int(v * 255))
+    i = int(h * 6.0)
+    f = (h * 6.0) - i
+    p, q, t = v * (1 - s), v * (1 - s * f), v * (1 - s * (1 - f))
+    i = i % 6
+    if i == 0:
+        r, g, b = v, t, p
+    elif i == 1:
+        r, g, b = q, v, p
+    elif i == 2:
+        r, g, b = p, v, t
+    elif i == 3:
+        r, g, b = p, q, v
+    elif i == 4:
+        r, g, b = t, p, v
+    else:
+        r, g, b = v, p, q
+    return (int(r * 255), int(g * 255), int(b * 255))
+
+def float_step(core, np, hue: int) -> None:
+    """改造前rainbow_flow内层循环的一步：每颗灯调用一次浮点hsv_to_rgb并构造元组赋值"""
+    for i in range(core.WS2812_NUM):
+        pixel_hue = (hue + i * core.RAINBOW_HUE_SPACING) % 360
+        r, g, b = hsv_to_rgb(pixel_hue / 360.0, 1.0, 1.0)
+        np[i] = (r, g, b)
+
+def max_error(core, np) -> int:
+    """360步中查找表结果与浮点版结果的最大单通道误差"""
+    worst = 0
+    for hue in range(360):
+        float_step(core, np, hue)
+        expected = bytes(np.buf)
+        core.rainbow_step(hue)
+        worst = max(worst, max(abs(a - b) for a, b in zip(expected, np.buf)))
+    return worst
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot rainbow effect per-frame cost benchmark")
+    parser.add_argument("--repeat", type=int, default=2000, help="每种实现计时的帧数")
+    args = parser.parse_args(argv)
+
+    sim = ChainSimulator(1, overrides=OVERRIDES)
+    # 先运行到固件初始化完成（启动main任务）
+    sim.run(until=1000.0)
+    core = sim.module(0)
+    np = sim.pixels(0)
+
+    results = []
+    for name, step in (("float hsv_to_rgb + np[i]", lambda h: float_step(core, np, h)),
+                       ("integer LUT slice copy", core.rainbow_step)):
+        def frames(step=step):
+            for k in range(args.repeat):
+                step(k % 360)
+        seconds = min(timeit.repeat(frames, number=1, repeat=3))
+        results.append((name, seconds / args.repeat * 1e6))
+
+    print("leds: %d, hue spacing: %d, frames: %d" % (core.WS2812_NUM, core.RAINBOW_HUE_SPACING, args.repeat))
+    print("%-28s %14s %10s" % ("method", "us/frame", "relative"))
+    baseline = results[0][1]
+    for name, us in results:
+        print("%-28s %14.3f %9.1fx" % (name, us, baseline / us))
+    print("LUT size: hue %d bytes + strip %d bytes, max channel error vs float: %d" % (
+        len(core.hue_lut), len(core.rainbow_strip_lut), max_error(core, np)))
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
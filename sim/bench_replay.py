@@ -0,0 +1,173 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_replay.py
+# @Description : 抓包与重放校验：各工作模式下在仿真链上发送模拟现场的流量（连续突发、接近空闲中断阈值的零散空闲、
+#                帧内停顿、超过接收缓冲区的超长帧），经sim.replay.tap_input在链首模块输入端抓包并写成文件，
+#                读回后按原时序重放两次：各模块刷新内容与链尾输出的校验和须与现场运行一致、两次重放完全相同；
+#                再压缩空闲重放一次，列出两种时序下的吞吐、每帧处理耗时、高水位与溢出
+#                用法：python -m sim.bench_replay --nodes 3 --frames 60 --save-dir captures
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+from host.capture import CaptureWriter, char_us, read_capture
+from sim.bench_latency import encode_frame, encode_per_pixel, frame_colors, framed, parse_overrides
+from sim.chain import ChainSimulator, firmware_module
+from sim.replay import SETTLE_MS, capture_meta, compare, output_checksums, replay, tap_input
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 关闭开机彩虹（其刷新与到达时序无关，只会让校验和里多出与重放无关的内容）
+BASE = {"STARTUP_EFFECT_ENABLE": False}
+
+# 超长帧按多少个模块的数据编码（远超链长，负载大于接收口驱动缓冲区与环形缓冲区之和）
+OVERSIZE_MODULES = 900
+
+# 流量中各类事件的比例：(名称, 权重)
+EVENTS = (("normal", 6), ("burst", 2), ("odd gap", 3), ("split", 2), ("oversize", 1))
+
+# ======================================== 功能函数 ============================================
+
+def modes() -> tuple:
+    """校验的工作模式：(名称, 配置覆盖, 编码函数)"""
+    framed_on = {"FRAMED_PROTOCOL_ENABLE": True}
+    return (
+        ("raw rgb", {}, encode_frame),
+        ("raw cut-through", {"CUT_THROUGH_ENABLE": True}, encode_frame),
+        ("framed rgb", framed_on, framed(encode_frame)),
+        ("framed per-pixel", dict(framed_on, PER_PIXEL_ENABLE=True), framed(encode_per_pixel)),
+        ("framed cut-through", dict(framed_on, CUT_THROUGH_ENABLE=True), framed(encode_frame)),
+    )
+
+def field_traffic(length: int, encode: callable, frames: int, byte_us: float, seed: int) -> list:
+    """
+    模拟现场流量，返回[(开始发送前的空闲us, bytes), ...]：
+    normal-帧间留出充足空闲；burst-连续几帧之间没有空闲；odd gap-帧间空闲在空闲中断阈值（32位时间）附近随机；
+    split-一帧拆成两段、中间停顿不到阈值到超过阈值；oversize-负载为OVERSIZE_MODULES个模块的超长帧
+    """
+    rng = random.Random(seed)
+    names = [name for name, weight in EVENTS for _ in range(weight)]
+    idle_us = 3.2 * byte_us  # 32位时间
+    out = []
+    f = 0
+    while f < frames:
+        event = rng.choice(names)
+        if event == "burst":
+            for _ in range(rng.randint(2, 5)):
+                out.append((0.0, encode(frame_colors(f, length), f)))
+                f += 1
+        elif event == "odd gap":
+            out.append((rng.uniform(0.3, 2.0) * idle_us, encode(frame_colors(f, length), f)))
+            f += 1
+        elif event == "split":
+            data = encode(frame_colors(f, length), f)
+            cut = 1 + int(rng.random() * (len(data) - 1))
+            out.append((rng.uniform(2000.0, 8000.0), data[:cut]))
+            out.append((rng.uniform(0.2, 1.5) * idle_us, data[cut:]))
+            f += 1
+        elif event == "oversize":
+            out.append((rng.uniform(2000.0, 8000.0), encode(frame_colors(f, OVERSIZE_MODULES), f)))
+            f += 1
+        else:
+            out.append((rng.uniform(5000.0, 20000.0), encode(frame_colors(f, length), f)))
+            f += 1
+    return out
+
+def live_capture(length: int, overrides: dict, traffic: list, path: str) -> dict:
+    """在仿真链上发送traffic，链首模块输入端抓包写入path，返回现场运行的校验和与溢出统计"""
+    sim = ChainSimulator(length, overrides=overrides)
+    with CaptureWriter(path, capture_meta(sim, 0)) as writer:
+        tap_input(sim, 0, writer)
+        t = BOOT_US
+        for gap, data in traffic:
+            t += gap
+            sim.send(data, at=t)
+            t += len(data) * sim.char_us
+        sim.run(until=t + SETTLE_MS * 1000.0)
+    result = output_checksums(sim)
+    result["rx_overflow"] = sim.uart_stats()["rx_overflow"]
+    result["ring_overflow"] = sim.ring_stats()["overflow"]
+    result["errors"] = len(sim.errors())
+    return result
+
+def check_mode(length: int, overrides: dict, encode: callable, frames: int, seed: int, path: str) -> dict:
+    """现场运行并抓包，读回后按原时序重放两次、压缩空闲重放一次，返回核对结果与各次重放的统计"""
+    baudrate = overrides.get("BAUDRATE", firmware_module("config").BAUDRATE)
+    traffic = field_traffic(length, encode, frames, char_us(baudrate), seed)
+    live = live_capture(length, overrides, traffic, path)
+    meta, records = read_capture(path)
+    nodes = meta["nodes"] - meta["module"]
+    replay_overrides = dict(meta["overrides"], BAUDRATE=meta["baudrate"])
+    first = replay(records, nodes, replay_overrides)
+    second = replay(records, nodes, replay_overrides)
+    fast = replay(records, nodes, replay_overrides, fast=True)
+    problems = []
+    for key in ("writes", "pixels_crc", "tail_crc"):
+        if first[key] != live[key]:
+            problems.append("replay %s differs from live run: %s vs %s" % (key, first[key], live[key]))
+    # 两次重放除主机耗时外须完全相同
+    problems += ["second replay: %s" % p for p in compare(second, first, tolerance=float("inf"))]
+    if first["errors"]:
+        problems.append("%d firmware error(s) during replay" % first["errors"])
+    return {"live": live, "records": len(records), "original": first, "fast": fast, "problems": problems}
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot UART capture and replay check")
+    parser.add_argument("--nodes", type=int, default=3, help="链长")
+    parser.add_argument("--frames", type=int, default=60, help="每种模式发送的帧数")
+    parser.add_argument("--seed", type=int, default=1, help="流量生成的随机种子")
+    parser.add_argument("--save-dir", help="保留各模式的抓包文件（可用python -m sim.replay重放），默认用临时目录")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    args = parser.parse_args(argv)
+    overrides = dict(BASE, **parse_overrides(args.overrides))
+
+    print("%-20s %7s %8s %6s %6s %6s %9s  %-34s %-34s" % (
+        "mode", "records", "bytes", "rx ovf", "ring", "check", "frames", "original: B/s  us/frame  speed",
+        "fast: B/s  us/frame  speed"))
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.save_dir or tmp
+        os.makedirs(directory, exist_ok=True)
+        for name, mode, encode in modes():
+            path = os.path.join(directory, name.replace(" ", "_") + ".npxcap")
+            r = check_mode(args.nodes, dict(overrides, **mode), encode, args.frames, args.seed, path)
+            failures += bool(r["problems"])
+            o, f = r["original"], r["fast"]
+            print("%-20s %7d %8d %6d %6d %6s %4d/%-4d  %9.0f %9.1f %8.1fx    %9.0f %9.1f %8.1fx" % (
+                name, r["records"], o["bytes"], o["rx_overflow"], o["ring_high_water"],
+                "ok" if not r["problems"] else "FAIL", o["frames"], f["frames"],
+                o["throughput_Bps"], o["cpu_us_per_frame"], o["speed"],
+                f["throughput_Bps"], f["cpu_us_per_frame"], f["speed"]))
+            for problem in r["problems"][:10]:
+                print("         %s" % problem)
+    print("(check: original-timing replay matches the live run's pixel/tail checksums and a second replay exactly;")
+    print(" frames: module 0 data frames original/fast; B/s over virtual time; us/frame: host CPU of module 0;")
+    print(" speed: virtual time replayed per host second; rx ovf/ring: module input overflow and ring high water)")
+    if failures:
+        print("%d mode(s) did not replay deterministically" % failures)
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_timesync.py
+# @Description : 链路时间同步基准：各模块本地时钟带随机偏移与漂移，主机周期性发送时间信标，
+#                统计各模块链路时间与主机时间之差、全链动态灯效的相位偏差（HOP_US取0、标称值与按HOP_US = 0测得的每级延迟校准值），
+#                并用发现帧读回各模块的偏移与仿真中的实际值核对
+#                用法：python -m sim.bench_timesync --nodes 10 50 --drift 100 --set CUT_THROUGH_ENABLE=True
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import random
+import sys
+from host import EFFECT_RAINBOW, PacedWriter, TimeBeacon, beacon_hop_us, effect_frame
+from sim.bench_discover import discover
+from sim.bench_latency import parse_overrides
+from sim.chain import ChainSimulator, firmware_module
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）
+BOOT_US = 1000.0
+
+# 校验用的彩虹灯效周期（毫秒），每级相位差为0：同步后全链应显示同一色相
+EFFECT_PERIOD_MS = 1000
+
+# 采样间隔（秒）
+SAMPLE_PERIOD = 0.1
+
+# ======================================== 功能函数 ============================================
+
+def ticks_diff(a: int, b: int) -> int:
+    """与MicroPython time.ticks_diff相同的回绕差值"""
+    return ((a - b + (1 << 29)) & ((1 << 30) - 1)) - (1 << 29)
+
+def sample(sim: ChainSimulator) -> tuple:
+    """
+    同一仿真时刻各模块的链路时间与主机时间（仿真时钟）之差（us），以及灯效相位相对模块0的偏差（换算为毫秒）
+    """
+    truth = int(round(sim.now)) & ((1 << 30) - 1)
+    errors = []
+    phases = []
+    for node in sim.nodes:
+        core = node.modules["core_protected"]
+        with node.context():
+            now = core.chain_us()
+            phases.append(core.effect_engine.phase_at(now))
+        errors.append(ticks_diff(now, truth))
+    skews = [abs(((p - phases[0] + 0x8000) & 0xFFFF) - 0x8000) * EFFECT_PERIOD_MS / 65536.0 for p in phases]
+    return errors, max(skews)
+
+def run_sync(length: int, overrides: dict, hop_us, duration: float, period: float, drift_ppm: float,
+             spread_us: float, seed: int) -> dict:
+    """
+    运行duration秒：hop_us为None时不发送信标（各模块按各自本地时钟渲染），否则每period秒发送一个信标；
+    前两个信标周期之后开始统计
+    """
+    sim = ChainSimulator(length, overrides=overrides)
+    rng = random.Random(seed)
+    for node in sim.nodes:
+        node.clock_offset_us = rng.uniform(0.0, spread_us)
+        node.clock_drift_ppm = rng.uniform(-drift_ppm, drift_ppm)
+    sim.run(until=BOOT_US)
+
+    class SimPort:
+        def write(self, data) -> None:
+            sim.send(data)
+
+    writer = PacedWriter(SimPort(), sim.baudrate, clock=lambda: sim.now / 1e6, sleep=lambda s: sim.run_for(s * 1e6))
+    beacon = TimeBeacon(hop_us or 0, period)
+    if hop_us is not None:
+        beacon.send(writer)
+    writer.write_frame(effect_frame(EFFECT_RAINBOW, period_ms=EFFECT_PERIOD_MS))
+
+    settle = sim.now + 2 * period * 1e6
+    end = sim.now + duration * 1e6
+    worst = 0
+    spread = 0
+    phase_skew = 0.0
+    hop_error = []
+    while sim.now < end:
+        if hop_us is not None:
+            beacon.send(writer)
+        sim.run_for(SAMPLE_PERIOD * 1e6)
+        if sim.now < settle:
+            continue
+        errors, skew = sample(sim)
+        worst = max(worst, max(abs(e) for e in errors))
+        spread = max(spread, max(errors) - min(errors))
+        phase_skew = max(phase_skew, skew)
+        hop_error.append((errors[-1] - errors[0]) / max(1, length - 1))
+
+    result = {"worst_us": worst, "spread_us": spread, "phase_skew_ms": phase_skew,
+              "per_hop_us": sum(hop_error) / len(hop_error) if hop_error else 0.0,
+              "beacons": beacon.sent, "errors": len(sim.errors())}
+    if hop_us is not None:
+        result["readout"] = check_readout(sim)
+    return result
+
+def check_readout(sim: ChainSimulator) -> list:
+    """发现帧读回的偏移与校正量须与各模块固件中的值一致，返回不一致项"""
+    fp = firmware_module("frame_parser")
+    r = discover(sim)
+    if "records" not in r:
+        return ["no discovery frame received"]
+    problems = []
+    for i, (node, rec) in enumerate(zip(sim.nodes, r["records"])):
+        core = node.modules["core_protected"]
+        if not rec["flags"] & fp.STATUS_TIME_SYNC:
+            problems.append("module %d not synced" % i)
+        if rec["time_offset_us"] != core.time_offset_us:
+            problems.append("module %d offset %d != %d" % (i, rec["time_offset_us"], core.time_offset_us))
+        if rec["time_err_us"] != max(-0x8000, min(0x7FFF, core.time_err_us)):
+            problems.append("module %d correction %d != %d" % (i, rec["time_err_us"], core.time_err_us))
+    return problems
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot chain time-base synchronization benchmark")
+    parser.add_argument("--nodes", type=int, nargs="+", default=[10, 50], help="级联模块数（可给多个）")
+    parser.add_argument("--duration", type=float, default=20.0, help="每种情况的运行时长（秒）")
+    parser.add_argument("--period", type=float, default=1.0, help="时间信标周期（秒）")
+    parser.add_argument("--drift", type=float, default=100.0, help="各模块时钟漂移的范围（±ppm）")
+    parser.add_argument("--spread", type=float, default=5e6, help="各模块上电时刻（本地时钟偏移）的范围（us）")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项，可重复")
+    args = parser.parse_args(argv)
+    overrides = parse_overrides(args.overrides)
+    overrides.setdefault("FRAMED_PROTOCOL_ENABLE", True)
+
+    config = firmware_module("config")
+    option = lambda key: overrides.get(key, getattr(config, key))
+    nominal = beacon_hop_us(option("BAUDRATE"), option("CUT_THROUGH_ENABLE"), option("CUT_THROUGH_POLL_FREQ"))
+    print("overrides: %s" % overrides)
+    print("clock drift ±%.0f ppm, offsets 0..%.0f ms, beacon every %.1f s, nominal HOP_US %d" % (
+        args.drift, args.spread / 1000, args.period, nominal))
+    print("%8s %-16s %12s %12s %12s %14s %8s" % ("modules", "sync", "worst(us)", "spread(us)", "per hop(us)",
+                                                 "phase skew(ms)", "readout"))
+    failures = 0
+    for length in args.nodes:
+        calibrated = None
+        for name in ("none", "beacon hop=0", "beacon nominal", "beacon calibrated"):
+            # 校准值：HOP_US = 0时链路时间误差沿链的平均增量即每级实际的接收检测延迟
+            hop = {"none": None, "beacon hop=0": 0, "beacon nominal": nominal, "beacon calibrated": calibrated}[name]
+            r = run_sync(length, overrides, hop, args.duration, args.period, args.drift, args.spread, args.seed)
+            if hop == 0:
+                calibrated = max(0, int(round(-r["per_hop_us"])))
+            elif name == "beacon calibrated":
+                name = "calibrated %d" % hop
+            readout = "-" if hop is None else ("ok" if not r["readout"] else "FAIL")
+            failures += bool(r.get("readout") or r["errors"])
+            print("%8d %-16s %12d %12d %12.1f %14.2f %8s" % (length, name, r["worst_us"], r["spread_us"],
+                                                            r["per_hop_us"], r["phase_skew_ms"], readout))
+            for problem in r.get("readout", [])[:5]:
+                print("         %s" % problem)
+            if r["errors"]:
+                print("         %d firmware errors" % r["errors"])
+    print("(worst: largest |chain time - host time| over all modules; per hop: mean drift of the error along the chain)")
+    if failures:
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : bench_uploader.py
+# @Description : 部署工具（code/pico_mpy_uploader.py）校验与基准：用替身mpy-cross/mpremote脚本（按设定耗时休眠、把文件写入临时目录模拟板上文件系统）
+#                校验首次部署、无改动重跑、改动一个文件、某块板上传失败后重跑、切换原生代码架构时的编译/会话次数与板上文件，
+#                并对比改造前逐文件串行流程的耗时
+#                用法：python -m sim.bench_uploader --boards 20 --parallel 8
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from sim.chain import FIRMWARE_DIR
+
+# ======================================== 全局变量 ============================================
+
+# 替身mpy-cross：休眠STUB_COMPILE_S秒后写出"MPY"+源文件内容，源文件含STUB_BAD、或含viper函数而未给-march时编译失败
+STUB_MPY_CROSS = r'''
+import os, sys, time
+out = sys.argv[sys.argv.index("-o") + 1]
+src = [a for a in sys.argv[1:] if not a.startswith("-") and a != out][0]
+data = open(src, "rb").read()
+time.sleep(float(os.environ.get("STUB_COMPILE_S", "0")))
+with open(os.environ["STUB_LOG"], "a") as log:
+    log.write("compile %s\n" % os.path.basename(src))
+if b"STUB_BAD" in data:
+    sys.stderr.write("SyntaxError: stub\n")
+    sys.exit(1)
+if b"@micropython.viper" in data and not any(a.startswith("-march=") for a in sys.argv):
+    sys.stderr.write("ValueError: invalid arch\n")
+    sys.exit(1)
+open(out, "wb").write(b"MPY" + data)
+'''
+
+# 替身mpremote：connect PORT后接以"+"分隔的命令（fs cp 源... :/、fs rm :文件...、reset、connect list），
+# 每个会话休眠STUB_SESSION_S秒，每个文件再休眠STUB_FILE_S秒，文件复制到STUB_BOARDS/<PORT>/；STUB_FAIL中的板返回失败
+STUB_MPREMOTE = r'''
+import os, shutil, sys, time
+args = sys.argv[1:]
+if args[:2] == ["connect", "list"]:
+    for port in os.environ.get("STUB_PORTS", "").split():
+        print("%s 0123456789abcdef 2e8a:0005 MicroPython Board in FS mode" % port)
+    sys.exit(0)
+port = "auto"
+if args[:1] == ["connect"]:
+    port = args[1]
+    args = args[2:]
+time.sleep(float(os.environ.get("STUB_SESSION_S", "0")))
+if port in os.environ.get("STUB_FAIL", "").split():
+    sys.stderr.write("mpremote: failed to access %s\n" % port)
+    sys.exit(1)
+board = os.path.join(os.environ["STUB_BOARDS"], port.replace("/", "_"))
+os.makedirs(board, exist_ok=True)
+files = 0
+commands = [[]]
+for a in args:
+    if a == "+":
+        commands.append([])
+    else:
+        commands[-1].append(a)
+for cmd in commands:
+    if cmd[:2] == ["fs", "cp"]:
+        for src in cmd[2:-1]:
+            time.sleep(float(os.environ.get("STUB_FILE_S", "0")))
+            shutil.copy(src, os.path.join(board, os.path.basename(src)))
+            files += 1
+    elif cmd[:2] == ["fs", "rm"]:
+        for path in cmd[2:]:
+            os.remove(os.path.join(board, path.lstrip(":")))
+with open(os.environ["STUB_LOG"], "a") as log:
+    log.write("session %s %d\n" % (port, files))
+'''
+
+# ======================================== 功能函数 ============================================
+
+def load_uploader():
+    """按路径导入code/pico_mpy_uploader.py（主机端脚本，不经固件替身）"""
+    path = os.path.join(FIRMWARE_DIR, "pico_mpy_uploader.py")
+    spec = importlib.util.spec_from_file_location("pico_mpy_uploader", path)
+    module = importlib.util.module_from_spec(spec)
+    # 进程池按模块名序列化编译函数，须能在sys.modules中找到
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def read_log(path: str) -> dict:
+    """统计替身调用：编译次数、会话次数、上传文件数，随后清空日志"""
+    counts = {"compile": 0, "session": 0, "files": 0}
+    if os.path.exists(path):
+        with open(path) as f:
+            for line in f:
+                parts = line.split()
+                counts[parts[0]] += 1
+                if parts[0] == "session":
+                    counts["files"] += int(parts[2])
+        os.remove(path)
+    return counts
+
+def board_ok(uploader, boards_dir: str, src_dir: str, port: str, arch: str) -> bool:
+    """
+    板上文件须与当前源文件一一对应：main.py（以及arch为none时的原生代码文件）原样，其余为对应的.mpy；
+    原生代码文件不得同时留有另一种形式
+    """
+    board = os.path.join(boards_dir, port.replace("/", "_"))
+    for name in uploader.list_sources(src_dir):
+        with open(os.path.join(src_dir, name), "rb") as f:
+            data = f.read()
+        remote = uploader.remote_name(name, arch)
+        want = data if remote == name else b"MPY" + data
+        if name in uploader.NATIVE_FILES:
+            other = name[:-3] + ".mpy" if remote == name else name
+            if os.path.exists(os.path.join(board, other)):
+                return False
+        try:
+            with open(os.path.join(board, remote), "rb") as f:
+                if f.read() != want:
+                    return False
+        except OSError:
+            return False
+    return True
+
+def run_uploader(uploader, argv: list) -> tuple:
+    """运行部署工具（不显示其输出），返回(退出码, 耗时)"""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        code = uploader.main(argv)
+    return code, time.perf_counter() - start
+
+def legacy_deploy(src_dir: str, mpy_cross: str, mpremote: str, port: str, arch: str) -> None:
+    """改造前的流程：逐文件串行编译（编译命令加上架构参数，使含viper代码的文件也能编译），每个文件单独启动一次mpremote"""
+    current = "pico_mpy_uploader.py"
+    files = sorted(f for f in os.listdir(src_dir) if f.endswith(".py") and f != current)
+    uploads = []
+    for name in files:
+        if name == "main.py":
+            continue
+        out = os.path.join(src_dir, name[:-3] + ".mpy")
+        subprocess.run(shlex.split(mpy_cross) + [os.path.join(src_dir, name), "-o", out, "-march=" + arch],
+                       check=True)
+        uploads.append(out)
+    uploads.append(os.path.join(src_dir, "main.py"))
+    for path in uploads:
+        subprocess.run(shlex.split(mpremote) + ["connect", port, "fs", "cp", path, ":/"], check=True)
+    for path in uploads[:-1]:
+        os.remove(path)
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot uploader check and benchmark with stub tools")
+    parser.add_argument("--boards", type=int, default=20, help="板数")
+    parser.add_argument("--parallel", type=int, default=8, help="同时部署的板数上限")
+    parser.add_argument("--jobs", type=int, default=4, help="并行编译的进程数")
+    parser.add_argument("--compile-s", type=float, default=0.05, help="替身mpy-cross每个文件的耗时（秒）")
+    parser.add_argument("--session-s", type=float, default=0.3, help="替身mpremote每次会话的连接耗时（秒）")
+    parser.add_argument("--file-s", type=float, default=0.02, help="替身mpremote每个文件的写入耗时（秒）")
+    parser.add_argument("--legacy-boards", type=int, default=2, help="改造前流程实际运行的板数（其余按线性外推）")
+    args = parser.parse_args(argv)
+
+    uploader = load_uploader()
+    work = tempfile.mkdtemp(prefix="npd_uploader_")
+    try:
+        src = os.path.join(work, "src")
+        shutil.copytree(FIRMWARE_DIR, src, ignore=shutil.ignore_patterns("__pycache__", ".mpy_cache"))
+        boards_dir = os.path.join(work, "boards")
+        log = os.path.join(work, "stub.log")
+        for name, text in (("stub_mpy_cross.py", STUB_MPY_CROSS), ("stub_mpremote.py", STUB_MPREMOTE)):
+            with open(os.path.join(work, name), "w") as f:
+                f.write(text)
+        py = shlex.quote(sys.executable)
+        mpy_cross = "%s %s" % (py, shlex.quote(os.path.join(work, "stub_mpy_cross.py")))
+        mpremote = "%s %s" % (py, shlex.quote(os.path.join(work, "stub_mpremote.py")))
+        ports = ["/dev/ttyACM%d" % i for i in range(args.boards)]
+        os.environ.update(STUB_LOG=log, STUB_BOARDS=boards_dir, STUB_PORTS=" ".join(ports),
+                          STUB_COMPILE_S=str(args.compile_s), STUB_SESSION_S=str(args.session_s),
+                          STUB_FILE_S=str(args.file_s), STUB_FAIL="")
+        common = ["--src", src, "--mpy-cross", mpy_cross, "--mpremote", mpremote, "--jobs", str(args.jobs),
+                  "--parallel", str(args.parallel)]
+        sources = uploader.list_sources(src)
+        print("%d source files, %d boards, parallel %d, compile %.2fs/file, session %.2fs + %.2fs/file" % (
+            len(sources), args.boards, args.parallel, args.compile_s, args.session_s, args.file_s))
+
+        # 改造前：每块板各跑一次完整流程
+        start = time.perf_counter()
+        for port in ports[:args.legacy_boards]:
+            legacy_deploy(src, mpy_cross, mpremote, port, uploader.DEFAULT_ARCH)
+        legacy = (time.perf_counter() - start) / max(1, args.legacy_boards) * args.boards
+        read_log(log)
+        shutil.rmtree(boards_dir, ignore_errors=True)
+
+        print("\n%-28s %6s %8s %9s %7s %9s %8s" % ("run", "exit", "compile", "sessions", "files", "time(s)", "check"))
+        print("%-28s %6s %8d %9d %7d %9.1f %8s" % ("legacy (serial, per file)", "-", (len(sources) - 1) * args.boards,
+                                                   len(sources) * args.boards, len(sources) * args.boards, legacy, "-"))
+
+        failures = []
+
+        def step(name: str, extra: list, expect: dict, check_ports: list, arch: str = uploader.DEFAULT_ARCH,
+                 fails: bool = False) -> None:
+            code, elapsed = run_uploader(uploader, common + extra)
+            counts = read_log(log)
+            ok = all(counts[k] == v for k, v in expect.items() if v is not None) and \
+                all(board_ok(uploader, boards_dir, src, p, arch) for p in check_ports) and (code != 0) == fails
+            print("%-28s %6d %8d %9d %7d %9.1f %8s" % (name, code, counts["compile"], counts["session"],
+                                                       counts["files"], elapsed, "ok" if ok else "FAIL"))
+            if not ok:
+                failures.append(name)
+
+        n = len(sources)
+        step("first deploy (--all)", ["--all"], {"compile": n - 1, "session": args.boards,
+                                                 "files": n * args.boards}, ports)
+        step("rerun, nothing changed", ["--all"], {"compile": 0, "session": 0, "files": 0}, ports)
+
+        # 改动一个模块：只重新编译并上传这一个文件
+        with open(os.path.join(src, "effects.py"), "a") as f:
+            f.write("\n# touched\n")
+        step("one file changed", ["--all"], {"compile": 1, "session": args.boards, "files": args.boards}, ports)
+
+        # 一块板上传失败：其余板照常完成，该板的记录不更新，下次重跑时补传
+        with open(os.path.join(src, "color_lut.py"), "a") as f:
+            f.write("\n# touched\n")
+        os.environ["STUB_FAIL"] = ports[0]
+        # 失败的会话不写替身日志，只统计成功的会话
+        step("one board fails", ["--all"], {"compile": 1, "session": args.boards - 1, "files": args.boards - 1},
+             ports[1:], fails=True)
+        os.environ["STUB_FAIL"] = ""
+        step("rerun after failure", ["--all"], {"compile": 0, "session": 1, "files": 1}, ports)
+
+        # 切换原生代码架构：none时原生代码文件以.py上传并删除板上的.mpy，切回时产物命中缓存，只换回.mpy
+        step("--arch none (source)", ["--all", "--arch", "none"], {"compile": 0, "session": args.boards,
+                                                                  "files": args.boards}, ports, "none")
+        step("--arch armv6m again", ["--all", "--arch", "armv6m"], {"compile": 0, "session": args.boards,
+                                                                   "files": args.boards}, ports)
+
+        # --all未找到任何板：报错退出，不回退到自动选择的单块板
+        os.environ["STUB_PORTS"] = ""
+        step("--all, no boards", ["--all"], {"compile": 0, "session": 0, "files": 0}, [], fails=True)
+        os.environ["STUB_PORTS"] = " ".join(ports)
+
+        # 编译失败的文件不上传，退出码非0
+        with open(os.path.join(src, "utils.py"), "a") as f:
+            f.write("\n# STUB_BAD\n")
+        step("compile error", ["--port", ports[0]], {"compile": 1, "session": 0, "files": 0}, [], fails=True)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    if failures:
+        print("%d step(s) failed: %s" % (len(failures), ", ".join(failures)))
+        sys.exit(1)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : chain.py
+# @Description : 级联仿真：为每个模块加载一份独立的固件（code/下的main.py及其依赖），按UART1→UART0首尾相接
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import contextlib
+import importlib
+import io
+import os
+import sys
+from sim import asyncio, machine, micropython, mpgc, mptime, neopixel
+from sim.kernel import Kernel, Node
+
+# ======================================== 全局变量 ============================================
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIRMWARE_DIR = os.path.join(REPO_ROOT, "code")
+
+# 固件导入时用替身顶替的模块
+STAND_INS = {
+    "machine": machine,
+    "neopixel": neopixel,
+    "micropython": micropython,
+    "time": mptime,
+    "asyncio": asyncio,
+    "gc": mpgc,
+}
+
+# firmware_module导入过的模块缓存
+_host_modules = {}
+
+# 模块的接收口/转发口UART编号（与main.py、core_protected.py一致）
+RECV_UART_ID = 0
+FORWARD_UART_ID = 1
+
+# ======================================== 功能函数 ============================================
+
+def firmware_module_names() -> list:
+    """code/目录下的固件模块名（不含主机端上传脚本）"""
+    return sorted(f[:-3] for f in os.listdir(FIRMWARE_DIR)
+                  if f.endswith(".py") and f != "pico_mpy_uploader.py")
+
+def firmware_module(name: str):
+    """
+    在主机端直接导入一个不依赖外设的固件模块（如frame_parser），供编码/校验复用同一份定义
+    导入时同样用替身顶替MicroPython专有模块，结果按模块名缓存；导入过程中的启动日志（如热路径选择）不输出
+    """
+    module = _host_modules.get(name)
+    if module is None:
+        saved = {key: sys.modules.pop(key, None) for key in list(STAND_INS) + [name]}
+        sys.modules.update(STAND_INS)
+        sys.path.insert(0, FIRMWARE_DIR)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                module = importlib.import_module(name)
+        finally:
+            sys.path.remove(FIRMWARE_DIR)
+            for key, value in saved.items():
+                if value is None:
+                    sys.modules.pop(key, None)
+                else:
+                    sys.modules[key] = value
+        _host_modules[name] = module
+    return module
+
+def load_firmware(node: Node, entry: str = "main", overrides: dict = None) -> dict:
+    """
+    为node加载一份独立的固件
+    先导入config并应用overrides（键必须是config中已有的配置项），再导入entry；
+    导入期间machine/neopixel/micropython/time/asyncio/gc由替身顶替，结束后恢复sys.modules。
+    entry定义了main协程时随即启动（对应板上的asyncio.run(main())），其任务由仿真内核在node上调度。
+    返回{模块名: 模块对象}，同时保存到node.modules。
+    """
+    names = firmware_module_names()
+    saved = {name: sys.modules.pop(name, None) for name in list(STAND_INS) + names}
+    sys.modules.update(STAND_INS)
+    sys.path.insert(0, FIRMWARE_DIR)
+    try:
+        with node.context():
+            config = importlib.import_module("config")
+            for key, value in (overrides or {}).items():
+                if not hasattr(config, key):
+                    raise KeyError("unknown config option: %s" % key)
+                setattr(config, key, value)
+            module = importlib.import_module(entry)
+            if hasattr(module, "main"):
+                asyncio.run(module.main())
+            for name in names:
+                if name in sys.modules:
+                    node.modules[name] = sys.modules[name]
+    finally:
+        sys.path.remove(FIRMWARE_DIR)
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+    return node.modules
+
+# ======================================== 自定义类 ============================================
+
+class ChainSimulator:
+    """
+    N个模块级联的仿真
+    主机(host) → 模块0 UART0 … 模块i UART1 → 模块i+1 UART0 … 模块N-1 UART1 → 链尾(tail)
+    主机与链尾是不运行固件的端点，只有一个UART替身。
+    """
+
+    def __init__(self, length: int, overrides: dict = None, cpu_scale: float = 0.0, entry: str = "main",
+                 quiet: bool = True, strict: bool = True):
+        self.kernel = Kernel()
+        overrides = dict(overrides or {})
+        if quiet:
+            overrides.setdefault("DEBUG_ENABLE", False)
+        self.overrides = overrides
+        self.nodes = []
+        for i in range(length):
+            node = Node(self.kernel, i, cpu_scale=cpu_scale, strict=strict)
+            load_firmware(node, entry, overrides)
+            self.nodes.append(node)
+
+        config = self.nodes[0].modules["config"] if self.nodes else None
+        self.baudrate = config.BAUDRATE if config else overrides.get("BAUDRATE", 115200)
+
+        self.host = Node(self.kernel, -1, "host", strict=strict)
+        with self.host.context():
+            self.host_uart = machine.UART(FORWARD_UART_ID, baudrate=self.baudrate)
+        self.tail = Node(self.kernel, length, "tail", strict=strict)
+        with self.tail.context():
+            self.tail_uart = machine.UART(RECV_UART_ID, baudrate=self.baudrate, rxbuf=1 << 20)
+
+        upstream = self.host_uart
+        for node in self.nodes:
+            machine.connect(upstream, node.uarts[RECV_UART_ID])
+            upstream = node.uarts[FORWARD_UART_ID]
+        machine.connect(upstream, self.tail_uart)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @property
+    def now(self) -> float:
+        return self.kernel.now
+
+    @property
+    def char_us(self) -> float:
+        """主机链路上单字节传输时间（微秒）"""
+        return self.host_uart.char_us
+
+    def module(self, index: int, name: str = "core_protected"):
+        return self.nodes[index].modules[name]
+
+    def pixels(self, index: int):
+        return self.nodes[index].pixels[0]
+
+    def send(self, data, at: float = None) -> None:
+        """主机在虚拟时刻at（默认当前时刻）开始发送data"""
+        t = self.kernel.now if at is None else at
+        self.host.submit(t, self.host_uart.write, bytes(data))
+
+    def run(self, until: float = None, stop: callable = None) -> float:
+        return self.kernel.run(until=until, stop=stop)
+
+    def run_for(self, us: float, stop: callable = None) -> float:
+        return self.kernel.run(until=self.kernel.now + us, stop=stop)
+
+    def errors(self) -> list:
+        return [(node.index, t, e) for node in self.nodes for t, e in node.errors]
+
+    def ring_stats(self) -> dict:
+        """全链环形缓冲区统计：最大占用（高水位）与累计溢出字节数"""
+        high_water = overflow = 0
+        for node in self.nodes:
+            ring = node.modules["core_protected"].ring_buffer
+            high_water = max(high_water, ring.high_water)
+            overflow += ring.overflow
+        return {"high_water": high_water, "overflow": overflow}
+
+    def uart_stats(self) -> dict:
+        """全链UART统计汇总：接收溢出、帧错误字节数等"""
+        stats = {"rx_overflow": 0, "framing_errors": 0, "idle_irqs": 0}
+        for node in self.nodes:
+            uart = node.uarts[RECV_UART_ID]
+            stats["rx_overflow"] += uart.rx_overflow
+            stats["framing_errors"] += uart.framing_errors
+            stats["idle_irqs"] += uart.idle_irqs
+        return stats
+
+
+class FrameTracker:
+    """
+    记录每个模块“首次显示第f帧目标颜色”的时刻
+    expected[f][i]为第f帧中模块i的(R, G, B)；只比较第0颗灯，按帧顺序匹配。
+    """
+
+    def __init__(self, sim: ChainSimulator, expected: list):
+        self.sim = sim
+        self.expected = expected
+        self.frames = len(expected)
+        self.times = [[None] * self.frames for _ in sim.nodes]
+        self.next_frame = [0] * len(sim.nodes)
+        self.done = 0
+        self.total = self.frames * len(sim.nodes)
+        self.last_progress = sim.now
+        for node in sim.nodes:
+            node.pixels[0].listener = self._on_write
+
+    def _on_write(self, np, t: float) -> None:
+        i = np._node.index
+        pixel = np.pixel(0)
+        for f in range(self.next_frame[i], self.frames):
+            if self.expected[f][i] == pixel:
+                self.times[i][f] = t
+                self.done += f - self.next_frame[i] + 1
+                self.next_frame[i] = f + 1
+                self.last_progress = t
+                break
+
+    def complete(self) -> bool:
+        """所有模块都按顺序显示了所有帧（不允许跳帧）"""
+        return all(t is not None for row in self.times for t in row)
+
+    def stop_when(self, stall_us: float) -> callable:
+        """生成kernel.run的停止条件：全部完成，或stall_us内没有任何进展"""
+        def stop() -> bool:
+            return self.done >= self.total or self.sim.now - self.last_progress > stall_us
+        return stop
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,253 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : kernel.py
+# @Description : 离散事件仿真内核：虚拟时钟（微秒）、事件队列、每个模块独立的“CPU”与调度队列
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import heapq
+import sys
+import time
+import traceback
+
+# ======================================== 全局变量 ============================================
+
+# 当前激活的仿真内核（替身模块通过它找到“正在运行”的模块）
+_active = None
+
+# MicroPython调度队列深度（MICROPY_SCHEDULER_DEPTH）
+SCHEDULER_DEPTH = 8
+
+# ======================================== 功能函数 ============================================
+
+def active_kernel():
+    """返回当前激活的仿真内核，未创建时抛出RuntimeError"""
+    if _active is None:
+        raise RuntimeError("no simulation kernel is active")
+    return _active
+
+def current_node():
+    """返回当前上下文中的模块（加载固件或执行回调时由内核设置）"""
+    node = active_kernel().current
+    if node is None:
+        raise RuntimeError("machine stand-ins must be used inside a node context")
+    return node
+
+# ======================================== 自定义类 ============================================
+
+class Kernel:
+    """
+    离散事件仿真内核
+    时间单位为微秒（float），事件按(时间, 序号)排序，同一时刻按提交顺序执行；
+    因CPU忙而推迟的事件保留原序号，CPU空闲时先到的事件先执行（定时器回调不会被不断让出又立即恢复的任务饿死）。
+    """
+
+    def __init__(self):
+        global _active
+        self.now = 0.0
+        self.current = None
+        self.events = 0
+        self._queue = []
+        self._seq = 0
+        self.seq = 0  # 正在执行的事件的序号
+        _active = self
+
+    def activate(self):
+        """将本内核设为激活内核（同一进程中存在多个仿真实例时使用）"""
+        global _active
+        _active = self
+
+    def at(self, t: float, fn: callable, *args) -> None:
+        """在虚拟时刻t执行fn(*args)，t早于当前时刻时按当前时刻处理"""
+        if t < self.now:
+            t = self.now
+        self._seq += 1
+        heapq.heappush(self._queue, (t, self._seq, fn, args))
+
+    def defer(self, t: float, fn: callable, *args) -> None:
+        """把正在执行的事件推迟到时刻t，保留其原序号"""
+        heapq.heappush(self._queue, (max(t, self.now), self.seq, fn, args))
+
+    def after(self, delay_us: float, fn: callable, *args) -> None:
+        """在delay_us微秒后执行fn(*args)"""
+        self.at(self.now + delay_us, fn, *args)
+
+    def run(self, until: float = None, stop: callable = None) -> float:
+        """
+        推进仿真
+        until：绝对时刻上限（微秒）；stop：每个事件后调用，返回True时停止。
+        两者都为None时运行到事件队列为空。
+        """
+        self.activate()
+        queue = self._queue
+        while queue:
+            t = queue[0][0]
+            if until is not None and t > until:
+                self.now = until
+                break
+            _, self.seq, fn, args = heapq.heappop(queue)
+            self.now = t
+            self.events += 1
+            fn(*args)
+            if stop is not None and stop():
+                break
+        else:
+            if until is not None and until > self.now:
+                self.now = until
+        return self.now
+
+    def pending(self) -> int:
+        """队列中尚未执行的事件数"""
+        return len(self._queue)
+
+
+class Node:
+    """
+    仿真中的一个模块（或主机/链尾等端点）
+    每个Node拥有独立的CPU：同一时刻只执行一个任务，后到任务排队至CPU空闲。
+    任务执行期间虚拟时间 = 任务开始时刻 + 主机耗时*cpu_scale + 阻塞时间（sleep/UART写阻塞等）。
+    cpu_scale为0时任务耗时只由阻塞时间决定，结果完全确定。
+    """
+
+    def __init__(self, kernel: Kernel, index: int, name: str = None, cpu_scale: float = 0.0, strict: bool = True):
+        self.kernel = kernel
+        self.index = index
+        self.name = name or "node%d" % index
+        self.cpu_scale = cpu_scale
+        self.strict = strict
+        # CPU状态
+        self.busy_until = 0.0
+        self.busy_time = 0.0
+        self.host_time = 0.0  # 任务在主机上的实际执行时间（秒），与cpu_scale无关
+        self.tasks = 0
+        self._running = False
+        self._t0 = 0.0
+        self._host_t0 = 0.0
+        self._stall = 0.0
+        # micropython.schedule等待中的回调数
+        self.scheduled = 0
+        # 本地时钟：偏移（微秒）与漂移（ppm），默认与仿真时钟一致
+        self.clock_offset_us = 0.0
+        self.clock_drift_ppm = 0.0
+        # 外设登记
+        self.uarts = {}
+        self.pin_irqs = {}  # 引脚号 → (回调, 触发条件, Pin)，由Pin.irq登记
+        self.heap = None  # gc替身的堆模型（首次使用时创建）
+        self.timers = []
+        self.pixels = []
+        self.adc_counts = {}
+        self.wdt = None
+        self.wdt_resets = 0
+        self.irq_disabled = 0
+        # 已加载的固件模块
+        self.modules = {}
+        self.errors = []
+
+    # ----------------------------- 时间 -----------------------------
+
+    def now(self) -> float:
+        """当前虚拟时刻（任务执行中包含已消耗的CPU/阻塞时间）"""
+        if not self._running:
+            return self.kernel.now
+        t = self._t0 + self._stall
+        if self.cpu_scale:
+            t += (time.perf_counter() - self._host_t0) * 1e6 * self.cpu_scale
+        return t
+
+    def local_us(self) -> float:
+        """模块本地时钟（含偏移与漂移），替身time模块的ticks_*基于它"""
+        t = self.now()
+        return t + t * self.clock_drift_ppm * 1e-6 + self.clock_offset_us
+
+    def stall(self, us: float) -> None:
+        """让本模块CPU阻塞us微秒（time.sleep、UART写满、WS2812发送等）"""
+        if us <= 0:
+            return
+        if self._running:
+            self._stall += us
+        else:
+            self.busy_until = max(self.busy_until, self.kernel.now) + us
+
+    # ----------------------------- 任务 -----------------------------
+
+    def context(self):
+        """上下文管理器：在with块内把本模块设为当前模块（用于加载固件/创建外设）"""
+        return _NodeContext(self)
+
+    def submit(self, t: float, fn: callable, *args) -> None:
+        """提交任务：在虚拟时刻t（或CPU空闲后）执行fn(*args)"""
+        self.kernel.at(t, self._dispatch, fn, args)
+
+    def schedule(self, fn: callable, arg) -> None:
+        """micropython.schedule的仿真实现，队列满时抛出RuntimeError"""
+        if self.scheduled >= SCHEDULER_DEPTH:
+            raise RuntimeError("schedule queue full")
+        self.scheduled += 1
+        self.submit(self.now(), self._run_scheduled, fn, arg)
+
+    def _run_scheduled(self, fn: callable, arg) -> None:
+        self.scheduled -= 1
+        fn(arg)
+
+    def _dispatch(self, fn: callable, args: tuple) -> None:
+        kernel = self.kernel
+        if self.busy_until > kernel.now:
+            # CPU忙，排到空闲时刻（保留原序号，先到先执行）
+            kernel.defer(self.busy_until, self._dispatch, fn, args)
+            return
+        prev = kernel.current
+        kernel.current = self
+        self._running = True
+        self._t0 = kernel.now
+        self._stall = 0.0
+        self._host_t0 = time.perf_counter()
+        try:
+            fn(*args)
+        except Exception as e:
+            self.errors.append((kernel.now, e))
+            if self.strict:
+                raise
+            if len(self.errors) == 1:
+                print("[%s] unhandled exception in callback:" % self.name, file=sys.stderr)
+                traceback.print_exc()
+        finally:
+            end = self.now()
+            self.host_time += time.perf_counter() - self._host_t0
+            self._running = False
+            kernel.current = prev
+            self.busy_until = end
+            self.busy_time += end - self._t0
+            self.tasks += 1
+
+    def module(self, name: str):
+        """获取本模块已加载的固件模块（如"core_protected"）"""
+        return self.modules[name]
+
+
+class _NodeContext:
+    def __init__(self, node: Node):
+        self.node = node
+        self.prev = None
+
+    def __enter__(self):
+        kernel = self.node.kernel
+        kernel.activate()
+        self.prev = kernel.current
+        kernel.current = self.node
+        return self.node
+
+    def __exit__(self, *exc):
+        self.node.kernel.current = self.prev
+        return False
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
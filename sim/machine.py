@@ -0,0 +1,396 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : machine.py
+# @Description : machine模块替身：Pin/UART/Timer/ADC/WDT/disable_irq，时间与中断由仿真内核驱动
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import math
+from collections import deque
+from sim.kernel import current_node
+
+# ======================================== 全局变量 ============================================
+
+# RP2040 PL011接收超时：连续32个bit时间无新数据即判定空闲
+RX_IDLE_BITS = 32
+
+# 默认电池电压（V），用于ADC替身的读数（经1/2分压后换算为read_u16计数）
+DEFAULT_BATTERY_VOLTAGE = 4.0
+
+# ======================================== 功能函数 ============================================
+
+def disable_irq() -> int:
+    """仿真中回调本身就是原子执行的，这里只做计数"""
+    node = current_node()
+    node.irq_disabled += 1
+    return 1
+
+def enable_irq(state: int = 1) -> None:
+    pass
+
+def freq(hz: int = None) -> int:
+    return 125_000_000
+
+def unique_id() -> bytes:
+    return current_node().index.to_bytes(8, "big")
+
+def reset() -> None:
+    current_node().wdt_resets += 1
+
+def idle() -> None:
+    pass
+
+def volts_to_counts(volts: float) -> int:
+    """电池电压（V）→ read_u16计数（板载1/2分压，参考电压3.3V）"""
+    counts = int(volts / 2 / 3.3 * 65535)
+    return max(0, min(65535, counts))
+
+# ======================================== 自定义类 ============================================
+
+class Pin:
+    IN = 0
+    OUT = 1
+    OPEN_DRAIN = 2
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__(self, id, mode: int = -1, pull: int = -1, value: int = None, **kwargs):
+        self.id = id
+        self.mode = mode
+        self._value = value or 0
+
+    def init(self, mode: int = -1, pull: int = -1, value: int = None, **kwargs) -> None:
+        self.mode = mode
+        if value is not None:
+            self._value = value
+
+    def value(self, v: int = None):
+        if v is None:
+            return self._value
+        self._value = 1 if v else 0
+
+    def __call__(self, v: int = None):
+        return self.value(v)
+
+    def on(self) -> None:
+        self._value = 1
+
+    def off(self) -> None:
+        self._value = 0
+
+    def irq(self, handler: callable = None, trigger: int = IRQ_FALLING | IRQ_RISING, hard: bool = False):
+        """
+        引脚中断：只模拟UART接收引脚的下降沿（每个字节的起始位），回调以任务形式提交给所属模块的CPU；
+        handler为None时关闭。打开时若该引脚上正有数据到达，下一个字节的起始位即触发
+        """
+        node = current_node()
+        if handler is None:
+            node.pin_irqs.pop(self.id, None)
+            return self
+        node.pin_irqs[self.id] = (handler, trigger, self)
+        for uart in node.uarts.values():
+            if uart.rx_pin == self.id:
+                uart._next_edge()
+        return self
+
+    def __repr__(self) -> str:
+        return "Pin(%s)" % self.id
+
+
+class ADC:
+    """ADC替身：读数来自模块的adc_counts（按引脚号），默认对应DEFAULT_BATTERY_VOLTAGE"""
+
+    def __init__(self, pin):
+        self._node = current_node()
+        self.pin_id = pin.id if isinstance(pin, Pin) else pin
+
+    def read_u16(self) -> int:
+        counts = self._node.adc_counts.get(self.pin_id)
+        if counts is None:
+            return volts_to_counts(DEFAULT_BATTERY_VOLTAGE)
+        if callable(counts):
+            return counts(self._node.now())
+        return counts
+
+
+class WDT:
+    """看门狗替身：记录喂狗间隔，超时即累计一次复位（不真正重启固件）"""
+
+    def __init__(self, id: int = 0, timeout: int = 5000):
+        self._node = current_node()
+        self.timeout = timeout
+        self.last_feed = self._node.now()
+        self.feeds = 0
+        self._node.wdt = self
+
+    def feed(self) -> None:
+        now = self._node.now()
+        if (now - self.last_feed) / 1000 > self.timeout:
+            self._node.wdt_resets += 1
+        self.last_feed = now
+        self.feeds += 1
+
+    def expired(self) -> bool:
+        return (self._node.now() - self.last_feed) / 1000 > self.timeout
+
+
+class Timer:
+    """
+    软件定时器替身：回调以任务形式提交给所属模块的CPU
+    与MicroPython软定时器一致，回调尚未执行时再次到期不重复排队（CPU忙时错过的周期合并为一次）
+    """
+    ONE_SHOT = 0
+    PERIODIC = 1
+
+    def __init__(self, id: int = -1, **kwargs):
+        self._node = current_node()
+        self._node.timers.append(self)
+        self._gen = 0
+        self._queued = False
+        self.callback = None
+        self.period_us = 0.0
+        self.mode = Timer.PERIODIC
+        if kwargs:
+            self.init(**kwargs)
+
+    def init(self, mode: int = PERIODIC, freq: float = -1, period: int = -1, callback: callable = None,
+             hard: bool = False) -> None:
+        if freq is not None and freq > 0:
+            self.period_us = 1e6 / freq
+        else:
+            self.period_us = max(period, 1) * 1000.0
+        self.mode = mode
+        self.callback = callback
+        # 重新init时让旧的到期事件失效
+        self._gen += 1
+        self._queued = False
+        self._arm(self._node.now() + self.period_us, self._gen)
+
+    def deinit(self) -> None:
+        self._gen += 1
+        self.callback = None
+
+    def _arm(self, t: float, gen: int) -> None:
+        self._node.kernel.at(t, self._expire, gen)
+
+    def _expire(self, gen: int) -> None:
+        if gen != self._gen or self.callback is None:
+            return
+        if self.mode == Timer.PERIODIC:
+            self._arm(self._node.kernel.now + self.period_us, gen)
+        if self._queued:
+            return
+        self._queued = True
+        self._node.submit(self._node.kernel.now, self._fire, gen)
+
+    def _fire(self, gen: int) -> None:
+        self._queued = False
+        if gen == self._gen and self.callback is not None:
+            self.callback(self)
+
+
+class UART:
+    """
+    UART替身（RP2040语义）
+    - 按波特率与帧格式计算字节时间，字节在发送端线路上依次“到达”对端；
+    - 接收侧有rxbuf大小的软件缓冲区，缓冲区满时后续字节被丢弃并计数；
+    - 对端波特率不一致时字节记为帧错误并丢弃；
+    - 线路空闲RX_IDLE_BITS个bit时间后触发IRQ_RXIDLE（hard=False时以调度方式执行回调）；
+    - 接收引脚登记了下降沿中断（Pin.irq）时，空闲线路上第一个字节的起始位触发该中断；
+    - write在发送缓冲区（txbuf）装不下时阻塞调用者，支持write(buf, off, sz)只写出其中一段。
+    """
+    IRQ_RXIDLE = 4096
+    IRQ_TXIDLE = 8192
+    IRQ_BREAK = 512
+    RTS = 1
+    CTS = 2
+
+    def __init__(self, id: int, baudrate: int = 115200, bits: int = 8, parity=None, stop: int = 1, tx=None, rx=None,
+                 txbuf: int = 256, rxbuf: int = 256, timeout: int = 0, **kwargs):
+        self._node = current_node()
+        self._node.uarts[id] = self
+        self.id = id
+        self.rx_pin = rx.id if isinstance(rx, Pin) else rx
+        self.peer = None
+        self._segments = deque()
+        self._rx = bytearray()
+        self._last_end = 0.0
+        self._tx_busy_until = 0.0
+        self._handler = None
+        self._trigger = 0
+        # 统计
+        self.rx_bytes = 0
+        self.tx_bytes = 0
+        self.rx_overflow = 0
+        self.framing_errors = 0
+        self.idle_irqs = 0
+        self.init(baudrate=baudrate, bits=bits, parity=parity, stop=stop, txbuf=txbuf, rxbuf=rxbuf, timeout=timeout)
+
+    def init(self, baudrate: int = None, bits: int = None, parity=-1, stop: int = None, txbuf: int = None,
+             rxbuf: int = None, timeout: int = None, **kwargs) -> None:
+        if baudrate is not None:
+            self.baudrate = baudrate
+        if bits is not None:
+            self.bits = bits
+        if parity != -1:
+            self.parity = parity
+        if stop is not None:
+            self.stop = stop
+        if txbuf is not None:
+            self.txbuf = txbuf
+        if rxbuf is not None:
+            self.rxbuf = rxbuf
+        if timeout is not None:
+            self.timeout = timeout
+        char_bits = 1 + self.bits + (0 if self.parity is None else 1) + self.stop
+        # 单字节传输时间（微秒）
+        self.char_us = char_bits * 1e6 / self.baudrate
+        self.idle_us = RX_IDLE_BITS * 1e6 / self.baudrate
+
+    def deinit(self) -> None:
+        self._handler = None
+        self._trigger = 0
+
+    def irq(self, handler: callable = None, trigger: int = 0, hard: bool = False):
+        self._handler = handler
+        self._trigger = trigger
+        return self
+
+    # ----------------------------- 接收 -----------------------------
+
+    def _deliver(self, start: float, char_us: float, data: bytes, baudrate: int) -> None:
+        """由对端write调用：一段数据从start开始、每char_us到达一个字节"""
+        end = start + len(data) * char_us
+        if start >= self._last_end:
+            # 线路由空闲转为收数据：起始位的下降沿
+            self._node.kernel.at(start, self._edge)
+        self._segments.append([start, char_us, data, 0, baudrate])
+        self._last_end = max(self._last_end, end)
+        self._node.kernel.at(end + self.idle_us, self._idle_check, end)
+
+    def _idle_check(self, end: float) -> None:
+        # 之后又有新数据到达则不是空闲
+        if self._last_end != end:
+            return
+        self.idle_irqs += 1
+        if self._handler is not None and self._trigger & UART.IRQ_RXIDLE:
+            self._node.submit(self._node.kernel.now, self._handler, self)
+
+    def _edge(self) -> None:
+        irq = self._node.pin_irqs.get(self.rx_pin)
+        if irq is not None and irq[1] & Pin.IRQ_FALLING:
+            self._node.submit(self._node.kernel.now, irq[0], irq[2])
+
+    def _next_edge(self) -> None:
+        """下降沿中断在数据到达途中打开：下一个字节的起始位触发"""
+        now = self._node.now()
+        for start, char_us, data, _, _ in self._segments:
+            k = max(0, math.ceil((now - start) / char_us - 1e-9))
+            if k < len(data):
+                self._node.kernel.at(start + k * char_us, self._edge)
+                return
+
+    def _materialize(self) -> None:
+        """把截至当前时刻已到达的字节搬入接收缓冲区（模拟驱动的RX中断搬运）"""
+        if not self._segments:
+            return
+        now = self._node.now()
+        rx = self._rx
+        segments = self._segments
+        while segments:
+            seg = segments[0]
+            start, char_us, data, pos, baudrate = seg
+            arrived = int((now - start) / char_us + 1e-9)
+            if arrived > len(data):
+                arrived = len(data)
+            if arrived > pos:
+                chunk = data[pos:arrived]
+                seg[3] = arrived
+                if baudrate != self.baudrate:
+                    self.framing_errors += len(chunk)
+                else:
+                    room = self.rxbuf - len(rx)
+                    if room < len(chunk):
+                        self.rx_overflow += len(chunk) - max(room, 0)
+                        chunk = chunk[:max(room, 0)]
+                    rx += chunk
+                    self.rx_bytes += len(chunk)
+            if seg[3] >= len(data):
+                segments.popleft()
+            else:
+                break
+
+    def any(self) -> int:
+        self._materialize()
+        return len(self._rx)
+
+    def read(self, nbytes: int = None):
+        self._materialize()
+        if not self._rx:
+            return None
+        n = len(self._rx) if nbytes is None else min(nbytes, len(self._rx))
+        data = bytes(self._rx[:n])
+        del self._rx[:n]
+        return data
+
+    def readinto(self, buf, nbytes: int = None):
+        self._materialize()
+        if not self._rx:
+            return None
+        n = len(buf) if nbytes is None else min(nbytes, len(buf))
+        n = min(n, len(self._rx))
+        buf[:n] = self._rx[:n]
+        del self._rx[:n]
+        return n
+
+    # ----------------------------- 发送 -----------------------------
+
+    def write(self, buf, off: int = 0, sz: int = -1) -> int:
+        """写出buf[off:off + sz]（sz默认到末尾），与MicroPython流对象的write(buf, off, sz)相同"""
+        data = bytes(buf[off:] if sz < 0 else buf[off:off + sz])
+        if not data:
+            return 0
+        node = self._node
+        now = node.now()
+        start = max(now, self._tx_busy_until)
+        end = start + len(data) * self.char_us
+        self._tx_busy_until = end
+        self.tx_bytes += len(data)
+        # 发送缓冲区放不下时，调用者阻塞到剩余字节能装进txbuf为止
+        release = end - self.txbuf * self.char_us
+        if release > now:
+            node.stall(release - now)
+        if self.peer is not None:
+            self.peer._deliver(start, self.char_us, data, self.baudrate)
+        return len(data)
+
+    def flush(self) -> None:
+        wait = self._tx_busy_until - self._node.now()
+        if wait > 0:
+            self._node.stall(wait)
+
+    def txdone(self) -> bool:
+        return self._node.now() >= self._tx_busy_until
+
+    def sendbreak(self) -> None:
+        pass
+
+
+def connect(a: UART, b: UART) -> None:
+    """把两个UART替身对接（全双工：a的TX接b的RX，b的TX接a的RX）"""
+    a.peer = b
+    b.peer = a
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,86 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : micropython.py
+# @Description : micropython模块替身：schedule进入所属模块的仿真调度队列，native装饰器原样返回函数，
+#                viper装饰器为函数补上ptr8指针类型（按字节读写缓冲区、写入截断为8位），其余按CPython语义执行
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import types
+from sim.kernel import current_node
+
+# ======================================== 全局变量 ============================================
+
+# ======================================== 功能函数 ============================================
+
+def const(value):
+    return value
+
+def schedule(fn: callable, arg) -> None:
+    """调度fn(arg)在当前回调结束后执行，队列满时抛出RuntimeError（与MicroPython一致）"""
+    current_node().schedule(fn, arg)
+
+def alloc_emergency_exception_buf(size: int) -> None:
+    pass
+
+def native(fn: callable) -> callable:
+    return fn
+
+def viper(fn: callable) -> callable:
+    """函数在附加了viper内建类型的全局命名空间副本中运行（模块命名空间不受影响）"""
+    scope = dict(fn.__globals__)
+    scope.update(VIPER_BUILTINS)
+    return types.FunctionType(fn.__code__, scope, fn.__name__, fn.__defaults__, fn.__closure__)
+
+def mem_info(verbose: int = 0) -> None:
+    pass
+
+def opt_level(level: int = None):
+    return 0 if level is None else None
+
+# ======================================== 自定义类 ============================================
+
+class Ptr8:
+    """
+    viper ptr8替身：指向缓冲区首字节，下标读写单个字节，写入时只保留低8位（与viper一致）
+    板上不检查越界，替身越界（含负下标）时抛出IndexError，便于主机端校验发现越界访问
+    """
+
+    def __init__(self, obj):
+        self._mv = memoryview(obj).cast("B")
+
+    def __getitem__(self, i: int) -> int:
+        if i < 0:
+            raise IndexError("ptr8 index %d out of buffer" % i)
+        return self._mv[i]
+
+    def __setitem__(self, i: int, value: int) -> None:
+        if i < 0:
+            raise IndexError("ptr8 index %d out of buffer" % i)
+        self._mv[i] = value & 0xFF
+
+class Ptr16(Ptr8):
+    """viper ptr16替身：按本机字节序的16位无符号整数下标读写（与array('H')一致），写入时只保留低16位"""
+
+    def __init__(self, obj):
+        self._mv = memoryview(obj).cast("B").cast("H")
+
+    def __setitem__(self, i: int, value: int) -> None:
+        if i < 0:
+            raise IndexError("ptr16 index %d out of buffer" % i)
+        self._mv[i] = value & 0xFFFF
+
+# ======================================== 初始化配置 ==========================================
+
+# viper函数中可用的内建类型
+VIPER_BUILTINS = {"ptr8": Ptr8, "ptr16": Ptr16}
+
+# ========================================  主程序  ===========================================
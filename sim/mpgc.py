@@ -0,0 +1,118 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : mpgc.py
+# @Description : gc模块替身（MicroPython子集）：每个模块一个GC堆模型，collect按模型停顿时长阻塞模块CPU；
+#                主机端CPython的分配与板上不同，模型中的分配只来自分配审计（alloc_audit.py）按MicroPython规则的估计，
+#                未启用审计时已分配字节数保持不变，显式回收条件不满足，其他基准的时序不受影响
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+from sim.kernel import current_node
+
+# ======================================== 全局变量 ============================================
+
+# 堆模型参数（RP2040上MicroPython的大致量级，板上的实际停顿以heap_report()为准）
+HEAP_SIZE = 192 * 1024  # GC堆大小（字节）
+LIVE_BYTES = 48 * 1024  # 固件导入、建表后常驻的对象（字节）
+GC_BASE_US = 50.0  # 每次回收的固定开销（us）
+GC_MARK_US_PER_KB = 20.0  # 标记阶段每KB存活对象的耗时（us）
+GC_SWEEP_US_PER_KB = 4.0  # 清扫阶段每KB堆的耗时（us）
+
+# ======================================== 功能函数 ============================================
+
+def heap(node=None) -> "Heap":
+    """模块的堆模型（首次使用时按当前模型参数创建）"""
+    node = node or current_node()
+    if node.heap is None:
+        node.heap = Heap()
+    return node.heap
+
+def collect() -> None:
+    heap().collect(current_node(), False)
+
+def mem_alloc() -> int:
+    return heap().allocated()
+
+def mem_free() -> int:
+    h = heap()
+    return h.size - h.allocated()
+
+def enable() -> None:
+    heap().enabled = True
+
+def disable() -> None:
+    heap().enabled = False
+
+def isenabled() -> bool:
+    return heap().enabled
+
+def threshold(amount: int = None):
+    """查询/设置自动回收阈值：自上次回收以来分配超过amount字节即自动回收，-1表示只在堆满时回收"""
+    h = heap()
+    if amount is None:
+        return h.threshold
+    h.threshold = amount
+
+# ======================================== 自定义类 ============================================
+
+class Heap:
+    """
+    一个模块的GC堆模型：live为常驻对象，garbage为上次回收以来新分配的字节（稳态下都会成为垃圾）
+    分配使堆用满（或超过threshold）时立即自动回收，与MicroPython一样发生在分配处，即数据流中的任意时刻
+    """
+
+    def __init__(self, size: int = None, live: int = None):
+        self.size = HEAP_SIZE if size is None else size
+        self.live = LIVE_BYTES if live is None else live
+        self.garbage = 0
+        self.enabled = True
+        self.threshold = -1
+        # 统计
+        self.allocations = 0  # 分配次数
+        self.allocated_bytes = 0  # 累计分配的字节数
+        self.collections = 0  # 显式回收次数
+        self.auto_collections = 0  # 自动回收次数
+        self.events = []  # [(时刻, 是否自动回收, 停顿us)]
+        self.listener = None  # 回收时调用listener(node, auto, pause_us)
+
+    def allocated(self) -> int:
+        return self.live + self.garbage
+
+    def pause_us(self) -> float:
+        """一次回收的停顿：标记与存活对象成正比，清扫与堆大小成正比"""
+        return GC_BASE_US + self.live / 1024 * GC_MARK_US_PER_KB + self.size / 1024 * GC_SWEEP_US_PER_KB
+
+    def allocate(self, node, nbytes: int) -> None:
+        """记录一次分配；堆用满或超过阈值时先自动回收"""
+        full = self.allocated() + nbytes > self.size
+        over = 0 <= self.threshold <= self.garbage + nbytes
+        # 板上禁用自动回收后堆满会抛出MemoryError，模型中仍按回收处理，便于统计
+        if full or (self.enabled and over):
+            self.collect(node, True)
+        self.garbage += nbytes
+        self.allocations += 1
+        self.allocated_bytes += nbytes
+
+    def collect(self, node, auto: bool) -> None:
+        pause = self.pause_us()
+        self.garbage = 0
+        if auto:
+            self.auto_collections += 1
+        else:
+            self.collections += 1
+        self.events.append((node.now(), auto, pause))
+        node.stall(pause)
+        if self.listener is not None:
+            self.listener(node, auto, pause)
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,61 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : mptime.py
+# @Description : MicroPython time模块替身（加载固件时以"time"名注入），ticks_*来自所属模块的本地虚拟时钟
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+from sim.kernel import current_node
+
+# ======================================== 全局变量 ============================================
+
+# MicroPython ticks回绕周期（2^30）
+TICKS_PERIOD = 1 << 30
+TICKS_MAX = TICKS_PERIOD - 1
+TICKS_HALFPERIOD = TICKS_PERIOD // 2
+
+# ======================================== 功能函数 ============================================
+
+def ticks_us() -> int:
+    return int(current_node().local_us()) & TICKS_MAX
+
+def ticks_ms() -> int:
+    return int(current_node().local_us() // 1000) & TICKS_MAX
+
+def ticks_cpu() -> int:
+    return ticks_us()
+
+def ticks_add(ticks: int, delta: int) -> int:
+    return (ticks + delta) & TICKS_MAX
+
+def ticks_diff(ticks1: int, ticks2: int) -> int:
+    return ((ticks1 - ticks2 + TICKS_HALFPERIOD) & TICKS_MAX) - TICKS_HALFPERIOD
+
+def sleep_us(us: int) -> None:
+    current_node().stall(us)
+
+def sleep_ms(ms: int) -> None:
+    current_node().stall(ms * 1000)
+
+def sleep(s: float) -> None:
+    current_node().stall(s * 1e6)
+
+def time_ns() -> int:
+    return int(current_node().local_us() * 1000)
+
+def time() -> int:
+    return int(current_node().local_us() // 1e6)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
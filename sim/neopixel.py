@@ -0,0 +1,90 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : neopixel.py
+# @Description : neopixel模块替身：与MicroPython同样的GRB字节布局，write()记录时间戳与缓冲区快照
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+from sim.kernel import current_node
+
+# ======================================== 全局变量 ============================================
+
+# WS2812单bit传输时间（微秒，800kHz）
+BIT_US = 1.25
+
+# ======================================== 功能函数 ============================================
+
+# ======================================== 自定义类 ============================================
+
+class NeoPixel:
+    """
+    NeoPixel替身
+    buf布局与MicroPython的neopixel.py相同（ORDER=(1, 0, 2, 3)，即GRB），
+    write()按800kHz位流阻塞CPU，并把(时间, 缓冲区快照)追加到history。
+    """
+    ORDER = (1, 0, 2, 3)
+
+    def __init__(self, pin, n: int, bpp: int = 3, timing: int = 1):
+        self._node = current_node()
+        self._node.pixels.append(self)
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.timing = timing
+        self.buf = bytearray(n * bpp)
+        self.history = []
+        self.keep_history = True
+        # 仿真观察者：write()时以(self, 时间)调用
+        self.listener = None
+
+    def __len__(self) -> int:
+        return self.n
+
+    def __setitem__(self, i: int, v) -> None:
+        offset = i * self.bpp
+        for j in range(self.bpp):
+            self.buf[offset + self.ORDER[j]] = v[j]
+
+    def __getitem__(self, i: int) -> tuple:
+        offset = i * self.bpp
+        return tuple(self.buf[offset + self.ORDER[j]] for j in range(self.bpp))
+
+    def fill(self, v) -> None:
+        b = self.buf
+        length = len(self.buf)
+        bpp = self.bpp
+        for i in range(bpp):
+            c = v[i]
+            j = self.ORDER[i]
+            while j < length:
+                b[j] = c
+                j += bpp
+
+    def write(self) -> None:
+        node = self._node
+        t = node.now()
+        if self.keep_history:
+            self.history.append((t, bytes(self.buf)))
+        if self.listener is not None:
+            self.listener(self, t)
+        node.stall(len(self.buf) * 8 * BIT_US)
+
+    def pixel(self, i: int = 0) -> tuple:
+        """最近一次write()时第i个像素的(R, G, B)"""
+        if not self.history:
+            return (0, 0, 0)
+        data = self.history[-1][1]
+        offset = i * self.bpp
+        return tuple(data[offset + self.ORDER[j]] for j in range(3))
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
@@ -0,0 +1,261 @@
+# Python env   : CPython 3.8+
+# -*- coding: utf-8 -*-
+# @Time    : 2026/10/17 上午10:00
+# @Author  : 李清水
+# @File    : replay.py
+# @Description : 抓包重放：把host/capture.py格式的抓包（现场串口抓包或仿真中tap_input记录的模块输入）按原时序、
+#                或把帧间空闲压缩到--max-gap-ms后尽快送入仿真链首模块的接收口，原样经过uart_idle_callback、
+#                process_received_data或直通轮询；报告吞吐、每帧处理耗时、环形缓冲区高水位与溢出、各模块刷新内容
+#                与链尾输出的校验和，给出--baseline（上一次--json的输出）时逐项对比，校验和不同或耗时超出容差即判为回归
+#                用法：python -m sim.replay field.npxcap --json > base.json
+#                      python -m sim.replay field.npxcap --baseline base.json --tolerance 0.3
+# @License : CC BY-NC 4.0
+
+__version__ = "0.1.0"
+__author__ = "李清水"
+__license__ = "CC BY-NC 4.0"
+__platform__ = "CPython 3.8+"
+
+# ======================================== 导入相关模块 =========================================
+
+import argparse
+import json
+import sys
+import time
+import zlib
+from host.capture import CaptureWriter, char_us, read_capture
+from sim.bench_latency import parse_overrides
+from sim.chain import RECV_UART_ID, ChainSimulator
+
+# ======================================== 全局变量 ============================================
+
+# 上电后等待固件初始化完成的时间（微秒）：抓包时刻早于此时整体后移
+BOOT_US = 1000.0
+
+# 最后一段数据到达后继续运行的时间（毫秒），让整条链处理完、转发完
+SETTLE_MS = 50.0
+
+# 压缩空闲时保留的最长帧间空闲（毫秒）：须大于FRAME_GAP_US（直通原始格式的帧间判定），空闲中断的32位时间更短
+MAX_GAP_MS = 3.0
+
+# 耗时类指标的默认回归容差（相对基线的增幅）
+TOLERANCE = 0.3
+
+# 与基线逐项比较的指标：(键, 比较方式)，exact-须相等，max-不得超过基线，time-不得超过基线×(1+容差)
+BASELINE_CHECKS = (
+    ("pixels_crc", "exact"),
+    ("tail_crc", "exact"),
+    ("frames", "exact"),
+    ("ring_high_water", "max"),
+    ("ring_overflow", "max"),
+    ("rx_overflow", "max"),
+    ("parser_lost", "max"),
+    ("errors", "max"),
+    ("cpu_us_per_frame", "time"),
+)
+
+# ======================================== 功能函数 ============================================
+
+def tap_input(sim: ChainSimulator, index: int, writer: CaptureWriter) -> None:
+    """把送达模块index接收口的每段数据（到达时刻、波特率、字节）记入writer，再照常交给UART替身"""
+    uart = sim.nodes[index].uarts[RECV_UART_ID]
+    deliver = uart._deliver
+
+    def tapped(start: float, per_byte: float, data: bytes, baudrate: int) -> None:
+        writer.write(start, data, baudrate)
+        deliver(start, per_byte, data, baudrate)
+
+    uart._deliver = tapped
+
+def capture_meta(sim: ChainSimulator, index: int, source: str = "sim") -> dict:
+    """仿真抓包的元数据：重放时据此还原链长（抓包模块及其下游）与固件配置"""
+    return {"baudrate": sim.baudrate, "source": source, "module": index, "nodes": len(sim),
+            "overrides": {k: v for k, v in sim.overrides.items() if k != "DEBUG_ENABLE"}}
+
+def schedule(records: list, fast: bool = False, max_gap_us: float = MAX_GAP_MS * 1000.0,
+             start_us: float = BOOT_US) -> list:
+    """
+    把抓包记录换算为重放时刻[(t, 波特率, bytes), ...]：整体后移使首段不早于start_us；
+    fast为True时相邻两段之间的空闲截短到max_gap_us（连续到达的仍连续，波特率切换前后的空闲保留原长，
+    否则模块来不及切换），帧边界仍由空闲划分，只是去掉了帧间多余的等待
+    """
+    if not records:
+        return []
+    shift = max(0.0, start_us - records[0][0])
+    out = []
+    prev_end = prev_new_end = None
+    prev_baud = None
+    for t, baudrate, data in records:
+        if prev_end is None:
+            new_t = t + shift
+        else:
+            gap = max(0.0, t - prev_end)
+            if fast and baudrate == prev_baud:
+                gap = min(gap, max_gap_us)
+            new_t = prev_new_end + gap
+        out.append((new_t, baudrate, data))
+        prev_end = t + len(data) * char_us(baudrate)
+        prev_new_end = new_t + len(data) * char_us(baudrate)
+        prev_baud = baudrate
+    return out
+
+def fold_crc(buffers) -> int:
+    """依次对各缓冲区计算CRC32"""
+    crc = 0
+    for buf in buffers:
+        crc = zlib.crc32(buf, crc)
+    return crc
+
+def output_checksums(sim: ChainSimulator) -> dict:
+    """各模块刷新次数与全部刷新内容的CRC32、链尾收到的字节的CRC32（读走链尾接收缓冲区）"""
+    histories = [sim.pixels(i).history for i in range(len(sim))]
+    return {
+        "writes": [len(history) for history in histories],
+        "pixels_crc": [fold_crc(bytes(buf) for _, buf in history) for history in histories],
+        "tail_crc": zlib.crc32(sim.tail_uart.read() or b""),
+    }
+
+def replay(records: list, nodes: int, overrides: dict = None, fast: bool = False,
+           max_gap_us: float = MAX_GAP_MS * 1000.0, settle_us: float = SETTLE_MS * 1000.0,
+           cpu_scale: float = 0.0) -> dict:
+    """
+    新建nodes个模块的链，把records按schedule()的时刻直接送入链首模块的接收口（与抓包时送达的时刻、字节完全相同），
+    运行到最后一段到达后再settle_us，返回统计；cpu_scale为0时结果完全确定，同一抓包重放的校验和每次相同
+    """
+    sim = ChainSimulator(nodes, overrides=overrides, cpu_scale=cpu_scale)
+    plan = schedule(records, fast, max_gap_us)
+    uart = sim.nodes[0].uarts[RECV_UART_ID]
+    for t, baudrate, data in plan:
+        sim.kernel.at(t, uart._deliver, t, char_us(baudrate), data, baudrate)
+    first = plan[0][0] if plan else 0.0
+    last = plan[-1][0] + len(plan[-1][2]) * char_us(plan[-1][1]) if plan else 0.0
+    wall = time.perf_counter()
+    sim.run(until=last + settle_us)
+    wall = time.perf_counter() - wall
+
+    total = sum(len(data) for _, _, data in records)
+    duration = last - first
+    cores = [node.modules["core_protected"] for node in sim.nodes]
+    head = sim.nodes[0]
+    frames = cores[0].data_frames
+    ring = sim.ring_stats()
+    uarts = sim.uart_stats()
+    result = {
+        "records": len(records),
+        "bytes": total,
+        "fast": fast,
+        "duration_ms": duration / 1000.0,
+        "throughput_Bps": total * 1e6 / duration if duration > 0 else 0.0,
+        "wall_s": wall,
+        "speed": duration / 1e6 / wall if wall > 0 else 0.0,
+        "frames": frames,
+        "cpu_us_per_frame": head.host_time * 1e6 / frames if frames else 0.0,
+        "cpu_us_total": sum(node.host_time for node in sim.nodes) * 1e6,
+        "ring_high_water": ring["high_water"],
+        "ring_overflow": ring["overflow"],
+        "rx_overflow": uarts["rx_overflow"],
+        "framing_errors": uarts["framing_errors"],
+        "idle_irqs": uarts["idle_irqs"],
+        "parser_lost": sum(core.frame_parser.lost for core in cores) if cores[0].FRAMED_PROTOCOL_ENABLE else 0,
+        "errors": len(sim.errors()),
+    }
+    result.update(output_checksums(sim))
+    # 固件性能统计（虚拟时间，cpu_scale为0时只含阻塞时间）：接收处理函数的调用次数与单次耗时
+    utils = head.modules["utils"]
+    if "process_received_data" in utils.profile_names:
+        with head.context():
+            stats = utils.profile_stats("process_received_data")
+        result["proc_calls"] = stats["count"]
+        result["proc_avg_us"] = stats["avg_us"]
+        result["proc_max_us"] = stats["max_us"]
+    return result
+
+def compare(result: dict, baseline: dict, tolerance: float = TOLERANCE) -> list:
+    """与基线逐项比较，返回回归描述列表（空表示没有回归）"""
+    problems = []
+    if result.get("fast") != baseline.get("fast"):
+        problems.append("timing mode differs from baseline (fast=%s vs %s)" % (result.get("fast"),
+                                                                                baseline.get("fast")))
+    for key, how in BASELINE_CHECKS:
+        if key not in baseline:
+            continue
+        new, old = result[key], baseline[key]
+        if how == "exact" and new != old:
+            if isinstance(new, list):
+                diff = [i for i, (a, b) in enumerate(zip(new, old)) if a != b]
+                problems.append("%s differs on module(s) %s" % (key, diff or "count %d vs %d" % (len(new), len(old))))
+            else:
+                problems.append("%s: %s vs baseline %s" % (key, new, old))
+        elif how == "max" and new > old:
+            problems.append("%s rose: %s vs baseline %s" % (key, new, old))
+        elif how == "time" and new > old * (1.0 + tolerance):
+            problems.append("%s: %.1f vs baseline %.1f (+%.0f%% > %.0f%%)" % (
+                key, new, old, (new / old - 1.0) * 100 if old else float("inf"), tolerance * 100))
+    return problems
+
+def print_result(r: dict) -> None:
+    print("timing              %s" % ("fast (gaps <= max gap)" if r["fast"] else "original"))
+    print("input               %d bytes in %d records over %.3f ms virtual" % (r["bytes"], r["records"],
+                                                                              r["duration_ms"]))
+    print("throughput          %.0f B/s virtual, replayed in %.3f s host (%.2fx real time)" % (
+        r["throughput_Bps"], r["wall_s"], r["speed"]))
+    print("frames (module 0)   %d, host CPU %.1f us/frame (whole chain %.1f ms)" % (
+        r["frames"], r["cpu_us_per_frame"], r["cpu_us_total"] / 1000.0))
+    if "proc_calls" in r:
+        print("process_received    %d calls, avg %d us, max %d us (virtual)" % (
+            r["proc_calls"], r["proc_avg_us"], r["proc_max_us"]))
+    print("ring                high water %d, overflow %d" % (r["ring_high_water"], r["ring_overflow"]))
+    print("uart                rx overflow %d, framing errors %d, idle irqs %d" % (
+        r["rx_overflow"], r["framing_errors"], r["idle_irqs"]))
+    print("parser lost         %d, errors %d" % (r["parser_lost"], r["errors"]))
+    print("writes per module   %s" % r["writes"])
+    print("pixels crc32        %s" % " ".join("%08x" % c for c in r["pixels_crc"]))
+    print("tail crc32          %08x" % r["tail_crc"])
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description="NeoPixDot UART capture replay")
+    parser.add_argument("capture", help="抓包文件（host/capture.py格式）")
+    parser.add_argument("--nodes", type=int, default=None,
+                        help="链长，默认为抓包元数据中抓包模块及其下游的模块数（没有时为1）")
+    parser.add_argument("--fast", action="store_true", help="帧间空闲截短到--max-gap-ms后尽快重放")
+    parser.add_argument("--max-gap-ms", type=float, default=MAX_GAP_MS, help="--fast时保留的最长空闲（毫秒）")
+    parser.add_argument("--settle-ms", type=float, default=SETTLE_MS, help="最后一段数据到达后继续运行的时间（毫秒）")
+    parser.add_argument("--cpu-scale", type=float, default=0.0,
+                        help="主机执行时间→RP2040执行时间的放大倍数，0表示只计阻塞时间（结果可复现）")
+    parser.add_argument("--set", dest="overrides", action="append", metavar="KEY=VALUE",
+                        help="覆盖config.py中的配置项（在抓包元数据中的配置之上），可重复")
+    parser.add_argument("--baseline", help="基线（之前--json的输出），逐项对比，有回归时退出码为1")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="耗时类指标相对基线允许的增幅")
+    parser.add_argument("--json", action="store_true", help="以JSON输出结果")
+    args = parser.parse_args(argv)
+
+    meta, records = read_capture(args.capture)
+    overrides = dict(meta.get("overrides", {}), **parse_overrides(args.overrides))
+    overrides.setdefault("BAUDRATE", meta.get("baudrate", 115200))
+    nodes = args.nodes or max(1, meta.get("nodes", 1) - meta.get("module", 0))
+    result = replay(records, nodes, overrides, args.fast, args.max_gap_ms * 1000.0, args.settle_ms * 1000.0,
+                    args.cpu_scale)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print("capture: %s (%s), %d module(s), overrides: %s" % (args.capture, meta.get("source", "?"), nodes,
+                                                                 overrides or "none"))
+        print_result(result)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        problems = compare(result, baseline, args.tolerance)
+        for problem in problems:
+            print("REGRESSION: %s" % problem, file=sys.stderr)
+        if problems:
+            sys.exit(1)
+        print("no regression against %s" % args.baseline, file=sys.stderr)
+
+# ======================================== 自定义类 ============================================
+
+# ======================================== 初始化配置 ==========================================
+
+# ========================================  主程序  ===========================================
+
+if __name__ == "__main__":
+    main()